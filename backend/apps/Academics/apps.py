@@ -5,3 +5,6 @@ class AcademicsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.Academics'
     label = 'Academics'
+
+    def ready(self):
+        import apps.Academics.signals
@@ -0,0 +1,51 @@
+"""
+Set-based attendance writes.
+
+upsert_attendance() saves any number of (student, date) records of a class
+with one INSERT ... ON CONFLICT DO UPDATE on the
+(class_instance, student, date) constraint. Created / updated counts come
+from a single read of which of those rows already existed. Together with
+the serializers' single enrollment check, saving a section's attendance
+takes a fixed number of queries however many students and dates it covers.
+"""
+from django.db import transaction
+
+
+def upsert_attendance(class_instance, records, user):
+    """
+    Create or update attendance. records is an iterable of
+    (student ID, date, status, remarks); the last record for a student and
+    date wins. Returns (created, updated).
+    """
+    from .models import Attendance
+
+    latest = {}
+    for student_id, date, status, remarks in records:
+        latest[(student_id, date)] = (status, remarks)
+    if not latest:
+        return 0, 0
+
+    student_ids = {student_id for student_id, _ in latest}
+    dates = {date for _, date in latest}
+    existing = set(
+        Attendance.objects.filter(
+            class_instance=class_instance, student_id__in=student_ids, date__in=dates
+        ).values_list('student_id', 'date')
+    )
+    updated = len(existing & latest.keys())
+
+    rows = [
+        Attendance(
+            class_instance=class_instance, student_id=student_id, date=date,
+            status=status, remarks=remarks, updated_by=user
+        )
+        for (student_id, date), (status, remarks) in latest.items()
+    ]
+    with transaction.atomic():
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['class_instance', 'student', 'date'],
+            update_fields=['status', 'remarks', 'updated_by', 'updated_at'],
+        )
+    return len(rows) - updated, updated
@@ -0,0 +1,169 @@
+"""
+Materialized grades (ComputedGrade rows).
+
+Each enrolled student has up to three rows per class: the midterm and final
+term grades with their component breakdowns, and the overall final grade.
+Reading a student's grades is then one query on the
+(class_instance, student, period) index instead of a recomputation from
+raw scores.
+
+Rows are never recomputed eagerly. Changes mark them stale (see
+signals.py):
+    - a Score                               that student's rows in its class
+    - an Assessment, RubricComponent or     every row of the class
+      GradingRubric
+Stale or missing rows are recomputed with the grade engine (grades.py) the
+next time they are read, for all stale students of a request at once.
+
+Staleness is a timestamp rather than a flag: invalidate_grades() sets
+stale_since when the change commits, and a recomputation stores the time it
+started reading as computed_at. A row is fresh only when stale_since is
+older than computed_at, so a change that lands while a recomputation is
+running still leaves the row stale. A student without rows (their first
+recomputation may be running) gets a stale marker row instead, which that
+recomputation's upsert keeps stale.
+
+Unenrolling a student deletes their rows. Code that changes scores with
+queryset.update() or bulk_create() (no signals) must call
+invalidate_grades() itself.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .grades import TERM_COMPONENT_KEYS, TERM_GRADE_KEYS, TERMS, compute_grades, load_gradebook
+
+OVERALL = 'overall'
+
+
+def invalidate_grades(class_id, student_ids=None):
+    """Mark the computed grades of a class (or of some of its students) stale once the transaction commits"""
+    def mark_stale():
+        from .models import ComputedGrade, Enrollment
+
+        now = timezone.now()
+        if student_ids is None:
+            missing = Enrollment.objects.filter(enrolled_class_id=class_id).exclude(
+                student_id__in=ComputedGrade.objects.filter(
+                    class_instance_id=class_id, period=OVERALL
+                ).values('student_id')
+            ).values_list('student_id', flat=True)
+        else:
+            missing = student_ids
+        # Markers first: rows a running recomputation writes after this are still caught by the update
+        ComputedGrade.objects.bulk_create(
+            [
+                ComputedGrade(
+                    class_instance_id=class_id, student_id=student_id, period=OVERALL,
+                    grade=0, computed_at=now, stale_since=now
+                )
+                for student_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+
+        rows = ComputedGrade.objects.filter(class_instance_id=class_id)
+        if student_ids is not None:
+            rows = rows.filter(student_id__in=student_ids)
+        rows.update(stale_since=now)
+
+    transaction.on_commit(mark_stale)
+
+
+def _is_fresh(row):
+    return row.stale_since is None or row.stale_since < row.computed_at
+
+
+def _grades_from_rows(rows):
+    """Grades dict (see grades.compute_grades) from one student's rows"""
+    by_period = {row.period: row for row in rows}
+    grades = {'final_grade': by_period[OVERALL].grade}
+    for term in TERMS:
+        grades[TERM_GRADE_KEYS[term]] = by_period[term].grade
+        grades[TERM_COMPONENT_KEYS[term]] = by_period[term].components_json
+    return grades
+
+
+def _rows_from_grades(class_instance, student_id, grades, computed_at):
+    from .models import ComputedGrade
+
+    rows = [
+        ComputedGrade(
+            class_instance=class_instance, student_id=student_id, period=OVERALL,
+            grade=grades['final_grade'], components_json={}, computed_at=computed_at
+        )
+    ]
+    for term in TERMS:
+        rows.append(ComputedGrade(
+            class_instance=class_instance, student_id=student_id, period=term,
+            grade=grades[TERM_GRADE_KEYS[term]], components_json=grades[TERM_COMPONENT_KEYS[term]],
+            computed_at=computed_at
+        ))
+    return rows
+
+
+def recompute_grades(class_instance, student_ids=None):
+    """
+    Recompute and store the grades of a class's enrolled students (all of
+    them by default). Returns {student ID: (StudentProfile, grades)}.
+    """
+    from .models import ComputedGrade
+
+    computed_at = timezone.now()
+    gradebook = load_gradebook(class_instance, student_ids=student_ids)
+    grades = compute_grades(gradebook)
+
+    rows = []
+    for student_id, student_grades in grades.items():
+        rows.extend(_rows_from_grades(class_instance, student_id, student_grades, computed_at))
+    if rows:
+        ComputedGrade.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['class_instance', 'student', 'period'],
+            update_fields=['grade', 'components_json', 'computed_at'],
+        )
+    return {student.pk: (student, grades[student.pk]) for student in gradebook.students}
+
+
+def get_grades(class_id, student_ids=None):
+    """
+    (Class, {student ID: (StudentProfile, grades)}) for the class's enrolled
+    students (or those of student_ids), from ComputedGrade where fresh and
+    recomputed otherwise. Students who are not enrolled are left out; the
+    class is None if it doesn't exist. When every row is fresh this is one
+    query for a single student.
+    """
+    from .models import Class, ComputedGrade, Enrollment
+
+    rows = ComputedGrade.objects.filter(class_instance_id=class_id).select_related(
+        'student__user', 'class_instance__course'
+    )
+    if student_ids is not None:
+        rows = rows.filter(student_id__in=student_ids)
+
+    class_instance = None
+    by_student = {}
+    for row in rows:
+        class_instance = row.class_instance
+        by_student.setdefault(row.student_id, []).append(row)
+
+    results = {}
+    for student_id, student_rows in by_student.items():
+        if len(student_rows) == len(TERMS) + 1 and all(_is_fresh(row) for row in student_rows):
+            results[student_id] = (student_rows[0].student, _grades_from_rows(student_rows))
+
+    if student_ids is None:
+        # Students without rows yet are only known from their enrollments
+        student_ids = list(
+            Enrollment.objects.filter(enrolled_class_id=class_id).values_list('student_id', flat=True)
+        )
+    stale = [student_id for student_id in student_ids if student_id not in results]
+    if stale:
+        if class_instance is None:
+            class_instance = Class.objects.select_related('course').filter(pk=class_id).first()
+            if class_instance is None:
+                return None, {}
+        results.update(recompute_grades(class_instance, stale))
+    elif class_instance is None:
+        class_instance = Class.objects.select_related('course').filter(pk=class_id).first()
+    return class_instance, results
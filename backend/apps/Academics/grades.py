@@ -0,0 +1,298 @@
+"""
+Grade computation for a whole class at once.
+
+load_gradebook() reads everything a class's grades depend on in a fixed
+number of queries, however many students, components and assessments it has:
+    1. the class's grading rubrics (midterm / finals)
+    2. their components
+    3. the components' assessments
+    4. the published scores for those assessments
+    5. the enrolled students
+
+compute_grades() then works on a students x assessments matrix of points:
+    component average   = points earned / max points of its assessments x 100
+                          (a missing score counts as 0 but its max points still count)
+    component share     = average x component percentage / 100
+    term grade          = sum of the term's component shares
+    final grade         = sum of term grade x term percentage / 100
+Only published scores count. Grades are rounded half up to two decimals,
+matching the per-student Decimal calculation this replaces.
+
+gradebook_payload() is the faculty grades table as columns: students,
+assessments grouped by term and component, and dense score / published
+matrices. gradebook_version() summarizes everything it depends on in one
+query, for use as its ETag.
+"""
+import hashlib
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+TERMS = ['midterm', 'finals']
+
+# Response keys of each term
+TERM_GRADE_KEYS = {'midterm': 'midterm_grade', 'finals': 'final_term_grade'}
+TERM_COMPONENT_KEYS = {'midterm': 'midterm_components', 'finals': 'final_components'}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def to_decimal(value):
+    """Round a float grade half up to two decimals"""
+    # Snap away float noise first so exact halves (12.345) round like Decimal would
+    return Decimal(repr(round(float(value), 9))).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def to_float(value):
+    return float(to_decimal(value))
+
+
+class Gradebook:
+    """
+    A class's rubrics, components, assessments, enrolled students and the
+    matrix of their published scores.
+
+    points[i, j] is student i's score on assessment j (0 if none), scored[i, j]
+    whether there is one and published[i, j] whether it is published.
+    component_of[j] is the column of assessment j's component, term_of[k]
+    the term of component k.
+    """
+
+    def __init__(self, class_instance, rubrics, components, assessments, students, scores):
+        self.class_instance = class_instance
+        self.rubrics = {rubric.academic_period: rubric for rubric in rubrics}
+        self.components = components
+        self.assessments = assessments
+        self.students = students
+
+        self.student_index = {student.pk: i for i, student in enumerate(students)}
+        self.assessment_index = {assessment.pk: j for j, assessment in enumerate(assessments)}
+        component_index = {component.pk: k for k, component in enumerate(components)}
+        rubric_terms = {rubric.pk: rubric.academic_period for rubric in rubrics}
+
+        self.max_points = np.array([a.max_points for a in assessments], dtype=np.float64)
+        self.component_of = np.array(
+            [component_index[a.rubric_component_id] for a in assessments], dtype=np.intp
+        )
+        self.component_percentages = np.array([float(c.percentage) for c in components], dtype=np.float64)
+        self.term_of = [rubric_terms[c.rubric_id] for c in components]
+
+        self.points = np.zeros((len(students), len(assessments)), dtype=np.float64)
+        self.scored = np.zeros(self.points.shape, dtype=bool)
+        self.published = np.zeros(self.points.shape, dtype=bool)
+        rows, columns, values, published = [], [], [], []
+        for student_id, assessment_id, points, is_published in scores:
+            if student_id in self.student_index:
+                rows.append(self.student_index[student_id])
+                columns.append(self.assessment_index[assessment_id])
+                values.append(points)
+                published.append(is_published)
+        self.points[rows, columns] = values
+        self.scored[rows, columns] = True
+        self.published[rows, columns] = published
+
+
+def load_gradebook(class_instance, student_ids=None, published_only=True):
+    """
+    Gradebook for class_instance, limited to student_ids (enrolled ones) when
+    given. Draft scores are loaded too unless published_only.
+    """
+    from .models import Assessment, Enrollment, GradingRubric, RubricComponent, Score
+
+    rubrics = list(GradingRubric.objects.filter(class_instance=class_instance, academic_period__in=TERMS))
+    rubric_terms = {rubric.pk: rubric.academic_period for rubric in rubrics}
+    components = sorted(
+        RubricComponent.objects.filter(rubric__in=rubrics),
+        key=lambda component: (TERMS.index(rubric_terms[component.rubric_id]), component.name)
+    )
+    assessments = list(
+        Assessment.objects.filter(rubric_component__in=components)
+        .only('id', 'title', 'max_points', 'is_published', 'rubric_component_id', 'created_at')
+    )
+
+    enrollments = Enrollment.objects.filter(enrolled_class=class_instance).select_related('student__user')
+    if student_ids is not None:
+        enrollments = enrollments.filter(student_id__in=student_ids)
+    students = [
+        enrollment.student
+        for enrollment in enrollments.order_by('student__user__last_name', 'student__user__first_name', 'student_id')
+    ]
+
+    scores = Score.objects.filter(assessment__in=assessments)
+    if published_only:
+        scores = scores.filter(is_published=True)
+    if student_ids is not None:
+        scores = scores.filter(student_id__in=student_ids)
+    scores = scores.order_by().values_list('student_id', 'assessment_id', 'points', 'is_published')
+
+    return Gradebook(class_instance, rubrics, components, assessments, students, scores)
+
+
+def compute_grades(gradebook):
+    """
+    {student ID: grades} for every student in gradebook, each with the keys of
+    StudentGradesSummarySerializer: midterm_grade, final_term_grade,
+    final_grade (Decimals), and midterm_components / final_components
+    ({component name: {percentage, average, contribution, assessments}};
+    components without assessments have no contribution).
+    """
+    book = gradebook
+    n_components = len(book.components)
+
+    # Which component each assessment and which term each component belongs to
+    in_component = np.zeros((len(book.assessments), n_components), dtype=np.float64)
+    in_component[np.arange(len(book.assessments)), book.component_of] = 1.0
+    in_term = np.array(
+        [[float(t == term) for term in TERMS] for t in book.term_of], dtype=np.float64
+    ).reshape(n_components, len(TERMS))
+    term_percentages = np.array(
+        [float(book.rubrics[term].term_percentage) if term in book.rubrics else 0.0 for term in TERMS]
+    )
+
+    points = np.where(book.published, book.points, 0.0)
+    earned = points @ in_component                         # students x components
+    possible = book.max_points @ in_component              # components
+    averages = np.divide(
+        earned * 100.0, possible,
+        out=np.zeros_like(earned), where=possible > 0
+    )
+    contributions = averages * book.component_percentages / 100.0
+    term_grades = contributions @ in_term                  # students x terms
+    final = term_grades @ term_percentages / 100.0         # students
+
+    # Per-assessment percentages for the breakdown
+    percentages = np.divide(
+        points * 100.0, book.max_points,
+        out=np.zeros_like(points), where=book.max_points > 0
+    )
+    assessments_of = [[] for _ in book.components]
+    for j, k in enumerate(book.component_of):
+        assessments_of[k].append(j)
+
+    results = {}
+    for i, student in enumerate(book.students):
+        grades = {
+            'final_grade': to_decimal(final[i]),
+            **{TERM_GRADE_KEYS[term]: to_decimal(term_grades[i, t]) for t, term in enumerate(TERMS)},
+            **{TERM_COMPONENT_KEYS[term]: {} for term in TERMS},
+        }
+        for k, component in enumerate(book.components):
+            breakdown = {
+                'percentage': float(component.percentage),
+                'average': to_float(averages[i, k]),
+                'contribution': to_float(contributions[i, k]),
+                'assessments': [
+                    {
+                        'title': book.assessments[j].title,
+                        'points': int(points[i, j]),
+                        'max_points': book.assessments[j].max_points,
+                        'percentage': to_float(percentages[i, j]),
+                    }
+                    for j in assessments_of[k]
+                ],
+            }
+            if not assessments_of[k]:
+                # A component with nothing to grade yet has no contribution entry
+                del breakdown['contribution']
+            grades[TERM_COMPONENT_KEYS[book.term_of[k]]][component.name] = breakdown
+        results[student.pk] = grades
+    return results
+
+
+def student_name(student):
+    return f"{student.user.last_name}, {student.user.first_name}"
+
+
+def gradebook_payload(gradebook):
+    """
+    The gradebook as columns. Assessment columns are ordered by term,
+    component and creation; each component lists its [start, stop) column
+    range. scores[i][j] is student i's points on column j (None if not
+    scored yet) and published[i][j] is 1 if that score is published.
+    """
+    book = gradebook
+    columns = sorted(
+        range(len(book.assessments)),
+        key=lambda j: (book.component_of[j], book.assessments[j].created_at, book.assessments[j].pk)
+    )
+    assessments = [book.assessments[j] for j in columns]
+    counts = np.bincount(book.component_of, minlength=len(book.components)).tolist()
+    starts = np.concatenate(([0], np.cumsum(counts))).tolist()
+
+    terms = []
+    for term in TERMS:
+        if term not in book.rubrics:
+            continue
+        rubric = book.rubrics[term]
+        terms.append({
+            'academic_period': term,
+            'rubric_id': rubric.pk,
+            'term_percentage': float(rubric.term_percentage),
+            'components': [
+                {
+                    'id': component.pk,
+                    'name': component.name,
+                    'percentage': float(component.percentage),
+                    'columns': [starts[k], starts[k + 1]],
+                }
+                for k, component in enumerate(book.components) if book.term_of[k] == term
+            ],
+        })
+
+    points = book.points[:, columns].astype(np.int64).tolist()
+    scored = book.scored[:, columns].tolist()
+    return {
+        'class_id': book.class_instance.pk,
+        'students': {
+            'id': [student.pk for student in book.students],
+            'institutional_id': [student.user.institutional_id for student in book.students],
+            'name': [student_name(student) for student in book.students],
+        },
+        'assessments': {
+            'id': [assessment.pk for assessment in assessments],
+            'title': [assessment.title for assessment in assessments],
+            'max_points': [assessment.max_points for assessment in assessments],
+            'is_published': [assessment.is_published for assessment in assessments],
+        },
+        'terms': terms,
+        'scores': [
+            [value if has_score else None for value, has_score in zip(row, scored_row)]
+            for row, scored_row in zip(points, scored)
+        ],
+        'published': book.published[:, columns].astype(np.int8).tolist(),
+    }
+
+
+def gradebook_version(class_id):
+    """
+    Digest of the latest change time and row count of a class's rubrics,
+    components, assessments, scores and enrollments (counts catch deletions).
+    Computed in one query. None if the class doesn't exist.
+    """
+    from django.db.models import Count, Max, OuterRef, Subquery
+    from .models import Assessment, Class, Enrollment, GradingRubric, RubricComponent, Score
+
+    def aggregate(model, lookup, function):
+        return Subquery(
+            model.objects.filter(**{lookup: OuterRef('pk')}).order_by()
+            .values(lookup).annotate(value=function).values('value')
+        )
+
+    sources = [
+        (GradingRubric, 'class_instance', 'updated_at'),
+        (RubricComponent, 'rubric__class_instance', 'updated_at'),
+        (Assessment, 'class_instance', 'updated_at'),
+        (Score, 'class_instance', 'updated_at'),
+        (Enrollment, 'enrolled_class', 'enrolled_at'),
+    ]
+    annotations = {}
+    for model, lookup, field in sources:
+        name = model._meta.model_name
+        annotations[f'{name}_changed'] = aggregate(model, lookup, Max(field))
+        annotations[f'{name}_count'] = aggregate(model, lookup, Count('pk'))
+
+    row = Class.objects.filter(pk=class_id).annotate(**annotations).values_list(*annotations).first()
+    if row is None:
+        return None
+    return hashlib.sha1(repr(row).encode()).hexdigest()[:20]
@@ -0,0 +1,82 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.Academics.timetable import LAB, LECTURE, get_config, solve
+
+
+def generate_problem(sections, classes_per_section, utilization, seed):
+    """
+    A college-sized timetabling problem: sections of 25-45 students taking
+    lecture classes of 2-4 hours, about a third with a 3-hour lab class,
+    faculty teaching about five classes each, and enough lecture and lab
+    rooms for the given room utilization.
+    """
+    rng = random.Random(seed)
+    config = get_config()
+    week_minutes = len(config['DAYS']) * (config['DAY_END'] - config['DAY_START'])
+
+    classes = []
+    for section_id in range(1, sections + 1):
+        size = rng.randint(25, 45)
+        for _ in range(classes_per_section):
+            label = f"C{len(classes) + 1} (S{section_id})"
+            classes.append({
+                'id': len(classes) + 1, 'label': label, 'kind': LECTURE,
+                'minutes': rng.choice([2, 3, 3, 3, 4]) * 60, 'size': size, 'section_id': section_id,
+            })
+            if rng.random() < 0.35:
+                classes.append({
+                    'id': len(classes) + 1, 'label': label + ' lab', 'kind': LAB,
+                    'minutes': 180, 'size': size, 'section_id': section_id,
+                })
+
+    faculty_count = max(1, len(classes) // 5)
+    faculty = [rng.randrange(faculty_count) + 1 for _ in classes]
+    for data, faculty_id in zip(classes, faculty):
+        data['faculty_id'] = faculty_id
+
+    rooms = []
+    for kind in (LECTURE, LAB):
+        minutes = sum(data['minutes'] for data in classes if data['kind'] == kind)
+        for number in range(1, int(minutes / (week_minutes * utilization)) + 2):
+            rooms.append({'name': f"{kind.upper()}-{number}", 'capacity': rng.choice([45, 50, 60]), 'type': kind})
+    return {'rooms': rooms, 'classes': classes, 'fixed': []}
+
+
+class Command(BaseCommand):
+    help = "Time the timetable solver on a generated college load (nothing is read from or written to the database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=300, help="Number of sections (default 300)")
+        parser.add_argument('--classes-per-section', type=int, default=7, help="Lecture classes per section (default 7)")
+        parser.add_argument(
+            '--utilization', type=float, default=0.75,
+            help="Share of the week's room time the classes need (default 0.75)"
+        )
+        parser.add_argument('--time-limit', type=int, default=None, help="Solver time limit in seconds")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        problem = generate_problem(
+            options['sections'], options['classes_per_section'], options['utilization'], options['seed']
+        )
+        config = get_config()
+        if options['time_limit'] is not None:
+            config['TIME_LIMIT'] = options['time_limit']
+
+        self.stdout.write(
+            f"{options['sections']} sections, {len(problem['classes'])} classes, "
+            f"{len(problem['rooms'])} rooms, {len({data['faculty_id'] for data in problem['classes']})} faculty"
+        )
+        started = time.perf_counter()
+        result = solve(problem, config)
+        seconds = time.perf_counter() - started
+
+        stats = result['stats']
+        for key in ['classes', 'placed', 'greedy_placed', 'repair_iterations', 'meetings', 'late_meetings', 'conflicts']:
+            self.stdout.write(f"  {key:<18} {stats[key]}")
+        self.stdout.write(f"  {'unplaced':<18} {len(result['unplaced'])}")
+        style = self.style.SUCCESS if not result['unplaced'] and not stats['conflicts'] else self.style.WARNING
+        self.stdout.write(style(f"Solved in {seconds:.2f}s"))
@@ -0,0 +1,470 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:03
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('code', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('units', models.PositiveSmallIntegerField()),
+                ('lec_hours', models.PositiveSmallIntegerField()),
+                ('lab_hours', models.PositiveSmallIntegerField()),
+                ('year_offered', models.CharField(choices=[('1', 'First Year'), ('2', 'Second Year'), ('3', 'Third Year'), ('4', 'Fourth Year')], max_length=1)),
+                ('term_offered', models.CharField(choices=[('first', 'First Semester'), ('second', 'Second Semester'), ('summer', 'Summer')], max_length=6)),
+            ],
+            options={
+                'db_table': 'academics_course',
+                'ordering': ['-curriculum', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Prerequisite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Class',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_classes', to='users.facultyprofile')),
+                ('lecture_class', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lab_classes', to='Academics.class')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='classes', to='Academics.course')),
+            ],
+            options={
+                'db_table': 'academics_class',
+                'ordering': ['-semester', 'course'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Curriculum',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision_year', models.PositiveSmallIntegerField()),
+                ('is_active', models.BooleanField()),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='curriculum', to='users.program')),
+            ],
+            options={
+                'db_table': 'academics_curriculum',
+                'ordering': ['-revision_year'],
+            },
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='curriculum',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courses', to='Academics.curriculum'),
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('enrolled_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='enrolling_officer', to=settings.AUTH_USER_MODEL)),
+                ('enrolled_class', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='enrollments', to='Academics.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='class_enrollments', to='users.studentprofile')),
+            ],
+            options={
+                'db_table': 'academics_enrollments',
+                'ordering': ['-enrolled_at', 'enrolled_class'],
+            },
+        ),
+        migrations.AddField(
+            model_name='class',
+            name='students',
+            field=models.ManyToManyField(related_name='enrolled_classes', through='Academics.Enrollment', to='users.studentprofile'),
+        ),
+        migrations.CreateModel(
+            name='GradingRubric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_period', models.CharField(choices=[('midterm', 'Midterm'), ('finals', 'Final Term')], max_length=7)),
+                ('term_percentage', models.DecimalField(decimal_places=2, help_text='This is the percentage of this rubric in the final grade calculation (example midterm rubric is 33.00 % then final term rubric 67.00 %)', max_digits=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grading_rubrics', to='Academics.class')),
+            ],
+            options={
+                'db_table': 'academics_grading_rubric',
+                'ordering': ['class_instance', 'academic_period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RubricComponent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20)),
+                ('percentage', models.DecimalField(decimal_places=2, help_text='percent of this component in the term grade (all component sum is 100%)', max_digits=5)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('rubric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='components', to='Academics.gradingrubric')),
+            ],
+            options={
+                'db_table': 'academics_rubric_component',
+                'ordering': ['rubric', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Assessment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('is_published', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_period', models.CharField(choices=[('midterm', 'Midterm'), ('finals', 'Final Term')], max_length=7)),
+                ('max_points', models.PositiveSmallIntegerField()),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Academics.class')),
+                ('rubric_component', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='assessments', to='Academics.rubriccomponent')),
+            ],
+            options={
+                'db_table': 'academics_assessment',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block_title', models.CharField(max_length=50)),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.studentprofile')),
+            ],
+            options={
+                'db_table': 'schedule_block',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduleEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_name', models.CharField(max_length=20)),
+                ('additional_context', models.CharField(max_length=50)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('day_of_week', models.CharField(choices=[('sun', 'Sunday'), ('mon', 'Monday'), ('tue', 'Tuesday'), ('wed', 'Wednesday'), ('thu', 'Thursday'), ('fri', 'Friday'), ('sat', 'Saturday')], default='tue', max_length=3)),
+                ('schedule_block_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Academics.scheduleblock')),
+            ],
+            options={
+                'db_table': 'schedule_entry',
+            },
+        ),
+        migrations.CreateModel(
+            name='Score',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.PositiveIntegerField(help_text='Points earned by the student')),
+                ('is_published', models.BooleanField(default=False, help_text='False = Draft, True = Uploaded')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='scores', to='Academics.assessment')),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='Academics.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='scores', to='users.studentprofile')),
+                ('uploaded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploaded_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'academics_score',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=4)),
+                ('year', models.CharField(choices=[('1', 'First Year'), ('2', 'Second Year'), ('3', 'Third Year'), ('4', 'Fourth Year')], max_length=1)),
+                ('type', models.CharField(choices=[('lec', 'Lecture'), ('lab', 'Laboratory')], max_length=3)),
+                ('capacity', models.PositiveSmallIntegerField()),
+                ('curriculum', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='Academics.curriculum')),
+            ],
+            options={
+                'db_table': 'academics_section',
+                'ordering': ['-semester', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='class',
+            name='section',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='classes', to='Academics.section'),
+        ),
+        migrations.CreateModel(
+            name='Semester',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(choices=[('first', 'First Semester'), ('second', 'Second Semester'), ('summer', 'Summer')], max_length=6)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('academic_year', models.CharField(max_length=9)),
+                ('is_active', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'academics_semester',
+                'ordering': ['is_active', '-start_date'],
+                'indexes': [models.Index(fields=['start_date'], name='academics_s_start_d_91d619_idx'), models.Index(fields=['is_active'], name='academics_s_is_acti_80fb5e_idx'), models.Index(fields=['academic_year'], name='academics_s_academi_a46b2d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('academic_year', 'term'), name='unique_semester'), models.UniqueConstraint(fields=('start_date', 'end_date'), name='unique_sem_dates'), models.CheckConstraint(condition=models.Q(('start_date__lt', models.F('end_date'))), name='semester_start_before_end')],
+            },
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='semester',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='Academics.semester'),
+        ),
+        migrations.AddField(
+            model_name='scheduleblock',
+            name='sem_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='Academics.semester'),
+        ),
+        migrations.AddField(
+            model_name='class',
+            name='semester',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='classes', to='Academics.semester'),
+        ),
+        migrations.CreateModel(
+            name='TimetableDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('applied', 'Applied')], default='queued', max_length=7)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('rooms', models.JSONField(default=list)),
+                ('reschedule', models.BooleanField(default=False)),
+                ('stats', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='timetable_drafts', to=settings.AUTH_USER_MODEL)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_drafts', to='Academics.semester')),
+            ],
+            options={
+                'db_table': 'academics_timetable_draft',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimetableDraftSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.CharField(choices=[('mon', 'Monday'), ('tue', 'Tuesday'), ('wed', 'Wednesday'), ('thu', 'Thursday'), ('fri', 'Friday'), ('sat', 'Saturday'), ('sun', 'Sunday')], max_length=3)),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('room', models.CharField(blank=True, max_length=50)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_slots', to='Academics.class')),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='Academics.timetabledraft')),
+            ],
+            options={
+                'db_table': 'academics_timetable_draft_slot',
+                'ordering': ['draft', 'class_instance', 'day', 'start_minute'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Topic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('topic_number', models.PositiveSmallIntegerField(default=0, help_text='Display topic numbr order in the class')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topics', to='Academics.class')),
+            ],
+            options={
+                'db_table': 'academics_topic',
+                'ordering': ['class_instance', 'topic_number', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Material',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('is_published', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='Academics.class')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('topic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Academics.topic')),
+            ],
+            options={
+                'db_table': 'academics_material',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='assessment',
+            name='topic',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Academics.topic'),
+        ),
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'), ('excused', 'Excused')], max_length=7)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='attendance', to='users.studentprofile')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorded_attendance', to=settings.AUTH_USER_MODEL)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='Academics.class')),
+            ],
+            options={
+                'db_table': 'academics_attendance',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'class_instance'], name='academics_a_date_99004e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('class_instance', 'student', 'date'), name='one_attendance_per_student_per_session')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.CharField(choices=[('mon', 'Monday'), ('tue', 'Tuesday'), ('wed', 'Wednesday'), ('thu', 'Thursday'), ('fri', 'Friday'), ('sat', 'Saturday'), ('sun', 'Sunday')], max_length=3)),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('room', models.CharField(blank=True, max_length=50)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='Academics.class')),
+            ],
+            options={
+                'db_table': 'academics_class_schedule',
+                'ordering': ['class_instance', 'day', 'start_minute'],
+                'indexes': [models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('room')), models.F('day'), models.F('start_minute'), name='class_schedule_room_day_idx'), models.Index(fields=['class_instance', 'day', 'start_minute'], name='academics_c_class_i_936488_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end_minute__gt', models.F('start_minute'))), name='class_schedule_ends_after_start'), models.CheckConstraint(condition=models.Q(('end_minute__lte', 1440)), name='class_schedule_within_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComputedGrade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('midterm', 'Midterm'), ('finals', 'Final Term'), ('overall', 'Final Grade')], max_length=7)),
+                ('grade', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('components_json', models.JSONField(blank=True, default=dict, help_text='Component breakdown of the term (empty for overall)')),
+                ('computed_at', models.DateTimeField()),
+                ('stale_since', models.DateTimeField(blank=True, null=True)),
+                ('class_instance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='computed_grades', to='Academics.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='computed_grades', to='users.studentprofile')),
+            ],
+            options={
+                'db_table': 'academics_computed_grade',
+                'ordering': ['class_instance', 'student', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('class_instance', 'student', 'period'), name='one_computed_grade_per_student_per_period')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['year_offered', 'term_offered'], name='academics_c_year_of_d37b8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_class', 'student'], name='academics_e_enrolle_ba3862_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('enrolled_class', 'student'), name='one_enrollment_per_class_per_student'),
+        ),
+        migrations.AddIndex(
+            model_name='gradingrubric',
+            index=models.Index(fields=['class_instance', 'academic_period'], name='academics_g_class_i_6d894d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradingrubric',
+            constraint=models.UniqueConstraint(fields=('class_instance', 'academic_period'), name='unique_rubric_per_class_per_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradingrubric',
+            constraint=models.CheckConstraint(condition=models.Q(('term_percentage__gte', 0), ('term_percentage__lte', 100)), name='valid_term_percentage'),
+        ),
+        migrations.AddIndex(
+            model_name='rubriccomponent',
+            index=models.Index(fields=['rubric'], name='academics_r_rubric__979561_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='rubriccomponent',
+            constraint=models.UniqueConstraint(fields=('rubric', 'name'), name='unique_component_per_rubric'),
+        ),
+        migrations.AddConstraint(
+            model_name='rubriccomponent',
+            constraint=models.CheckConstraint(condition=models.Q(('percentage__gt', 0), ('percentage__lte', 100)), name='valid_component_percentage'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['student', 'assessment'], name='academics_s_student_9d3a7f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['class_instance', 'is_published'], name='academics_s_class_i_8f9a4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['assessment'], name='academics_s_assessm_7ea298_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='score',
+            constraint=models.UniqueConstraint(fields=('student', 'assessment'), name='one_score_per_student_per_assessment'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['name', 'semester'], name='academics_s_name_36a02d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='section',
+            constraint=models.UniqueConstraint(fields=('name', 'curriculum', 'semester', 'year', 'type'), name='unique_section'),
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['faculty', 'semester'], name='academics_c_faculty_2d8b6e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['semester', 'course'], name='academics_c_semeste_1a252e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['semester', 'section'], name='academics_c_semeste_671217_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='class',
+            constraint=models.UniqueConstraint(fields=('course', 'section', 'semester'), name='unique_course_section_per_class_per_sem'),
+        ),
+        migrations.AddIndex(
+            model_name='timetabledraftslot',
+            index=models.Index(fields=['draft', 'class_instance'], name='academics_t_draft_i_f824f7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['class_instance', 'topic_number'], name='academics_t_class_i_e0d9c4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['class_instance', 'is_published'], name='academics_m_class_i_1fce14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['topic'], name='academics_m_topic_i_e0f44b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['class_instance', 'academic_period'], name='academics_a_class_i_a07fd2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['rubric_component'], name='academics_a_rubric__d3e062_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['is_published'], name='academics_a_is_publ_4c667c_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Lower, Trim
 
 # Enums
 
@@ -140,7 +141,9 @@ class Section(models.Model):
         """
         Returns the code of the section. Ex.: BSIT3A, BSIT3Ax, BSIT-PS99
         """
-        program_abbr = getattr(self.curriculum.program, "abbr")
+        # Programs don't have an abbreviation field yet; fall back to the program name
+        program = self.curriculum.program
+        program_abbr = getattr(program, "abbr", None) or program.program_name
         # For petitioned sections, return only program and section name
         if self.name[:2] == "PS":
             return f"{program_abbr}-{self.name}"
@@ -212,12 +215,97 @@ class Class(models.Model):
         ordering = ["-semester", "course"]
         indexes = [
             models.Index(fields=["faculty", "semester"]),
+            # Listing a semester's classes (in the default ordering) and filtering them by section
+            models.Index(fields=["semester", "course"]),
+            models.Index(fields=["semester", "section"]),
         ]
         constraints = [
             # A section can only have one class instance for a specific course for a semester
             models.UniqueConstraint(fields=["course", "section", "semester"], name="unique_course_section_per_class_per_sem"),
         ]
 
+class ClassSchedule(models.Model):
+    """
+    A weekly meeting slot of a class: day, time and room.
+    Times are stored as minutes from midnight so overlaps are plain integer comparisons (see schedule_conflicts.py).
+    """
+
+    class Day(models.TextChoices):
+        MON = "mon", "Monday"
+        TUE = "tue", "Tuesday"
+        WED = "wed", "Wednesday"
+        THU = "thu", "Thursday"
+        FRI = "fri", "Friday"
+        SAT = "sat", "Saturday"
+        SUN = "sun", "Sunday"
+
+    class_instance = models.ForeignKey(Class, related_name="schedules", on_delete=models.CASCADE)
+    day = models.CharField(max_length=3, choices=Day.choices)
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    room = models.CharField(max_length=50, blank=True) # blank for classes without a room (e.g. online)
+
+    class Meta:
+        db_table = "academics_class_schedule"
+        ordering = ["class_instance", "day", "start_minute"]
+        indexes = [
+            # Conflict checks match rooms case-insensitively; faculty and section
+            # checks go through Class's (faculty, semester) and (semester, section) indexes
+            models.Index(Lower(Trim("room")), "day", "start_minute", name="class_schedule_room_day_idx"),
+            models.Index(fields=["class_instance", "day", "start_minute"]),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_minute__gt=models.F("start_minute")), name="class_schedule_ends_after_start"),
+            models.CheckConstraint(condition=models.Q(end_minute__lte=24 * 60), name="class_schedule_within_day"),
+        ]
+
+class TimetableDraft(models.Model):
+    """
+    A semester timetable generated by the solver (see timetable.py), kept for registrar review.
+    Applying it replaces the schedules of the classes it covers.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+        APPLIED = "applied", "Applied"
+
+    semester = models.ForeignKey(Semester, related_name="timetable_drafts", on_delete=models.CASCADE)
+    status = models.CharField(max_length=7, choices=Status.choices, default=Status.QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0) # percent
+    message = models.CharField(max_length=255, blank=True)
+    rooms = models.JSONField(default=list) # [{"name", "capacity", "type"}] the solver could use
+    reschedule = models.BooleanField(default=False) # also move classes that already have schedules
+    stats = models.JSONField(default=dict) # solver statistics and the classes it could not place
+    created_by = models.ForeignKey("users.BaseUser", related_name="timetable_drafts", on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "academics_timetable_draft"
+        ordering = ["-created_at"]
+
+class TimetableDraftSlot(models.Model):
+    """
+    A meeting slot proposed by a timetable draft (same fields as ClassSchedule).
+    """
+
+    draft = models.ForeignKey(TimetableDraft, related_name="slots", on_delete=models.CASCADE)
+    class_instance = models.ForeignKey(Class, related_name="draft_slots", on_delete=models.CASCADE)
+    day = models.CharField(max_length=3, choices=ClassSchedule.Day.choices)
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    room = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        db_table = "academics_timetable_draft_slot"
+        ordering = ["draft", "class_instance", "day", "start_minute"]
+        indexes = [
+            models.Index(fields=["draft", "class_instance"]),
+        ]
+
 class Enrollment(models.Model):
     """
     Links students to classes they are enrolled in.
@@ -493,6 +581,37 @@ class Score(models.Model):
             # Tje score should be validated that it would not exceed the assessments max score
         ]
 
+class ComputedGrade(models.Model):
+    """
+        Materialized grade of a student in a class for one period (midterm, finals,
+        or the overall final grade), maintained by grade_cache.py.
+        A row is stale when stale_since is set and not older than computed_at.
+    """
+    class Period(models.TextChoices):
+        midterm = "midterm", "Midterm"
+        finals = "finals", "Final Term"
+        overall = "overall", "Final Grade"
+
+    class_instance = models.ForeignKey(Class, related_name="computed_grades", on_delete=models.CASCADE)
+    student = models.ForeignKey("users.StudentProfile", related_name="computed_grades", on_delete=models.CASCADE)
+    period = models.CharField(max_length=7, choices=Period.choices)
+
+    grade = models.DecimalField(max_digits=5, decimal_places=2)
+    components_json = models.JSONField(default=dict, blank=True, help_text="Component breakdown of the term (empty for overall)")
+
+    computed_at = models.DateTimeField()
+    stale_since = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "academics_computed_grade"
+        ordering = ["class_instance", "student", "period"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['class_instance', 'student', 'period'],
+                name='one_computed_grade_per_student_per_period'
+            ),
+        ]
+
 class Attendance(models.Model):
     """
     Records a student's attendance status for a class session.
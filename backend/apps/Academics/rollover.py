@@ -0,0 +1,188 @@
+"""
+Semester rollover.
+
+rollover() copies the structure of a semester into another (usually new)
+one, so a term doesn't have to be set up again a section and a class at a
+time:
+    - sections: same name, curriculum, year level, type and capacity.
+      Sections the target already has (same name, curriculum, year and type)
+      are reused
+    - classes: same course, in the target's copy of their section, taught by
+      the same faculty unless include_faculty is False. Lab classes are linked
+      to the target's copy of their lecture class. Classes the target already
+      has (same course and section) are left alone
+    - the grading rubrics and rubric components of the copied classes
+    - the schedules of the copied classes, only with include_schedules (rooms
+      and times usually change between terms; see timetable.py)
+Enrollments, assessments, scores, attendance, topics and materials belong to
+their term and aren't copied.
+
+The source and target are read with a few queries, the copies are built in
+memory with their foreign keys pointing at the other copies, and each model
+is written with bulk_create() (classes in two passes, lecture classes before
+their labs), all in one transaction. With dry_run nothing is written; the
+report says what would be created.
+"""
+BATCH_SIZE = 1000
+
+
+class RolloverError(Exception):
+    """The semester can't be rolled over as requested"""
+
+
+def _section_key(section):
+    return (section.name, section.curriculum_id, section.year, section.type)
+
+
+def _insert_classes(copies):
+    """bulk_create class copies, each after the copy of its lecture class"""
+    from .models import Class
+
+    pending = copies
+    while pending:
+        ready = [copy for copy in pending if copy.lecture_class is None or copy.lecture_class.pk is not None]
+        if not ready:
+            raise RolloverError("Some lab classes are linked to each other as lecture classes.")
+        Class.objects.bulk_create(ready, batch_size=BATCH_SIZE)
+        pending = [copy for copy in pending if copy.pk is None]
+
+
+def rollover(source, target, include_faculty=True, include_schedules=False, dry_run=False):
+    """
+    Copy the sections, classes and rubrics of the source semester into the
+    target one (an unsaved Semester is created). Returns the report:
+    {
+        "source_semester": 1,
+        "target_semester": 2,  (None for a new semester in a dry run)
+        "dry_run": false,
+        "sections": {"created": ["BSIT1A", ...], "existing": [...]},
+        "classes": {"created": ["IT101 (BSIT1A)", ...], "existing": [...]},
+        "rubrics": 120, "rubric_components": 360, "schedules": 0
+    }
+    """
+    from django.db import connection, transaction
+    from django.db.models import Q
+    from .models import Class, ClassSchedule, GradingRubric, RubricComponent, Section
+
+    if target.pk is not None and target.pk == source.pk:
+        raise RolloverError("A semester can't be rolled over into itself.")
+    if not dry_run and not connection.features.can_return_rows_from_bulk_insert:
+        raise RolloverError("The database doesn't return the ids of bulk inserted rows, which rollover needs.")
+
+    with transaction.atomic():
+        # The source semester's sections and those of its classes (in case they differ)
+        sections = (
+            Section.objects.filter(Q(semester=source) | Q(classes__semester=source))
+            .select_related('curriculum__program').distinct().order_by('pk')
+        )
+        classes = list(Class.objects.filter(semester=source).order_by('pk'))
+        target_sections = {}
+        target_classes = {}
+        if target.pk is not None:
+            target_sections = {
+                _section_key(section): section
+                for section in Section.objects.filter(semester=target).select_related('curriculum__program')
+            }
+            target_classes = {
+                (course_id, section_id): class_id
+                for class_id, course_id, section_id in Class.objects.filter(semester=target).values_list(
+                    'pk', 'course_id', 'section_id'
+                )
+            }
+
+        report = {
+            'source_semester': source.pk,
+            'target_semester': target.pk,
+            'dry_run': dry_run,
+            'sections': {'created': [], 'existing': []},
+            'classes': {'created': [], 'existing': []},
+            'rubrics': 0,
+            'rubric_components': 0,
+            'schedules': 0,
+        }
+
+        # Source section id -> the target's section (a new copy or an existing one)
+        section_map = {}
+        new_sections = []
+        for section in sections:
+            copy = target_sections.get(_section_key(section))
+            if copy is None:
+                copy = Section(
+                    name=section.name, curriculum=section.curriculum, semester=target,
+                    year=section.year, type=section.type, capacity=section.capacity
+                )
+                new_sections.append(copy)
+                report['sections']['created'].append(section.code)
+            else:
+                report['sections']['existing'].append(section.code)
+            section_map[section.pk] = copy
+
+        # Source class id -> the target's copy, or the id of the target's existing class
+        class_map = {}
+        new_classes = []
+        for class_instance in classes:
+            section = section_map[class_instance.section_id]
+            label = f"{class_instance.course_id} ({section.code})"
+            existing_id = target_classes.get((class_instance.course_id, section.pk))
+            if existing_id is not None:
+                class_map[class_instance.pk] = existing_id
+                report['classes']['existing'].append(label)
+                continue
+            copy = Class(
+                course_id=class_instance.course_id,
+                faculty_id=class_instance.faculty_id if include_faculty else None,
+                section=section,
+                semester=target
+            )
+            class_map[class_instance.pk] = copy
+            new_classes.append((class_instance, copy))
+            report['classes']['created'].append(label)
+        for class_instance, copy in new_classes:
+            lecture = class_map.get(class_instance.lecture_class_id)
+            if isinstance(lecture, Class):
+                copy.lecture_class = lecture
+            elif lecture is not None:
+                copy.lecture_class_id = lecture
+
+        copied = {class_instance.pk: copy for class_instance, copy in new_classes}
+        rubric_map = {}
+        new_rubrics = []
+        for rubric in GradingRubric.objects.filter(class_instance__semester=source).order_by('pk'):
+            if rubric.class_instance_id in copied:
+                copy = GradingRubric(
+                    class_instance=copied[rubric.class_instance_id], academic_period=rubric.academic_period,
+                    term_percentage=rubric.term_percentage
+                )
+                rubric_map[rubric.pk] = copy
+                new_rubrics.append(copy)
+        new_components = [
+            RubricComponent(rubric=rubric_map[component.rubric_id], name=component.name, percentage=component.percentage)
+            for component in RubricComponent.objects.filter(rubric__class_instance__semester=source).order_by('pk')
+            if component.rubric_id in rubric_map
+        ]
+        new_schedules = []
+        if include_schedules:
+            new_schedules = [
+                ClassSchedule(
+                    class_instance=copied[schedule.class_instance_id], day=schedule.day,
+                    start_minute=schedule.start_minute, end_minute=schedule.end_minute, room=schedule.room
+                )
+                for schedule in ClassSchedule.objects.filter(class_instance__semester=source).order_by('pk')
+                if schedule.class_instance_id in copied
+            ]
+        report['rubrics'] = len(new_rubrics)
+        report['rubric_components'] = len(new_components)
+        report['schedules'] = len(new_schedules)
+
+        if dry_run:
+            return report
+
+        if target.pk is None:
+            target.save()
+            report['target_semester'] = target.pk
+        Section.objects.bulk_create(new_sections, batch_size=BATCH_SIZE)
+        _insert_classes([copy for _, copy in new_classes])
+        GradingRubric.objects.bulk_create(new_rubrics, batch_size=BATCH_SIZE)
+        RubricComponent.objects.bulk_create(new_components, batch_size=BATCH_SIZE)
+        ClassSchedule.objects.bulk_create(new_schedules, batch_size=BATCH_SIZE)
+    return report
@@ -0,0 +1,249 @@
+"""
+Schedule conflict detection.
+
+Two meeting slots conflict when they share a resource on the same day and
+their times overlap (start1 < end2 and start2 < end1; a class ending at 9:00
+doesn't conflict with one starting at 9:00). The resources are:
+    - room      slots in the same room (case-insensitive; slots without a room never clash)
+    - faculty   classes taught by the same faculty member
+    - section   classes of the same section (its students attend all of them)
+
+ScheduleIndex keeps one IntervalIndex per (resource, day), so checking a
+proposed slot costs a few binary searches over that room's, faculty
+member's or section's slots that day, instead of comparing it with every
+slot of every class. ScheduleIndex.for_semester() builds it from one query
+on the ClassSchedule indexes; slots can then be added and removed in place
+(the timetable solver checks its results this way).
+
+find_conflicts(), which checks a few proposed slots per request, loads
+only their candidates instead: the schedules sharing a room, faculty member
+or section with a slot on its day with start_minute < end and
+end_minute > start, one indexed branch per resource in a single UNION query.
+"""
+from bisect import bisect_left, insort
+from collections import namedtuple
+from functools import reduce
+from itertools import count
+from operator import or_
+
+# A meeting slot of a class. start and end are minutes from midnight;
+# room is '' and faculty_id None when unassigned. label names the class in
+# messages (course code and section).
+Slot = namedtuple('Slot', ['class_id', 'day', 'start', 'end', 'room', 'faculty_id', 'section_id', 'label'])
+
+
+def to_minutes(value):
+    """Minutes from midnight of a datetime.time"""
+    return value.hour * 60 + value.minute
+
+
+def format_minutes(minutes):
+    """'HH:MM' for minutes from midnight"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class IntervalIndex:
+    """
+    Half-open intervals [start, end) sorted by start. Since an interval
+    overlapping [start, end) must begin after start - (longest interval), a
+    query is two binary searches plus a scan of that window.
+    """
+
+    def __init__(self):
+        self._entries = []  # (start, end, sequence, item), sorted
+        self._sequence = count()
+        self._longest = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, start, end, item):
+        entry = (start, end, next(self._sequence), item)
+        insort(self._entries, entry)
+        self._longest = max(self._longest, end - start)
+        return entry
+
+    def remove(self, entry):
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
+
+    def overlapping(self, start, end):
+        """Items of the intervals overlapping [start, end), by start"""
+        low = bisect_left(self._entries, (start - self._longest + 1,))
+        high = bisect_left(self._entries, (end,))
+        return [item for entry_start, entry_end, _, item in self._entries[low:high] if entry_end > start]
+
+
+# ClassSchedule columns of a Slot (the pk keeps distinct rows apart in a UNION)
+SLOT_COLUMNS = (
+    'pk', 'class_instance_id', 'day', 'start_minute', 'end_minute', 'room',
+    'class_instance__faculty_id', 'class_instance__section_id',
+    'class_instance__course_id', 'class_instance__section__name',
+)
+
+
+def _slots(rows):
+    """Slots of SLOT_COLUMNS rows"""
+    return (
+        Slot(class_id, day, start, end, room, faculty_id, section_id, f"{course_code} ({section_name})")
+        for _, class_id, day, start, end, room, faculty_id, section_id, course_code, section_name in rows
+    )
+
+
+def _resource_keys(slot):
+    """(resource, key) pairs a slot occupies"""
+    keys = []
+    if slot.room:
+        keys.append(('room', slot.room.strip().lower()))
+    if slot.faculty_id is not None:
+        keys.append(('faculty', slot.faculty_id))
+    if slot.section_id is not None:
+        keys.append(('section', slot.section_id))
+    return keys
+
+
+class ScheduleIndex:
+    """Interval indexes of a set of slots by room, faculty and section, per day"""
+
+    def __init__(self, slots=()):
+        self._indexes = {}
+        self._entries = {}
+        for slot in slots:
+            self.add(slot)
+
+    @classmethod
+    def for_semester(cls, semester_id, days=None, exclude_class_ids=()):
+        """Index of the semester's class schedules (optionally only some days, without some classes)"""
+        from .models import ClassSchedule
+
+        rows = ClassSchedule.objects.filter(class_instance__semester_id=semester_id)
+        if days is not None:
+            rows = rows.filter(day__in=days)
+        if exclude_class_ids:
+            rows = rows.exclude(class_instance_id__in=exclude_class_ids)
+        return cls(_slots(rows.values_list(*SLOT_COLUMNS)))
+
+    def add(self, slot):
+        entries = []
+        for resource, key in _resource_keys(slot):
+            index = self._indexes.setdefault((resource, key, slot.day), IntervalIndex())
+            entries.append((index, index.add(slot.start, slot.end, slot)))
+        self._entries.setdefault(slot, []).append(entries)
+
+    def remove(self, slot):
+        """Remove a slot added earlier (one copy, if it was added more than once)"""
+        added = self._entries.get(slot)
+        if not added:
+            return
+        for index, entry in added.pop():
+            index.remove(entry)
+        if not added:
+            del self._entries[slot]
+
+    def clashes(self, slot):
+        """[(resource, other slot)] for the indexed slots of other classes that conflict with slot"""
+        found = []
+        for resource, key in _resource_keys(slot):
+            index = self._indexes.get((resource, key, slot.day))
+            if index is None:
+                continue
+            for other in index.overlapping(slot.start, slot.end):
+                if other.class_id != slot.class_id:
+                    found.append((resource, other))
+        return found
+
+    def has_conflict(self, slot):
+        return bool(self.clashes(slot))
+
+    def conflicts(self, slots):
+        """Conflict dicts (see describe_conflict) for proposed slots"""
+        return [
+            describe_conflict(resource, slot, other)
+            for slot in slots
+            for resource, other in self.clashes(slot)
+        ]
+
+
+def describe_conflict(resource, slot, other):
+    """JSON-friendly description of a conflict between a proposed slot and an existing one"""
+    from .models import ClassSchedule
+
+    day = ClassSchedule.Day(slot.day).label
+    if resource == 'room':
+        message = f"Room {other.room} is used by {other.label}"
+    elif resource == 'faculty':
+        message = f"The faculty member already teaches {other.label}"
+    else:
+        message = f"The section already has {other.label}"
+    start, end = format_minutes(other.start), format_minutes(other.end)
+    return {
+        'type': resource,
+        'day': slot.day,
+        'start_time': format_minutes(slot.start),
+        'end_time': format_minutes(slot.end),
+        'conflicting_class': other.class_id,
+        'conflicting_start_time': start,
+        'conflicting_end_time': end,
+        'message': f"{message} on {day} {start} - {end}",
+    }
+
+
+def overlapping_pairs(slots):
+    """Pairs of slots in a list that are on the same day and overlap (a class can't meet twice at once)"""
+    pairs = []
+    by_day = {}
+    for slot in sorted(slots, key=lambda s: (s.day, s.start)):
+        earlier = by_day.setdefault(slot.day, [])
+        pairs.extend((other, slot) for other in earlier if other.end > slot.start)
+        earlier.append(slot)
+    return pairs
+
+
+# Lookup of each resource key on an annotated ClassSchedule queryset
+RESOURCE_LOOKUPS = {
+    'room': 'room_key',
+    'faculty': 'class_instance__faculty_id',
+    'section': 'class_instance__section_id',
+}
+
+
+def candidate_schedules(semester_id, slots, exclude_class_id=None):
+    """
+    SLOT_COLUMNS rows of the semester's schedules that share a room, faculty
+    member or section with one of slots and overlap it in time (other than
+    those of exclude_class_id)
+    """
+    from django.db.models import Q
+    from django.db.models.functions import Lower, Trim
+    from .models import ClassSchedule
+
+    conditions = {}
+    for slot in slots:
+        overlapping = Q(day=slot.day, start_minute__lt=slot.end, end_minute__gt=slot.start)
+        for resource, key in _resource_keys(slot):
+            conditions.setdefault(resource, []).append(Q(**{RESOURCE_LOOKUPS[resource]: key}) & overlapping)
+    if not conditions:
+        return []
+
+    rows = ClassSchedule.objects.filter(class_instance__semester_id=semester_id)
+    if exclude_class_id:
+        rows = rows.exclude(class_instance_id=exclude_class_id)
+    rows = rows.annotate(room_key=Lower(Trim('room'))).order_by()
+    # One branch per resource, so each can use its own index
+    branches = [
+        rows.filter(reduce(or_, resource_conditions)).values_list(*SLOT_COLUMNS)
+        for resource_conditions in conditions.values()
+    ]
+    return list(branches[0].union(*branches[1:]))
+
+
+def find_conflicts(semester_id, slots, exclude_class_id=None):
+    """
+    Conflicts between proposed slots and the semester's existing schedules,
+    ignoring the slots of exclude_class_id (the class being edited).
+    """
+    if not slots:
+        return []
+    index = ScheduleIndex(_slots(candidate_schedules(semester_id, slots, exclude_class_id)))
+    return index.conflicts(slots)
@@ -0,0 +1,260 @@
+"""
+Set-based score writes and spreadsheet score import.
+
+upsert_scores() saves any number of scores of a class with one
+INSERT ... ON CONFLICT DO UPDATE on the (student, assessment) constraint,
+after a single read of which scores already exist (for created / updated
+counts). Bulk writes skip model signals, so it marks the class's computed
+grades stale itself (see grade_cache.py).
+
+import_scores() reads an uploaded CSV or XLSX row by row (openpyxl in
+read-only mode), so memory use doesn't grow with the file:
+    - the id_number (or institutional_id) column is matched to the class's
+      enrolled students
+    - every column whose header is the title or ID of one of the class's
+      assessments holds scores for it; other columns (full_name, ...) are ignored
+    - empty cells are skipped; points must be whole numbers from 0 to max_points
+Valid rows are written IMPORT_BATCH_SIZE at a time, all in one transaction.
+Invalid cells are reported per row instead of failing the import.
+"""
+import csv
+import io
+import os
+import zipfile
+
+from django.db import transaction
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+ID_COLUMNS = ['id_number', 'institutional_id']
+IMPORT_FORMATS = ['csv', 'xlsx']
+
+
+class ScoreImportError(Exception):
+    """The file as a whole can't be imported (unreadable, no ID or assessment columns)"""
+
+
+def upsert_scores(class_id, scores, user):
+    """
+    Create or update scores. scores is an iterable of
+    (student ID, assessment ID, points, is_published); the last score for a
+    student and assessment wins. Returns (created, updated).
+    """
+    from .grade_cache import invalidate_grades
+    from .models import Score
+
+    latest = {}
+    for student_id, assessment_id, points, is_published in scores:
+        latest[(student_id, assessment_id)] = (points, is_published)
+    if not latest:
+        return 0, 0
+
+    existing = set(
+        Score.objects.filter(
+            student_id__in={student_id for student_id, _ in latest},
+            assessment_id__in={assessment_id for _, assessment_id in latest},
+        ).values_list('student_id', 'assessment_id')
+    )
+    updated = len(existing & latest.keys())
+
+    rows = [
+        Score(
+            class_instance_id=class_id, student_id=student_id, assessment_id=assessment_id,
+            points=points, is_published=is_published, uploaded_by=user
+        )
+        for (student_id, assessment_id), (points, is_published) in latest.items()
+    ]
+    with transaction.atomic():
+        Score.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['student', 'assessment'],
+            update_fields=['points', 'is_published', 'uploaded_by', 'updated_at'],
+        )
+        invalidate_grades(class_id)
+    return len(rows) - updated, updated
+
+
+class ImportReport:
+    """What a score import wrote (or would write, for a dry run) and the cells it rejected"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.columns = {}
+        self.ignored_columns = []
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, row, message, column=None):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'column': column, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'columns': self.columns,
+            'ignored_columns': self.ignored_columns,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def _csv_rows(uploaded_file):
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ScoreImportError(f"Could not read the CSV file (it must be UTF-8 text): {e}")
+    finally:
+        text.detach()
+
+
+def _xlsx_rows(uploaded_file):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError, ValueError) as e:
+        raise ScoreImportError(f"Could not read the XLSX file: {e}")
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(uploaded_file, filename):
+    """Iterator over the rows (sequences of cell values) of an uploaded CSV or XLSX file"""
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension not in IMPORT_FORMATS:
+        raise ScoreImportError(f"Unsupported file type '{extension}'. Upload one of: {', '.join(IMPORT_FORMATS)}")
+    return _xlsx_rows(uploaded_file) if extension == 'xlsx' else _csv_rows(uploaded_file)
+
+
+def _cell_text(value):
+    """Cell value as stripped text; whole-number floats (Excel IDs) lose their '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _parse_points(value, max_points):
+    """(points, error message)"""
+    text = _cell_text(value)
+    try:
+        number = float(text)
+    except ValueError:
+        return None, f"'{text}' is not a number"
+    if not number.is_integer():
+        return None, f"Points must be a whole number, got {text}"
+    points = int(number)
+    if points < 0:
+        return None, "Points cannot be negative"
+    if points > max_points:
+        return None, f"Points ({points}) cannot exceed the assessment's max points ({max_points})"
+    return points, None
+
+
+def _map_columns(header, assessments, report):
+    """(ID column index, {column index: Assessment}) from the header row"""
+    by_name = {}
+    for assessment in assessments:
+        by_name.setdefault(assessment.title.strip().lower(), assessment)
+        by_name[str(assessment.pk)] = assessment
+
+    id_column = None
+    score_columns = {}
+    for index, value in enumerate(header):
+        name = _cell_text(value)
+        key = name.lower()
+        if key in ID_COLUMNS and id_column is None:
+            id_column = index
+        elif key in by_name:
+            score_columns[index] = by_name[key]
+            report.columns[name] = by_name[key].pk
+        elif name:
+            report.ignored_columns.append(name)
+
+    if id_column is None:
+        raise ScoreImportError(f"The first row must have an {' or '.join(ID_COLUMNS)} column")
+    if not score_columns:
+        raise ScoreImportError("No column header matches the title or ID of an assessment of this class")
+    return id_column, score_columns
+
+
+def import_scores(class_instance, rows, user, is_published=False, dry_run=False):
+    """Import scores from rows (see read_rows) into class_instance. Returns an ImportReport."""
+    from .models import Assessment, Enrollment
+
+    report = ImportReport()
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ScoreImportError("The file is empty")
+
+    assessments = Assessment.objects.filter(class_instance=class_instance).only('id', 'title', 'max_points')
+    id_column, score_columns = _map_columns(header, assessments, report)
+    students = dict(
+        Enrollment.objects.filter(enrolled_class=class_instance)
+        .values_list('student__user__institutional_id', 'student_id')
+    )
+
+    def write(batch):
+        if dry_run:
+            # Count as the upsert would, without writing
+            from .models import Score
+            keys = {(student_id, assessment_id) for student_id, assessment_id, _, _ in batch}
+            existing = Score.objects.filter(
+                student_id__in={student_id for student_id, _ in keys},
+                assessment_id__in={assessment_id for _, assessment_id in keys},
+            ).values_list('student_id', 'assessment_id')
+            updated = len(keys & set(existing))
+            return len(keys) - updated, updated
+        return upsert_scores(class_instance.pk, batch, user)
+
+    batch = []
+    with transaction.atomic():
+        # Row numbers as shown in a spreadsheet (the header is row 1)
+        for row_number, row in enumerate(rows, start=2):
+            if not any(_cell_text(value) for value in row):
+                continue
+            report.rows += 1
+
+            institutional_id = _cell_text(row[id_column]) if id_column < len(row) else ''
+            student_id = students.get(institutional_id)
+            if student_id is None:
+                report.error(
+                    row_number,
+                    f"No student with ID number '{institutional_id}' is enrolled in this class"
+                    if institutional_id else "Missing ID number"
+                )
+                continue
+
+            for index, assessment in score_columns.items():
+                value = row[index] if index < len(row) else None
+                if _cell_text(value) == '':
+                    continue
+                points, error = _parse_points(value, assessment.max_points)
+                if error:
+                    report.error(row_number, error, column=_cell_text(header[index]))
+                else:
+                    batch.append((student_id, assessment.pk, points, is_published))
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                created, updated = write(batch)
+                report.created += created
+                report.updated += updated
+                batch = []
+
+        if batch:
+            created, updated = write(batch)
+            report.created += created
+            report.updated += updated
+    return report
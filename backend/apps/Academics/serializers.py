@@ -6,13 +6,15 @@ from rest_framework.exceptions import AuthenticationFailed
 # serializers.py
 from rest_framework import serializers
 from django.conf import settings
+from django.db import transaction
 
 from .models import *
 from .models import (
     GradingRubric, RubricComponent, Topic, Material, 
     Assessment, Score, Class, Enrollment, Attendance
 )
-from ..Users.models import Program, StudentProfile
+from .schedule_conflicts import Slot, find_conflicts, format_minutes, overlapping_pairs, to_minutes
+from ..Users.models import FacultyProfile, Program, StudentProfile
 from ..Users.serializers import ProgramSerializer
 from ..Users.serializers import StudentProfileSerializer, BaseUserSerializer
 
@@ -99,7 +101,7 @@ class CourseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Course
-        fields = ["id", "code", "title", "units", "lec_hours", "lab_hours", "curriculum_id", "curriculum_details", "year_offered", "term_offered"]
+        fields = ["code", "title", "units", "lec_hours", "lab_hours", "curriculum_id", "curriculum_details", "year_offered", "term_offered"]
         read_only_fields = ["curriculum_details"]
 
 class CourseListSerializer(serializers.ModelSerializer):
@@ -132,6 +134,90 @@ class CurriculumCourseSerializer(serializers.ModelSerializer):
         read_only_fields = ["program", "revision_year", "is_active", "courses"]
 
 
+class MinuteOfDayField(serializers.TimeField):
+    """
+    Time of day stored as minutes from midnight. Accepts 'HH:MM' (24-hour) or
+    'HH:MM AM/PM' and returns 'HH:MM'.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('input_formats', ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M%p'])
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, value):
+        if isinstance(value, str):
+            value = value.strip().upper()
+        return to_minutes(super().to_internal_value(value))
+
+    def to_representation(self, value):
+        return format_minutes(value)
+
+
+class ClassScheduleSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the weekly meeting slots of a class.
+    """
+    start_time = MinuteOfDayField(source='start_minute')
+    end_time = MinuteOfDayField(source='end_minute')
+
+    class Meta:
+        model = ClassSchedule
+        fields = ['id', 'day', 'start_time', 'end_time', 'room']
+        read_only_fields = ['id']
+
+    def validate(self, data):
+        """Validate the slot ends after it starts"""
+        if data['end_minute'] <= data['start_minute']:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time'})
+        data['room'] = data.get('room', '').strip()
+        return data
+
+
+def proposed_slots(schedules, section, faculty, class_instance=None):
+    """
+    Slots (see schedule_conflicts.py) of validated ClassScheduleSerializer
+    dicts. Raises a ValidationError on 'schedules' if they overlap each other.
+    """
+    class_id = class_instance.pk if class_instance else None
+    slots = [
+        Slot(
+            class_id, schedule['day'], schedule['start_minute'], schedule['end_minute'],
+            schedule.get('room', ''), faculty.pk if faculty else None, section.pk if section else None, None
+        )
+        for schedule in schedules
+    ]
+    overlaps = overlapping_pairs(slots)
+    if overlaps:
+        raise serializers.ValidationError({
+            'schedules': [
+                f"Slots overlap on {ClassSchedule.Day(first.day).label}: "
+                f"{format_minutes(first.start)} - {format_minutes(first.end)} and "
+                f"{format_minutes(second.start)} - {format_minutes(second.end)}"
+                for first, second in overlaps
+            ]
+        })
+    return slots
+
+
+def check_schedule_conflicts(schedules, semester, section, faculty, class_instance=None):
+    """
+    Raise a ValidationError on 'schedules' if the slots overlap each other or
+    conflict with another class's room, faculty or section schedule in the
+    semester. class_instance is the class being edited.
+    """
+    slots = proposed_slots(schedules, section, faculty, class_instance)
+    conflicts = find_conflicts(semester.pk, slots, exclude_class_id=class_instance.pk if class_instance else None)
+    if conflicts:
+        raise serializers.ValidationError({'schedules': [conflict['message'] for conflict in conflicts]})
+
+
+def save_schedules(class_instance, schedules):
+    """Replace the meeting slots of a class"""
+    ClassSchedule.objects.filter(class_instance=class_instance).delete()
+    ClassSchedule.objects.bulk_create(
+        ClassSchedule(class_instance=class_instance, **schedule) for schedule in schedules
+    )
+
+
 class ClassSerializer(serializers.ModelSerializer):
     """
     Serializer for retrieving Class instances with full details.
@@ -141,13 +227,14 @@ class ClassSerializer(serializers.ModelSerializer):
     semester_details = SemesterSerializer(source='semester', read_only=True)
     faculty_name = serializers.CharField(source='faculty.user.get_full_name', read_only=True)
     lecture_class_details = serializers.SerializerMethodField()
+    schedules = ClassScheduleSerializer(many=True, read_only=True)
     
     class Meta:
         model = Class
         fields = [
             'id', 'course', 'course_details', 'faculty', 'faculty_name',
             'section', 'section_details', 'semester', 'semester_details',
-            'lecture_class', 'lecture_class_details'
+            'lecture_class', 'lecture_class_details', 'schedules'
         ]
         read_only_fields = ['id', 'course_details', 'section_details', 'semester_details', 'faculty_name']
     
@@ -162,13 +249,40 @@ class ClassSerializer(serializers.ModelSerializer):
         return None
 
 
+class ClassListSerializer(serializers.ModelSerializer):
+    """
+    Flat serializer for listing classes (e.g. the tagging pages).
+    Everything it reads is loaded by ClassViewSet's list queryset, so a list
+    takes the same number of queries however many classes it has.
+    """
+    code = serializers.CharField(source='course_id', read_only=True)
+    title = serializers.CharField(source='course.title', read_only=True)
+    units = serializers.IntegerField(source='course.units', read_only=True)
+    section_code = serializers.CharField(source='section.code', read_only=True)
+    section_name = serializers.CharField(source='section.name', read_only=True)
+    type = serializers.CharField(source='section.type', read_only=True)
+    faculty_name = serializers.CharField(source='faculty.user.get_full_name', read_only=True)
+    lecture_class_code = serializers.CharField(source='lecture_class.course_id', read_only=True)
+    schedules = ClassScheduleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Class
+        fields = [
+            'id', 'code', 'title', 'units', 'section', 'section_code', 'section_name', 'type',
+            'semester', 'faculty', 'faculty_name', 'lecture_class', 'lecture_class_code', 'schedules'
+        ]
+        read_only_fields = fields
+
+
 class ClassCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating Class instances.
     """
+    schedules = ClassScheduleSerializer(many=True, required=False)
+
     class Meta:
         model = Class
-        fields = ['id', 'course', 'faculty', 'section', 'semester', 'lecture_class']
+        fields = ['id', 'course', 'faculty', 'section', 'semester', 'lecture_class', 'schedules']
         read_only_fields = ['id']
     
     def validate(self, data):
@@ -176,6 +290,7 @@ class ClassCreateSerializer(serializers.ModelSerializer):
         Validate that:
         1. The course belongs to the section's curriculum
         2. If lecture_class is provided, it exists and is for the same section/semester
+        3. The schedules don't conflict with other classes' rooms, faculty or section
         """
         course = data.get('course')
         section = data.get('section')
@@ -199,17 +314,27 @@ class ClassCreateSerializer(serializers.ModelSerializer):
                     'lecture_class': 'Lecture class must be for the same semester'
                 })
         
+        check_schedule_conflicts(data.get('schedules', []), semester, section, data.get('faculty'))
         return data
 
+    def create(self, validated_data):
+        schedules = validated_data.pop('schedules', [])
+        with transaction.atomic():
+            class_instance = super().create(validated_data)
+            save_schedules(class_instance, schedules)
+        return class_instance
+
 
 class ClassUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating Class instances.
-    Only allows updating faculty and lecture_class.
+    Only allows updating faculty, lecture_class and schedules (which replace the current ones).
     """
+    schedules = ClassScheduleSerializer(many=True, required=False)
+
     class Meta:
         model = Class
-        fields = ['id', 'faculty', 'lecture_class']
+        fields = ['id', 'faculty', 'lecture_class', 'schedules']
         read_only_fields = ['id']
     
     def validate_lecture_class(self, value):
@@ -222,6 +347,117 @@ class ClassUpdateSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError('Lecture class must be for the same semester')
         return value
 
+    def validate(self, data):
+        """Validate the new schedules, or the current ones with a new faculty, don't conflict"""
+        instance = self.instance
+        if 'schedules' in data or 'faculty' in data:
+            schedules = data.get('schedules')
+            if schedules is None:
+                schedules = instance.schedules.values('day', 'start_minute', 'end_minute', 'room')
+            check_schedule_conflicts(
+                schedules, instance.semester, instance.section,
+                data.get('faculty', instance.faculty), class_instance=instance
+            )
+        return data
+
+    def update(self, instance, validated_data):
+        schedules = validated_data.pop('schedules', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if schedules is not None:
+                save_schedules(instance, schedules)
+        return instance
+
+
+class ScheduleConflictCheckSerializer(serializers.Serializer):
+    """
+    Serializer for checking proposed schedules before saving a class.
+    class_instance is the class being edited: its own slots are ignored and
+    its section and faculty are used unless given.
+    """
+    semester = serializers.PrimaryKeyRelatedField(queryset=Semester.objects.all(), required=False)
+    section = serializers.PrimaryKeyRelatedField(queryset=Section.objects.all(), required=False, allow_null=True)
+    faculty = serializers.PrimaryKeyRelatedField(queryset=FacultyProfile.objects.all(), required=False, allow_null=True)
+    class_instance = serializers.PrimaryKeyRelatedField(queryset=Class.objects.all(), required=False, allow_null=True)
+    schedules = ClassScheduleSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        class_instance = data.get('class_instance')
+        if class_instance:
+            data.setdefault('semester', class_instance.semester)
+            data.setdefault('section', class_instance.section)
+            data.setdefault('faculty', class_instance.faculty)
+        if not data.get('semester'):
+            raise serializers.ValidationError({'semester': 'This field is required.'})
+        data['slots'] = proposed_slots(data['schedules'], data.get('section'), data.get('faculty'), class_instance)
+        return data
+
+
+class TimetableRoomSerializer(serializers.Serializer):
+    """
+    A room the timetable solver may use. type limits it to lecture or lab classes.
+    """
+    name = serializers.CharField(max_length=50)
+    capacity = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=ClassType.choices, required=False, allow_null=True, default=None)
+
+
+class TimetableSolveSerializer(serializers.Serializer):
+    """
+    Serializer for starting the timetable solver for a semester.
+    Without rooms, classes are scheduled without rooms.
+    """
+    rooms = TimetableRoomSerializer(many=True)
+    reschedule = serializers.BooleanField(default=False)
+
+    def validate_rooms(self, value):
+        """Validate room names are unique"""
+        names = [room['name'].strip().lower() for room in value]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate rooms: {', '.join(duplicates)}")
+        return value
+
+
+class TimetableDraftSlotSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the slots of a timetable draft.
+    """
+    course = serializers.CharField(source='class_instance.course_id', read_only=True)
+    section = serializers.CharField(source='class_instance.section.name', read_only=True)
+    start_time = MinuteOfDayField(source='start_minute', read_only=True)
+    end_time = MinuteOfDayField(source='end_minute', read_only=True)
+
+    class Meta:
+        model = TimetableDraftSlot
+        fields = ['class_instance', 'course', 'section', 'day', 'start_time', 'end_time', 'room']
+        read_only_fields = fields
+
+
+class TimetableDraftSerializer(serializers.ModelSerializer):
+    """
+    Serializer for timetable drafts. slots is empty until the solver is done.
+    """
+    slots = TimetableDraftSlotSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = TimetableDraft
+        fields = [
+            'id', 'semester', 'status', 'progress', 'message', 'rooms', 'reschedule',
+            'stats', 'created_by', 'created_at', 'finished_at', 'slots'
+        ]
+        read_only_fields = fields
+
+
+class TimetableDraftListSerializer(serializers.ModelSerializer):
+    """
+    Serializer for listing timetable drafts (without slots).
+    """
+    class Meta:
+        model = TimetableDraft
+        fields = ['id', 'semester', 'status', 'progress', 'message', 'reschedule', 'created_by', 'created_at', 'finished_at']
+        read_only_fields = fields
+
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     """
@@ -409,78 +645,123 @@ class AttendanceCreateUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+MAX_ATTENDANCE_DAYS = 31
+
+
+def validate_attendance_record_list(value):
+    """
+    Validate attendance records format without touching the database.
+    Expected format: [{"student": 1, "status": "present", "remarks": "..."}, ...]
+    Student IDs are converted to int; enrollment is checked by the caller.
+    """
+    valid_statuses = Attendance.Status.values
+    
+    for record in value:
+        # Check required fields
+        if 'student' not in record or 'status' not in record:
+            raise serializers.ValidationError(
+                'Each record must have "student" and "status" fields'
+            )
+        
+        try:
+            record['student'] = int(record['student'])
+        except (ValueError, TypeError):
+            raise serializers.ValidationError(f'Invalid student ID: {record["student"]}')
+        
+        if record['status'] not in valid_statuses:
+            raise serializers.ValidationError(
+                f'Invalid status "{record["status"]}". Must be one of: {", ".join(valid_statuses)}'
+            )
+    
+    return value
+
+
+def validate_attendance_date(date):
+    from datetime import date as dt_date
+    
+    if date > dt_date.today():
+        raise serializers.ValidationError('Attendance date cannot be in the future')
+    return date
+
+
+def check_students_enrolled(class_instance, student_ids):
+    """Raise a ValidationError unless every student is enrolled in the class (one IN query)."""
+    student_ids = set(student_ids)
+    enrolled_students = set(
+        Enrollment.objects.filter(
+            enrolled_class=class_instance,
+            student_id__in=student_ids
+        ).values_list('student_id', flat=True)
+    )
+    
+    not_enrolled = student_ids - enrolled_students
+    if not_enrolled:
+        raise serializers.ValidationError({
+            'attendance_records': f'Students not enrolled in class: {sorted(not_enrolled)}'
+        })
+
+
+def attendance_records_field():
+    return serializers.ListField(
+        child=serializers.DictField(
+            child=serializers.CharField(allow_blank=True)
+        )
+    )
+
+
 class BulkAttendanceSerializer(serializers.Serializer):
     """
     Serializer for bulk recording attendance for multiple students.
     """
     class_instance = serializers.PrimaryKeyRelatedField(queryset=Class.objects.all())
-    date = serializers.DateField()
-    attendance_records = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.CharField()
+    date = serializers.DateField(validators=[validate_attendance_date])
+    attendance_records = attendance_records_field()
+    
+    def validate_attendance_records(self, value):
+        return validate_attendance_record_list(value)
+    
+    def validate(self, data):
+        """Validate that all students are enrolled."""
+        check_students_enrolled(
+            data['class_instance'],
+            [record['student'] for record in data['attendance_records']]
         )
-    )
+        return data
+
+
+class AttendanceDaySerializer(serializers.Serializer):
+    """
+    One date of a multi-date attendance save.
+    """
+    date = serializers.DateField(validators=[validate_attendance_date])
+    attendance_records = attendance_records_field()
     
     def validate_attendance_records(self, value):
-        """
-        Validate attendance records format.
-        Expected format: [{"student": 1, "status": "present", "remarks": "..."}, ...]
-        """
-        from ..Users.models import StudentProfile
-        
-        for record in value:
-            # Check required fields
-            if 'student' not in record or 'status' not in record:
-                raise serializers.ValidationError(
-                    'Each record must have "student" and "status" fields'
-                )
-            
-            # Validate student ID
-            try:
-                student_id = int(record['student'])
-                if not StudentProfile.objects.filter(id=student_id).exists():
-                    raise serializers.ValidationError(f'Student with ID {student_id} does not exist')
-            except (ValueError, TypeError):
-                raise serializers.ValidationError(f'Invalid student ID: {record["student"]}')
-            
-            # Validate status
-            valid_statuses = ['present', 'absent', 'late', 'excused']
-            if record['status'] not in valid_statuses:
-                raise serializers.ValidationError(
-                    f'Invalid status "{record["status"]}". Must be one of: {", ".join(valid_statuses)}'
-                )
-        
+        return validate_attendance_record_list(value)
+
+
+class BulkAttendanceDaysSerializer(serializers.Serializer):
+    """
+    Serializer for recording attendance for several dates at once
+    (e.g. a week of the attendance grid).
+    """
+    class_instance = serializers.PrimaryKeyRelatedField(queryset=Class.objects.all())
+    days = AttendanceDaySerializer(many=True, allow_empty=False)
+    
+    def validate_days(self, value):
+        if len(value) > MAX_ATTENDANCE_DAYS:
+            raise serializers.ValidationError(f'At most {MAX_ATTENDANCE_DAYS} dates can be saved at once')
+        dates = [day['date'] for day in value]
+        if len(set(dates)) != len(dates):
+            raise serializers.ValidationError('Each date may only appear once')
         return value
     
     def validate(self, data):
-        """Validate date and enrollment."""
-        from datetime import date as dt_date
-        
-        date = data.get('date')
-        class_instance = data.get('class_instance')
-        attendance_records = data.get('attendance_records', [])
-        
-        # Check date is not in the future
-        if date and date > dt_date.today():
-            raise serializers.ValidationError({
-                'date': 'Attendance date cannot be in the future'
-            })
-        
-        # Check all students are enrolled
-        student_ids = [int(record['student']) for record in attendance_records]
-        enrolled_students = set(
-            Enrollment.objects.filter(
-                enrolled_class=class_instance,
-                student_id__in=student_ids
-            ).values_list('student_id', flat=True)
+        """Validate that all students on all dates are enrolled."""
+        check_students_enrolled(
+            data['class_instance'],
+            [record['student'] for day in data['days'] for record in day['attendance_records']]
         )
-        
-        not_enrolled = set(student_ids) - enrolled_students
-        if not_enrolled:
-            raise serializers.ValidationError({
-                'attendance_records': f'Students not enrolled in class: {list(not_enrolled)}'
-            })
-        
         return data
 
 
@@ -834,6 +1115,16 @@ class BulkScoreUploadSerializer(serializers.Serializer):
         return value
 
 
+class ScoreImportSerializer(serializers.Serializer):
+    """
+    Serializer for importing scores from a CSV or XLSX file.
+    The file is read row by row by scores.import_scores().
+    """
+    file = serializers.FileField()
+    is_published = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
+
+
 class StudentGradesSummarySerializer(serializers.Serializer):
     """
     Serializer for student's grade summary.
@@ -859,6 +1150,32 @@ class StudentGradesSummarySerializer(serializers.Serializer):
         ]
 
 
+class ClassGradeRowSerializer(serializers.Serializer):
+    """
+    One student's grades in the class-wide grade list.
+    Component breakdowns are only present when requested.
+    """
+    student_id = serializers.IntegerField()
+    student_name = serializers.CharField()
+
+    midterm_grade = serializers.DecimalField(max_digits=5, decimal_places=2)
+    final_term_grade = serializers.DecimalField(max_digits=5, decimal_places=2)
+    final_grade = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+    midterm_components = serializers.DictField(required=False)
+    final_components = serializers.DictField(required=False)
+
+
+class ClassGradesSerializer(serializers.Serializer):
+    """
+    Serializer for the grades of every student enrolled in a class.
+    """
+    class_id = serializers.IntegerField()
+    class_name = serializers.CharField()
+    count = serializers.IntegerField()
+    students = ClassGradeRowSerializer(many=True)
+
+
 
 #MODULE 3
 class ScheduleEntrySerializer(serializers.ModelSerializer):
@@ -955,4 +1272,25 @@ class ScheduleEntryUpdateSerializer(serializers.ModelSerializer):
             'end_time',
             'day_of_week'
         ]
-        read_only_fields = ['id', 'schedule_block_id']
\ No newline at end of file
+        read_only_fields = ['id', 'schedule_block_id']
+
+
+class SemesterRolloverSerializer(serializers.Serializer):
+    """
+    Serializer for rolling a semester over (see rollover.py), either into an
+    existing semester (target_semester) or into a new one (new_semester, with
+    the fields of SemesterSerializer).
+    """
+    target_semester = serializers.PrimaryKeyRelatedField(
+        queryset=Semester.objects.all(), required=False, allow_null=True, default=None
+    )
+    new_semester = SemesterSerializer(required=False, allow_null=True, default=None)
+    include_faculty = serializers.BooleanField(default=True)
+    include_schedules = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        """Validate that exactly one of target_semester and new_semester is given"""
+        if (data['target_semester'] is None) == (data['new_semester'] is None):
+            raise serializers.ValidationError("Provide either target_semester or new_semester.")
+        return data
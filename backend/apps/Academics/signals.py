@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .grade_cache import invalidate_grades
+from .models import ComputedGrade, Enrollment, Score, Assessment, RubricComponent, GradingRubric
+
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def invalidate_student_grades(sender, instance, **kwargs):
+    """A score changed - only that student's grades in the class are affected"""
+    invalidate_grades(instance.class_instance_id, [instance.student_id])
+
+@receiver(post_save, sender=Assessment)
+@receiver(post_delete, sender=Assessment)
+@receiver(post_save, sender=GradingRubric)
+@receiver(post_delete, sender=GradingRubric)
+def invalidate_class_grades(sender, instance, **kwargs):
+    """An assessment or rubric changed - every grade in the class is affected"""
+    invalidate_grades(instance.class_instance_id)
+
+@receiver(post_save, sender=RubricComponent)
+@receiver(post_delete, sender=RubricComponent)
+def invalidate_component_grades(sender, instance, **kwargs):
+    """A rubric component changed - every grade in its class is affected"""
+    class_id = GradingRubric.objects.filter(pk=instance.rubric_id).values_list('class_instance_id', flat=True).first()
+    if class_id is not None:
+        invalidate_grades(class_id)
+
+@receiver(post_delete, sender=Enrollment)
+def delete_computed_grades(sender, instance, **kwargs):
+    """Unenrolled - the student no longer has grades in the class"""
+    ComputedGrade.objects.filter(class_instance_id=instance.enrolled_class_id, student_id=instance.student_id).delete()
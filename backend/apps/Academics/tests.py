@@ -1,3 +1,1059 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import random
+from collections import Counter
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.Users.models import BaseUser, FacultyProfile, Program, StudentProfile
+
+from . import grade_cache, scores, timetable
+from .attendance import upsert_attendance
+from .grade_cache import get_grades
+from .grades import (
+    TERM_COMPONENT_KEYS, TERM_GRADE_KEYS, TERMS, compute_grades, gradebook_version, load_gradebook,
+)
+from .schedule_conflicts import Slot, find_conflicts
+from .scores import import_scores, upsert_scores
+from .models import (
+    Assessment, Attendance, Class, ClassSchedule, ComputedGrade, Course, Curriculum, Enrollment, GradingRubric,
+    RubricComponent, Score, Section, Semester, TimetableDraft, TimetableDraftSlot,
+)
+from .rollover import RolloverError, rollover
+from .views import (
+    BulkAttendanceDaysAPIView, ClassGradebookAPIView, ClassViewSet, ScoreImportAPIView, SemesterRolloverAPIView,
+    TimetableAPIView, TimetableDraftApplyAPIView,
+)
+
+
+class GradingTestCase(TestCase):
+    """A class with three enrolled students"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = Program.objects.create(program_name="BSIT")
+        curriculum = Curriculum.objects.create(program=cls.program, revision_year=2024, is_active=True)
+        semester = Semester.objects.create(
+            term="first", start_date=datetime.date(2025, 8, 1), end_date=datetime.date(2025, 12, 20),
+            academic_year="2025-2026", is_active=True
+        )
+        section = Section.objects.create(
+            name="A", curriculum=curriculum, semester=semester, year="1", type="lec", capacity=40
+        )
+        course = Course.objects.create(
+            code="IT101", title="Programming", units=3, lec_hours=2, lab_hours=1,
+            curriculum=curriculum, year_offered="1", term_offered="first"
+        )
+        cls.faculty = FacultyProfile.objects.create(user=BaseUser.objects.create(
+            username="faculty", institutional_id="F0001", role_type="faculty"
+        ))
+        cls.class_instance = Class.objects.create(
+            course=course, faculty=cls.faculty, section=section, semester=semester
+        )
+        cls.students = [cls.enroll(i) for i in range(3)]
+
+    @classmethod
+    def enroll(cls, i):
+        student = StudentProfile.objects.create(
+            user=BaseUser.objects.create(
+                username=f"student{i}", institutional_id=f"S{i:04d}", role_type="student",
+                first_name=f"First{i}", last_name=f"Last{i}"
+            ),
+            program=cls.program, year_level=1
+        )
+        Enrollment.objects.create(enrolled_class=cls.class_instance, student=student)
+        return student
+
+
+def decimal_term_grade(student, rubric):
+    """The per-student Decimal calculation that compute_grades() replaced"""
+    term_grade = Decimal("0.00")
+    components = {}
+    for component in rubric.components.all():
+        assessments = component.assessments.all()
+        if not assessments:
+            components[component.name] = {"percentage": float(component.percentage), "average": 0.00}
+            continue
+        total_score = Decimal("0.00")
+        total_max = Decimal("0.00")
+        for assessment in assessments:
+            score = Score.objects.filter(student=student, assessment=assessment, is_published=True).first()
+            if score is not None:
+                total_score += Decimal(str(score.points))
+            total_max += Decimal(str(assessment.max_points))
+        average = (total_score / total_max) * Decimal("100.00") if total_max > 0 else Decimal("0.00")
+        contribution = (average * component.percentage) / Decimal("100.00")
+        term_grade += contribution
+        components[component.name] = {
+            "percentage": float(component.percentage),
+            "average": float(average),
+            "contribution": float(contribution),
+        }
+    return term_grade, components
+
+
+class GradeComputationTests(GradingTestCase):
+    """compute_grades() matches the per-student Decimal calculation, from a fixed number of queries"""
+
+    def split(self, rng, parts):
+        """parts random percentages (two decimals) that add up to 100"""
+        cuts = sorted(rng.sample(range(1, 10000), parts - 1))
+        bounds = [0] + cuts + [10000]
+        return [Decimal(high - low) / 100 for low, high in zip(bounds, bounds[1:])]
+
+    def build_rubrics(self, rng, max_components=4, max_assessments=4):
+        """Random rubrics, assessments and (partly published) scores for the class"""
+        Score.objects.filter(class_instance=self.class_instance).delete()
+        Assessment.objects.filter(class_instance=self.class_instance).delete()
+        GradingRubric.objects.filter(class_instance=self.class_instance).delete()
+
+        for term, term_percentage in zip(TERMS, self.split(rng, 2)):
+            rubric = GradingRubric.objects.create(
+                class_instance=self.class_instance, academic_period=term, term_percentage=term_percentage
+            )
+            count = rng.randint(1, max_components)
+            for c, percentage in enumerate(self.split(rng, count)):
+                component = RubricComponent.objects.create(rubric=rubric, name=f"C{c}", percentage=percentage)
+                for a in range(rng.randint(0, max_assessments)):
+                    assessment = Assessment.objects.create(
+                        class_instance=self.class_instance, title=f"{term} {c}.{a}", rubric_component=component,
+                        academic_period=term, max_points=rng.randint(1, 100), is_published=True
+                    )
+                    for student in self.students:
+                        if rng.random() < 0.8:
+                            Score.objects.create(
+                                class_instance=self.class_instance, student=student, assessment=assessment,
+                                points=rng.randint(0, assessment.max_points), is_published=rng.random() < 0.8
+                            )
+
+    def assertClose(self, actual, expected, msg=None):
+        self.assertLessEqual(abs(Decimal(str(actual)) - Decimal(str(expected))), Decimal("0.01"), msg)
+
+    def test_matches_decimal_calculation(self):
+        rng = random.Random(2025)
+        for seed in range(8):
+            with self.subTest(seed=seed):
+                self.build_rubrics(rng)
+                results = compute_grades(load_gradebook(self.class_instance))
+                rubrics = {r.academic_period: r for r in GradingRubric.objects.filter(class_instance=self.class_instance)}
+
+                for student in self.students:
+                    grades = results[student.pk]
+                    final_grade = Decimal("0.00")
+                    for term in TERMS:
+                        term_grade, components = decimal_term_grade(student, rubrics[term])
+                        final_grade += term_grade * rubrics[term].term_percentage / Decimal("100.00")
+                        self.assertClose(grades[TERM_GRADE_KEYS[term]], term_grade)
+
+                        computed = grades[TERM_COMPONENT_KEYS[term]]
+                        self.assertEqual(set(computed), set(components))
+                        for name, expected in components.items():
+                            self.assertEqual(set(expected) - set(computed[name]), set())
+                            # Components without assessments keep the old shape
+                            self.assertEqual("contribution" in computed[name], "contribution" in expected)
+                            for key, value in expected.items():
+                                self.assertClose(computed[name][key], value, f"{term} {name} {key}")
+                    self.assertClose(grades["final_grade"], final_grade)
+
+    def test_load_gradebook_query_count(self):
+        self.build_rubrics(random.Random(1), max_components=1, max_assessments=1)
+        with self.assertNumQueries(5):
+            small = load_gradebook(self.class_instance)
+
+        for i in range(3, 20):
+            self.students.append(self.enroll(i))
+        self.build_rubrics(random.Random(2), max_components=6, max_assessments=6)
+        with self.assertNumQueries(5):
+            large = load_gradebook(self.class_instance)
+
+        self.assertEqual(len(small.students), 3)
+        self.assertEqual(len(large.students), 20)
+        self.assertGreater(len(large.assessments), len(small.assessments))
+
+
+class GradebookTests(GradingTestCase):
+    """The columnar gradebook and its ETag"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        midterm = GradingRubric.objects.create(
+            class_instance=cls.class_instance, academic_period="midterm", term_percentage=40
+        )
+        finals = GradingRubric.objects.create(
+            class_instance=cls.class_instance, academic_period="finals", term_percentage=60
+        )
+        quiz = RubricComponent.objects.create(rubric=midterm, name="Quiz", percentage=30)
+        exam = RubricComponent.objects.create(rubric=midterm, name="Exam", percentage=70)
+        project = RubricComponent.objects.create(rubric=finals, name="Project", percentage=100)
+
+        def assessment(title, component, max_points, is_published=True):
+            return Assessment.objects.create(
+                class_instance=cls.class_instance, title=title, rubric_component=component,
+                academic_period=component.rubric.academic_period, max_points=max_points,
+                is_published=is_published
+            )
+
+        cls.quiz1 = assessment("Quiz 1", quiz, 10)
+        cls.quiz2 = assessment("Quiz 2", quiz, 20)
+        cls.exam = assessment("Midterm exam", exam, 50)
+        cls.project = assessment("Project", project, 100, is_published=False)
+        first, second, _ = cls.students
+        for student, item, points, is_published in [
+            (first, cls.quiz1, 8, True), (first, cls.quiz2, 15, True), (first, cls.exam, 40, True),
+            (first, cls.project, 90, False), (second, cls.quiz1, 5, True), (second, cls.exam, 25, False),
+        ]:
+            Score.objects.create(
+                class_instance=cls.class_instance, student=student, assessment=item,
+                points=points, is_published=is_published
+            )
+
+    def get(self, user=None, class_id=None, **headers):
+        class_id = class_id or self.class_instance.pk
+        request = APIRequestFactory().get(f"/api/academics/classes/{class_id}/gradebook/", **headers)
+        force_authenticate(request, user=user or self.faculty.user)
+        response = ClassGradebookAPIView.as_view()(request, class_id=class_id)
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    def test_payload(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data["version"], gradebook_version(self.class_instance.pk))
+        self.assertEqual(data["class_id"], self.class_instance.pk)
+        self.assertEqual(data["students"], {
+            "id": [student.pk for student in self.students],
+            "institutional_id": ["S0000", "S0001", "S0002"],
+            "name": ["Last0, First0", "Last1, First1", "Last2, First2"],
+        })
+        # Columns follow term, then component name, then creation order
+        self.assertEqual(data["assessments"], {
+            "id": [self.exam.pk, self.quiz1.pk, self.quiz2.pk, self.project.pk],
+            "title": ["Midterm exam", "Quiz 1", "Quiz 2", "Project"],
+            "max_points": [50, 10, 20, 100],
+            "is_published": [True, True, True, False],
+        })
+        self.assertEqual(
+            [(term["academic_period"], term["term_percentage"]) for term in data["terms"]],
+            [("midterm", 40.0), ("finals", 60.0)]
+        )
+        self.assertEqual(
+            [(c["name"], c["columns"]) for term in data["terms"] for c in term["components"]],
+            [("Exam", [0, 1]), ("Quiz", [1, 3]), ("Project", [3, 4])]
+        )
+        # Draft scores are included; missing ones are None
+        self.assertEqual(data["scores"], [[40, 8, 15, 90], [25, 5, None, None], [None] * 4])
+        self.assertEqual(data["published"], [[1, 1, 1, 0], [0, 1, 0, 0], [0] * 4])
+
+    def test_not_modified(self):
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_changes_give_a_new_etag(self):
+        etag = self.get()["ETag"]
+        score = Score.objects.get(student=self.students[1], assessment=self.quiz1)
+        score.points = 7
+        score.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["scores"][1][1], 7)
+
+        # Deleting a row changes the counts
+        etag = response["ETag"]
+        score.delete()
+        self.assertNotEqual(self.get()["ETag"], etag)
+
+    def test_access(self):
+        self.assertEqual(self.get(user=self.students[0].user).status_code, 403)
+        admin = BaseUser.objects.create(username="admin", institutional_id="A0001", role_type="admin", is_staff=True)
+        self.assertEqual(self.get(user=admin).status_code, 200)
+        self.assertEqual(self.get(user=admin, class_id=self.class_instance.pk + 100).status_code, 404)
+        self.assertIsNone(gradebook_version(self.class_instance.pk + 100))
+
+
+class GradeCacheTests(GradingTestCase):
+    """Computed grades are reused until a change marks them stale"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = cls.students[0]
+        rubric = GradingRubric.objects.create(
+            class_instance=cls.class_instance, academic_period="midterm", term_percentage=100
+        )
+        component = RubricComponent.objects.create(rubric=rubric, name="Quiz", percentage=100)
+        assessment = Assessment.objects.create(
+            class_instance=cls.class_instance, title="Quiz 1", rubric_component=component,
+            academic_period="midterm", max_points=100, is_published=True
+        )
+        cls.score = Score.objects.create(
+            class_instance=cls.class_instance, student=cls.student, assessment=assessment,
+            points=80, is_published=True
+        )
+
+    def midterm_grade(self):
+        _, results = get_grades(self.class_instance.pk, [self.student.pk])
+        return results[self.student.pk][1]["midterm_grade"]
+
+    def change_score(self, points):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.score.points = points
+            self.score.save()
+
+    def test_fresh_grades_are_one_query(self):
+        grade = self.midterm_grade()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.midterm_grade(), grade)
+
+    def test_score_change_marks_grades_stale(self):
+        before = self.midterm_grade()
+        self.change_score(40)
+        self.assertLess(self.midterm_grade(), before)
+
+    def test_score_change_during_first_recompute(self):
+        before = self.midterm_grade()
+        ComputedGrade.objects.all().delete()
+        compute_grades = grade_cache.compute_grades
+
+        def compute_then_change(gradebook):
+            grades = compute_grades(gradebook)
+            # The score commits after the gradebook was read, before the rows are written
+            self.change_score(40)
+            return grades
+
+        with mock.patch.object(grade_cache, "compute_grades", compute_then_change):
+            self.assertEqual(self.midterm_grade(), before)
+        self.assertLess(self.midterm_grade(), before)
+
+    def test_class_change_leaves_markers_for_students_without_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.score.assessment.save()
+        marker = ComputedGrade.objects.get(student=self.student)
+        self.assertEqual(marker.period, grade_cache.OVERALL)
+        self.assertEqual(marker.stale_since, marker.computed_at)
+        self.midterm_grade()
+        self.assertEqual(ComputedGrade.objects.filter(student=self.student).count(), 3)
+
+
+class AttendanceTests(GradingTestCase):
+    """Attendance for any number of students and dates is saved with one upsert"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = BaseUser.objects.create(
+            username="admin", institutional_id="A0001", role_type="admin", is_staff=True
+        )
+
+    def dates(self, count):
+        monday = datetime.date(2025, 9, 1)
+        return [monday + datetime.timedelta(days=i) for i in range(count)]
+
+    def post_days(self, days):
+        url = f"/api/academics/classes/{self.class_instance.pk}/attendance/bulk-days/"
+        request = APIRequestFactory().post(url, {"days": days}, format="json")
+        force_authenticate(request, user=self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = BulkAttendanceDaysAPIView.as_view()(request, class_id=self.class_instance.pk)
+        response.render()
+        upserts = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        return response, len(queries), upserts
+
+    def week(self, dates, status="present"):
+        return [
+            {
+                "date": date.isoformat(),
+                "attendance_records": [{"student": s.pk, "status": status, "remarks": ""} for s in self.students],
+            }
+            for date in dates
+        ]
+
+    def test_upsert_attendance(self):
+        first, second, _ = self.students
+        day = datetime.date(2025, 9, 1)
+        created, updated = upsert_attendance(self.class_instance, [
+            (first.pk, day, "present", ""),
+            (second.pk, day, "absent", ""),
+            # The last record for a student and date wins
+            (first.pk, day, "late", "Traffic"),
+        ], self.admin)
+        self.assertEqual((created, updated), (2, 0))
+
+        created, updated = upsert_attendance(self.class_instance, [
+            (second.pk, day, "excused", "Medical"),
+            (second.pk, day + datetime.timedelta(days=1), "present", ""),
+        ], self.admin)
+        self.assertEqual((created, updated), (1, 1))
+
+        self.assertEqual(
+            sorted(Attendance.objects.values_list("student_id", "date", "status", "remarks")),
+            sorted([
+                (first.pk, day, "late", "Traffic"),
+                (second.pk, day, "excused", "Medical"),
+                (second.pk, day + datetime.timedelta(days=1), "present", ""),
+            ])
+        )
+        self.assertEqual(upsert_attendance(self.class_instance, [], self.admin), (0, 0))
+
+    def test_bulk_days_is_one_upsert(self):
+        response, few, upserts = self.post_days(self.week(self.dates(2)))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data["created"], response.data["updated"]), (6, 0))
+        self.assertEqual(len(upserts), 1)
+
+        for i in range(3, 20):
+            self.students.append(self.enroll(i))
+        response, many, upserts = self.post_days(self.week(self.dates(5)))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["total"], 100)
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual(few, many)
+
+    def test_resave_updates(self):
+        self.post_days(self.week(self.dates(3)))
+        response, _, upserts = self.post_days(self.week(self.dates(3), status="absent"))
+
+        self.assertEqual((response.data["created"], response.data["updated"]), (0, 9))
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual(Attendance.objects.count(), 9)
+        self.assertEqual(set(Attendance.objects.values_list("status", flat=True)), {"absent"})
+
+    def test_students_must_be_enrolled(self):
+        stranger = StudentProfile.objects.create(
+            user=BaseUser.objects.create(username="stranger", institutional_id="S9999", role_type="student"),
+            program=self.program, year_level=1
+        )
+        days = self.week(self.dates(1))
+        days[0]["attendance_records"].append({"student": stranger.pk, "status": "present"})
+        response, _, upserts = self.post_days(days)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(upserts, [])
+        self.assertFalse(Attendance.objects.exists())
+
+
+class ScoreImportTests(GradingTestCase):
+    """Scores are upserted in one statement; spreadsheets are imported in batches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rubric = GradingRubric.objects.create(
+            class_instance=cls.class_instance, academic_period="midterm", term_percentage=100
+        )
+        component = RubricComponent.objects.create(rubric=rubric, name="Quiz", percentage=100)
+        cls.quiz1, cls.quiz2 = [
+            Assessment.objects.create(
+                class_instance=cls.class_instance, title=title, rubric_component=component,
+                academic_period="midterm", max_points=max_points
+            )
+            for title, max_points in [("Quiz 1", 10), ("Quiz 2", 20)]
+        ]
+
+    def saved(self):
+        return set(Score.objects.values_list("student__user__institutional_id", "assessment_id", "points"))
+
+    def upsert(self, scores):
+        with CaptureQueriesContext(connection) as queries:
+            result = upsert_scores(self.class_instance.pk, scores, self.faculty.user)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "academics_score"')]
+        return result, len(queries), len(inserts)
+
+    def post(self, content, filename, **fields):
+        upload = SimpleUploadedFile(filename, content)
+        request = APIRequestFactory().post(
+            f"/api/academics/classes/{self.class_instance.pk}/scores/import/",
+            {"file": upload, **fields}, format="multipart"
+        )
+        force_authenticate(request, user=self.faculty.user)
+        response = ScoreImportAPIView.as_view()(request, class_id=self.class_instance.pk)
+        response.render()
+        return response
+
+    def csv_file(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def xlsx_file(self, rows):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    def test_upsert_scores(self):
+        first, second, _ = self.students
+        result, few, inserts = self.upsert([
+            (first.pk, self.quiz1.pk, 5, False),
+            (second.pk, self.quiz1.pk, 7, False),
+            # The last score for a student and assessment wins
+            (first.pk, self.quiz1.pk, 6, True),
+        ])
+        self.assertEqual(result, (2, 0))
+        self.assertEqual(inserts, 1)
+
+        for i in range(3, 40):
+            self.students.append(self.enroll(i))
+        result, many, inserts = self.upsert(
+            (student.pk, assessment.pk, 9, True) for student in self.students for assessment in (self.quiz1, self.quiz2)
+        )
+        self.assertEqual(result, (78, 2))
+        self.assertEqual(inserts, 1)
+        self.assertEqual(few, many)
+        self.assertEqual(Score.objects.count(), 80)
+        self.assertEqual(set(Score.objects.values_list("points", "is_published")), {(9, True)})
+
+    def test_csv_import(self):
+        response = self.post(self.csv_file([
+            ["id_number", "full_name", "Quiz 1", str(self.quiz2.pk)],
+            ["S0000", "Last0, First0", "8", "15"],
+            ["S0001", "Last1, First1", "", "12"],
+            ["S0002", "Last2, First2", "abc", "25"],
+            ["S9999", "Stranger", "1", "1"],
+            ["", "", "", ""],
+        ]), "scores.csv")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data
+        self.assertEqual((data["rows"], data["created"], data["updated"]), (4, 3, 0))
+        self.assertEqual(data["columns"], {"Quiz 1": self.quiz1.pk, str(self.quiz2.pk): self.quiz2.pk})
+        self.assertEqual(data["ignored_columns"], ["full_name"])
+        self.assertEqual(
+            [(e["row"], e["column"]) for e in data["errors"]],
+            [(4, "Quiz 1"), (4, str(self.quiz2.pk)), (5, None)]
+        )
+        self.assertIn("not a number", data["errors"][0]["error"])
+        self.assertIn("cannot exceed", data["errors"][1]["error"])
+        self.assertEqual(self.saved(), {
+            ("S0000", self.quiz1.pk, 8), ("S0000", self.quiz2.pk, 15), ("S0001", self.quiz2.pk, 12),
+        })
+        self.assertFalse(Score.objects.filter(is_published=True).exists())
+
+    def test_xlsx_import(self):
+        response = self.post(self.xlsx_file([
+            ["Institutional_ID", "quiz 1", "Quiz 2"],
+            ["S0000", 8.0, 19],
+            ["S0001", -1, 20.5],
+        ]), "scores.xlsx", is_published="true")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data["created"], response.data["error_count"]), (2, 2))
+        self.assertEqual(self.saved(), {("S0000", self.quiz1.pk, 8), ("S0000", self.quiz2.pk, 19)})
+        self.assertEqual(set(Score.objects.values_list("is_published", flat=True)), {True})
+
+    def test_dry_run(self):
+        Score.objects.create(
+            class_instance=self.class_instance, student=self.students[0], assessment=self.quiz1, points=1
+        )
+        response = self.post(
+            self.csv_file([["id_number", "Quiz 1"], ["S0000", "9"], ["S0001", "9"]]), "scores.csv", dry_run="true"
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(response.data["dry_run"])
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 1))
+        self.assertEqual(self.saved(), {("S0000", self.quiz1.pk, 1)})
+
+    def test_batches(self):
+        rows = [["id_number", "Quiz 1", "Quiz 2"]] + [[s.user.institutional_id, "5", "5"] for s in self.students]
+        with mock.patch.object(scores, "IMPORT_BATCH_SIZE", 4), \
+                mock.patch.object(scores, "upsert_scores", wraps=scores.upsert_scores) as upsert:
+            report = import_scores(self.class_instance, rows, self.faculty.user)
+
+        # Rows are added to the batch whole, so it's written once it reaches 4 scores
+        self.assertEqual([len(list(call.args[1])) for call in upsert.call_args_list], [4, 2])
+        self.assertEqual(report.created, 6)
+        self.assertEqual(Score.objects.count(), 6)
+
+    def test_unreadable_files(self):
+        for content, filename in [
+            (self.csv_file([["name", "Quiz 1"], ["x", "1"]]), "scores.csv"),
+            (self.csv_file([["id_number", "Essay"], ["S0000", "1"]]), "scores.csv"),
+            (b"", "scores.csv"),
+            (b"not a workbook", "scores.xlsx"),
+            (b"id_number", "scores.txt"),
+        ]:
+            with self.subTest(filename=filename, content=content[:20]):
+                response = self.post(content, filename)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Score.objects.exists())
+
+
+class ClassesTestCase(TestCase):
+    """A semester with a lecture and a lab section and three faculty members"""
+
+    @classmethod
+    def setUpTestData(cls):
+        program = Program.objects.create(program_name="BSIT")
+        curriculum = Curriculum.objects.create(program=program, revision_year=2024, is_active=True)
+        cls.semester = Semester.objects.create(
+            term="first", start_date=datetime.date(2025, 8, 1), end_date=datetime.date(2025, 12, 20),
+            academic_year="2025-2026", is_active=True
+        )
+        cls.admin = BaseUser.objects.create(
+            username="admin", institutional_id="A0001", role_type="admin", is_staff=True
+        )
+        cls.lec_section = Section.objects.create(
+            name="A", curriculum=curriculum, semester=cls.semester, year="1", type="lec", capacity=40
+        )
+        cls.lab_section = Section.objects.create(
+            name="Ax", curriculum=curriculum, semester=cls.semester, year="1", type="lab", capacity=20
+        )
+        cls.faculty = []
+        for i in range(3):
+            user = BaseUser.objects.create(
+                username=f"faculty{i}", institutional_id=f"F{i:04d}", role_type="faculty",
+                first_name=f"First{i}", last_name=f"Last{i}"
+            )
+            cls.faculty.append(FacultyProfile.objects.create(user=user))
+        cls.curriculum = curriculum
+
+    def create_classes(self, count):
+        """count lecture classes, each with a lab class and two meetings"""
+        start = Course.objects.count()
+        for i in range(start, start + count):
+            course = Course.objects.create(
+                code=f"IT{i:03d}", title=f"Course {i}", units=3, lec_hours=2, lab_hours=1,
+                curriculum=self.curriculum, year_offered="1", term_offered="first"
+            )
+            faculty = self.faculty[i % len(self.faculty)]
+            lecture = Class.objects.create(
+                course=course, faculty=faculty, section=self.lec_section, semester=self.semester
+            )
+            lab = Class.objects.create(
+                course=course, faculty=faculty, section=self.lab_section, semester=self.semester,
+                lecture_class=lecture
+            )
+            for class_instance in (lecture, lab):
+                ClassSchedule.objects.create(
+                    class_instance=class_instance, day="mon", start_minute=420 + i, end_minute=480 + i
+                )
+                ClassSchedule.objects.create(
+                    class_instance=class_instance, day="thu", start_minute=420 + i, end_minute=480 + i
+                )
+
+
+class FindConflictsTests(ClassesTestCase):
+    """Proposed slots are checked against the rooms, faculty and sections of existing schedules"""
+
+    def setUp(self):
+        self.create_classes(3)
+        # IT000's lecture meets mon/thu 07:00-08:00; give it a room
+        self.lecture = Class.objects.get(course__code="IT000", lecture_class__isnull=True)
+        ClassSchedule.objects.filter(class_instance=self.lecture).update(room="Room 101")
+        self.other_section = Section.objects.create(
+            name="B", curriculum=self.curriculum, semester=self.semester, year="1", type="lec", capacity=40
+        )
+
+    def slot(self, start, end, room="", faculty=None, section=None, day="mon", class_id=None):
+        return Slot(class_id, day, start, end, room, faculty, section, None)
+
+    def conflicts(self, *slots, exclude_class_id=None):
+        with self.assertNumQueries(1):
+            return find_conflicts(self.semester.pk, list(slots), exclude_class_id=exclude_class_id)
+
+    def test_room_is_matched_case_insensitively(self):
+        conflicts = self.conflicts(self.slot(450, 500, room=" room 101", section=self.other_section.pk))
+        self.assertEqual([(c["type"], c["conflicting_class"]) for c in conflicts], [("room", self.lecture.pk)])
+
+    def test_faculty_and_section(self):
+        conflicts = self.conflicts(
+            self.slot(470, 530, faculty=self.faculty[1].pk, section=self.other_section.pk, day="thu")
+        )
+        # IT001 (07:01-08:01) and IT002 (07:02-08:02) have lecture and lab classes; IT001 is taught by faculty1
+        self.assertEqual(
+            sorted((c["type"], c["conflicting_start_time"]) for c in conflicts),
+            [("faculty", "07:01"), ("faculty", "07:01")]
+        )
+        conflicts = self.conflicts(self.slot(470, 530, section=self.lec_section.pk))
+        self.assertEqual(len(conflicts), 3)
+        self.assertTrue(all(c["type"] == "section" for c in conflicts))
+
+    def test_touching_slots_and_other_days_do_not_clash(self):
+        self.assertEqual(self.conflicts(self.slot(480, 540, room="Room 101", faculty=self.faculty[0].pk)), [])
+        self.assertEqual(
+            self.conflicts(self.slot(420, 480, room="Room 101", section=self.lec_section.pk, day="tue")), []
+        )
+
+    def test_edited_class_is_ignored(self):
+        slot = self.slot(420, 480, room="Room 101", class_id=self.lecture.pk)
+        self.assertEqual(self.conflicts(slot, exclude_class_id=self.lecture.pk), [])
+
+    def test_unassigned_slot_needs_no_query(self):
+        self.assertEqual(find_conflicts(self.semester.pk, [self.slot(420, 480)]), [])
+
+
+@override_settings(ACADEMICS_TIMETABLE={"BACKGROUND": False, "TIME_LIMIT": 5})
+class TimetableTests(ClassesTestCase):
+    """The solver, timetable drafts and applying them"""
+
+    rooms = [
+        {"name": "R101", "capacity": 40, "type": "lec"},
+        {"name": "R102", "capacity": 40, "type": "lec"},
+        {"name": "LAB1", "capacity": 30, "type": "lab"},
+    ]
+
+    def call(self, view, url, user=None, data=None, **kwargs):
+        factory = APIRequestFactory()
+        request = factory.post(url, data, format="json") if data is not None else factory.get(url)
+        force_authenticate(request, user=user or self.admin)
+        response = view.as_view()(request, **kwargs)
+        response.render()
+        return response
+
+    def solve_semester(self, **data):
+        return self.call(
+            TimetableAPIView, f"/api/academics/semesters/{self.semester.pk}/timetable/",
+            data={"rooms": self.rooms, **data}, semester_id=self.semester.pk
+        )
+
+    def apply(self, draft_id):
+        return self.call(
+            TimetableDraftApplyAPIView, f"/api/academics/timetable-drafts/{draft_id}/apply/",
+            data={}, pk=draft_id
+        )
+
+    def schedules(self, class_ids=None):
+        rows = ClassSchedule.objects.all()
+        if class_ids is not None:
+            rows = rows.filter(class_instance_id__in=class_ids)
+        return set(rows.values_list("class_instance_id", "day", "start_minute", "end_minute", "room"))
+
+    def test_solver(self):
+        classes = [
+            {"id": i, "kind": "lec", "minutes": 180, "size": 35, "faculty_id": i % 2, "section_id": i % 3}
+            for i in range(12)
+        ] + [
+            {"id": 100, "kind": "lab", "minutes": 180, "size": 25, "faculty_id": 0, "section_id": 0},
+            {"id": 101, "kind": "lec", "minutes": 120, "size": 90, "faculty_id": 1, "section_id": 1},
+        ]
+        fixed = [(200, "mon", 420, 600, "R101", 0, 5)]
+        problem = {"rooms": self.rooms, "classes": classes, "fixed": fixed}
+        result = timetable.solve(problem, dict(timetable.get_config(), SEED=3))
+
+        self.assertEqual(result["stats"]["conflicts"], 0)
+        self.assertEqual(timetable.count_conflicts(problem, result["slots"]), 0)
+        # No room holds 90 students
+        self.assertEqual([(u["class_id"], u["reason"]) for u in result["unplaced"]], [(101, "No lec room holds 90 students")])
+        self.assertEqual(result["stats"]["placed"], 13)
+
+        minutes = Counter()
+        for slot in result["slots"]:
+            minutes[slot["class_id"]] += slot["end_minute"] - slot["start_minute"]
+            kind = "lab" if slot["class_id"] == 100 else "lec"
+            self.assertEqual(next(r["type"] for r in self.rooms if r["name"] == slot["room"]), kind)
+            # The fixed schedule keeps R101 on Monday morning
+            if slot["room"] == "R101" and slot["day"] == "mon":
+                self.assertGreaterEqual(slot["start_minute"], 600)
+        self.assertEqual(minutes, {data["id"]: 180 for data in classes if data["id"] != 101})
+
+    def test_draft_lifecycle(self):
+        self.create_classes(3)
+        ClassSchedule.objects.all().delete()
+
+        response = self.solve_semester()
+        self.assertEqual(response.status_code, 202, response.data)
+        draft = TimetableDraft.objects.get(pk=response.data["id"])
+        self.assertEqual(draft.status, TimetableDraft.Status.DONE, draft.message)
+        self.assertEqual((draft.stats["placed"], draft.stats["conflicts"]), (6, 0))
+        proposed = set(draft.slots.values_list("class_instance_id", "day", "start_minute", "end_minute", "room"))
+        self.assertEqual(len(response.data["slots"]), len(proposed))
+        # A draft is only a proposal
+        self.assertEqual(self.schedules(), set())
+
+        response = self.apply(draft.pk)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.schedules(), proposed)
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, TimetableDraft.Status.APPLIED)
+        self.assertEqual(self.apply(draft.pk).status_code, 400)
+
+    def test_existing_schedules_stay_fixed(self):
+        self.create_classes(2)
+        kept = Class.objects.get(course__code="IT000", lecture_class__isnull=True)
+        ClassSchedule.objects.exclude(class_instance=kept).delete()
+        ClassSchedule.objects.filter(class_instance=kept).update(room="R101")
+        before = self.schedules()
+
+        draft = TimetableDraft.objects.get(pk=self.solve_semester().data["id"])
+        self.assertEqual(draft.stats["placed"], 3)
+        self.assertFalse(draft.slots.filter(class_instance=kept).exists())
+        self.assertEqual(self.apply(draft.pk).status_code, 200)
+        self.assertTrue(before <= self.schedules())
+
+    def test_conflicted_result_is_not_applicable(self):
+        self.create_classes(2)
+        draft = TimetableDraft.objects.create(semester=self.semester)
+        lecture = Class.objects.get(course__code="IT000", lecture_class__isnull=True)
+        other = Class.objects.get(course__code="IT001", lecture_class__isnull=True)
+        result = {
+            "slots": [
+                {"class_id": lecture.pk, "day": "tue", "start_minute": 600, "end_minute": 660, "room": ""},
+                {"class_id": other.pk, "day": "tue", "start_minute": 630, "end_minute": 690, "room": ""},
+            ],
+            "unplaced": [],
+            "stats": {"classes": 2, "placed": 2, "conflicts": 2},
+        }
+        timetable.save_result(draft.pk, result)
+
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, TimetableDraft.Status.FAILED)
+        self.assertEqual(draft.slots.count(), 2)
+        before = self.schedules()
+        self.assertEqual(self.apply(draft.pk).status_code, 400)
+        self.assertEqual(self.schedules(), before)
+
+    def draft_with(self, *slots):
+        draft = TimetableDraft.objects.create(semester=self.semester, status=TimetableDraft.Status.DONE)
+        TimetableDraftSlot.objects.bulk_create(
+            TimetableDraftSlot(draft=draft, class_instance=class_instance, day=day,
+                               start_minute=start, end_minute=end, room=room)
+            for class_instance, day, start, end, room in slots
+        )
+        return draft
+
+    def test_apply_checks_draft_slots_against_each_other(self):
+        self.create_classes(2)
+        lecture = Class.objects.get(course__code="IT000", lecture_class__isnull=True)
+        other = Class.objects.get(course__code="IT001", lecture_class__isnull=True)
+        before = self.schedules()
+        # Same section, overlapping on Tuesday; nothing else is scheduled then
+        draft = self.draft_with(
+            (lecture, "tue", 600, 660, "R101"),
+            (lecture, "fri", 600, 660, "R101"),
+            (other, "tue", 630, 690, "R102"),
+        )
+
+        conflicts = timetable.apply_draft(draft)
+
+        self.assertEqual(
+            [(c["type"], c["day"], c["conflicting_class"]) for c in conflicts],
+            [("section", "tue", lecture.pk)]
+        )
+        self.assertIn("IT000 (A)", conflicts[0]["message"])
+        self.assertEqual(self.schedules(), before)
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, TimetableDraft.Status.DONE)
+
+    def test_apply_checks_schedules_changed_since(self):
+        self.create_classes(2)
+        lecture = Class.objects.get(course__code="IT000", lecture_class__isnull=True)
+        draft = self.draft_with((lecture, "tue", 600, 660, "R101"))
+        other = Class.objects.get(course__code="IT001", lecture_class__isnull=True)
+        ClassSchedule.objects.create(class_instance=other, day="tue", start_minute=640, end_minute=700, room="r101 ")
+
+        response = self.apply(draft.pk)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            sorted(c["type"] for c in response.data["conflicts"]), ["room", "section"]
+        )
+        self.assertFalse(ClassSchedule.objects.filter(class_instance=lecture, day="tue").exists())
+
+
+class ClassListQueryCountTests(ClassesTestCase):
+    """Listing classes takes the same number of queries however many classes there are"""
+
+    def list_classes(self, **params):
+        request = APIRequestFactory().get("/api/academics/classes/", params)
+        force_authenticate(request, user=self.admin)
+        response = ClassViewSet.as_view({"get": "list"})(request)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_list_query_count_is_constant(self):
+        # The classes, then their schedules
+        self.create_classes(2)
+        with self.assertNumQueries(2):
+            small = self.list_classes()
+        self.create_classes(40)
+        with self.assertNumQueries(2):
+            large = self.list_classes()
+        self.assertEqual(len(small), 4)
+        self.assertEqual(len(large), 84)
+
+    def test_filtered_list_query_count_is_constant(self):
+        self.create_classes(10)
+        with self.assertNumQueries(2):
+            data = self.list_classes(
+                semester=self.semester.pk, section=self.lab_section.pk, faculty=self.faculty[0].pk
+            )
+        self.assertEqual(len(data), 4)
+        self.assertTrue(all(row["lecture_class"] for row in data))
+
+    def test_detailed_list_query_count_is_constant(self):
+        self.create_classes(2)
+        with self.assertNumQueries(2):
+            self.list_classes(details="true")
+        self.create_classes(20)
+        with self.assertNumQueries(2):
+            self.list_classes(details="true")
+
+    def test_list_fields(self):
+        self.create_classes(1)
+        lab = next(row for row in self.list_classes() if row["lecture_class"])
+        self.assertEqual(lab["code"], "IT000")
+        self.assertEqual(lab["title"], "Course 0")
+        self.assertEqual(lab["section_code"], "BSIT1Ax")
+        self.assertEqual(lab["type"], "lab")
+        self.assertEqual(lab["lecture_class_code"], "IT000")
+        self.assertEqual(lab["faculty_name"], "First0 Last0")
+        self.assertEqual(len(lab["schedules"]), 2)
+
+
+class RolloverTests(ClassesTestCase):
+    """Copying a semester's sections, classes and rubrics into another semester"""
+
+    def setUp(self):
+        self.create_classes(2)
+        for class_instance in Class.objects.filter(lecture_class__isnull=True):
+            for period, term_percentage in (("midterm", "40.00"), ("finals", "60.00")):
+                rubric = GradingRubric.objects.create(
+                    class_instance=class_instance, academic_period=period, term_percentage=term_percentage
+                )
+                RubricComponent.objects.create(rubric=rubric, name="Quiz", percentage="30.00")
+                RubricComponent.objects.create(rubric=rubric, name="Exam", percentage="70.00")
+
+    def new_semester(self):
+        return Semester(
+            term="second", start_date=datetime.date(2026, 1, 10), end_date=datetime.date(2026, 5, 30),
+            academic_year="2025-2026", is_active=False
+        )
+
+    def copies(self, semester):
+        """The (course, section name, faculty id, lecture course) of each class in the semester"""
+        return {
+            (c.course_id, c.section.name, c.faculty_id, c.lecture_class.course_id if c.lecture_class else None)
+            for c in Class.objects.filter(semester=semester).select_related("section", "lecture_class")
+        }
+
+    def test_copies_sections_classes_and_rubrics(self):
+        target = self.new_semester()
+        report = rollover(self.semester, target)
+
+        self.assertIsNotNone(target.pk)
+        self.assertEqual(report["target_semester"], target.pk)
+        self.assertEqual(sorted(report["sections"]["created"]), ["BSIT1A", "BSIT1Ax"])
+        self.assertEqual(len(report["classes"]["created"]), 4)
+        self.assertEqual(
+            set(Section.objects.filter(semester=target).values_list("name", "curriculum", "year", "type", "capacity")),
+            {("A", self.curriculum.pk, "1", "lec", 40), ("Ax", self.curriculum.pk, "1", "lab", 20)}
+        )
+        copies = self.copies(target)
+        self.assertEqual(copies, self.copies(self.semester))
+        # Labs are linked to the target's lecture classes, not the source's
+        for lab in Class.objects.filter(semester=target, lecture_class__isnull=False):
+            self.assertEqual(lab.lecture_class.semester_id, target.pk)
+            self.assertEqual(lab.section.semester_id, target.pk)
+
+        self.assertEqual((report["rubrics"], report["rubric_components"]), (4, 8))
+        self.assertEqual(
+            sorted(GradingRubric.objects.filter(class_instance__semester=target).values_list(
+                "class_instance__course_id", "academic_period", "term_percentage"
+            )),
+            sorted(GradingRubric.objects.filter(class_instance__semester=self.semester).values_list(
+                "class_instance__course_id", "academic_period", "term_percentage"
+            ))
+        )
+        self.assertEqual(RubricComponent.objects.filter(rubric__class_instance__semester=target).count(), 8)
+        # Schedules aren't copied by default
+        self.assertEqual((report["schedules"], ClassSchedule.objects.filter(class_instance__semester=target).count()), (0, 0))
+
+    def test_options(self):
+        target = self.new_semester()
+        report = rollover(self.semester, target, include_faculty=False, include_schedules=True)
+
+        self.assertEqual({faculty_id for _, _, faculty_id, _ in self.copies(target)}, {None})
+        self.assertEqual(report["schedules"], 8)
+        self.assertEqual(
+            sorted(ClassSchedule.objects.filter(class_instance__semester=target).values_list(
+                "class_instance__course_id", "class_instance__section__name", "day", "start_minute", "end_minute"
+            )),
+            sorted(ClassSchedule.objects.filter(class_instance__semester=self.semester).values_list(
+                "class_instance__course_id", "class_instance__section__name", "day", "start_minute", "end_minute"
+            ))
+        )
+
+    def test_existing_target_keeps_its_sections_and_classes(self):
+        target = self.new_semester()
+        target.save()
+        section = Section.objects.create(
+            name="A", curriculum=self.curriculum, semester=target, year="1", type="lec", capacity=45
+        )
+        Class.objects.create(course_id="IT000", section=section, semester=target)
+
+        report = rollover(self.semester, target)
+
+        self.assertEqual((report["sections"]["created"], report["sections"]["existing"]), (["BSIT1Ax"], ["BSIT1A"]))
+        self.assertEqual(report["classes"]["existing"], ["IT000 (BSIT1A)"])
+        self.assertEqual(Section.objects.filter(semester=target).count(), 2)
+        self.assertEqual(Class.objects.filter(semester=target).count(), 4)
+        # IT000's lab is linked to the class the target already had
+        lab = Class.objects.get(semester=target, course_id="IT000", lecture_class__isnull=False)
+        self.assertEqual(lab.lecture_class.section_id, section.pk)
+        self.assertEqual(report["rubrics"], 2)
+
+    def test_dry_run_writes_nothing(self):
+        counts = [model.objects.count() for model in (Semester, Section, Class, GradingRubric, RubricComponent, ClassSchedule)]
+        target = self.new_semester()
+
+        report = rollover(self.semester, target, include_schedules=True, dry_run=True)
+
+        self.assertTrue(report["dry_run"])
+        self.assertIsNone(report["target_semester"])
+        self.assertEqual(len(report["classes"]["created"]), 4)
+        self.assertEqual((report["rubrics"], report["rubric_components"], report["schedules"]), (4, 8, 8))
+        self.assertIsNone(target.pk)
+        self.assertEqual(
+            [model.objects.count() for model in (Semester, Section, Class, GradingRubric, RubricComponent, ClassSchedule)],
+            counts
+        )
+
+    def test_errors(self):
+        with self.assertRaises(RolloverError):
+            rollover(self.semester, self.semester)
+
+        target = self.new_semester()
+        with mock.patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock,
+            return_value=False
+        ):
+            with self.assertRaises(RolloverError):
+                rollover(self.semester, target)
+            # A dry run doesn't need the inserted ids
+            self.assertTrue(rollover(self.semester, target, dry_run=True)["dry_run"])
+        self.assertIsNone(target.pk)
+        self.assertFalse(Semester.objects.filter(term="second").exists())
+
+    def test_view(self):
+        request = APIRequestFactory().post(
+            f"/api/academics/semesters/{self.semester.pk}/rollover/",
+            {"new_semester": {
+                "term": "second", "start_date": "2026-01-10", "end_date": "2026-05-30",
+                "academic_year": "2025-2026", "is_active": False
+            }},
+            format="json"
+        )
+        force_authenticate(request, user=self.admin)
+        response = SemesterRolloverAPIView.as_view()(request, semester_id=self.semester.pk)
+        response.render()
+
+        self.assertEqual(response.status_code, 201, response.data)
+        target = Semester.objects.get(pk=response.data["target_semester"])
+        self.assertEqual(self.copies(target), self.copies(self.semester))
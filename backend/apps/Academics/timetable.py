@@ -0,0 +1,690 @@
+"""
+Automatic semester timetabling.
+
+solve() places the classes of a semester on a weekly grid so that no room,
+faculty member or section is double-booked (the same rules as
+schedule_conflicts.py) and every section fits in its room:
+    - each class meets for its course's lec_hours (lecture classes) or
+      lab_hours (lab classes: a lab section or a class with a lecture_class),
+      split into meetings of at most MAX_LECTURE_MEETING / MAX_LAB_MEETING
+      minutes on different days, all at the same time and in the same room
+    - a section's size is its capacity; it gets the smallest free room that
+      holds it (rooms may be limited to 'lec' or 'lab' classes)
+    - schedules of classes that aren't being solved stay where they are
+
+The grid is DAYS x SLOT_MINUTES cells from DAY_START to DAY_END; every room,
+faculty member and section has a bitmask of busy cells per day, so testing a
+placement is a few integer ANDs. Solving runs in three phases:
+    1. greedy: hardest classes first (fewest usable rooms, most hours), each
+       at the earliest start and day pattern with a free room
+    2. repair (local search): an unplaced class takes the position that evicts
+       the fewest (and least often evicted) classes, which go back in the
+       queue, until every class is placed or TIME_LIMIT runs out
+    3. compaction: classes ending after LATE_AFTER move earlier if they can
+The result is checked against a ScheduleIndex before it is returned.
+
+start_solving() runs the solver in a worker process (spawned, like the
+preview renderer's) and a thread of the web process stores its progress on
+the TimetableDraft and, when it finishes, the proposed slots. A draft is
+only a proposal: apply_draft() copies it to the classes' schedules after the
+registrar has reviewed it. A result with conflicts is stored for review but
+marked failed, so it can't be applied.
+
+Configured by settings.ACADEMICS_TIMETABLE:
+    BACKGROUND          False solves synchronously in-process (use in tests)
+    TIME_LIMIT          seconds the solver may run
+    DAYS                days classes may meet on
+    DAY_START, DAY_END  first and last minute of the teaching day
+    SLOT_MINUTES        grid resolution; meetings start and end on it
+    LATE_AFTER          meetings ending after this minute are moved earlier if possible
+    MAX_LECTURE_MEETING, MAX_LAB_MEETING   longest meeting, in minutes
+    SEED                random seed of the repair phase
+
+`manage.py benchmark_timetable` times the solver on a generated college load.
+"""
+import itertools
+import logging
+import multiprocessing
+import queue
+import random
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from django.conf import settings
+
+from .schedule_conflicts import ScheduleIndex, Slot
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKGROUND': True,
+    'TIME_LIMIT': 120,
+    'DAYS': ['mon', 'tue', 'wed', 'thu', 'fri', 'sat'],
+    'DAY_START': 7 * 60,
+    'DAY_END': 21 * 60,
+    'SLOT_MINUTES': 30,
+    'LATE_AFTER': 17 * 60,
+    'MAX_LECTURE_MEETING': 120,
+    'MAX_LAB_MEETING': 180,
+    'SEED': 0,
+}
+
+LECTURE = 'lec'
+LAB = 'lab'
+
+# Owner of grid cells taken by schedules that are not being solved
+FIXED = -1
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'ACADEMICS_TIMETABLE', {}))
+    return config
+
+
+def _room_key(name):
+    return (name or '').strip().lower()
+
+
+def meeting_lengths(minutes, kind, config):
+    """Lengths in grid cells of the weekly meetings of a class"""
+    slot = config['SLOT_MINUTES']
+    cells = -(-minutes // slot)
+    longest = config['MAX_LAB_MEETING' if kind == LAB else 'MAX_LECTURE_MEETING'] // slot
+    count = -(-cells // longest)
+    if kind == LECTURE and count == 1 and minutes >= 120:
+        # Two shorter lectures rather than one long one
+        count = 2
+    base, extra = divmod(cells, count)
+    return [base + 1] * extra + [base] * (count - extra)
+
+
+def day_patterns(count, day_count):
+    """Day index tuples for count meetings, spread-out patterns (no back-to-back days) first"""
+    def key(days):
+        gaps = [b - a for a, b in zip(days, days[1:])]
+        return (sum(gap == 1 for gap in gaps), max(gaps, default=0) - min(gaps, default=0), days)
+    return sorted(itertools.combinations(range(day_count), count), key=key)
+
+
+class _Class:
+    __slots__ = ('index', 'id', 'label', 'lengths', 'patterns', 'rooms', 'room_mask', 'faculty', 'section')
+
+    def __init__(self, index, data, lengths, patterns, rooms):
+        self.index = index
+        self.id = data['id']
+        self.label = data.get('label', str(data['id']))
+        self.lengths = lengths
+        self.patterns = patterns
+        self.rooms = rooms
+        self.room_mask = sum(1 << room for room in rooms)
+        self.faculty = data.get('faculty_id')
+        self.section = data.get('section_id')
+
+
+class TimetableSolver:
+    """
+    Solver state for one problem (see solve() for its format): the busy
+    cells of every room, faculty member and section, and where each class is.
+    """
+
+    def __init__(self, problem, config, progress=None):
+        self.config = config
+        self.progress = progress or (lambda percent, message: None)
+        self.random = random.Random(config['SEED'])
+        self.days = list(config['DAYS'])
+        self.slot = config['SLOT_MINUTES']
+        self.day_start = config['DAY_START']
+        self.cell_count = (config['DAY_END'] - self.day_start) // self.slot
+
+        # Smallest rooms first, so the first free fitting room wastes the fewest seats
+        self.rooms = sorted(problem.get('rooms', []), key=lambda room: (room['capacity'], _room_key(room['name'])))
+        self.use_rooms = bool(self.rooms)
+        room_index = {_room_key(room['name']): index for index, room in enumerate(self.rooms)}
+
+        self.masks = Counter()  # (resource, key, day) -> bitmask of busy cells
+        # [day][cell] -> bitmask of busy rooms, to find a free room without trying each one
+        self.busy_rooms = [[0] * self.cell_count for _ in self.days]
+        self.owners = {}  # (resource, key, day) -> [class index or FIXED per cell]
+        self.positions = {}  # class index -> (start cell, day pattern, room index)
+
+        self.classes = []
+        self.unplaceable = []
+        for data in problem['classes']:
+            self._add_class(data)
+
+        for class_id, day, start, end, room, faculty_id, section_id in problem.get('fixed', []):
+            if day not in self.days:
+                continue
+            first = max(0, (start - self.day_start) // self.slot)
+            last = min(self.cell_count, -(-(end - self.day_start) // self.slot))
+            if last <= first:
+                continue
+            day_index = self.days.index(day)
+            resources = [('section', section_id), ('faculty', faculty_id), ('room', room_index.get(_room_key(room)))]
+            for resource, key in resources:
+                if key is not None:
+                    self._occupy((resource, key, day_index), first, last - first, FIXED)
+
+    def _add_class(self, data):
+        kind = data.get('kind', LECTURE)
+        if data['minutes'] <= 0:
+            self.unplaceable.append((data, "The course has no hours for this class"))
+            return
+        lengths = meeting_lengths(data['minutes'], kind, self.config)
+        if len(lengths) > len(self.days):
+            self.unplaceable.append((data, f"{len(lengths)} meetings don't fit in {len(self.days)} days"))
+            return
+        if max(lengths) > self.cell_count:
+            self.unplaceable.append((data, "A meeting is longer than the teaching day"))
+            return
+        rooms = [
+            index for index, room in enumerate(self.rooms)
+            if room['capacity'] >= data.get('size', 0) and room.get('type') in (None, '', kind)
+        ]
+        if self.use_rooms and not rooms:
+            self.unplaceable.append((data, f"No {kind} room holds {data.get('size', 0)} students"))
+            return
+        patterns = day_patterns(len(lengths), len(self.days))
+        self.classes.append(_Class(len(self.classes), data, lengths, patterns, rooms))
+
+    # ---- grid ----
+
+    def _occupy(self, key, start, length, owner):
+        self.masks[key] |= ((1 << length) - 1) << start
+        cells = self.owners.get(key)
+        if cells is None:
+            cells = self.owners[key] = [None] * self.cell_count
+        cells[start:start + length] = [owner] * length
+        resource, room, day = key
+        if resource == 'room':
+            busy = self.busy_rooms[day]
+            for cell in range(start, start + length):
+                busy[cell] |= 1 << room
+
+    def _release(self, key, start, length):
+        self.masks[key] &= ~(((1 << length) - 1) << start)
+        self.owners[key][start:start + length] = [None] * length
+        resource, room, day = key
+        if resource == 'room':
+            busy = self.busy_rooms[day]
+            for cell in range(start, start + length):
+                busy[cell] &= ~(1 << room)
+
+    def _keys(self, cls, day, room):
+        keys = []
+        if cls.section is not None:
+            keys.append(('section', cls.section, day))
+        if cls.faculty is not None:
+            keys.append(('faculty', cls.faculty, day))
+        if room is not None:
+            keys.append(('room', room, day))
+        return keys
+
+    def place(self, cls, start, pattern, room):
+        for day, length in zip(pattern, cls.lengths):
+            for key in self._keys(cls, day, room):
+                self._occupy(key, start, length, cls.index)
+        self.positions[cls.index] = (start, pattern, room)
+
+    def unplace(self, cls):
+        start, pattern, room = self.positions.pop(cls.index)
+        for day, length in zip(pattern, cls.lengths):
+            for key in self._keys(cls, day, room):
+                self._release(key, start, length)
+
+    def restore(self, positions):
+        """Move every class back to positions (class index -> position)"""
+        for index in list(self.positions):
+            self.unplace(self.classes[index])
+        for index, position in positions.items():
+            self.place(self.classes[index], *position)
+
+    def _starts(self, cls):
+        return range(self.cell_count - max(cls.lengths) + 1)
+
+    def _time_free(self, cls, start, pattern):
+        masks = self.masks
+        for day, length in zip(pattern, cls.lengths):
+            bits = ((1 << length) - 1) << start
+            if cls.section is not None and masks[('section', cls.section, day)] & bits:
+                return False
+            if cls.faculty is not None and masks[('faculty', cls.faculty, day)] & bits:
+                return False
+        return True
+
+    def _free_room(self, cls, start, pattern):
+        """Smallest usable room free at every meeting of a position, or None"""
+        busy = 0
+        for day, length in zip(pattern, cls.lengths):
+            cells = self.busy_rooms[day]
+            for cell in range(start, start + length):
+                busy |= cells[cell]
+        free = cls.room_mask & ~busy
+        return (free & -free).bit_length() - 1 if free else None
+
+    def first_fit(self, cls):
+        """Earliest (start, pattern, room) with everything free, or None"""
+        for start in self._starts(cls):
+            for pattern in cls.patterns:
+                if not self._time_free(cls, start, pattern):
+                    continue
+                if not self.use_rooms:
+                    return start, pattern, None
+                room = self._free_room(cls, start, pattern)
+                if room is not None:
+                    return start, pattern, room
+        return None
+
+    def _blockers(self, key, start, length, found):
+        """Add the classes occupying cells of key to found; False if a fixed schedule does"""
+        if not self.masks[key] & (((1 << length) - 1) << start):
+            return True
+        for owner in self.owners[key][start:start + length]:
+            if owner is not None:
+                if owner == FIXED:
+                    return False
+                found.add(owner)
+        return True
+
+    def least_blocked(self, cls, evictions):
+        """
+        (start, pattern, room, blocking class indexes) of the position whose
+        blockers are fewest and least often evicted, or None if fixed
+        schedules block every position.
+        """
+        best = None
+        best_score = None
+        for start in self._starts(cls):
+            for pattern in cls.patterns:
+                blockers = set()
+                blocked = False
+                for day, length in zip(pattern, cls.lengths):
+                    for key in self._keys(cls, day, None):
+                        if not self._blockers(key, start, length, blockers):
+                            blocked = True
+                            break
+                    if blocked:
+                        break
+                if blocked:
+                    continue
+                score = sum(1 + evictions[index] for index in blockers)
+                if best_score is not None and score > best_score:
+                    continue
+
+                room = None
+                if self.use_rooms:
+                    room, room_blockers = self._least_blocked_room(cls, start, pattern, blockers)
+                    if room is None:
+                        continue
+                    blockers |= room_blockers
+                    score = sum(1 + evictions[index] for index in blockers)
+
+                score += self.random.random()
+                if best_score is None or score < best_score:
+                    best, best_score = (start, pattern, room, blockers), score
+        return best
+
+    def _least_blocked_room(self, cls, start, pattern, already):
+        """(room, extra blockers) for a time position, checking a sample of the usable rooms"""
+        room = self._free_room(cls, start, pattern)
+        if room is not None:
+            return room, set()
+        candidates = cls.rooms if len(cls.rooms) <= 8 else cls.rooms[:4] + self.random.sample(cls.rooms[4:], 4)
+        best = (None, None)
+        for room in candidates:
+            blockers = set()
+            if all(
+                self._blockers(('room', room, day), start, length, blockers)
+                for day, length in zip(pattern, cls.lengths)
+            ):
+                blockers -= already
+                if best[0] is None or len(blockers) < len(best[1]):
+                    best = (room, blockers)
+        return best
+
+    # ---- phases ----
+
+    def solve(self, time_limit):
+        started = time.monotonic()
+        deadline = started + time_limit
+        total = len(self.classes)
+
+        faculty_load = Counter(cls.faculty for cls in self.classes)
+        order = sorted(
+            self.classes,
+            key=lambda cls: (len(cls.rooms), -sum(cls.lengths) * len(cls.lengths), -faculty_load[cls.faculty], cls.id)
+        )
+        unplaced = []
+        for done, cls in enumerate(order, start=1):
+            position = self.first_fit(cls)
+            if position is None:
+                unplaced.append(cls)
+            else:
+                self.place(cls, *position)
+            if done % 50 == 0 or done == total:
+                self.progress(int(60 * done / max(total, 1)), f"Placed {done - len(unplaced)} of {total} classes")
+        greedy_unplaced = len(unplaced)
+
+        # Repair: evict and requeue the cheapest blockers until everything is placed
+        stuck = []
+        pending = deque(unplaced)
+        evictions = Counter()
+        iterations = 0
+        max_iterations = 50 * max(total, 1)
+        best_unplaced, best_positions = len(pending), dict(self.positions)
+        while pending and iterations < max_iterations and time.monotonic() < deadline:
+            cls = pending.popleft()
+            iterations += 1
+            best = self.least_blocked(cls, evictions)
+            if best is None:
+                stuck.append(cls)
+                continue
+            start, pattern, room, blockers = best
+            for index in blockers:
+                blocker = self.classes[index]
+                self.unplace(blocker)
+                evictions[index] += 1
+                pending.append(blocker)
+            self.place(cls, start, pattern, room)
+            if len(pending) + len(stuck) < best_unplaced:
+                best_unplaced, best_positions = len(pending) + len(stuck), dict(self.positions)
+            if iterations % 25 == 0:
+                remaining = len(pending) / max(greedy_unplaced, 1)
+                self.progress(60 + int(35 * max(0.0, 1 - remaining)), f"Repairing: {len(pending)} classes left to place")
+        if len(pending) + len(stuck) > best_unplaced:
+            # Out of time in a worse state than one already seen
+            self.restore(best_positions)
+        unplaced = [cls for cls in self.classes if cls.index not in self.positions]
+
+        # Compaction: move late classes earlier where there's room now
+        late_cell = (self.config['LATE_AFTER'] - self.day_start) // self.slot
+        for index, (start, pattern, room) in list(self.positions.items()):
+            cls = self.classes[index]
+            if start + max(cls.lengths) <= late_cell or time.monotonic() >= deadline:
+                continue
+            self.unplace(cls)
+            self.place(cls, *(self.first_fit(cls) or (start, pattern, room)))
+        self.progress(100, "Done")
+
+        return self.result(unplaced, {
+            'greedy_placed': total - greedy_unplaced,
+            'repair_iterations': iterations,
+            'seconds': round(time.monotonic() - started, 2),
+        })
+
+    def result(self, unplaced, stats):
+        slots = []
+        for index, (start, pattern, room) in self.positions.items():
+            cls = self.classes[index]
+            for day, length in zip(pattern, cls.lengths):
+                slots.append({
+                    'class_id': cls.id,
+                    'day': self.days[day],
+                    'start_minute': self.day_start + start * self.slot,
+                    'end_minute': self.day_start + (start + length) * self.slot,
+                    'room': self.rooms[room]['name'] if room is not None else '',
+                })
+        late = self.config['LATE_AFTER']
+        stats.update({
+            'classes': len(self.classes) + len(self.unplaceable),
+            'placed': len(self.positions),
+            'meetings': len(slots),
+            'late_meetings': sum(slot['end_minute'] > late for slot in slots),
+        })
+        return {
+            'slots': slots,
+            'unplaced': [
+                {'class_id': data['id'], 'label': data.get('label', ''), 'reason': reason}
+                for data, reason in self.unplaceable
+            ] + [
+                {'class_id': cls.id, 'label': cls.label, 'reason': "No conflict-free position was found"}
+                for cls in unplaced
+            ],
+            'stats': stats,
+        }
+
+
+def count_conflicts(problem, slots):
+    """Conflicts between solved slots and each other or the fixed schedules, by ScheduleIndex"""
+    classes = {data['id']: data for data in problem['classes']}
+    index = ScheduleIndex(
+        Slot(class_id, day, start, end, room, faculty_id, section_id, None)
+        for class_id, day, start, end, room, faculty_id, section_id in problem.get('fixed', [])
+    )
+    solved = []
+    for slot in slots:
+        data = classes[slot['class_id']]
+        solved.append(Slot(
+            slot['class_id'], slot['day'], slot['start_minute'], slot['end_minute'], slot['room'],
+            data.get('faculty_id'), data.get('section_id'), None
+        ))
+        index.add(solved[-1])
+    # Each conflict between two solved slots is seen from both sides
+    return sum(len(index.clashes(slot)) for slot in solved)
+
+
+def solve(problem, config=None, progress=None):
+    """
+    Timetable for a problem:
+    {
+        "rooms": [{"name", "capacity", "type": "lec" | "lab" | None}],
+        "classes": [{"id", "label", "kind": "lec" | "lab", "minutes" (weekly),
+                     "size", "faculty_id", "section_id"}],
+        "fixed": [(class ID, day, start minute, end minute, room, faculty ID, section ID)]
+    }
+    Returns {"slots": [{"class_id", "day", "start_minute", "end_minute", "room"}],
+    "unplaced": [{"class_id", "label", "reason"}], "stats": {...}}.
+    progress(percent, message) is called as the solver goes.
+    """
+    config = config or get_config()
+    solver = TimetableSolver(problem, config, progress)
+    result = solver.solve(config['TIME_LIMIT'])
+    result['stats']['conflicts'] = count_conflicts(problem, result['slots'])
+    return result
+
+
+# ---- database ----
+
+def load_problem(semester_id, rooms, reschedule=False):
+    """
+    Problem (see solve()) for a semester's classes. Without reschedule only
+    classes that have no schedule yet are solved; the others are fixed.
+    """
+    from django.db.models import Exists, OuterRef
+    from .models import Class, ClassSchedule
+
+    classes = Class.objects.filter(semester_id=semester_id).select_related('course', 'section').annotate(
+        has_schedule=Exists(ClassSchedule.objects.filter(class_instance=OuterRef('pk')))
+    )
+    solved = []
+    for class_instance in classes:
+        if class_instance.has_schedule and not reschedule:
+            continue
+        section = class_instance.section
+        is_lab = section.type == LAB or class_instance.lecture_class_id is not None
+        course = class_instance.course
+        solved.append({
+            'id': class_instance.pk,
+            'label': f"{course.pk} ({section.name})",
+            'kind': LAB if is_lab else LECTURE,
+            'minutes': (course.lab_hours if is_lab else course.lec_hours) * 60,
+            'size': section.capacity,
+            'faculty_id': class_instance.faculty_id,
+            'section_id': class_instance.section_id,
+        })
+
+    fixed = []
+    if not reschedule:
+        fixed = list(
+            ClassSchedule.objects.filter(class_instance__semester_id=semester_id).values_list(
+                'class_instance_id', 'day', 'start_minute', 'end_minute', 'room',
+                'class_instance__faculty_id', 'class_instance__section_id'
+            )
+        )
+    return {'rooms': rooms, 'classes': solved, 'fixed': fixed}
+
+
+def _set_progress(draft_id, percent, message):
+    from .models import TimetableDraft
+
+    TimetableDraft.objects.filter(pk=draft_id).update(
+        status=TimetableDraft.Status.RUNNING, progress=percent, message=message[:255]
+    )
+
+
+def save_result(draft_id, result):
+    """Store a solver result as the draft's slots"""
+    from django.db import transaction
+    from django.utils import timezone
+    from .models import TimetableDraft, TimetableDraftSlot
+
+    with transaction.atomic():
+        TimetableDraftSlot.objects.filter(draft_id=draft_id).delete()
+        TimetableDraftSlot.objects.bulk_create(
+            [
+                TimetableDraftSlot(
+                    draft_id=draft_id, class_instance_id=slot['class_id'], day=slot['day'],
+                    start_minute=slot['start_minute'], end_minute=slot['end_minute'], room=slot['room']
+                )
+                for slot in result['slots']
+            ],
+            batch_size=1000
+        )
+        stats = dict(result['stats'], unplaced=result['unplaced'])
+        if stats.get('conflicts'):
+            draft_status = TimetableDraft.Status.FAILED
+            message = f"The timetable has conflicting meetings ({stats['conflicts']}) and can't be applied"
+        else:
+            draft_status = TimetableDraft.Status.DONE
+            message = f"Placed {stats['placed']} of {stats['classes']} classes"
+        TimetableDraft.objects.filter(pk=draft_id).update(
+            status=draft_status, progress=100, stats=stats, finished_at=timezone.now(), message=message
+        )
+
+
+def _fail(draft_id, message):
+    from django.utils import timezone
+    from .models import TimetableDraft
+
+    TimetableDraft.objects.filter(pk=draft_id).update(
+        status=TimetableDraft.Status.FAILED, message=message[:255], finished_at=timezone.now()
+    )
+
+
+def _solve_in_worker(problem, config, messages):
+    """Worker process: solve and send ('progress', percent, message), then ('done', result) or ('failed', error)"""
+    last = [None]
+
+    def progress(percent, message):
+        if percent != last[0]:
+            last[0] = percent
+            messages.put(('progress', percent, message))
+
+    try:
+        messages.put(('done', solve(problem, config, progress)))
+    except Exception:
+        messages.put(('failed', traceback.format_exc()))
+
+
+def _watch(draft_id, process, messages):
+    """Web-process thread storing a worker's progress and result on the draft"""
+    from django.db import connection
+
+    try:
+        while True:
+            try:
+                message = messages.get(timeout=1)
+            except queue.Empty:
+                if not process.is_alive():
+                    _fail(draft_id, f"The solver process exited unexpectedly (exit code {process.exitcode})")
+                    return
+                continue
+            if message[0] == 'progress':
+                _set_progress(draft_id, message[1], message[2])
+            elif message[0] == 'done':
+                save_result(draft_id, message[1])
+                return
+            else:
+                logger.error("Timetable solver failed for draft %s:\n%s", draft_id, message[1])
+                _fail(draft_id, message[1].strip().splitlines()[-1])
+                return
+    except Exception:
+        logger.exception("Storing the timetable of draft %s failed", draft_id)
+        _fail(draft_id, "Storing the timetable failed")
+    finally:
+        process.join(timeout=5)
+        connection.close()
+
+
+def start_solving(draft):
+    """Solve a queued draft, in a worker process once the current transaction commits"""
+    from django.db import transaction
+
+    config = get_config()
+    problem = load_problem(draft.semester_id, draft.rooms, reschedule=draft.reschedule)
+    if not config['BACKGROUND']:
+        try:
+            save_result(draft.pk, solve(problem, config, lambda percent, message: None))
+        except Exception as e:
+            logger.exception("Timetable solver failed for draft %s", draft.pk)
+            _fail(draft.pk, str(e))
+        return
+
+    def launch():
+        # Spawned, not forked: the web process runs request and background threads
+        context = multiprocessing.get_context('spawn')
+        messages = context.Queue()
+        process = context.Process(target=_solve_in_worker, args=(problem, config, messages), daemon=True)
+        process.start()
+        threading.Thread(
+            target=_watch, args=(draft.pk, process, messages), name=f'timetable-solver-{draft.pk}', daemon=True
+        ).start()
+
+    transaction.on_commit(launch)
+
+
+def apply_draft(draft):
+    """
+    Replace the schedules of the draft's classes with its slots. Returns the
+    conflicts (see schedule_conflicts.describe_conflict) between its slots or
+    with schedules that changed since the draft was made; nothing is saved
+    if there are any.
+    """
+    from django.db import transaction
+    from .models import ClassSchedule, TimetableDraft
+
+    slots = list(draft.slots.select_related('class_instance__section'))
+    class_ids = {slot.class_instance_id for slot in slots}
+    proposed = [
+        Slot(
+            slot.class_instance_id, slot.day, slot.start_minute, slot.end_minute, slot.room,
+            slot.class_instance.faculty_id, slot.class_instance.section_id,
+            f"{slot.class_instance.course_id} ({slot.class_instance.section.name})"
+        )
+        for slot in slots
+    ]
+    with transaction.atomic():
+        index = ScheduleIndex.for_semester(draft.semester_id, exclude_class_ids=class_ids)
+        conflicts = []
+        for slot in proposed:
+            # Against the other classes' schedules and the draft's slots before it
+            conflicts += index.conflicts([slot])
+            index.add(slot)
+        if conflicts:
+            return conflicts
+        ClassSchedule.objects.filter(class_instance_id__in=class_ids).delete()
+        ClassSchedule.objects.bulk_create(
+            [
+                ClassSchedule(
+                    class_instance_id=slot.class_instance_id, day=slot.day,
+                    start_minute=slot.start_minute, end_minute=slot.end_minute, room=slot.room
+                )
+                for slot in slots
+            ],
+            batch_size=1000
+        )
+        TimetableDraft.objects.filter(pk=draft.pk).update(status=TimetableDraft.Status.APPLIED)
+    return []
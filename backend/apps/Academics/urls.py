@@ -19,7 +19,10 @@ from .views import (
     ScoreDetailAPIView,
     BulkScoreCreateAPIView,
     BulkScoreUploadAPIView,
+    ScoreImportAPIView,
     StudentGradesSummaryAPIView,
+    ClassGradesAPIView,
+    ClassGradebookAPIView,
     ClassStudentsListAPIView,
     EnrollmentListCreateAPIView,
     EnrollmentDetailAPIView,
@@ -27,6 +30,11 @@ from .views import (
     AttendanceListCreateAPIView,
     AttendanceDetailAPIView,
     BulkAttendanceAPIView,
+    BulkAttendanceDaysAPIView,
+    TimetableAPIView,
+    TimetableDraftDetailAPIView,
+    TimetableDraftApplyAPIView,
+    SemesterRolloverAPIView,
 )
 
 
@@ -62,6 +70,10 @@ router.register(r'classes', ClassViewSet, basename='class')
 urlpatterns = [
     path('active-semester/', ActiveSemesterRetrieveAPIView.as_view(), name='active-semester-retrieve-api-view'),
     path('curriculums/courses/', CurriculumCourseListAPIView.as_view(), name='curriculum-course-list-api-view'),
+    path('semesters/<int:semester_id>/rollover/', SemesterRolloverAPIView.as_view(), name='semester-rollover'),
+    path('semesters/<int:semester_id>/timetable/', TimetableAPIView.as_view(), name='semester-timetable'),
+    path('timetable-drafts/<int:pk>/', TimetableDraftDetailAPIView.as_view(), name='timetable-draft-detail'),
+    path('timetable-drafts/<int:pk>/apply/', TimetableDraftApplyAPIView.as_view(), name='timetable-draft-apply'),
     # path('sections/', SectionListCreateAPIView.as_view(), name='section-list-api-view'),
     # path('sections/<int:pk>/', SectionRetrieveUpdateDestroyAPIView.as_view(), name='section-retrieve-update-delete-api-view'),
 
@@ -141,12 +153,27 @@ urlpatterns = [
         BulkScoreUploadAPIView.as_view(),
         name='score-bulk-upload'
     ),
+    path(
+        'classes/<int:class_id>/scores/import/',
+        ScoreImportAPIView.as_view(),
+        name='score-import'
+    ),
     
     path(
         'classes/<int:class_id>/students/<int:student_id>/grades/',
         StudentGradesSummaryAPIView.as_view(),
         name='student-grades-summary'
     ),
+    path(
+        'classes/<int:class_id>/grades/',
+        ClassGradesAPIView.as_view(),
+        name='class-grades'
+    ),
+    path(
+        'classes/<int:class_id>/gradebook/',
+        ClassGradebookAPIView.as_view(),
+        name='class-gradebook'
+    ),
     
 
     path(
@@ -188,6 +215,11 @@ urlpatterns = [
         BulkAttendanceAPIView.as_view(),
         name='attendance-bulk-create'
     ),
+    path(
+        'classes/<int:class_id>/attendance/bulk-days/',
+        BulkAttendanceDaysAPIView.as_view(),
+        name='attendance-bulk-days'
+    ),
     
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from django.shortcuts import render
 
 # views.py
 from rest_framework import viewsets, status, generics
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
@@ -9,12 +10,24 @@ from .models import ScheduleBlock, ScheduleEntry, Semester
 from .serializers import *
 from django.shortcuts import get_object_or_404
 
+from django.db import IntegrityError
 from django.db.models import Prefetch, Q
-from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .attendance import upsert_attendance
+from .grade_cache import get_grades, invalidate_grades
+from .grades import gradebook_payload, gradebook_version, load_gradebook, student_name
+from .schedule_conflicts import find_conflicts
+from .scores import ScoreImportError, import_scores, read_rows, upsert_scores
+from .rollover import RolloverError, rollover
+from .timetable import apply_draft, start_solving
 
 from .models import (
     GradingRubric, RubricComponent, Topic, Material,
-    Assessment, Score, Class, Enrollment, Attendance
+    Assessment, Score, Class, Enrollment, Attendance, TimetableDraft, TimetableDraftSlot
 )
 from .serializers import (
     GradingRubricSerializer, GradingRubricCreateSerializer,
@@ -25,11 +38,14 @@ from .serializers import (
     AssessmentSerializer, AssessmentListSerializer,
     AssessmentCreateUpdateSerializer, ScoreSerializer,
     ScoreListSerializer, ScoreCreateUpdateSerializer,
-    BulkScoreCreateSerializer, BulkScoreUploadSerializer,
-    StudentGradesSummarySerializer,
-    ClassSerializer, ClassCreateSerializer, ClassUpdateSerializer,
+    BulkScoreCreateSerializer, BulkScoreUploadSerializer, ScoreImportSerializer,
+    StudentGradesSummarySerializer, ClassGradesSerializer,
+    ClassSerializer, ClassListSerializer, ClassCreateSerializer, ClassUpdateSerializer,
+    ScheduleConflictCheckSerializer,
     EnrollmentSerializer, EnrollmentCreateSerializer, BulkEnrollmentSerializer,
-    AttendanceSerializer, AttendanceCreateUpdateSerializer, BulkAttendanceSerializer
+    AttendanceSerializer, AttendanceCreateUpdateSerializer, BulkAttendanceSerializer,
+    BulkAttendanceDaysSerializer, TimetableSolveSerializer, TimetableDraftSerializer,
+    TimetableDraftListSerializer, SemesterRolloverSerializer
 )
 
 
@@ -88,6 +104,50 @@ class SemesterViewSet(BaseCRUDViewSet):
             return SemesterUpdateSerializer
         return SemesterSerializer
 
+class SemesterRolloverAPIView(APIView):
+    """
+    Copy a semester's sections, classes and grading rubrics into another
+    semester (admin only). See rollover.py.
+
+    URL: /api/academics/semesters/{semester_id}/rollover/
+
+    POST:
+    Request body:
+    {
+        "target_semester": 2,  (or "new_semester": {"term", "start_date", "end_date", "academic_year", "is_active"})
+        "include_faculty": true,
+        "include_schedules": false,
+        "dry_run": false  (true only reports what would be created)
+    }
+    Response: the sections and classes created and already existing, and the
+    number of rubrics, rubric components and schedules created.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, semester_id):
+        source = get_object_or_404(Semester, pk=semester_id)
+        serializer = SemesterRolloverSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        target = data['target_semester'] or Semester(**data['new_semester'])
+        try:
+            report = rollover(
+                source, target,
+                include_faculty=data['include_faculty'],
+                include_schedules=data['include_schedules'],
+                dry_run=data['dry_run']
+            )
+        except RolloverError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response(
+                {"error": "The target semester changed during the rollover, please try again."},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(report, status=status.HTTP_200_OK if data['dry_run'] else status.HTTP_201_CREATED)
+
 class ActiveSemesterRetrieveAPIView(generics.RetrieveAPIView):
     """
     API endpoint for retrieving the active semester.
@@ -194,10 +254,19 @@ class ClassViewSet(BaseCRUDViewSet):
     POST: Create a new class (admin only)
     PUT/PATCH: Update a class (admin only)
     DELETE: Delete a class (admin only)
+
+    Creating or updating a class with schedules is rejected if they conflict
+    with another class's room, faculty or section (see schedule_conflicts.py).
     """
-    queryset = Class.objects.select_related(
-        'course', 'faculty', 'section', 'semester', 'lecture_class'
-    ).all()
+    queryset = Class.objects.all()
+
+    # Everything ClassListSerializer / ClassSerializer read, so listing takes
+    # a fixed number of queries (one, plus one for the schedules)
+    list_related = ['course', 'section__curriculum__program', 'faculty__user', 'lecture_class']
+    detail_related = [
+        'course__curriculum__program', 'section__curriculum__program', 'section__semester',
+        'semester', 'faculty__user', 'lecture_class__course'
+    ]
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -205,13 +274,24 @@ class ClassViewSet(BaseCRUDViewSet):
             return ClassCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return ClassUpdateSerializer
+        elif self.action == 'list' and not self.wants_details():
+            return ClassListSerializer
         return ClassSerializer
+
+    def wants_details(self):
+        """?details=true lists classes with the full ClassSerializer"""
+        return self.request.query_params.get('details', '').lower() in ('1', 'true')
     
     def get_queryset(self):
         """
         Optionally filter classes by semester, section, course, or faculty.
         """
         queryset = super().get_queryset()
+        if self.action == 'list' and not self.wants_details():
+            queryset = queryset.select_related(*self.list_related)
+        else:
+            queryset = queryset.select_related(*self.detail_related)
+        queryset = queryset.prefetch_related('schedules')
         
         # Filter by semester
         semester_id = self.request.query_params.get('semester')
@@ -235,6 +315,118 @@ class ClassViewSet(BaseCRUDViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['post'], url_path='check-conflicts')
+    def check_conflicts(self, request):
+        """
+        POST /api/academics/classes/check-conflicts/
+        Check proposed schedules without saving anything.
+
+        Request body:
+        {
+            "semester": 1, "section": 2, "faculty": 3,
+            "class_instance": 4,  (optional: the class being edited)
+            "schedules": [{"day": "mon", "start_time": "08:00", "end_time": "09:30", "room": "CL1"}]
+        }
+
+        Response:
+        {"has_conflicts": true, "conflicts": [{"type": "room", "day": "mon", ..., "message": "..."}]}
+        """
+        serializer = ScheduleConflictCheckSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        class_instance = data.get('class_instance')
+        conflicts = find_conflicts(
+            data['semester'].pk, data['slots'], exclude_class_id=class_instance.pk if class_instance else None
+        )
+        return Response({"has_conflicts": bool(conflicts), "conflicts": conflicts}, status=status.HTTP_200_OK)
+
+
+class TimetableAPIView(APIView):
+    """
+    Timetable drafts of a semester (admin only). See timetable.py.
+
+    URL: /api/academics/semesters/{semester_id}/timetable/
+
+    GET: List the semester's drafts, newest first.
+
+    POST: Start the solver on the semester's classes. It runs in the
+    background; poll the draft (timetable-drafts/{id}/) for its progress.
+    Request body:
+    {
+        "rooms": [{"name": "ENG-201", "capacity": 60, "type": null}],
+        "reschedule": false  (true also moves classes that already have schedules)
+    }
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, semester_id):
+        drafts = TimetableDraft.objects.filter(semester_id=semester_id)
+        return Response(TimetableDraftListSerializer(drafts, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request, semester_id):
+        semester = get_object_or_404(Semester, pk=semester_id)
+        serializer = TimetableSolveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        draft = TimetableDraft.objects.create(
+            semester=semester,
+            rooms=serializer.validated_data['rooms'],
+            reschedule=serializer.validated_data['reschedule'],
+            created_by=request.user
+        )
+        start_solving(draft)
+        draft.refresh_from_db()
+        return Response(TimetableDraftSerializer(draft).data, status=status.HTTP_202_ACCEPTED)
+
+
+class TimetableDraftDetailAPIView(generics.RetrieveDestroyAPIView):
+    """
+    GET: A timetable draft with its progress and, once solved, its slots.
+    DELETE: Discard a draft.
+
+    URL: /api/academics/timetable-drafts/{id}/
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = TimetableDraftSerializer
+    queryset = TimetableDraft.objects.prefetch_related(
+        Prefetch('slots', queryset=TimetableDraftSlot.objects.select_related('class_instance__section'))
+    )
+
+
+class TimetableDraftApplyAPIView(APIView):
+    """
+    POST: Replace the schedules of the draft's classes with the draft's slots.
+    Only finished drafts can be applied (a draft whose timetable has
+    conflicts is marked failed). Fails with 409 and the conflicts if other
+    classes' schedules changed so that the draft no longer fits.
+
+    URL: /api/academics/timetable-drafts/{id}/apply/
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, pk):
+        draft = get_object_or_404(TimetableDraft, pk=pk)
+        if draft.status != TimetableDraft.Status.DONE:
+            return Response(
+                {"error": f"Only finished drafts can be applied (this one is {draft.get_status_display().lower()})."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        conflicts = apply_draft(draft)
+        if conflicts:
+            return Response(
+                {"error": "The draft's slots conflict with each other or with schedules changed since it was made.",
+                 "conflicts": conflicts},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            {"message": f"Applied timetable draft {draft.pk}.", "slots": draft.slots.count()},
+            status=status.HTTP_200_OK
+        )
+
 
 class EnrollmentListCreateAPIView(generics.ListCreateAPIView):
     """
@@ -435,35 +627,19 @@ class BulkAttendanceAPIView(APIView):
         serializer = BulkAttendanceSerializer(data=data)
         serializer.is_valid(raise_exception=True)
         
-        # Process attendance records
         class_instance = serializer.validated_data['class_instance']
         date = serializer.validated_data['date']
         attendance_records = serializer.validated_data['attendance_records']
         
-        # Update or create attendance records
-        created_count = 0
-        updated_count = 0
-        
-        for record in attendance_records:
-            student_id = int(record['student'])
-            status = record['status']
-            remarks = record.get('remarks', '')
-            
-            attendance, created = Attendance.objects.update_or_create(
-                class_instance=class_instance,
-                student_id=student_id,
-                date=date,
-                defaults={
-                    'status': status,
-                    'remarks': remarks,
-                    'updated_by': request.user
-                }
-            )
-            
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        # One upsert for every record instead of update_or_create per student
+        created_count, updated_count = upsert_attendance(
+            class_instance,
+            (
+                (record['student'], date, record['status'], record.get('remarks', ''))
+                for record in attendance_records
+            ),
+            request.user
+        )
         
         return Response({
             'message': f'Attendance recorded successfully',
@@ -475,6 +651,65 @@ class BulkAttendanceAPIView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class BulkAttendanceDaysAPIView(APIView):
+    """
+    API endpoint for recording attendance for several dates at once,
+    e.g. saving a whole week of the attendance grid in one request.
+    
+    POST: Record attendance for multiple students on multiple dates (admin/faculty only)
+    """
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request, class_id):
+        """
+        Bulk record attendance for students on several dates.
+        
+        Request body:
+        {
+            "days": [
+                {
+                    "date": "2025-12-01",
+                    "attendance_records": [
+                        {"student": 1, "status": "present", "remarks": ""},
+                        ...
+                    ]
+                },
+                {"date": "2025-12-02", "attendance_records": [...]},
+                ...
+            ]
+        }
+        """
+        data = {
+            'class_instance': class_id,
+            'days': request.data.get('days', [])
+        }
+        
+        serializer = BulkAttendanceDaysSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        
+        class_instance = serializer.validated_data['class_instance']
+        days = serializer.validated_data['days']
+        
+        created_count, updated_count = upsert_attendance(
+            class_instance,
+            (
+                (record['student'], day['date'], record['status'], record.get('remarks', ''))
+                for day in days
+                for record in day['attendance_records']
+            ),
+            request.user
+        )
+        
+        return Response({
+            'message': f'Attendance recorded successfully for {len(days)} dates',
+            'created': created_count,
+            'updated': updated_count,
+            'total': created_count + updated_count,
+            'class_id': class_id,
+            'dates': sorted(day['date'] for day in days)
+        }, status=status.HTTP_201_CREATED)
+
+
 class CurriculumCourseListAPIView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = CurriculumCourseSerializer
@@ -599,11 +834,9 @@ class ScheduleEntryViewSet(viewsets.ModelViewSet):
 
 def is_faculty_of_class(user, class_id):
     """Check if user is the faculty assigned to the class"""
-    if not hasattr(user, 'facultyprofile'):
-        return False
     return Class.objects.filter(
         id=class_id, 
-        faculty=user.facultyprofile
+        faculty__user=user
     ).exists()
 
 
@@ -1141,53 +1374,19 @@ class BulkScoreCreateAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get all enrolled students
-        enrollments = Enrollment.objects.filter(enrolled_class_id=class_id)
-        
-        # Bulk create/update scores
-        scores_to_create = []
-        scores_to_update = []
-        
-        for enrollment in enrollments:
-            student = enrollment.student
-            
-            # Check if score already exists
-            try:
-                existing_score = Score.objects.get(
-                    student=student,
-                    assessment=assessment
-                )
-                existing_score.points = points
-                existing_score.is_published = is_published
-                existing_score.uploaded_by = user
-                scores_to_update.append(existing_score)
-            except Score.DoesNotExist:
-                scores_to_create.append(
-                    Score(
-                        class_instance_id=class_id,
-                        student=student,
-                        assessment=assessment,
-                        points=points,
-                        is_published=is_published,
-                        uploaded_by=user
-                    )
-                )
-        
-        # Perform bulk operations
-        if scores_to_create:
-            Score.objects.bulk_create(scores_to_create)
-        
-        if scores_to_update:
-            Score.objects.bulk_update(
-                scores_to_update, 
-                ['points', 'is_published', 'uploaded_by', 'updated_at']
-            )
+        # One pre-read and one upsert for the whole class
+        student_ids = Enrollment.objects.filter(enrolled_class_id=class_id).values_list('student_id', flat=True)
+        created, updated = upsert_scores(
+            class_id,
+            ((student_id, assessment.id, points, is_published) for student_id in student_ids),
+            user
+        )
         
         return Response(
             {
-                "message": f"Bulk created/updated scores for {len(scores_to_create) + len(scores_to_update)} students.",
-                "created": len(scores_to_create),
-                "updated": len(scores_to_update)
+                "message": f"Bulk created/updated scores for {created + updated} students.",
+                "created": created,
+                "updated": updated
             },
             status=status.HTTP_200_OK
         )
@@ -1236,7 +1435,8 @@ class BulkScoreUploadAPIView(APIView):
         updated_count = Score.objects.filter(
             class_instance_id=class_id,
             assessment_id=assessment_id
-        ).update(is_published=True)
+        ).update(is_published=True, updated_at=timezone.now())
+        invalidate_grades(class_id)
         
         return Response(
             {
@@ -1247,6 +1447,63 @@ class BulkScoreUploadAPIView(APIView):
         )
 
 
+class ScoreImportAPIView(APIView):
+    """
+    POST: Import scores from a CSV or XLSX file (multipart/form-data).
+    The first row holds an id_number column and one column per assessment,
+    titled with the assessment's title (or ID). Rows are matched to enrolled
+    students by ID number; empty cells are skipped. See scores.py.
+    
+    URL: /api/academics/classes/{class_id}/scores/import/
+    
+    Form fields:
+        file: the .csv or .xlsx file
+        is_published: publish the imported scores (default false)
+        dry_run: validate and count without saving (default false)
+    
+    Response:
+    {
+        "rows": 120, "created": 300, "updated": 60,
+        "columns": {"Quiz 1": 4, ...}, "ignored_columns": ["full_name"],
+        "error_count": 1,
+        "errors": [{"row": 7, "column": "Quiz 1", "error": "..."}],
+        "dry_run": false
+    }
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, class_id):
+        user = request.user
+        
+        # Permission check
+        if not (user.is_staff or is_faculty_of_class(user, class_id)):
+            return Response(
+                {"error": "Only faculty can import scores."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        class_instance = get_object_or_404(Class, id=class_id)
+        
+        serializer = ScoreImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        uploaded_file = serializer.validated_data['file']
+        dry_run = serializer.validated_data['dry_run']
+        try:
+            report = import_scores(
+                class_instance,
+                read_rows(uploaded_file, uploaded_file.name),
+                user,
+                is_published=serializer.validated_data['is_published'],
+                dry_run=dry_run
+            )
+        except ScoreImportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({**report.as_dict(), "dry_run": dry_run}, status=status.HTTP_200_OK)
+
+
 class StudentGradesSummaryAPIView(APIView):
     """
     GET: Retrieve comprehensive grade summary for a student in a class.
@@ -1276,166 +1533,123 @@ class StudentGradesSummaryAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get class and student
-        class_instance = get_object_or_404(Class, id=class_id)
-        from ..Users.models import StudentProfile
-        student = get_object_or_404(StudentProfile, id=student_id)
-        
-        # Verify student is enrolled in this class
-        if not Enrollment.objects.filter(
-            enrolled_class=class_instance,
-            student=student
-        ).exists():
+        # Stored grades, recomputed only if a score or the rubric changed since
+        class_instance, grades = get_grades(class_id, student_ids=[student_id])
+        if class_instance is None:
+            return Response({"error": "Class not found."}, status=status.HTTP_404_NOT_FOUND)
+        if student_id not in grades:
             return Response(
                 {"error": "Student is not enrolled in this class."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        student, student_grades = grades[student_id]
         
-        # Get rubrics for this class
-        rubrics = GradingRubric.objects.filter(
-            class_instance=class_instance
-        ).prefetch_related('components__assessments__scores')
-        
-        # Calculate grades
-        grades_data = self._calculate_grades(student, rubrics)
-        
-        # Prepare response
         response_data = {
             'student_id': student.id,
-            'student_name': f"{student.user.last_name}, {student.user.first_name}",
+            'student_name': student_name(student),
             'class_id': class_instance.id,
             'class_name': class_instance.course.title,
-            **grades_data
+            **student_grades
         }
         
         serializer = StudentGradesSummarySerializer(data=response_data)
         serializer.is_valid(raise_exception=True)
         
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
+class ClassGradesAPIView(APIView):
+    """
+    GET: Midterm, final term, and overall grades of every student enrolled in a class.
     
-    def _calculate_grades(self, student, rubrics):
-        """
-        Calculate comprehensive grades for a student.
-        Returns midterm, final term, and overall grades with component breakdowns.
-        """
-        midterm_rubric = None
-        final_rubric = None
-        
-        for rubric in rubrics:
-            if rubric.academic_period == 'midterm':
-                midterm_rubric = rubric
-            elif rubric.academic_period == 'finals':
-                final_rubric = rubric
-        
-        # Calculate midterm grade
-        midterm_data = self._calculate_term_grade(student, midterm_rubric) if midterm_rubric else {
-            'grade': Decimal('0.00'),
-            'components': {}
-        }
-        
-        # Calculate final term grade
-        final_data = self._calculate_term_grade(student, final_rubric) if final_rubric else {
-            'grade': Decimal('0.00'),
-            'components': {}
-        }
+    URL: /api/academics/classes/{class_id}/grades/
+    Optional query params: ?components=true to include each student's component breakdown
+    
+    Faculty of the class and admins only.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, class_id):
+        user = request.user
         
-        # Calculate overall grade
-        midterm_contribution = Decimal('0.00')
-        final_contribution = Decimal('0.00')
+        if not (user.is_staff or is_faculty_of_class(user, class_id)):
+            return Response(
+                {"error": "Only faculty can view class grades."},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        if midterm_rubric:
-            midterm_contribution = (midterm_data['grade'] * midterm_rubric.term_percentage) / Decimal('100.00')
+        class_instance, grades = get_grades(class_id)
+        if class_instance is None:
+            return Response({"error": "Class not found."}, status=status.HTTP_404_NOT_FOUND)
+        
+        include_components = request.query_params.get('components') == 'true'
+        students = []
+        for student, student_grades in sorted(
+            grades.values(),
+            key=lambda item: (item[0].user.last_name, item[0].user.first_name, item[0].id)
+        ):
+            if not include_components:
+                student_grades = {
+                    key: value for key, value in student_grades.items()
+                    if key not in ('midterm_components', 'final_components')
+                }
+            students.append({
+                'student_id': student.id,
+                'student_name': student_name(student),
+                **student_grades
+            })
         
-        if final_rubric:
-            final_contribution = (final_data['grade'] * final_rubric.term_percentage) / Decimal('100.00')
+        serializer = ClassGradesSerializer({
+            'class_id': class_instance.id,
+            'class_name': class_instance.course.title,
+            'count': len(students),
+            'students': students,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+
+class ClassGradebookAPIView(APIView):
+    """
+    GET: The faculty grades table of a class in one compact, columnar payload:
+    students, assessment columns grouped by term and component, and dense
+    score and published matrices (draft scores included).
+    
+    URL: /api/academics/classes/{class_id}/gradebook/
+    
+    The response carries an ETag that changes whenever the class's rubrics,
+    assessments, scores or enrollments do; send it back in If-None-Match to
+    get a 304 when nothing changed.
+    
+    Faculty of the class and admins only.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, class_id):
+        user = request.user
         
-        final_grade = midterm_contribution + final_contribution
+        if not (user.is_staff or is_faculty_of_class(user, class_id)):
+            return Response(
+                {"error": "Only faculty can view the gradebook."},
+                status=status.HTTP_403_FORBIDDEN
+            )
         
-        return {
-            'midterm_grade': midterm_data['grade'],
-            'final_term_grade': final_data['grade'],
-            'final_grade': final_grade,
-            'midterm_components': midterm_data['components'],
-            'final_components': final_data['components']
-        }
-    
-    def _calculate_term_grade(self, student, rubric):
-        """
-        Calculate grade for a single term (midterm or finals).
-        Returns the term grade and component breakdown.
-        """
-        if not rubric:
-            return {'grade': Decimal('0.00'), 'components': {}}
-        
-        components_data = {}
-        term_grade = Decimal('0.00')
-        
-        for component in rubric.components.all():
-            # Get all assessments for this component
-            assessments = component.assessments.all()
-            
-            if not assessments:
-                components_data[component.name] = {
-                    'percentage': float(component.percentage),
-                    'average': 0.00,
-                    'assessments': []
-                }
-                continue
-            
-            # Calculate component average
-            total_score = Decimal('0.00')
-            total_max = Decimal('0.00')
-            assessment_details = []
-            
-            for assessment in assessments:
-                # Get student's score (only published if student is viewing)
-                try:
-                    score = Score.objects.get(
-                        student=student,
-                        assessment=assessment,
-                        is_published=True  # Only count published scores
-                    )
-                    total_score += Decimal(str(score.points))
-                    total_max += Decimal(str(assessment.max_points))
-                    
-                    assessment_details.append({
-                        'title': assessment.title,
-                        'points': float(score.points),
-                        'max_points': assessment.max_points,
-                        'percentage': float(score.percentage)
-                    })
-                except Score.DoesNotExist:
-                    # No score yet, treat as 0
-                    total_max += Decimal(str(assessment.max_points))
-                    assessment_details.append({
-                        'title': assessment.title,
-                        'points': 0,
-                        'max_points': assessment.max_points,
-                        'percentage': 0.00
-                    })
-            
-            # Calculate component average percentage
-            if total_max > 0:
-                component_avg = (total_score / total_max) * Decimal('100.00')
-            else:
-                component_avg = Decimal('0.00')
-            
-            # Calculate contribution to term grade
-            component_contribution = (component_avg * component.percentage) / Decimal('100.00')
-            term_grade += component_contribution
-            
-            components_data[component.name] = {
-                'percentage': float(component.percentage),
-                'average': float(component_avg),
-                'contribution': float(component_contribution),
-                'assessments': assessment_details
-            }
-        
-        return {
-            'grade': term_grade,
-            'components': components_data
-        }
-
+        version = gradebook_version(class_id)
+        if version is None:
+            return Response({"error": "Class not found."}, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = quote_etag(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            class_instance = Class.objects.get(id=class_id)
+            gradebook = load_gradebook(class_instance, published_only=False)
+            response = Response(
+                {'version': version, **gradebook_payload(gradebook)},
+                status=status.HTTP_200_OK
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class ClassStudentsListAPIView(generics.ListAPIView):
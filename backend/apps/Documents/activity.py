@@ -0,0 +1,123 @@
+"""
+Write-behind buffer for ActivityLog rows.
+
+ActivityLog.log() hands new (unsaved) rows to the process-wide buffer, which
+writes them with bulk_create once BATCH_SIZE rows are pending or every
+FLUSH_INTERVAL seconds, and once more at interpreter shutdown.
+
+Configured by settings.DOCUMENTS_ACTIVITY_LOG:
+    BUFFERED        False writes every row synchronously (use in tests)
+    BATCH_SIZE      rows per bulk_create
+    FLUSH_INTERVAL  seconds between background flushes
+
+resolve_content_objects() loads the generic content_object of many rows at
+once: one query per content type instead of one per row.
+"""
+import logging
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from .buffers import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BUFFERED': True,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+
+class ActivityLogBuffer(WriteBehindBuffer):
+    """Thread-safe in-process queue of pending ActivityLog rows"""
+    thread_name = 'activity-log-flusher'
+
+    def __init__(self):
+        super().__init__()
+        self._pending = deque()
+
+    def get_config(self):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, 'DOCUMENTS_ACTIVITY_LOG', {}))
+        return config
+
+    def log(self, entry):
+        """Queue entry (or save it right away when buffering is off)"""
+        config = self.get_config()
+        if not config['BUFFERED']:
+            entry.save()
+            return entry
+
+        with self._lock:
+            self._pending.append(entry)
+            pending = len(self._pending)
+        self.ensure_worker()
+
+        batch_size = config['BATCH_SIZE']
+        if pending >= batch_size * 10:
+            # Worker can't keep up - apply back-pressure on the caller
+            self.flush()
+        elif pending >= batch_size:
+            self.wake()
+        return entry
+
+    def flush(self):
+        """Write every pending row. Returns the number of rows written."""
+        from .models import ActivityLog
+
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(self._pending)
+                    self._pending.clear()
+                if not batch:
+                    return written
+                try:
+                    ActivityLog.objects.bulk_create(batch, batch_size=self.get_config()['BATCH_SIZE'])
+                    written += len(batch)
+                except Exception:
+                    # Don't lose the whole batch because of one bad row
+                    logger.exception("Bulk activity log insert failed, retrying row by row")
+                    for entry in batch:
+                        try:
+                            entry.save()
+                            written += 1
+                        except Exception:
+                            logger.exception("Dropping activity log entry: %s", entry.description)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+activity_buffer = ActivityLogBuffer()
+
+
+def resolve_content_objects(activities, select_related=None):
+    """
+    Batch-load the objects activity rows point at, grouped by content type.
+
+    select_related maps a model to the relations to load with it (e.g.
+    {DocumentVersion: ['document']}). Returns {(content_type_id, object_id):
+    object}; rows whose object no longer exists are simply missing.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    ids_by_type = defaultdict(set)
+    for activity in activities:
+        ids_by_type[activity.content_type_id].add(activity.object_id)
+
+    resolved = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        # Like the GenericForeignKey itself, don't let a default manager hide rows
+        queryset = model._base_manager.filter(pk__in=object_ids)
+        related = (select_related or {}).get(model)
+        if related:
+            queryset = queryset.select_related(*related)
+        for obj in queryset:
+            resolved[(content_type_id, obj.pk)] = obj
+    return resolved
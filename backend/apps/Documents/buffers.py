@@ -0,0 +1,66 @@
+"""
+Base class for in-process write-behind buffers.
+
+Subclasses keep their own pending state and implement flush() and
+get_config(); this class runs the per-process background thread that calls
+flush() every FLUSH_INTERVAL seconds (or sooner when woken up) and flushes
+once more at interpreter shutdown.
+"""
+import atexit
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer(ABC):
+    thread_name = 'write-behind-flusher'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    @abstractmethod
+    def get_config(self):
+        """Settings dict with at least FLUSH_INTERVAL"""
+
+    @abstractmethod
+    def flush(self):
+        """Write everything pending"""
+
+    def wake(self):
+        """Ask the background thread to flush now"""
+        self._wakeup.set()
+
+    def ensure_worker(self):
+        # Threads don't survive fork, so (re)start per process
+        if self._worker_running():
+            return
+        with self._lock:
+            if self._worker_running():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def _worker_running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.get_config()['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush failed", type(self).__name__)
+            finally:
+                close_old_connections()
@@ -0,0 +1,224 @@
+"""
+Set-based bulk changes: move, restore and re-categorize many documents, and
+approve/reject many approvals, in one request.
+
+Each operation loads the requested rows in one query and checks permissions
+for all of them at once (see permissions.py). It then applies the change to
+the allowed rows with a single UPDATE and writes their ActivityLog (and
+ApprovalHistory) rows with bulk_create, all in one transaction. The result
+reports every requested ID, so clients can show partial failures without
+sending one request per document.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+MAX_BULK_DOCUMENTS = 500
+
+# Per-item outcomes
+OK = 'ok'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+SKIPPED = 'skipped'
+
+
+class BulkResult:
+    """Outcome of a bulk operation for each requested ID, in request order"""
+
+    def __init__(self, ids):
+        self._items = {pk: (NOT_FOUND, 'Not found') for pk in ids}
+
+    def ok(self, pk):
+        self._items[pk] = (OK, None)
+
+    def fail(self, pk, outcome, error):
+        self._items[pk] = (outcome, error)
+
+    @property
+    def succeeded(self):
+        return sum(1 for outcome, _ in self._items.values() if outcome == OK)
+
+    def as_dict(self):
+        return {
+            'succeeded': self.succeeded,
+            'failed': len(self._items) - self.succeeded,
+            'results': [
+                {'id': pk, 'status': outcome, 'error': error}
+                for pk, (outcome, error) in self._items.items()
+            ],
+        }
+
+
+def _editable_documents(user, ids, result, **filters):
+    """
+    Documents in ids (matching filters) that user may edit: admins, staff and
+    owners always, others with edit access to the document's folder. Records
+    not_found / forbidden outcomes in result.
+    """
+    from .models import Document
+    from .permissions import check_many, get_effective_permissions
+
+    documents = list(
+        Document.objects.filter(pk__in=ids, is_active=True, **filters)
+        .select_related('folder', 'category', 'document_type')
+    )
+    visible = check_many(user, documents, 'view')
+    perms = None if user.is_staff or user.role_type == 'admin' else get_effective_permissions(user)
+
+    folder_editable = {}
+    if perms is not None:
+        folder_editable = perms.resolve({d.folder_id for d in documents if d.folder_id}, 'edit')
+
+    editable = []
+    for document in documents:
+        if not visible[document.pk]:
+            continue
+        if perms is None or document.uploaded_by_id == user.pk or folder_editable.get(document.folder_id, False):
+            editable.append(document)
+        else:
+            result.fail(document.pk, FORBIDDEN, 'You do not have permission to change this document')
+    return editable
+
+
+def move_documents(user, ids, folder):
+    """Move documents into folder (None for the root). Returns a BulkResult."""
+    from .models import ActivityLog, Document, Folder
+
+    result = BulkResult(ids)
+    documents = _editable_documents(user, ids, result, deleted_at__isnull=True)
+    if not documents:
+        return result
+
+    paths = Folder.full_paths({document.folder for document in documents} | {folder})
+    new_location = paths[folder.pk] if folder else "root directory"
+    now = timezone.now()
+    with transaction.atomic():
+        Document.objects.filter(pk__in=[d.pk for d in documents]).update(folder=folder, updated_at=now)
+        ActivityLog.objects.bulk_create([
+            ActivityLog.build(
+                ActivityLog.ActionTypes.DOCUMENT_UPDATE, document, user,
+                f"Moved document from '{paths.get(document.folder_id, 'root directory')}' to '{new_location}'",
+                old_folder_id=document.folder_id,
+                new_folder_id=folder.pk if folder else None
+            )
+            for document in documents
+        ])
+    for document in documents:
+        result.ok(document.pk)
+    return result
+
+
+def restore_documents(user, ids, folder=None):
+    """Restore documents from the trash, optionally into folder. Returns a BulkResult."""
+    from .models import ActivityLog, Document
+    from .search import search_indexer
+
+    result = BulkResult(ids)
+    documents = []
+    for document in Document.objects.filter(pk__in=ids, is_active=True).only('id', 'title', 'deleted_at', 'uploaded_by'):
+        if not document.deleted_at:
+            result.fail(document.pk, SKIPPED, 'Document is not in trash')
+        elif not user.is_staff and document.uploaded_by_id != user.pk:
+            result.fail(document.pk, FORBIDDEN, 'You do not have permission to restore this document')
+        else:
+            documents.append(document)
+    if not documents:
+        return result
+
+    updates = {'deleted_at': None, 'deleted_by': None, 'updated_at': timezone.now()}
+    if folder is not None:
+        updates['folder'] = folder
+    with transaction.atomic():
+        Document.objects.filter(pk__in=[d.pk for d in documents]).update(**updates)
+        ActivityLog.objects.bulk_create([
+            ActivityLog.build(
+                ActivityLog.ActionTypes.DOCUMENT_UPDATE, document, user,
+                f"Restored document '{document.title}' from trash"
+            )
+            for document in documents
+        ])
+        # Restored documents go back into the search index
+        for document in documents:
+            search_indexer.enqueue(document.pk)
+    for document in documents:
+        result.ok(document.pk)
+    return result
+
+
+def recategorize_documents(user, ids, category):
+    """Assign category to documents. Returns a BulkResult."""
+    from .models import ActivityLog, Document
+
+    result = BulkResult(ids)
+    documents = _editable_documents(user, ids, result, deleted_at__isnull=True)
+    if not documents:
+        return result
+
+    with transaction.atomic():
+        Document.objects.filter(pk__in=[d.pk for d in documents]).update(
+            category=category, updated_at=timezone.now()
+        )
+        ActivityLog.objects.bulk_create([
+            ActivityLog.build(
+                ActivityLog.ActionTypes.DOCUMENT_UPDATE, document, user,
+                f"Changed category of '{document.title}' from '{document.category.name}' to '{category.name}'",
+                old_category_id=document.category_id,
+                new_category_id=category.pk
+            )
+            for document in documents
+        ])
+    for document in documents:
+        result.ok(document.pk)
+    return result
+
+
+def review_approvals(user, document_ids, new_status, notes=''):
+    """
+    Approve or reject the approvals of many documents (pending or resubmitted
+    ones, as DocumentApproval.clean allows). Writes the same ApprovalHistory
+    and ActivityLog rows as saving each approval would. Returns a BulkResult
+    keyed by document ID.
+    """
+    from .models import ActivityLog, ApprovalHistory, DocumentApproval
+
+    Status = DocumentApproval.StatusChoices
+    action = ActivityLog.ActionTypes.APPROVAL_APPROVE if new_status == Status.APPROVED \
+        else ActivityLog.ActionTypes.APPROVAL_REJECT
+
+    result = BulkResult(document_ids)
+    approvals = []
+    for approval in DocumentApproval.objects.filter(document_id__in=document_ids):
+        if approval.status in (Status.PENDING, Status.RESUBMITTED):
+            approvals.append(approval)
+        else:
+            result.fail(approval.document_id, SKIPPED, f"Approval is already {approval.status}")
+    if not approvals:
+        return result
+
+    now = timezone.now()
+    with transaction.atomic():
+        # One UPDATE per previous status so previous_status is right on every database
+        for old_status in {approval.status for approval in approvals}:
+            DocumentApproval.objects.filter(
+                pk__in=[a.pk for a in approvals if a.status == old_status]
+            ).update(
+                status=new_status, previous_status=old_status,
+                reviewed_by=user, review_notes=notes, reviewed_at=now
+            )
+        ApprovalHistory.objects.bulk_create([
+            ApprovalHistory(
+                approval=approval, status_from=approval.status, status_to=new_status,
+                changed_by=user, notes=notes
+            )
+            for approval in approvals
+        ])
+        ActivityLog.objects.bulk_create([
+            ActivityLog.build(
+                action, approval, user,
+                f"Status changed from {approval.status} to {new_status}",
+                review_notes=notes
+            )
+            for approval in approvals
+        ])
+    for approval in approvals:
+        result.ok(approval.document_id)
+    return result
@@ -0,0 +1,264 @@
+"""
+Trash purge and orphaned file reaper.
+
+purge_expired_trash() permanently deletes documents that have been in the
+trash for longer than RETENTION_DAYS, and folders deleted that long ago
+together with everything below them. Documents are deleted BATCH_SIZE at a
+time, one transaction per batch. The files a batch releases (blobs that lost
+their last reference, old-style files) are deleted once it has committed,
+by a pool of WORKERS threads.
+
+reap_orphaned_files() reconciles the Documents directories under MEDIA_ROOT
+with the database and removes what nothing refers to any more:
+    - blobs whose reference count dropped to zero, and blob files without a FileBlob row
+    - files under documents/ and document_versions/ that no row points at
+    - partial upload files without an upload session
+    - cached previews of content that no longer exists
+Files modified within GRACE_PERIOD are left alone, since they may belong to
+an upload whose row hasn't been committed yet.
+
+Configured by settings.DOCUMENTS_TRASH:
+    RETENTION_DAYS  days a document or folder stays in the trash
+    BATCH_SIZE      documents deleted per transaction
+    WORKERS         threads deleting files
+    GRACE_PERIOD    seconds before an unreferenced file counts as orphaned
+
+`manage.py purge_trash` runs both; schedule it daily (cron, systemd timer).
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .storage import BLOB_PREFIX, blob_storage, deferred_file_deletion
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'RETENTION_DAYS': 15,
+    'BATCH_SIZE': 200,
+    'WORKERS': 4,
+    'GRACE_PERIOD': 24 * 60 * 60,
+}
+
+# Directories (relative to the blob storage) holding document files
+DOCUMENT_DIRS = ['documents', 'document_versions']
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DOCUMENTS_TRASH', {}))
+    return config
+
+
+class CleanupReport:
+    """Counts of what a purge / reap removed (or would remove, for a dry run)"""
+
+    def __init__(self):
+        self.documents = 0
+        self.folders = 0
+        self.files = 0
+        self.bytes = 0
+
+    def add_files(self, count, size):
+        self.files += count
+        self.bytes += size
+
+    def as_dict(self):
+        return {
+            'documents': self.documents,
+            'folders': self.folders,
+            'files': self.files,
+            'bytes_reclaimed': self.bytes,
+        }
+
+
+def _delete_one(item):
+    storage, name = item
+    try:
+        size = storage.size(name)
+        storage.delete(name)
+    except FileNotFoundError:
+        return 0, 0
+    except OSError:
+        logger.exception("Deleting %s failed", name)
+        return 0, 0
+    return 1, size
+
+
+def delete_files(files, workers=None):
+    """Delete [(storage, name)] in a thread pool. Returns (files deleted, bytes freed)."""
+    if not files:
+        return 0, 0
+    workers = workers or get_config()['WORKERS']
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='documents-cleanup') as pool:
+        results = list(pool.map(_delete_one, files))
+    return sum(count for count, _ in results), sum(size for _, size in results)
+
+
+# Trash
+
+def expired_trash(cutoff):
+    """(documents queryset, folder IDs) that have been in the trash since before cutoff"""
+    from .models import Document, Folder
+
+    # A deleted folder takes its whole subtree with it
+    subtree = Q(pk__in=[])
+    for pk, path in Folder.objects.filter(deleted_at__lt=cutoff).values_list('pk', 'path'):
+        # Folders without a materialized path yet (see rebuild_folder_paths) go alone
+        subtree |= Q(path__startswith=path) if path else Q(pk=pk)
+    folder_ids = list(Folder.objects.filter(subtree).values_list('pk', flat=True))
+
+    documents = Document.objects.filter(Q(deleted_at__lt=cutoff) | Q(folder_id__in=folder_ids))
+    return documents, folder_ids
+
+
+def _released_by(documents):
+    """(files, bytes) that deleting documents would free: blobs only they reference, old-style files"""
+    from collections import Counter
+    from .models import DocumentVersion, FileBlob
+    from .storage import is_blob
+
+    references = Counter(documents.exclude(file_path='').values_list('file_path', flat=True))
+    references.update(
+        DocumentVersion.objects.filter(document__in=documents.values('pk'))
+        .exclude(file_path='').values_list('file_path', flat=True)
+    )
+    count = size = 0
+    blobs = FileBlob.objects.filter(name__in=[name for name in references if is_blob(name)])
+    for name, ref_count, blob_size in blobs.values_list('name', 'ref_count', 'size'):
+        if ref_count <= references[name]:
+            count += 1
+            size += blob_size
+    for name in references:
+        if not is_blob(name) and blob_storage.exists(name):
+            count += 1
+            size += blob_storage.size(name)
+    return count, size
+
+
+def purge_expired_trash(retention_days=None, batch_size=None, workers=None, dry_run=False):
+    """Permanently delete expired trash (see module docstring). Returns a CleanupReport."""
+    from .models import Document, Folder
+
+    config = get_config()
+    retention_days = config['RETENTION_DAYS'] if retention_days is None else retention_days
+    batch_size = batch_size or config['BATCH_SIZE']
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    report = CleanupReport()
+    documents, folder_ids = expired_trash(cutoff)
+
+    if dry_run:
+        report.documents = documents.count()
+        report.folders = len(folder_ids)
+        report.add_files(*_released_by(documents))
+        return report
+
+    while True:
+        batch = list(documents.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        with deferred_file_deletion() as files:
+            with transaction.atomic():
+                Document.objects.filter(pk__in=batch).delete()
+        report.documents += len(batch)
+        report.add_files(*delete_files(files, workers))
+
+    if folder_ids:
+        with deferred_file_deletion() as files:
+            with transaction.atomic():
+                report.folders = Folder.objects.filter(pk__in=folder_ids).delete()[1].get(Folder._meta.label, 0)
+        report.add_files(*delete_files(files, workers))
+    return report
+
+
+# Orphaned files
+
+def _walk(storage, prefix=''):
+    """Yield (storage name, modified timestamp) of every file under prefix"""
+    root = storage.path(prefix)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                modified = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            yield os.path.relpath(path, storage.location).replace(os.sep, '/'), modified
+
+
+def _file_names(model):
+    return set(model.objects.exclude(file_path='').values_list('file_path', flat=True).iterator())
+
+
+def find_orphaned_files(grace_period=None):
+    """[(storage, name)] of unreferenced files (see module docstring)"""
+    from .models import Document, DocumentVersion, FileBlob, UploadSession
+    from .previews import get_cache_dir
+    from .uploads import get_config as get_upload_config
+
+    grace_period = get_config()['GRACE_PERIOD'] if grace_period is None else grace_period
+    settled = time.time() - grace_period
+    orphans = []
+
+    blob_names = set(FileBlob.objects.values_list('name', flat=True).iterator())
+    referenced = blob_names | _file_names(Document) | _file_names(DocumentVersion)
+    for prefix in [BLOB_PREFIX, *DOCUMENT_DIRS]:
+        for name, modified in _walk(blob_storage, prefix):
+            if name not in referenced and modified < settled:
+                orphans.append((blob_storage, name))
+
+    temp_storage = FileSystemStorage(location=get_upload_config()['TEMP_DIR'])
+    sessions = {f'{pk}.part' for pk in UploadSession.objects.values_list('pk', flat=True).iterator()}
+    for name, modified in _walk(temp_storage):
+        if name not in sessions and modified < settled:
+            orphans.append((temp_storage, name))
+
+    preview_storage = FileSystemStorage(location=get_cache_dir())
+    keys = set(FileBlob.objects.values_list('sha256', flat=True).iterator())
+    keys |= set(Document.objects.exclude(preview_key='').values_list('preview_key', flat=True).iterator())
+    for name, modified in _walk(preview_storage):
+        key = os.path.splitext(os.path.basename(name))[0]
+        if key not in keys and modified < settled:
+            orphans.append((preview_storage, name))
+    return orphans
+
+
+def release_unreferenced_blobs():
+    """Delete FileBlob rows without references. Returns their files as [(storage, name)]."""
+    from .models import FileBlob
+
+    with transaction.atomic():
+        blobs = list(FileBlob.objects.select_for_update().filter(ref_count__lte=0).values_list('pk', 'name'))
+        FileBlob.objects.filter(pk__in=[pk for pk, _ in blobs]).delete()
+    return [(blob_storage, name) for _, name in blobs]
+
+
+def reap_orphaned_files(grace_period=None, workers=None, dry_run=False):
+    """Remove files nothing refers to (see module docstring). Returns a CleanupReport."""
+    from .models import FileBlob
+
+    report = CleanupReport()
+    if dry_run:
+        unreferenced = FileBlob.objects.filter(ref_count__lte=0)
+        files = [(blob_storage, name) for name in unreferenced.values_list('name', flat=True)]
+        for storage, name in dict.fromkeys(files + find_orphaned_files(grace_period)):
+            try:
+                report.add_files(1, storage.size(name))
+            except OSError:
+                pass
+        return report
+
+    # Old unreferenced blobs show up in both lists
+    files = release_unreferenced_blobs()
+    files = list(dict.fromkeys(files + find_orphaned_files(grace_period)))
+    report.add_files(*delete_files(files, workers))
+    return report
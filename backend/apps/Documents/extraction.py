@@ -0,0 +1,87 @@
+"""
+Plain-text extraction from uploaded files for the search index.
+
+Supports plain text formats, DOCX (read straight from the zip, no extra
+dependency) and PDF when the optional `pypdf` package is installed. Files in
+other formats are indexed by title and description only.
+"""
+import logging
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {'txt', 'md', 'csv', 'tsv', 'json', 'xml', 'html', 'htm', 'rtf', 'log'}
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+WHITESPACE_RE = re.compile(r'[ \t\r\f\v]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+
+def _extract_plain(fh, max_chars):
+    # Up to 4 bytes per character in UTF-8
+    return fh.read(max_chars * 4).decode('utf-8', errors='replace')
+
+
+def _extract_docx(fh, max_chars):
+    with zipfile.ZipFile(fh) as archive:
+        with archive.open('word/document.xml') as xml:
+            parts = []
+            length = 0
+            for _, element in ElementTree.iterparse(xml):
+                if element.tag == WORD_NS + 't' and element.text:
+                    parts.append(element.text)
+                    length += len(element.text)
+                elif element.tag == WORD_NS + 'p':
+                    parts.append('\n')
+                    element.clear()
+                if length >= max_chars:
+                    break
+            return ''.join(parts)
+
+
+def _extract_pdf(fh, max_chars):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.debug("pypdf is not installed, PDF contents are not indexed")
+        return ''
+
+    parts = []
+    length = 0
+    for page in PdfReader(fh).pages:
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return '\n'.join(parts)
+
+
+EXTRACTORS = {ext: _extract_plain for ext in TEXT_EXTENSIONS}
+EXTRACTORS['docx'] = _extract_docx
+EXTRACTORS['pdf'] = _extract_pdf
+
+
+def normalize_text(text):
+    text = WHITESPACE_RE.sub(' ', text.replace('\x00', ''))
+    return BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
+def extract_text(field_file, filename=None, max_chars=500000):
+    """Return up to max_chars of text from a stored file ('' if unsupported or unreadable)"""
+    _, ext = os.path.splitext(filename or field_file.name)
+    extractor = EXTRACTORS.get(ext.lower().lstrip('.'))
+    if extractor is None:
+        return ''
+
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as fh:
+            text = extractor(fh, max_chars)
+    except Exception:
+        logger.warning("Could not extract text from %s", field_file.name, exc_info=True)
+        return ''
+    return normalize_text(text)[:max_chars]
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.Documents.activity import activity_buffer
+from apps.Documents.recent import backfill_recent_accesses, recent_buffer
+
+
+class Command(BaseCommand):
+    help = "Fill each user's recently accessed documents from the activity log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-per-user', type=int, default=None,
+            help="Documents to keep per user (default: DOCUMENTS_RECENT['MAX_PER_USER'])"
+        )
+
+    def handle(self, *args, **options):
+        activity_buffer.flush()
+        recent_buffer.flush()
+        rows = backfill_recent_accesses(max_per_user=options['max_per_user'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} recent document access row(s)"))
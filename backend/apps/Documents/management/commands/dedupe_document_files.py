@@ -0,0 +1,92 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from apps.Documents.models import Document, DocumentVersion, FileBlob
+from apps.Documents.storage import (
+    BLOB_PREFIX, blob_name, blob_storage, hash_content, rebuild_blob_refcounts,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing document and version files under MEDIA_ROOT into the "
+        "content-addressed blob store, keeping one copy of duplicate files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would be moved and how much space would be freed"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = blob_storage
+
+        moved = {}          # old name -> blob name
+        seen_digests = {}   # digest -> blob name (for dry runs)
+        duplicates = []     # old files whose content already lives in a blob
+        freed = 0
+        missing = 0
+
+        for model in (Document, DocumentVersion):
+            rows = (
+                model.objects.exclude(file_path='')
+                .exclude(file_path__startswith=BLOB_PREFIX + '/')
+                .only('pk', 'file_path', 'original_filename')
+            )
+            for row in rows.iterator():
+                old = row.file_path.name
+                if old not in moved:
+                    if not storage.exists(old):
+                        self.stderr.write(f"Missing file for {model.__name__} {row.pk}: {old}")
+                        missing += 1
+                        continue
+
+                    with storage.open(old, 'rb') as fh:
+                        digest, size = hash_content(File(fh))
+
+                    if dry_run:
+                        if digest in seen_digests or FileBlob.objects.filter(sha256=digest).exists():
+                            freed += size
+                        moved[old] = seen_digests.setdefault(digest, blob_name(digest, old))
+                        continue
+
+                    blob, _ = FileBlob.objects.get_or_create(
+                        sha256=digest,
+                        defaults={'name': blob_name(digest, old), 'size': size}
+                    )
+                    if storage.exists(blob.name):
+                        duplicates.append(old)
+                        freed += size
+                    else:
+                        target = storage.path(blob.name)
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(storage.path(old), target)
+                    moved[old] = blob.name
+
+                if not dry_run:
+                    model.objects.filter(pk=row.pk).update(
+                        file_path=moved[old],
+                        original_filename=row.original_filename or os.path.basename(old)
+                    )
+
+        if dry_run:
+            self.stdout.write(
+                f"Would move {len(moved)} file(s) into {len(set(moved.values()))} blob(s), "
+                f"freeing {freed / (1024 * 1024):.1f}MB"
+            )
+            return
+
+        # Rows now point at the blobs, so the duplicate copies can go
+        for old in duplicates:
+            storage.delete(old)
+
+        fixed = rebuild_blob_refcounts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {len(moved)} file(s) into blobs, removed {len(duplicates)} duplicate(s) "
+            f"({freed / (1024 * 1024):.1f}MB freed), fixed {fixed} reference count(s)"
+            + (f", {missing} missing file(s)" if missing else "")
+        ))
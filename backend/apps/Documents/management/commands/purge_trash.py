@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from apps.Documents.activity import activity_buffer
+from apps.Documents.cleanup import get_config, purge_expired_trash, reap_orphaned_files
+from apps.Documents.search import search_indexer
+
+
+class Command(BaseCommand):
+    help = "Permanently delete expired trash and remove orphaned document files"
+
+    def add_arguments(self, parser):
+        config = get_config()
+        parser.add_argument(
+            '--days', type=int, default=config['RETENTION_DAYS'],
+            help="Delete documents and folders that have been in the trash this many days (default: %(default)s)"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=config['BATCH_SIZE'],
+            help="Documents deleted per transaction (default: %(default)s)"
+        )
+        parser.add_argument(
+            '--workers', type=int, default=config['WORKERS'],
+            help="Threads deleting files (default: %(default)s)"
+        )
+        parser.add_argument(
+            '--skip-orphans', action='store_true',
+            help="Only purge the trash, don't look for orphaned files"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would be removed without deleting anything"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        prefix = "Would remove" if dry_run else "Removed"
+
+        trash = purge_expired_trash(
+            retention_days=options['days'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=dry_run,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {trash.documents} document(s) and {trash.folders} folder(s) from the trash, "
+            f"{trash.files} file(s), {filesizeformat(trash.bytes)}"
+        ))
+
+        if not options['skip_orphans']:
+            orphans = reap_orphaned_files(workers=options['workers'], dry_run=dry_run)
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix} {orphans.files} orphaned file(s), {filesizeformat(orphans.bytes)}"
+            ))
+
+        if not dry_run:
+            # Deletions are logged and unindexed through the background buffers
+            activity_buffer.flush()
+            search_indexer.flush()
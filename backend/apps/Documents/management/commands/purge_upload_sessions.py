@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.Documents.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired and completed upload sessions along with their partial files"
+
+    def handle(self, *args, **options):
+        stale = UploadSession.objects.filter(expires_at__lte=timezone.now()) | UploadSession.objects.filter(
+            status=UploadSession.StatusChoices.COMPLETED
+        )
+        deleted = 0
+        # Delete one by one so post_delete removes each partial file
+        for session in stale.iterator():
+            session.delete()
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} upload session(s)"))
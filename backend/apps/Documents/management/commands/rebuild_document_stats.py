@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.Documents.stats import rebuild_daily_stats, stats_buffer
+
+
+class Command(BaseCommand):
+    help = "Recompute daily document usage rollups and download counts from the activity log"
+
+    def handle(self, *args, **options):
+        stats_buffer.flush()
+        rows = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily stat row(s)"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.Documents.models import Folder
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized path/depth of every folder (repairs existing or imported data)"
+
+    def handle(self, *args, **options):
+        updated = Folder.rebuild_paths()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt paths for {updated} folder(s)"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.Documents.search import rebuild_search_index, search_indexer
+
+
+class Command(BaseCommand):
+    help = "Rebuild the document full-text search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reextract', action='store_true',
+            help="Extract text from every file again instead of reusing stored text"
+        )
+
+    def handle(self, *args, **options):
+        search_indexer.flush()
+        indexed = rebuild_search_index(reextract=options['reextract'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} document(s)"))
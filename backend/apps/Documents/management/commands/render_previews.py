@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from apps.Documents.models import Document
+from apps.Documents.previews import preview_renderer
+
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = "Render thumbnails / text previews for documents that don't have one"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Render every document again, not only those without a preview"
+        )
+
+    def handle(self, *args, **options):
+        preview_renderer.flush()
+        documents = Document.objects.filter(is_active=True)
+        if not options['all']:
+            documents = documents.filter(preview_key='')
+        ids = list(documents.values_list('id', flat=True))
+
+        rendered = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            rendered += preview_renderer.render(ids[start:start + BATCH_SIZE], force=options['all'])
+        self.stdout.write(self.style.SUCCESS(f"Rendered previews for {rendered} document(s)"))
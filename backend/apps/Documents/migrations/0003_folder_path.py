@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+def populate_folder_paths(apps, schema_editor):
+    Folder = apps.get_model('Documents', 'Folder')
+    parent_paths = {}
+    level = list(Folder.objects.filter(parent__isnull=True))
+    depth = 0
+    while level:
+        for folder in level:
+            folder.path = f"{parent_paths.get(folder.parent_id, '/')}{folder.pk}/"
+            folder.depth = depth
+            parent_paths[folder.pk] = folder.path
+        Folder.objects.bulk_update(level, ['path', 'depth'], batch_size=500)
+        level = list(Folder.objects.filter(parent_id__in=[f.pk for f in level]))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Materialized path of ancestor IDs (maintained automatically)', max_length=1024),
+        ),
+        migrations.RunPython(populate_folder_paths, migrations.RunPython.noop),
+    ]
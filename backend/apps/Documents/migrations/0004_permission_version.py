@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:06
+
+from django.db import migrations, models
+
+
+def create_permission_version(apps, schema_editor):
+    PermissionVersion = apps.get_model('Documents', 'PermissionVersion')
+    PermissionVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0003_folder_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermissionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'documents_permission_version',
+            },
+        ),
+        migrations.RunPython(create_permission_version, migrations.RunPython.noop),
+    ]
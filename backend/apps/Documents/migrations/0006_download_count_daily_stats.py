@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_download_counts(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ActivityLog = apps.get_model('Documents', 'ActivityLog')
+    Document = apps.get_model('Documents', 'Document')
+
+    doc_type = ContentType.objects.filter(app_label='Documents', model='document').first()
+    if doc_type is None:
+        return
+    downloads = (
+        ActivityLog.objects.filter(content_type=doc_type, action='doc_download')
+        .values('object_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for row in downloads:
+        Document.objects.filter(pk=row['object_id']).update(download_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0005_activitylog_created_at_default'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='DocumentDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('scope', models.CharField(choices=[('site', 'Site'), ('document', 'Document'), ('category', 'Category'), ('user', 'User')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField(default=0, help_text='Document, category or user ID (0 for site totals)')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('downloads', models.PositiveIntegerField(default=0)),
+                ('uploads', models.PositiveIntegerField(default=0)),
+                ('bytes_uploaded', models.PositiveBigIntegerField(default=0)),
+                ('bytes_downloaded', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'document_daily_stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['scope', 'date'], name='document_da_scope_6794e8_idx'), models.Index(fields=['scope', 'object_id', 'date'], name='document_da_scope_d716ae_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'scope', 'object_id'), name='one_daily_stat_per_scope_object')],
+            },
+        ),
+        migrations.RunPython(backfill_download_counts, migrations.RunPython.noop),
+    ]
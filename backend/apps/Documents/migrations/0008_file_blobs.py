@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:06
+
+import apps.Documents.models
+import apps.Documents.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0007_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(help_text='Storage name', max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'file_blobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='original_filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='original_filename',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='file_path',
+            field=models.FileField(storage=apps.Documents.storage.get_blob_storage, upload_to=apps.Documents.models.document_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='documentversion',
+            name='file_path',
+            field=models.FileField(storage=apps.Documents.storage.get_blob_storage, upload_to='document_versions/'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS document_search_fts "
+            "USING fts5(title, description, content, tokenize='porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE document_search_entries ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX document_search_vector_idx ON document_search_entries USING gin (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS document_search_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS document_search_vector_idx")
+        schema_editor.execute("ALTER TABLE document_search_entries DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0008_file_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchEntry',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='Documents.document')),
+                ('source_name', models.CharField(blank=True, help_text='Storage name of the file the content was extracted from', max_length=255)),
+                ('content', models.TextField(blank=True)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'document_search_entries',
+            },
+        ),
+        # Documents are indexed by `manage.py rebuild_search_index`
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0009_document_search'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-created_at', '-id'], name='activity_lo_created_fc6e69_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='documents_uploade_f15991_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['-deleted_at', '-id'], name='documents_deleted_c1c451_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentapproval',
+            index=models.Index(fields=['status', 'submitted_at', 'id'], name='document_ap_status_acd606_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0010_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecentDocumentAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_accessed_at', models.DateTimeField()),
+                ('access_kind', models.CharField(choices=[('view', 'Viewed'), ('download', 'Downloaded'), ('upload', 'Uploaded')], max_length=10)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recent_accesses', to='Documents.document')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recent_document_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'recent_document_accesses',
+                'ordering': ['-last_accessed_at'],
+                'indexes': [models.Index(fields=['user', '-last_accessed_at'], name='recent_docu_user_id_e69802_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'document'), name='one_recent_access_per_user_document')],
+            },
+        ),
+    ]
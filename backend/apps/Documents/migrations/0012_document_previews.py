@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Documents', '0011_recent_document_access'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='preview_key',
+            field=models.CharField(blank=True, help_text='SHA-256 of the file the preview was rendered from (empty: not rendered yet)', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='preview_kind',
+            field=models.CharField(blank=True, choices=[('', 'No preview'), ('image', 'Thumbnail'), ('text', 'Text snippet')], max_length=10),
+        ),
+    ]
@@ -1,13 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 import os
+import uuid
 import mimetypes
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from .mixins import ActivityTrackingMixin
+from .storage import get_blob_storage
 
 # Constants
 BYTES_PER_MB = 1024 * 1024
@@ -23,6 +26,44 @@ def document_upload_path(instance, filename):
 
 User = get_user_model()
 
+
+def _count_subquery(model, fk_field, **filters):
+    """Correlated COUNT(*) of model rows pointing at the outer row (0 when none)"""
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+    
+    counts = (
+        model.objects.filter(**{fk_field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(fk_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class CategoryQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate document_count and folder_count (active rows only)"""
+        return self.annotate(
+            document_count=_count_subquery(
+                Document, 'category', is_active=True, deleted_at__isnull=True
+            ),
+            folder_count=_count_subquery(Folder, 'category', deleted_at__isnull=True),
+        )
+
+
+class FolderQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate subfolder_count and document_count (active rows only)"""
+        return self.annotate(
+            subfolder_count=_count_subquery(Folder, 'parent', deleted_at__isnull=True),
+            document_count=_count_subquery(
+                Document, 'folder', is_active=True, deleted_at__isnull=True
+            ),
+        )
+
+
 # Create your models here.
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -33,6 +74,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         db_table = 'categories'
         verbose_name_plural = 'Categories'
@@ -127,6 +170,19 @@ class Folder(models.Model):
         related_name='deleted_folders'
     )
     
+    # Materialized path of folder IDs from the root, e.g. "/1/5/9/"
+    path = models.CharField(
+        max_length=1024,
+        blank=True,
+        default='',
+        editable=False,
+        db_index=True,
+        help_text="Materialized path of ancestor IDs (maintained automatically)"
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    
+    objects = FolderQuerySet.as_manager()
+    
     class Meta:
         db_table = 'folders'
         ordering = ['name']
@@ -151,29 +207,130 @@ class Folder(models.Model):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+        self._update_path()
+    
+    def _build_path(self):
+        """Build this folder's materialized path from its parent's path"""
+        if self.parent_id:
+            parent_path = self.parent.path or f"/{self.parent_id}/"
+            return f"{parent_path}{self.pk}/"
+        return f"/{self.pk}/"
+    
+    def _update_path(self):
+        """Persist path/depth and rewrite the subtree when the folder moved"""
+        old_path = self.path
+        new_path = self._build_path()
+        if new_path == old_path:
+            return
+        
+        from django.db.models import F, Value
+        from django.db.models.functions import Concat, Substr
+        
+        old_depth = self.depth
+        self.path = new_path
+        self.depth = new_path.count('/') - 2
+        Folder.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        
+        if old_path:
+            # Moved: re-root every descendant in a single UPDATE
+            Folder.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth)
+            )
+        self.__dict__.pop('_ancestors_cache', None)
+    
+    @classmethod
+    def rebuild_paths(cls):
+        """Recompute path/depth for every folder, level by level. Returns the number of folders updated."""
+        updated = 0
+        level = list(cls.objects.filter(parent__isnull=True).only('id', 'path', 'depth'))
+        parent_paths = {}
+        depth = 0
+        while level:
+            changed = []
+            for folder in level:
+                parent_path = parent_paths.get(folder.parent_id, '/')
+                path = f"{parent_path}{folder.pk}/"
+                parent_paths[folder.pk] = path
+                if folder.path != path or folder.depth != depth:
+                    folder.path = path
+                    folder.depth = depth
+                    changed.append(folder)
+            cls.objects.bulk_update(changed, ['path', 'depth'], batch_size=500)
+            updated += len(changed)
+            level = list(
+                cls.objects.filter(parent_id__in=[f.pk for f in level])
+                .only('id', 'parent_id', 'path', 'depth')
+            )
+            depth += 1
+        return updated
+    
+    def get_ancestor_ids(self):
+        """IDs of all parent folders from root to direct parent (no query)"""
+        if not self.path:
+            return [self.parent_id] if self.parent_id else []
+        return [int(pk) for pk in self.path.strip('/').split('/')[:-1]]
     
     def get_full_path(self):
         """Get the full path like /Academic/CS101/Lectures"""
-        if self.parent:
-            return f"{self.parent.get_full_path()}/{self.name}"
-        return f"/{self.name}"
+        names = [ancestor.name for ancestor in self.get_ancestors()]
+        names.append(self.name)
+        return '/' + '/'.join(names)
+    
+    @classmethod
+    def full_paths(cls, folders):
+        """{pk: get_full_path()} for many folders, with one query for all their ancestors"""
+        folders = [f for f in folders if f is not None]
+        ancestor_ids = {pk for f in folders for pk in f.get_ancestor_ids()}
+        names = dict(cls.objects.filter(pk__in=ancestor_ids).values_list('pk', 'name')) if ancestor_ids else {}
+        return {
+            f.pk: '/' + '/'.join([names.get(pk, '?') for pk in f.get_ancestor_ids()] + [f.name])
+            for f in folders
+        }
     
     def get_ancestors(self):
-        """Get all parent folders up to root"""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.insert(0, current)
-            current = current.parent
-        return ancestors
+        """Get all parent folders up to root (single query, cached per instance)"""
+        cache = self.__dict__.get('_ancestors_cache')
+        if cache is not None and cache[0] == self.path:
+            return list(cache[1])
+        
+        ancestor_ids = self.get_ancestor_ids()
+        ancestors = list(Folder.objects.filter(pk__in=ancestor_ids).order_by('depth')) if ancestor_ids else []
+        self._ancestors_cache = (self.path, ancestors)
+        return list(ancestors)
     
     def get_descendants(self):
-        """Get all child folders recursively"""
-        descendants = list(self.subfolders.filter(deleted_at__isnull=True))
-        for subfolder in list(descendants):
-            descendants.extend(subfolder.get_descendants())
+        """Get all non-deleted child folders recursively (single query)"""
+        if not self.path:
+            # Path not maintained yet (e.g. before rebuild_folder_paths):
+            # path__startswith='' would match every folder, so walk the parents
+            return self._walk_descendants()
+
+        subtree = list(
+            Folder.objects.filter(path__startswith=self.path)
+            .exclude(pk=self.pk)
+            .order_by('path')
+        )
+        
+        # Folders below a soft-deleted folder are hidden along with it
+        deleted_ids = {str(f.pk) for f in subtree if f.deleted_at}
+        if not deleted_ids:
+            return subtree
+        return [
+            f for f in subtree
+            if not deleted_ids.intersection(f.path[len(self.path):].strip('/').split('/'))
+        ]
+
+    def _walk_descendants(self):
+        """get_descendants() by parent links, one query per level"""
+        descendants = []
+        level = [self.pk]
+        while level:
+            children = list(Folder.objects.filter(parent_id__in=level, deleted_at__isnull=True))
+            descendants.extend(children)
+            level = [f.pk for f in children]
         return descendants
-    
+
     def can_user_access(self, user, action='view'):
         """Check if user can perform action on this folder"""
         if not user or not user.is_authenticated:
@@ -183,39 +340,10 @@ class Folder(models.Model):
         if user.role_type == 'admin':
             return True
         
-        # Check folder permissions
-        permission = self.folder_permissions.filter(user=user).first()
-        if permission:
-            if action == 'view':
-                return permission.can_view
-            elif action == 'upload':
-                return permission.can_upload
-            elif action == 'edit':
-                return permission.can_edit
-            elif action == 'delete':
-                return permission.can_delete
-        
-        # Check role-based permissions
-        role_permission = self.folder_role_permissions.filter(role=user.role_type).first()
-        if role_permission:
-            if action == 'view':
-                return role_permission.can_view
-            elif action == 'upload':
-                return role_permission.can_upload
-            elif action == 'edit':
-                return role_permission.can_edit
-            elif action == 'delete':
-                return role_permission.can_delete
-        
-        # Faculty can access their own folders
-        if user.role_type == 'faculty' and self.created_by == user:
-            return True
-        
-        # Default: students can view public folders
-        if self.is_public and action == 'view':
-            return True
-        
-        return False
+        # User permission, then role permission, then ownership, then public view
+        # (resolved for all folders at once and cached, see permissions.py)
+        from .permissions import get_effective_permissions
+        return get_effective_permissions(user).allows(self.pk, action)
 
 class FolderPermission(models.Model):
     """User-specific permissions for folders"""
@@ -287,14 +415,35 @@ class FolderRolePermission(models.Model):
     def __str__(self):
         return f"{self.role} - {self.folder.name}"
 
+class PermissionVersion(models.Model):
+    """
+    Single-row counter bumped whenever folders or folder permissions change.
+    Cached permission answers are keyed by it (see permissions.py); it lives
+    in the database so a bump made by one process is seen by all of them.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'documents_permission_version'
+
+    def __str__(self):
+        return f"Permission version {self.version}"
+
 class ActiveDocumentManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True, deleted_at__isnull=True)
 
 class Document(ActivityTrackingMixin, models.Model):
+
+    class PreviewKinds(models.TextChoices):
+        NONE = '', 'No preview'
+        IMAGE = 'image', 'Thumbnail'
+        TEXT = 'text', 'Text snippet'
+
     title = models.CharField(max_length=255, db_index=True)
     description = models.TextField(blank=True)
-    file_path = models.FileField(upload_to=document_upload_path)
+    file_path = models.FileField(upload_to=document_upload_path, storage=get_blob_storage)
+    original_filename = models.CharField(max_length=255, blank=True)
     file_size = models.PositiveBigIntegerField(null=True, blank=True)
     file_extension = models.CharField(max_length=10, blank=True)
     mime_type = models.CharField(max_length=100, blank=True)
@@ -339,9 +488,17 @@ class Document(ActivityTrackingMixin, models.Model):
 
     is_active = models.BooleanField(default=True)
     view_count = models.IntegerField(default=0)
+    download_count = models.PositiveIntegerField(default=0)
 
     is_featured = models.BooleanField(default=False)
     
+    # Thumbnail / text preview of the current file (see previews.py)
+    preview_key = models.CharField(
+        max_length=64, blank=True,
+        help_text="SHA-256 of the file the preview was rendered from (empty: not rendered yet)"
+    )
+    preview_kind = models.CharField(max_length=10, choices=PreviewKinds.choices, blank=True)
+    
     # Soft delete fields
     deleted_at = models.DateTimeField(null=True, blank=True)
     deleted_by = models.ForeignKey(
@@ -367,6 +524,9 @@ class Document(ActivityTrackingMixin, models.Model):
             models.Index(fields=['title']),
             models.Index(fields=['deleted_at']),
             models.Index(fields=['folder']),
+            # Keyset pagination (see pagination.py)
+            models.Index(fields=['-uploaded_at', '-id']),
+            models.Index(fields=['-deleted_at', '-id']),
         ]
         
         constraints = [
@@ -396,75 +556,44 @@ class Document(ActivityTrackingMixin, models.Model):
         return True
     
     def get_download_count(self):
-        """Get number of downloads from activity log (use in querysets with annotations)"""
-        return self.get_activity_count(
-            action=ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD
-        )
+        """Get number of downloads (stored counter, no query)"""
+        return self.download_count
+    
+    def get_download_filename(self):
+        """Name the file was uploaded as (stored files are named by content hash)"""
+        return self.original_filename or os.path.basename(self.file_path.name)
+    
+    def get_current_file(self):
+        """(file, filename) of the current version, or the original upload"""
+        version = self.versions.filter(is_current=True).first()
+        if version and version.file_path:
+            return version.file_path, version.get_download_filename()
+        return self.file_path, self.get_download_filename()
+    
+    def increment_download_count(self):
+        """Count a download (coalesced like increment_view_count)"""
+        from .counters import counter_buffer
+        pending_before = counter_buffer.pending(self.pk, 'download_count')
+        counter_buffer.increment(self.pk, 'download_count')
+        self.download_count += pending_before + 1
+        return self.download_count
     
     def increment_view_count(self):
-        """Atomically increment view count"""
-        from django.db.models import F
-        Document.objects.filter(pk=self.pk).update(view_count=F('view_count') + 1)
-        self.refresh_from_db()
+        """
+        Count a view. Increments are coalesced and written in batches (see
+        counters.py); view_count is set to the estimated current value
+        (stored value + pending increments) without re-reading the row.
+        """
+        from .counters import counter_buffer
+        pending_before = counter_buffer.pending(self.pk, 'view_count')
+        counter_buffer.increment(self.pk, 'view_count')
+        self.view_count += pending_before + 1
+        return self.view_count
     
     def can_user_access(self, user, action='view'):
         """Check if user can perform action on this document"""
-        if not user or not user.is_authenticated:
-            # Anonymous users can only view if no approval required
-            if action == 'view' and not self.document_type:
-                return True
-            if action == 'view' and self.document_type and not self.document_type.requires_approval:
-                return True
-            return False
-        
-        # Admin can do everything
-        if user.role_type == 'admin':
-            return True
-        
-        # Faculty can do everything with their own documents
-        if user.role_type == 'faculty' and self.uploaded_by == user:
-            return True
-        
-        # Check folder permissions for actions that modify structure (not view/download)
-        # For view and download, we need to check if user can at least view the folder
-        if self.folder:
-            if action in ['edit', 'delete', 'upload']:
-                # For modifying actions, check exact folder permission
-                if not self.folder.can_user_access(user, action):
-                    return False
-            else:
-                # For view/download, only require view access to folder
-                if not self.folder.can_user_access(user, 'view'):
-                    return False
-        
-        # Check document-specific permissions
-        permission = self.permissions.filter(role=user.role_type).first()
-        if permission:
-            if action == 'view':
-                return permission.can_view
-            elif action == 'download':
-                return permission.can_download and self.can_be_downloaded
-            elif action == 'edit':
-                return permission.can_edit
-            elif action == 'delete':
-                return permission.can_delete
-        
-        # Default role-based permissions
-        if user.role_type == 'student':
-            # Students can ONLY view and download (if approved), nothing else
-            if action in ['view', 'download']:
-                return self.can_be_downloaded
-            return False
-        
-        if user.role_type == 'staff':
-            # Staff org officers - view and download, upload needs approval
-            if action in ['view', 'download']:
-                return self.can_be_downloaded
-            elif action == 'upload':
-                return True  # But requires approval
-            return False
-        
-        return False
+        from .permissions import check_many
+        return check_many(user, [self], action)[self.pk]
     
     def clean(self):
         """Validate document before saving"""
@@ -489,6 +618,10 @@ class Document(ActivityTrackingMixin, models.Model):
     def save(self, *args, **kwargs):
         """Auto-populate file metadata before saving"""
         if self.file_path:
+            # Keep the uploaded name; the stored name is the content hash
+            if not self.file_path._committed:
+                self.original_filename = os.path.basename(self.file_path.name)
+            
             # Auto-populate file_size
             if not self.file_size and hasattr(self.file_path, 'size'):
                 self.file_size = self.file_path.size
@@ -504,7 +637,9 @@ class Document(ActivityTrackingMixin, models.Model):
                 if mime_type:
                     self.mime_type = mime_type
         
-        super().save(*args, **kwargs)
+        # Storing the file takes a blob reference; keep it only if the row is saved
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 class DocumentPermission(models.Model):
     """Role-based permissions for documents (matches BaseUser.ROLE_CHOICES)"""
@@ -592,7 +727,8 @@ class DocumentApproval(ActivityTrackingMixin, models.Model):
         db_table = 'document_approvals'
         indexes = [
             models.Index(fields=['status']),
-            models.Index(fields=['reviewed_by'])
+            models.Index(fields=['reviewed_by']),
+            models.Index(fields=['status', 'submitted_at', 'id']),
         ]
     
     def __str__(self):
@@ -728,7 +864,8 @@ class ActivityLog(models.Model):
         help_text="Additional data about the action"
     )
 
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the event happens, not when the buffered row is flushed
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
 
     class Meta:
         db_table = 'activity_logs'
@@ -740,12 +877,31 @@ class ActivityLog(models.Model):
             models.Index(fields=['action', '-created_at']),
             # For analytics queries
             models.Index(fields=['action', 'content_type', '-created_at']),
+            # Keyset pagination
+            models.Index(fields=['-created_at', '-id']),
         ]
 
     def __str__(self):
         user_str = self.user.username if self.user else 'Anonymous'
         return f"{user_str} {self.get_action_display()} at {self.created_at}"
     
+    @classmethod
+    def build(cls, action, content_object, user=None, description='', **metadata):
+        """
+        Unsaved entry for content_object, for callers that write many rows
+        with bulk_create (inside their own transaction) instead of log().
+        """
+        # Store the type/ID rather than the instance: the row may be written
+        # after the object is deleted (and its pk cleared)
+        return cls(
+            content_type=ContentType.objects.get_for_model(content_object),
+            object_id=content_object.pk,
+            user=user,
+            action=action,
+            description=description,
+            metadata=metadata
+        )
+    
     @classmethod
     def log(cls, action, content_object, user=None, description='', **metadata):
         """
@@ -759,14 +915,65 @@ class ActivityLog(models.Model):
                 description=f"Downloaded {document.title}",
                 ip=request.META.get('REMOTE_ADDR')
             )
+        
+        Rows are written behind through the activity buffer (see activity.py),
+        so the returned instance may not have a primary key yet.
         """
-        return cls.objects.create(
-            content_object=content_object,
-            user=user,
-            action=action,
-            description=description,
-            metadata=metadata
-        )
+        from .activity import activity_buffer
+        from .recent import recent_buffer
+        from .stats import stats_buffer
+        
+        entry = cls.build(action, content_object, user, description, **metadata)
+        if isinstance(content_object, Document):
+            stats_buffer.record_activity(
+                action, content_object, user=user,
+                num_bytes=metadata.get('bytes_served'), when=entry.created_at
+            )
+            recent_buffer.record_activity(action, content_object, user=user, when=entry.created_at)
+        return activity_buffer.log(entry)
+
+class DocumentDailyStat(models.Model):
+    """
+    Daily usage rollup, maintained incrementally from activity (see stats.py).
+    One row per day for the whole site and for each document, category and
+    user that had activity that day.
+    """
+
+    class Scopes(models.TextChoices):
+        SITE = 'site', 'Site'
+        DOCUMENT = 'document', 'Document'
+        CATEGORY = 'category', 'Category'
+        USER = 'user', 'User'
+
+    date = models.DateField()
+    scope = models.CharField(max_length=10, choices=Scopes.choices)
+    object_id = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Document, category or user ID (0 for site totals)"
+    )
+
+    views = models.PositiveIntegerField(default=0)
+    downloads = models.PositiveIntegerField(default=0)
+    uploads = models.PositiveIntegerField(default=0)
+    bytes_uploaded = models.PositiveBigIntegerField(default=0)
+    bytes_downloaded = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'document_daily_stats'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['scope', 'date']),
+            models.Index(fields=['scope', 'object_id', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'scope', 'object_id'],
+                name='one_daily_stat_per_scope_object'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.scope}:{self.object_id}"
 
 class DocumentVersion(ActivityTrackingMixin, models.Model):
     document = models.ForeignKey(
@@ -775,7 +982,8 @@ class DocumentVersion(ActivityTrackingMixin, models.Model):
         related_name='versions'
     )
     version_number = models.IntegerField()
-    file_path = models.FileField(upload_to='document_versions/')
+    file_path = models.FileField(upload_to='document_versions/', storage=get_blob_storage)
+    original_filename = models.CharField(max_length=255, blank=True)
     file_size = models.PositiveBigIntegerField(null=True, blank=True)
     mime_type = models.CharField(max_length=100, blank=True, null=True)
     
@@ -807,4 +1015,194 @@ class DocumentVersion(ActivityTrackingMixin, models.Model):
         ]
     
     def __str__(self):
-        return f"{self.document.title} v{self.version_number}"
\ No newline at end of file
+        return f"{self.document.title} v{self.version_number}"
+
+    def save(self, *args, **kwargs):
+        # Keep the uploaded name; the stored name is the content hash
+        if self.file_path and not self.file_path._committed:
+            self.original_filename = os.path.basename(self.file_path.name)
+        # Storing the file takes a blob reference; keep it only if the row is saved
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def get_download_filename(self):
+        return self.original_filename or os.path.basename(self.file_path.name)
+
+class UploadSession(models.Model):
+    """
+    Resumable chunked upload (see uploads.py). Chunks are written into a temp
+    file; finalizing turns it into a new Document, or a new DocumentVersion
+    of `document` when one was given at initiate.
+    """
+
+    class StatusChoices(models.TextChoices):
+        ACTIVE = 'active', 'Active'
+        COMPLETED = 'completed', 'Completed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='document_upload_sessions'
+    )
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        null=True, blank=True,
+        related_name='upload_sessions',
+        help_text="Document receiving a new version (or the created document once completed)"
+    )
+
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    metadata = models.JSONField(
+        default=dict, blank=True,
+        help_text="Document / version fields applied at finalize"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.ACTIVE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['expires_at'])
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def total_chunks(self):
+        return max(-(-self.total_size // self.chunk_size), 1)
+
+    @property
+    def is_version(self):
+        return self.metadata.get('kind') == 'version'
+
+    def chunk_bounds(self, index):
+        """(offset, length) of chunk index"""
+        offset = index * self.chunk_size
+        return offset, min(self.chunk_size, self.total_size - offset)
+
+
+class UploadChunk(models.Model):
+    """A chunk of an UploadSession that has been received and verified"""
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks'
+    )
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    checksum = models.CharField(max_length=64, help_text="SHA-256 hex digest")
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_chunks'
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session', 'index'],
+                name='one_chunk_per_session_index'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.session_id} #{self.index}"
+
+
+class FileBlob(models.Model):
+    """
+    A stored file shared by every Document / DocumentVersion with the same
+    content (see storage.py). Deleted with its last reference.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name")
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'file_blobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class DocumentSearchEntry(models.Model):
+    """
+    Text extracted from a document's current file; the source of the
+    full-text search index (see search.py).
+    """
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_entry'
+    )
+    source_name = models.CharField(
+        max_length=255, blank=True,
+        help_text="Storage name of the file the content was extracted from"
+    )
+    content = models.TextField(blank=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'document_search_entries'
+
+    def __str__(self):
+        return f"Search entry for document {self.document_id}"
+
+
+class RecentDocumentAccess(models.Model):
+    """
+    A user's latest view, download or upload of a document, kept for the
+    MAX_PER_USER most recent documents per user (see recent.py). Backs
+    the my-recent list.
+    """
+
+    class AccessKinds(models.TextChoices):
+        VIEW = 'view', 'Viewed'
+        DOWNLOAD = 'download', 'Downloaded'
+        UPLOAD = 'upload', 'Uploaded'
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recent_document_accesses'
+    )
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name='recent_accesses'
+    )
+    last_accessed_at = models.DateTimeField()
+    access_kind = models.CharField(max_length=10, choices=AccessKinds.choices)
+
+    class Meta:
+        db_table = 'recent_document_accesses'
+        ordering = ['-last_accessed_at']
+        indexes = [
+            models.Index(fields=['user', '-last_accessed_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'document'],
+                name='one_recent_access_per_user_document'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.access_kind} {self.document_id} at {self.last_accessed_at}"
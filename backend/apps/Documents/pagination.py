@@ -0,0 +1,186 @@
+"""
+Keyset (cursor) pagination for the Documents API.
+
+Instead of OFFSET, each page starts after the ordering values of the last
+row the client saw, e.g. for the default document ordering
+
+    WHERE uploaded_at < :t OR (uploaded_at = :t AND id < :id)
+    ORDER BY uploaded_at DESC, id DESC LIMIT :n
+
+so every page is the same index range scan however deep the client
+scrolls, and rows inserted meanwhile don't shift pages. The ordering is
+whatever the view produced (OrderingFilter's `ordering` param or the
+view's default), with the primary key appended as a tie-breaker; filters
+apply as usual.
+
+Responses look like {"next": <url or null>, "results": [...]}; follow
+`next` until it is null. Pages only go forward, which is all that
+infinite scrolling needs.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # isoformat keeps microseconds (DjangoJSONEncoder would round them off)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+        self.next_values = None
+
+        queryset = queryset.order_by(*[self._order_expression(key) for key in self.keys])
+        values = self.decode_cursor(request)
+        if values is not None:
+            queryset = queryset.filter(self._after(self.keys, values))
+
+        rows = list(queryset[:self.page_size + 1])
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_values = [_encode_value(self._value(rows[-1], name)) for name, _, _ in self.keys]
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        raw = json.dumps(self.next_values, separators=(',', ':')).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_keys(self, queryset):
+        """[(field path, descending, nullable)] from the queryset's ordering plus the pk"""
+        model = queryset.model
+        ordering = queryset.query.order_by or model._meta.ordering or ()
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or item == '?':
+                continue
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = model._meta.pk.name
+            field = self._resolve_field(model, name)
+            if field is None:
+                continue
+            keys.append((name, item.startswith('-'), field.null))
+            if field.primary_key or (field.unique and not field.null):
+                # Already a total order
+                return keys
+
+        descending = keys[0][1] if keys else True
+        keys.append((model._meta.pk.name, descending, False))
+        return keys
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            return [
+                None if value is None else self._resolve_field(self.model, name).to_python(value)
+                for (name, _, _), value in zip(self.keys, values)
+            ]
+        except (TypeError, ValueError, ValidationError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # Helpers
+
+    @staticmethod
+    def _resolve_field(model, path):
+        """Concrete field at the end of path (None for relations / unknown names)"""
+        field = None
+        for part in path.split('__'):
+            if field is not None:
+                if not (field.many_to_one or field.one_to_one):
+                    return None
+                model = field.related_model
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+        if field is None or field.is_relation:
+            return None
+        return field
+
+    def _order_expression(self, key):
+        name, descending, nullable = key
+        if not nullable:
+            return f"-{name}" if descending else name
+        # Nulls go last in both directions so _after() is database independent
+        return F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+
+    def _after(self, keys, values):
+        """Q matching rows that sort strictly after `values`"""
+        (name, descending, nullable), rest = keys[0], keys[1:]
+        value = values[0]
+        tail = self._after(rest, values[1:]) if rest else None
+
+        if value is None:
+            # Nulls sort last, so only other nulls can follow
+            return Q(**{f"{name}__isnull": True}) & tail if tail is not None else Q(pk__in=[])
+
+        condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        if nullable:
+            condition |= Q(**{f"{name}__isnull": True})
+        if tail is not None:
+            condition |= Q(**{name: value}) & tail
+        return condition
+
+    @staticmethod
+    def _value(obj, path):
+        for part in path.split('__'):
+            if obj is None:
+                return None
+            obj = getattr(obj, part)
+        return obj
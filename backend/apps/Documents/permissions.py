@@ -0,0 +1,230 @@
+"""
+Effective permission resolution for folders and documents.
+
+Folder access follows the same precedence as before: the user's
+FolderPermission row, then the FolderRolePermission row for their role, then
+ownership (faculty can do everything in folders they created), then
+is_public (view only). The rules are evaluated by the database:
+folder_q() turns them into EXISTS subqueries on the permission tables, so
+list endpoints filter with a join instead of a list of folder IDs.
+
+Point checks (allows() / check_many()) resolve just the folders asked about,
+in one query, and cache the answers per user under the permission version.
+The version is a counter in the database (PermissionVersion) that is bumped
+whenever a folder or folder permission changes (see signals.py), so a change
+made by any process invalidates the cached answers of every process.
+
+Usage:
+    visible = get_effective_permissions(request.user).folder_q('view', prefix='folder__')
+    if visible is not None:
+        queryset = queryset.filter(visible)
+
+    allowed = check_many(request.user, documents, 'download')  # {pk: bool}
+"""
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Q
+
+FOLDER_ACTIONS = ('view', 'upload', 'edit', 'delete')
+
+PERMISSION_CACHE_TIMEOUT = 60 * 15
+
+# Bumps made by this process, so a request sees its own changes without re-reading the version
+_local_bumps = 0
+
+
+def get_permission_version():
+    """Return the current permission version"""
+    from .models import PermissionVersion
+
+    version = PermissionVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    if version is None:
+        version = PermissionVersion.objects.get_or_create(pk=1)[0].version
+    return version
+
+
+def bump_permission_version():
+    """Invalidate every cached permission answer, in every process"""
+    from .models import PermissionVersion
+
+    global _local_bumps
+    _local_bumps += 1
+    if not PermissionVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        PermissionVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+def folder_q(user, action='view', prefix=''):
+    """
+    Q matching the folders user may perform action on, or None for every
+    folder. With prefix='folder__' it filters rows of a model with a folder
+    foreign key instead (rows without a folder don't match).
+    """
+    from .models import FolderPermission, FolderRolePermission
+
+    if action not in FOLDER_ACTIONS:
+        return Q(**{f'{prefix}pk__in': []})
+
+    if not user or not user.is_authenticated:
+        if action == 'view':
+            return Q(**{f'{prefix}is_public': True})
+        return Q(**{f'{prefix}pk__in': []})
+
+    if user.role_type == 'admin':
+        return None
+
+    folder = OuterRef(f'{prefix[:-2]}_id' if prefix else 'pk')
+    user_rows = FolderPermission.objects.filter(folder=folder, user=user)
+    role_rows = FolderRolePermission.objects.filter(folder=folder, role=user.role_type)
+    flag = {f'can_{action}': True}
+
+    q = Q(Exists(user_rows.filter(**flag))) | (~Q(Exists(user_rows)) & Q(Exists(role_rows.filter(**flag))))
+
+    # Without a permission row: owners (faculty) can do everything, anyone can view public folders
+    fallback = []
+    if user.role_type == 'faculty':
+        fallback.append(Q(**{f'{prefix}created_by': user}))
+    if action == 'view':
+        fallback.append(Q(**{f'{prefix}is_public': True}))
+    if fallback:
+        q |= ~Q(Exists(user_rows)) & ~Q(Exists(role_rows)) & reduce(or_, fallback)
+    return q
+
+
+class EffectivePermissions:
+    """A user's folder access, resolved lazily and cached per permission version"""
+
+    def __init__(self, user, version):
+        self.user = user
+        self.all_access = bool(user and user.is_authenticated and user.role_type == 'admin')
+        if user and user.is_authenticated:
+            self._cache_key = f'documents:permissions:{user.pk}:{user.role_type}:{version}'
+        else:
+            self._cache_key = f'documents:permissions:anonymous:{version}'
+        self._answers = None
+
+    def folder_q(self, action='view', prefix=''):
+        """See folder_q(); None means every folder"""
+        return folder_q(self.user, action, prefix)
+
+    def resolve(self, folder_ids, action='view'):
+        """{folder_id: bool} for action, with at most one query for folders not resolved before"""
+        folder_ids = set(folder_ids)
+        if self.all_access:
+            return dict.fromkeys(folder_ids, True)
+
+        if self._answers is None:
+            self._answers = cache.get(self._cache_key) or {}
+        answers = self._answers.setdefault(action, {})
+        missing = folder_ids.difference(answers)
+        if missing:
+            from .models import Folder
+
+            allowed = set(
+                Folder.objects.filter(pk__in=missing).filter(self.folder_q(action))
+                .values_list('pk', flat=True)
+            )
+            answers.update((folder_id, folder_id in allowed) for folder_id in missing)
+            cache.set(self._cache_key, self._answers, PERMISSION_CACHE_TIMEOUT)
+        return {folder_id: answers[folder_id] for folder_id in folder_ids}
+
+    def allows(self, folder_id, action='view'):
+        return self.resolve([folder_id], action)[folder_id]
+
+
+def get_effective_permissions(user):
+    """Return the EffectivePermissions for user (memoized on the user object for the request)"""
+    memo = getattr(user, '_documents_permissions', None)
+    if memo and memo[0] == _local_bumps:
+        return memo[1]
+
+    perms = EffectivePermissions(user, get_permission_version())
+    if user is not None:
+        user._documents_permissions = (_local_bumps, perms)
+    return perms
+
+
+def check_many(user, objects, action='view'):
+    """
+    Check action for many folders or documents at once.
+
+    Returns a dict of {pk: bool}. Documents are checked with the same rules as
+    Document.can_user_access but use at most one extra query (for document
+    permissions that were not prefetched).
+    """
+    from .models import Folder
+
+    objects = list(objects)
+    if not objects:
+        return {}
+
+    is_folder = isinstance(objects[0], Folder)
+    if not user or not user.is_authenticated:
+        if is_folder:
+            return {f.pk: f.is_public and action == 'view' for f in objects}
+        # Anonymous users can only view if no approval required
+        return {
+            doc.pk: action == 'view' and not (doc.document_type and doc.document_type.requires_approval)
+            for doc in objects
+        }
+
+    if user.role_type == 'admin':
+        return {obj.pk: True for obj in objects}
+
+    perms = get_effective_permissions(user)
+    if is_folder:
+        allowed = perms.resolve([f.pk for f in objects], action)
+        return {f.pk: allowed[f.pk] for f in objects}
+    return _check_documents(user, perms, objects, action)
+
+
+def _check_documents(user, perms, documents, action):
+    from .models import DocumentPermission
+
+    # Document-specific permissions for the user's role, from prefetch when available
+    role_perms = {}
+    missing = []
+    for doc in documents:
+        prefetched = getattr(doc, '_prefetched_objects_cache', {}).get('permissions')
+        if prefetched is None:
+            missing.append(doc.pk)
+        else:
+            role_perms[doc.pk] = next((p for p in prefetched if p.role == user.role_type), None)
+    if missing:
+        for permission in DocumentPermission.objects.filter(document_id__in=missing, role=user.role_type):
+            role_perms[permission.document_id] = permission
+
+    folder_action = action if action in ('edit', 'delete', 'upload') else 'view'
+    folder_allowed = perms.resolve({doc.folder_id for doc in documents if doc.folder_id}, folder_action)
+    results = {}
+    for doc in documents:
+        # Faculty can do everything with their own documents
+        if user.role_type == 'faculty' and doc.uploaded_by_id == user.pk:
+            results[doc.pk] = True
+            continue
+
+        if doc.folder_id and not folder_allowed[doc.folder_id]:
+            results[doc.pk] = False
+            continue
+
+        permission = role_perms.get(doc.pk)
+        if permission and action in ('view', 'download', 'edit', 'delete'):
+            results[doc.pk] = {
+                'view': permission.can_view,
+                'download': permission.can_download and doc.can_be_downloaded,
+                'edit': permission.can_edit,
+                'delete': permission.can_delete,
+            }[action]
+        elif user.role_type == 'student':
+            # Students can ONLY view and download (if approved), nothing else
+            results[doc.pk] = action in ('view', 'download') and doc.can_be_downloaded
+        elif user.role_type == 'staff':
+            # Staff org officers - view and download, upload needs approval
+            if action in ('view', 'download'):
+                results[doc.pk] = doc.can_be_downloaded
+            else:
+                results[doc.pk] = action == 'upload'
+        else:
+            results[doc.pk] = False
+    return results
@@ -0,0 +1,399 @@
+"""
+Thumbnails and text previews of document files.
+
+A document's current file gets a preview when it is uploaded or a new
+version is added (see signals.py):
+    - images:            a PNG thumbnail (Pillow)
+    - PDFs:              a PNG of the first page, when PyMuPDF or poppler's
+                         pdftoppm is available; otherwise a text snippet
+    - text formats/DOCX: a plain-text snippet (see extraction.py)
+
+Rendering runs in a pool of worker processes fed by a background thread, so
+uploads don't wait for it and a large image can't stall the web workers.
+Results are cached on disk under CACHE_DIR keyed by the file's SHA-256
+(<aa>/<sha256>.png or .txt), so identical files, which share one blob, are
+rendered once. The document row records the key and kind of its preview,
+which is all the API needs to build thumbnail URLs; nothing on disk is
+checked when listing documents.
+
+Configured by settings.DOCUMENTS_PREVIEWS:
+    BACKGROUND      False renders synchronously in-process (use in tests)
+    FLUSH_INTERVAL  seconds between background rendering runs
+    WORKERS         size of the rendering process pool
+    THUMBNAIL_SIZE  longest side of thumbnails, in pixels
+    SNIPPET_CHARS   length of text previews
+    RENDER_TIMEOUT  seconds before giving up on one file
+    CACHE_DIR       preview directory (default: MEDIA_ROOT/previews)
+
+`manage.py render_previews` renders previews for existing documents.
+"""
+import atexit
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from django.conf import settings
+
+from .buffers import WriteBehindBuffer
+from .extraction import EXTRACTORS, normalize_text
+from .storage import hash_content, is_blob
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKGROUND': True,
+    'FLUSH_INTERVAL': 2.0,
+    'WORKERS': 2,
+    'THUMBNAIL_SIZE': 256,
+    'SNIPPET_CHARS': 600,
+    'RENDER_TIMEOUT': 60,
+    'CACHE_DIR': None,
+}
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp', 'tif', 'tiff'}
+
+# Preview kinds (Document.preview_kind); '' means the file has no preview
+IMAGE = 'image'
+TEXT = 'text'
+
+PREVIEW_SUFFIXES = {IMAGE: '.png', TEXT: '.txt'}
+CONTENT_TYPES = {IMAGE: 'image/png', TEXT: 'text/plain; charset=utf-8'}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DOCUMENTS_PREVIEWS', {}))
+    return config
+
+
+def get_cache_dir():
+    return get_config()['CACHE_DIR'] or os.path.join(settings.MEDIA_ROOT, 'previews')
+
+
+def preview_path(key, kind, cache_dir=None):
+    """Path of the cached preview of the given kind for content key"""
+    return os.path.join(cache_dir or get_cache_dir(), key[:2], key + PREVIEW_SUFFIXES[kind])
+
+
+def content_key(field_file):
+    """SHA-256 of a stored file (taken from the name for blobs, no read needed)"""
+    if is_blob(field_file.name):
+        return os.path.splitext(os.path.basename(field_file.name))[0]
+    with field_file.storage.open(field_file.name, 'rb') as fh:
+        return hash_content(fh)[0]
+
+
+# Rendering. These run in the worker processes and must not touch Django's
+# database or settings.
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _png_bytes(image, size):
+    import io
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _render_image(source, size):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        # Let JPEG decode at reduced scale instead of full resolution
+        image.draft('RGB', (size, size))
+        image.seek(0)
+        return _png_bytes(image, size)
+
+
+def _render_pdf(source, size, timeout=None):
+    """First page as PNG bytes, or None when no PDF renderer is available"""
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+
+    if fitz is not None:
+        with fitz.open(source) as pdf:
+            page = pdf[0]
+            zoom = size / max(page.rect.width, page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes('png')
+
+    if shutil.which('pdftoppm'):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'page')
+            subprocess.run(
+                ['pdftoppm', '-png', '-f', '1', '-l', '1', '-singlefile',
+                 '-scale-to', str(size), source, output],
+                check=True, capture_output=True, timeout=timeout
+            )
+            with open(output + '.png', 'rb') as fh:
+                return fh.read()
+    return None
+
+
+def _render_snippet(source, ext, chars):
+    extractor = EXTRACTORS.get(ext)
+    if extractor is None:
+        return None
+    with open(source, 'rb') as fh:
+        text = normalize_text(extractor(fh, chars))[:chars]
+    return text.encode('utf-8') if text else None
+
+
+def render_preview(source, ext, key, cache_dir, size, chars, timeout=None):
+    """Render and cache the preview of the file at source. Returns its kind ('' for none)."""
+    if ext in IMAGE_EXTENSIONS:
+        _write_atomic(preview_path(key, IMAGE, cache_dir), _render_image(source, size))
+        return IMAGE
+
+    if ext == 'pdf':
+        try:
+            png = _render_pdf(source, size, timeout)
+        except Exception:
+            # Fall back to the text layer
+            logger.warning("Rendering the first page of %s failed", source, exc_info=True)
+            png = None
+        if png:
+            _write_atomic(preview_path(key, IMAGE, cache_dir), png)
+            return IMAGE
+
+    snippet = _render_snippet(source, ext, chars)
+    if snippet:
+        _write_atomic(preview_path(key, TEXT, cache_dir), snippet)
+        return TEXT
+    return ''
+
+
+def cached_kind(key, cache_dir=None):
+    """Kind of an already cached preview for key, or None"""
+    for kind in (IMAGE, TEXT):
+        if os.path.exists(preview_path(key, kind, cache_dir)):
+            return kind
+    return None
+
+
+def serve_preview(request, document):
+    """
+    Response with document's cached preview, honouring If-None-Match. URLs
+    carrying the current content key (?v=, see serializers.thumbnail_url)
+    may be cached by the client indefinitely. Returns None when the
+    preview file is missing from the cache.
+    """
+    from django.http import FileResponse
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import quote_etag
+
+    key, kind = document.preview_key, document.preview_kind
+    etag = quote_etag(f"{key}-{kind}")
+    version = request.GET.get('v')
+    cache_control = (
+        'private, max-age=31536000, immutable' if version and key.startswith(version)
+        else 'private, no-cache'
+    )
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            fh = open(preview_path(key, kind), 'rb')
+        except FileNotFoundError:
+            return None
+        response = FileResponse(fh, content_type=CONTENT_TYPES[kind])
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+# Scheduling
+
+class RenderTimeout(Exception):
+    """Some files took longer than RENDER_TIMEOUT; their workers may still be busy"""
+
+    def __init__(self, keys, rendered):
+        super().__init__(f"Rendering timed out for {len(keys)} file(s)")
+        self.keys = keys
+        self.rendered = rendered
+
+
+def _preview_jobs(document_ids):
+    """{content key: (source path, extension, [document ids])} for documents that have a file"""
+    from .models import Document
+
+    jobs = {}
+    for document in Document.objects.filter(pk__in=document_ids, is_active=True):
+        field_file, filename = document.get_current_file()
+        if not field_file:
+            continue
+        try:
+            source = field_file.path
+            key = content_key(field_file)
+        except (NotImplementedError, OSError):
+            logger.warning("Can't preview document %s: file is not on local disk", document.pk)
+            continue
+        ext = os.path.splitext(filename or field_file.name)[1].lower().lstrip('.')
+        jobs.setdefault(key, (source, ext, []))[2].append(document.pk)
+    return jobs
+
+
+def _save_previews(results):
+    """Record {content key: (kind, [document ids])} on the documents"""
+    from .models import Document
+
+    for key, (kind, document_ids) in results.items():
+        Document.objects.filter(pk__in=document_ids).update(preview_key=key, preview_kind=kind)
+
+
+def render_documents(document_ids, executor=None, force=False):
+    """
+    Render (or reuse cached) previews for documents and record them.
+    Renders in executor when given, otherwise in this process. Returns the
+    number of documents updated. Raises RenderTimeout, after recording the
+    other previews, when a file in executor takes longer than RENDER_TIMEOUT.
+    """
+    config = get_config()
+    cache_dir = get_cache_dir()
+    args = (cache_dir, config['THUMBNAIL_SIZE'], config['SNIPPET_CHARS'], config['RENDER_TIMEOUT'])
+
+    results = {}
+    futures = {}
+    for key, (source, ext, ids) in _preview_jobs(document_ids).items():
+        kind = None if force else cached_kind(key, cache_dir)
+        if kind is not None:
+            results[key] = (kind, ids)
+        elif executor is None:
+            try:
+                results[key] = (render_preview(source, ext, key, *args), ids)
+            except Exception:
+                logger.exception("Rendering preview of %s failed", source)
+                results[key] = ('', ids)
+        else:
+            futures[key] = (executor.submit(render_preview, source, ext, key, *args), ids)
+
+    timed_out = []
+    for key, (future, ids) in futures.items():
+        try:
+            results[key] = (future.result(timeout=config['RENDER_TIMEOUT']), ids)
+        except concurrent.futures.TimeoutError:
+            logger.error("Rendering preview %s timed out", key)
+            timed_out.append(key)
+        except Exception:
+            logger.exception("Rendering preview %s failed", key)
+            results[key] = ('', ids)
+
+    _save_previews(results)
+    rendered = sum(len(ids) for _, ids in results.values())
+    if timed_out:
+        raise RenderTimeout(timed_out, rendered)
+    return rendered
+
+
+class PreviewRenderer(WriteBehindBuffer):
+    """Queue of document IDs whose previews the background thread renders in a process pool"""
+    thread_name = 'document-preview-renderer'
+
+    def __init__(self):
+        # Registered before the base class's exit flush, so it runs after it
+        atexit.register(self.shutdown)
+        super().__init__()
+        self._pending = set()
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def get_config(self):
+        return get_config()
+
+    def enqueue(self, document_id):
+        """Render document_id's preview once the current transaction commits"""
+        from django.db import transaction
+        transaction.on_commit(lambda: self._add(document_id))
+
+    def _add(self, document_id):
+        if not self.get_config()['BACKGROUND']:
+            try:
+                render_documents([document_id])
+            except Exception:
+                logger.exception("Rendering preview of document %s failed", document_id)
+            return
+        with self._lock:
+            self._pending.add(document_id)
+        self.ensure_worker()
+
+    def get_executor(self):
+        # Like the thread, the pool belongs to the process that started it
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.get_config()['WORKERS'],
+                    # Don't fork a process that runs request and flusher threads
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def shutdown(self, terminate=False):
+        """
+        Stop the worker pool (it is started again when needed). terminate
+        kills the workers instead of waiting for their current files.
+        """
+        with self._executor_lock:
+            executor = self._executor
+            if executor is not None and self._executor_pid == os.getpid():
+                if terminate:
+                    # A running task can't be cancelled, only its process killed
+                    for process in list((executor._processes or {}).values()):
+                        process.terminate()
+                executor.shutdown(wait=not terminate, cancel_futures=terminate)
+            self._executor = None
+
+    def render(self, document_ids, force=False):
+        """
+        render_documents() in the worker pool. A pool with a worker stuck
+        on a file is replaced; the files that timed out are not retried.
+        """
+        try:
+            return render_documents(document_ids, executor=self.get_executor(), force=force)
+        except RenderTimeout as exc:
+            logger.error("%s, restarting the preview worker pool", exc)
+            self.shutdown(terminate=True)
+            return exc.rendered
+
+    def flush(self):
+        """Render every queued document. Returns the number processed."""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = set()
+            if not pending:
+                return 0
+            try:
+                return self.render(pending)
+            except concurrent.futures.process.BrokenProcessPool:
+                logger.exception("Preview worker pool died, will retry")
+                self.shutdown()
+                with self._lock:
+                    self._pending |= pending
+                return 0
+
+
+preview_renderer = PreviewRenderer()
@@ -0,0 +1,197 @@
+"""
+Per-user "recently accessed documents", kept in a small table.
+
+Every document view, download and upload logged through ActivityLog.log()
+upserts the (user, document) row in RecentDocumentAccess with the time and
+kind of access. Only each user's MAX_PER_USER most recent documents are
+kept, so my-recent reads a handful of rows from the (user, -last_accessed_at)
+index instead of grouping the user's whole activity history.
+
+Accesses are coalesced in memory (the latest one per user and document
+wins) and written every FLUSH_INTERVAL seconds with one bulk upsert.
+
+Configured by settings.DOCUMENTS_RECENT:
+    BUFFERED        False writes every access immediately (use in tests)
+    FLUSH_INTERVAL  seconds between background flushes
+    MAX_PER_USER    documents remembered per user
+
+`manage.py backfill_recent_documents` fills the table from the activity log.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': 5.0,
+    'MAX_PER_USER': 50,
+}
+
+# ActivityLog action -> RecentDocumentAccess.access_kind
+ACCESS_KINDS = {
+    'doc_view': 'view',
+    'doc_download': 'download',
+    'doc_upload': 'upload',
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DOCUMENTS_RECENT', {}))
+    return config
+
+
+def upsert_recent_accesses(accesses):
+    """
+    Write {(user_id, document_id): (when, kind)} and trim the touched users'
+    lists to MAX_PER_USER. Accesses to documents or users that no longer
+    exist are skipped. Returns the number of rows written.
+    """
+    from django.contrib.auth import get_user_model
+    from .models import Document, RecentDocumentAccess
+
+    user_ids = {user_id for user_id, _ in accesses}
+    document_ids = {document_id for _, document_id in accesses}
+    user_ids &= set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    document_ids &= set(Document.objects.filter(pk__in=document_ids).values_list('pk', flat=True))
+
+    rows = [
+        RecentDocumentAccess(user_id=user_id, document_id=document_id, last_accessed_at=when, access_kind=kind)
+        for (user_id, document_id), (when, kind) in accesses.items()
+        if user_id in user_ids and document_id in document_ids
+    ]
+    if not rows:
+        return 0
+
+    with transaction.atomic():
+        RecentDocumentAccess.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'document'],
+            update_fields=['last_accessed_at', 'access_kind'],
+        )
+        trim_recent_accesses(user_ids)
+    return len(rows)
+
+
+def trim_recent_accesses(user_ids, keep=None):
+    """Delete all but each user's `keep` most recent rows, in one statement"""
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+    from .models import RecentDocumentAccess
+
+    keep = get_config()['MAX_PER_USER'] if keep is None else keep
+    ranked = RecentDocumentAccess.objects.filter(user_id__in=user_ids).annotate(
+        rank=Window(
+            RowNumber(),
+            partition_by=F('user_id'),
+            order_by=[F('last_accessed_at').desc(), F('id').desc()],
+        )
+    )
+    RecentDocumentAccess.objects.filter(
+        pk__in=ranked.filter(rank__gt=keep).values('pk')
+    ).delete()
+
+
+class RecentAccessBuffer(WriteBehindBuffer):
+    """Latest pending access keyed by (user_id, document_id)"""
+    thread_name = 'recent-access-flusher'
+
+    def __init__(self):
+        super().__init__()
+        self._pending = {}
+
+    def get_config(self):
+        return get_config()
+
+    def record_activity(self, action, document, user=None, when=None):
+        """Remember a view/download/upload of document by user (other actions are ignored)"""
+        kind = ACCESS_KINDS.get(action)
+        user_id = getattr(user, 'pk', None)
+        if kind is None or not user_id or not document.pk:
+            return
+
+        key = (user_id, document.pk)
+        access = (when or timezone.now(), kind)
+        if not self.get_config()['BUFFERED']:
+            upsert_recent_accesses({key: access})
+            return
+
+        with self._lock:
+            self._merge(key, access)
+        self.ensure_worker()
+
+    def _merge(self, key, access):
+        current = self._pending.get(key)
+        if current is None or current[0] <= access[0]:
+            self._pending[key] = access
+
+    def flush(self):
+        """Write pending accesses. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = {}
+            if not pending:
+                return 0
+            try:
+                return upsert_recent_accesses(pending)
+            except Exception:
+                # Put the accesses back so they're retried on the next flush
+                logger.exception("Writing recent document accesses failed, will retry")
+                with self._lock:
+                    for key, access in pending.items():
+                        self._merge(key, access)
+                return 0
+
+
+recent_buffer = RecentAccessBuffer()
+
+
+def backfill_recent_accesses(max_per_user=None):
+    """
+    Rebuild RecentDocumentAccess from the activity log: each user's
+    max_per_user most recently viewed/downloaded/uploaded documents that
+    still exist. Returns the number of rows written.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from .models import ActivityLog, Document, RecentDocumentAccess
+
+    max_per_user = get_config()['MAX_PER_USER'] if max_per_user is None else max_per_user
+    existing = set(Document.objects.values_list('id', flat=True))
+    history = ActivityLog.objects.filter(
+        content_type=ContentType.objects.get_for_model(Document),
+        action__in=list(ACCESS_KINDS),
+        user__isnull=False,
+    )
+    user_ids = history.values_list('user_id', flat=True).distinct().order_by()
+
+    written = 0
+    for user_id in list(user_ids):
+        # Newest first from the (user, -created_at) index; stop once the list is full
+        latest = {}
+        events = (
+            history.filter(user_id=user_id)
+            .order_by('-created_at', '-id')
+            .values_list('object_id', 'action', 'created_at')
+        )
+        for document_id, action, created_at in events.iterator():
+            if document_id in existing and document_id not in latest:
+                latest[document_id] = RecentDocumentAccess(
+                    user_id=user_id, document_id=document_id,
+                    last_accessed_at=created_at, access_kind=ACCESS_KINDS[action]
+                )
+                if len(latest) >= max_per_user:
+                    break
+
+        with transaction.atomic():
+            RecentDocumentAccess.objects.filter(user_id=user_id).delete()
+            RecentDocumentAccess.objects.bulk_create(latest.values())
+        written += len(latest)
+    return written
@@ -0,0 +1,298 @@
+"""
+Full-text search over document titles, descriptions and file contents.
+
+Text is extracted from a document's current file (see extraction.py) into a
+DocumentSearchEntry row and fed to the database's own full-text index:
+    - SQLite:     an FTS5 table, document_search_fts (rowid = document id)
+    - PostgreSQL: a weighted tsvector column on document_search_entries
+    - others:     plain icontains matching, unranked
+
+Documents are queued for (re)indexing on upload, version creation, update,
+soft delete and restore (see signals.py) and indexed by a background thread,
+so uploads don't wait for text extraction. Deleted documents are dropped
+from the index; their extracted text is kept so a restore doesn't need to
+extract it again.
+
+search_documents() runs the ranked query restricted to a queryset of
+documents the user may see, so permission filtering happens in the same
+query as the ranking.
+
+Configured by settings.DOCUMENTS_SEARCH:
+    BACKGROUND          False indexes synchronously (use in tests)
+    FLUSH_INTERVAL      seconds between background indexing runs
+    MAX_CONTENT_CHARS   extracted text kept per document
+"""
+import html
+import logging
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .buffers import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKGROUND': True,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_CONTENT_CHARS': 500000,
+}
+
+FTS_TABLE = 'document_search_fts'
+
+# Snippet highlight markers, replaced with <mark> after HTML-escaping
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SearchHit = namedtuple('SearchHit', ['document_id', 'rank', 'snippet'])
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DOCUMENTS_SEARCH', {}))
+    return config
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn the match markers into <mark> tags"""
+    return html.escape(snippet or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def _visible_sql(visible):
+    """SQL (and params) selecting the IDs of the visible documents"""
+    sql, params = visible.order_by().values('pk').query.sql_with_params()
+    return sql, list(params)
+
+
+class SQLiteSearchBackend:
+    """FTS5 with bm25 ranking (title > description > content)"""
+
+    def index(self, document, content):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [document.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description, content) VALUES (%s, %s, %s, %s)",
+                [document.pk, document.title, document.description or '', content]
+            )
+
+    def remove(self, document_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [[pk] for pk in document_ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, visible, limit, offset):
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return 0, []
+        visible_sql, visible_params = _visible_sql(visible)
+        # Every term must match, each as a prefix ("sylla" finds "syllabus")
+        match = ' '.join('"%s"*' % token for token in tokens)
+        where = f"{FTS_TABLE} MATCH %s AND rowid IN ({visible_sql})"
+        params = [match, *visible_params]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {where}", params)
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT rowid, bm25({FTS_TABLE}, 10.0, 4.0, 1.0) AS score, "
+                f"snippet({FTS_TABLE}, -1, %s, %s, '…', 16) "
+                f"FROM {FTS_TABLE} WHERE {where} ORDER BY score LIMIT %s OFFSET %s",
+                [MARK_START, MARK_END, *params, limit, offset]
+            )
+            # bm25 is lower-is-better; flip it so higher rank means more relevant
+            hits = [SearchHit(pk, -score, snippet) for pk, score, snippet in cursor.fetchall()]
+        return total, hits
+
+
+class PostgresSearchBackend:
+    """tsvector weighted A (title), B (description), C (content), ranked with ts_rank_cd"""
+    config = 'english'
+
+    def index(self, document, content):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_search_entries SET search_vector = "
+                "setweight(to_tsvector(%s, %s), 'A') || "
+                "setweight(to_tsvector(%s, %s), 'B') || "
+                "setweight(to_tsvector(%s, content), 'C') "
+                "WHERE document_id = %s",
+                [self.config, document.title, self.config, document.description or '',
+                 self.config, document.pk]
+            )
+
+    def remove(self, document_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE document_search_entries SET search_vector = NULL WHERE document_id = ANY(%s)",
+                [list(document_ids)]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE document_search_entries SET search_vector = NULL")
+
+    def search(self, query, visible, limit, offset):
+        visible_sql, visible_params = _visible_sql(visible)
+        where = f"e.search_vector @@ q AND e.document_id IN ({visible_sql})"
+        tsquery = "CROSS JOIN websearch_to_tsquery(%s, %s) q"
+        options = (
+            f"StartSel={MARK_START}, StopSel={MARK_END}, "
+            "MaxFragments=2, MaxWords=24, MinWords=8, FragmentDelimiter=\" … \""
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM document_search_entries e {tsquery} WHERE {where}",
+                [self.config, query, *visible_params]
+            )
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT e.document_id, ts_rank_cd(e.search_vector, q) AS score, "
+                f"ts_headline(%s, concat_ws(' ', d.title, d.description, e.content), q, %s) "
+                f"FROM document_search_entries e JOIN documents d ON d.id = e.document_id {tsquery} "
+                f"WHERE {where} ORDER BY score DESC, e.document_id LIMIT %s OFFSET %s",
+                [self.config, options, self.config, query, *visible_params, limit, offset]
+            )
+            hits = [SearchHit(pk, score, snippet) for pk, score, snippet in cursor.fetchall()]
+        return total, hits
+
+
+class BasicSearchBackend:
+    """Fallback for databases without a full-text index: unranked icontains"""
+
+    def index(self, document, content):
+        pass
+
+    def remove(self, document_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, visible, limit, offset):
+        from django.db.models import Q
+
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return 0, []
+        matches = Q()
+        for token in tokens:
+            matches &= (
+                Q(title__icontains=token) |
+                Q(description__icontains=token) |
+                Q(search_entry__content__icontains=token)
+            )
+        queryset = visible.filter(matches).order_by('-uploaded_at')
+        total = queryset.count()
+        ids = queryset.values_list('id', flat=True)[offset:offset + limit]
+        return total, [SearchHit(pk, 0.0, '') for pk in ids]
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return BasicSearchBackend()
+
+
+def index_document(document_id):
+    """Extract (if the file changed) and index one document, or drop it from the index"""
+    from .extraction import extract_text
+    from .models import Document, DocumentSearchEntry
+
+    backend = get_backend()
+    document = Document.objects.filter(pk=document_id).first()
+    if document is None or document.deleted_at or not document.is_active:
+        backend.remove([document_id])
+        return False
+
+    field_file, filename = document.get_current_file()
+    source_name = field_file.name if field_file else ''
+    entry = DocumentSearchEntry.objects.filter(document=document).first()
+    if entry is None or entry.source_name != source_name:
+        content = extract_text(field_file, filename, get_config()['MAX_CONTENT_CHARS']) if field_file else ''
+        entry, _ = DocumentSearchEntry.objects.update_or_create(
+            document=document,
+            defaults={'source_name': source_name, 'content': content}
+        )
+
+    with transaction.atomic():
+        backend.index(document, entry.content)
+    return True
+
+
+def search_documents(query, visible_queryset, limit=20, offset=0):
+    """
+    Ranked search restricted to visible_queryset (documents the user may see).
+    Returns (total matches, [SearchHit]) with snippets HTML-escaped and highlighted.
+    """
+    total, hits = get_backend().search(query, visible_queryset, limit, offset)
+    return total, [hit._replace(snippet=highlight(hit.snippet)) for hit in hits]
+
+
+def rebuild_search_index(reextract=False):
+    """Re-index every active document. Returns the number indexed."""
+    from .models import Document, DocumentSearchEntry
+
+    backend = get_backend()
+    with transaction.atomic():
+        backend.clear()
+        if reextract:
+            DocumentSearchEntry.objects.all().delete()
+
+    indexed = 0
+    ids = Document.objects.filter(is_active=True, deleted_at__isnull=True).values_list('id', flat=True)
+    for document_id in ids.iterator():
+        if index_document(document_id):
+            indexed += 1
+    return indexed
+
+
+class SearchIndexer(WriteBehindBuffer):
+    """Queue of document IDs waiting to be (re)indexed by the background thread"""
+    thread_name = 'document-search-indexer'
+
+    def __init__(self):
+        super().__init__()
+        self._pending = set()
+
+    def get_config(self):
+        return get_config()
+
+    def enqueue(self, document_id):
+        """Index document_id once the current transaction commits"""
+        transaction.on_commit(lambda: self._add(document_id))
+
+    def _add(self, document_id):
+        if not self.get_config()['BACKGROUND']:
+            index_document(document_id)
+            return
+        with self._lock:
+            self._pending.add(document_id)
+        self.ensure_worker()
+
+    def flush(self):
+        """Index every queued document. Returns the number processed."""
+        done = 0
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = set()
+            for document_id in pending:
+                try:
+                    index_document(document_id)
+                    done += 1
+                except Exception:
+                    logger.exception("Indexing document %s failed", document_id)
+        return done
+
+
+search_indexer = SearchIndexer()
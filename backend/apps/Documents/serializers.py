@@ -33,9 +33,14 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['slug', 'created_at', 'updated_at']
     
     def get_document_count(self, obj):
+        # Read the Category.objects.with_counts() annotation when present
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.filter(is_active=True, deleted_at__isnull=True).count()
     
     def get_folder_count(self, obj):
+        if hasattr(obj, 'folder_count'):
+            return obj.folder_count
         return obj.folders.filter(deleted_at__isnull=True).count()
 
 
@@ -118,9 +123,14 @@ class FolderListSerializer(serializers.ModelSerializer):
         read_only_fields = ['slug', 'created_at']
     
     def get_subfolder_count(self, obj):
+        # Read the Folder.objects.with_counts() annotation when present
+        if hasattr(obj, 'subfolder_count'):
+            return obj.subfolder_count
         return obj.subfolders.filter(deleted_at__isnull=True).count()
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.filter(is_active=True, deleted_at__isnull=True).count()
 
 
@@ -187,13 +197,10 @@ class FolderCreateUpdateSerializer(serializers.ModelSerializer):
         # Check for circular references
         parent = attrs.get('parent')
         if parent and self.instance:
-            current = parent
-            while current:
-                if current.id == self.instance.id:
-                    raise serializers.ValidationError({
-                        'parent': 'Cannot set folder as its own ancestor (circular reference)'
-                    })
-                current = current.parent
+            if parent.id == self.instance.id or self.instance.id in parent.get_ancestor_ids():
+                raise serializers.ValidationError({
+                    'parent': 'Cannot set folder as its own ancestor (circular reference)'
+                })
         
         return attrs
 
@@ -221,10 +228,10 @@ class DocumentVersionSerializer(serializers.ModelSerializer):
         model = DocumentVersion
         fields = [
             'id', 'document', 'version_number', 'file_path', 'file_url',
-            'file_size', 'file_size_mb', 'mime_type', 'uploaded_by',
-            'uploaded_at', 'change_notes', 'is_current'
+            'original_filename', 'file_size', 'file_size_mb', 'mime_type',
+            'uploaded_by', 'uploaded_at', 'change_notes', 'is_current'
         ]
-        read_only_fields = ['uploaded_at']
+        read_only_fields = ['uploaded_at', 'original_filename']
     
     def get_file_size_mb(self, obj):
         if obj.file_size:
@@ -340,6 +347,18 @@ class ActivityLogSerializer(serializers.ModelSerializer):
         return obj.content_type.model if obj.content_type else None
 
 
+def thumbnail_url(document, request):
+    """
+    URL of document's preview, versioned by content hash so clients can
+    cache it for good (None until a preview has been rendered)
+    """
+    if not document.preview_kind or request is None:
+        return None
+    from django.urls import reverse
+    url = reverse('documents:document-thumbnail', kwargs={'pk': document.pk})
+    return request.build_absolute_uri(f"{url}?v={document.preview_key[:16]}")
+
+
 class DocumentListSerializer(serializers.ModelSerializer):
     """Lightweight document list serializer"""
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -347,6 +366,7 @@ class DocumentListSerializer(serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField()
     file_size_mb = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
     can_download = serializers.BooleanField(source='can_be_downloaded', read_only=True)
     
     class Meta:
@@ -355,7 +375,8 @@ class DocumentListSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'file_extension', 'mime_type',
             'file_size', 'file_size_mb', 'file_url', 'category', 'category_name',
             'folder', 'folder_name', 'uploaded_by_name', 'uploaded_at',
-            'view_count', 'is_featured', 'is_active', 'can_download', 'deleted_at'
+            'view_count', 'download_count', 'is_featured', 'is_active', 'can_download', 'deleted_at',
+            'preview_kind', 'thumbnail_url'
         ]
         read_only_fields = fields
     
@@ -373,6 +394,9 @@ class DocumentListSerializer(serializers.ModelSerializer):
             if request:
                 return request.build_absolute_uri(obj.file_path.url)
         return None
+    
+    def get_thumbnail_url(self, obj):
+        return thumbnail_url(obj, self.context.get('request'))
 
 
 class DocumentDetailSerializer(serializers.ModelSerializer):
@@ -391,24 +415,25 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
     # Computed fields
     file_size_mb = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
     can_download = serializers.BooleanField(source='can_be_downloaded', read_only=True)
-    download_count = serializers.SerializerMethodField()
     recent_activities = serializers.SerializerMethodField()
     
     class Meta:
         model = Document
         fields = [
             'id', 'title', 'description', 'file_path', 'file_url',
-            'file_size', 'file_size_mb', 'file_extension', 'mime_type',
+            'original_filename', 'file_size', 'file_size_mb', 'file_extension', 'mime_type',
             'category', 'folder', 'document_type', 'uploaded_by',
             'uploaded_at', 'updated_at', 'is_active', 'view_count',
             'is_featured', 'can_download', 'download_count',
             'deleted_at', 'deleted_by', 'permissions', 'versions',
-            'approval', 'recent_activities'
+            'approval', 'recent_activities', 'preview_kind', 'thumbnail_url'
         ]
         read_only_fields = [
-            'file_size', 'file_extension', 'mime_type', 'uploaded_at',
-            'updated_at', 'view_count'
+            'original_filename', 'file_size', 'file_extension', 'mime_type',
+            'uploaded_at', 'updated_at', 'view_count', 'download_count',
+            'preview_kind'
         ]
     
     def get_file_size_mb(self, obj):
@@ -421,9 +446,8 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.file_path.url)
         return None
     
-    def get_download_count(self, obj):
-        # Note: This makes a DB query. Consider using annotations in viewset
-        return obj.get_download_count()
+    def get_thumbnail_url(self, obj):
+        return thumbnail_url(obj, self.context.get('request'))
     
     def get_recent_activities(self, obj):
         """Get last 5 activities for this document"""
@@ -431,6 +455,27 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
         return ActivityLogSerializer(activities, many=True, context=self.context).data
 
 
+def validate_file_for_type(document_type, filename, size, field='file_path'):
+    """Check a file's extension and size against document_type's limits"""
+    import os
+    _, ext = os.path.splitext(filename)
+    ext = ext.lower().lstrip('.')
+    
+    # Validate file extension
+    allowed = document_type.allowed_extensions
+    if allowed and ext not in allowed:
+        raise serializers.ValidationError({
+            field: f"File extension '{ext}' not allowed. Allowed: {', '.join(allowed)}"
+        })
+    
+    # Validate file size
+    max_size = document_type.max_file_size_mb * 1024 * 1024
+    if size > max_size:
+        raise serializers.ValidationError({
+            field: f"File size exceeds maximum allowed ({document_type.max_file_size_mb}MB)"
+        })
+
+
 class DocumentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating documents"""
     
@@ -458,23 +503,7 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
         file_path = attrs.get('file_path')
         
         if document_type and file_path:
-            # Validate file extension
-            import os
-            _, ext = os.path.splitext(file_path.name)
-            ext = ext.lower().lstrip('.')
-            
-            allowed = document_type.allowed_extensions
-            if allowed and ext not in allowed:
-                raise serializers.ValidationError({
-                    'file_path': f"File extension '{ext}' not allowed. Allowed: {', '.join(allowed)}"
-                })
-            
-            # Validate file size
-            max_size = document_type.max_file_size_mb * 1024 * 1024
-            if file_path.size > max_size:
-                raise serializers.ValidationError({
-                    'file_path': f"File size exceeds maximum allowed ({document_type.max_file_size_mb}MB)"
-                })
+            validate_file_for_type(document_type, file_path.name, file_path.size)
         
         return attrs
     
@@ -586,3 +615,167 @@ class DocumentRestoreSerializer(serializers.Serializer):
         
         return value
 
+
+class BulkDocumentsSerializer(serializers.Serializer):
+    """Base for set-based bulk operations on documents (see bulk.py)"""
+    document_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
+    
+    def validate_document_ids(self, value):
+        from .bulk import MAX_BULK_DOCUMENTS
+        if len(value) > MAX_BULK_DOCUMENTS:
+            raise serializers.ValidationError(
+                f"Cannot process more than {MAX_BULK_DOCUMENTS} documents at once"
+            )
+        # Keep request order, drop duplicates
+        return list(dict.fromkeys(value))
+
+
+class BulkMoveSerializer(BulkDocumentsSerializer, DocumentMoveSerializer):
+    """Serializer for moving many documents to one folder"""
+
+
+class BulkRestoreSerializer(BulkDocumentsSerializer, DocumentRestoreSerializer):
+    """Serializer for restoring many documents from trash"""
+
+
+class BulkCategorizeSerializer(BulkDocumentsSerializer):
+    """Serializer for assigning one category to many documents"""
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for upload session status (what has been received so far)"""
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    missing_chunks = serializers.SerializerMethodField()
+    received_ranges = serializers.SerializerMethodField()
+    received_bytes = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'content_type', 'total_size', 'chunk_size',
+            'total_chunks', 'received_chunks', 'missing_chunks',
+            'received_ranges', 'received_bytes', 'document', 'status',
+            'created_at', 'expires_at'
+        ]
+        read_only_fields = fields
+    
+    def _indexes(self, obj):
+        # Prefetched chunks when available
+        return sorted(chunk.index for chunk in obj.chunks.all())
+    
+    def get_received_chunks(self, obj):
+        return self._indexes(obj)
+    
+    def get_missing_chunks(self, obj):
+        received = set(self._indexes(obj))
+        return [i for i in range(obj.total_chunks) if i not in received]
+    
+    def get_received_ranges(self, obj):
+        from .uploads import received_ranges
+        return received_ranges(obj, self._indexes(obj))
+    
+    def get_received_bytes(self, obj):
+        return sum(chunk.size for chunk in obj.chunks.all())
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """
+    Start an upload session. Pass `document` to upload a new version of it,
+    otherwise the document fields used by DocumentCreateSerializer.
+    """
+    filename = serializers.CharField(max_length=255)
+    total_size = serializers.IntegerField(min_value=1)
+    chunk_size = serializers.IntegerField(required=False, min_value=64 * 1024)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    
+    # New version of an existing document
+    document = serializers.PrimaryKeyRelatedField(
+        queryset=Document.objects.filter(deleted_at__isnull=True),
+        required=False, allow_null=True
+    )
+    change_notes = serializers.CharField(required=False, allow_blank=True)
+    
+    # New document
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    folder = serializers.PrimaryKeyRelatedField(
+        queryset=Folder.objects.filter(deleted_at__isnull=True),
+        required=False, allow_null=True
+    )
+    document_type = serializers.PrimaryKeyRelatedField(
+        queryset=DocumentType.objects.all(), required=False, allow_null=True
+    )
+    is_featured = serializers.BooleanField(required=False)
+    
+    def validate_filename(self, value):
+        import os
+        value = os.path.basename(value.replace('\\', '/'))
+        if not value:
+            raise serializers.ValidationError("Invalid filename")
+        return value
+    
+    def validate(self, attrs):
+        from .uploads import get_config
+        config = get_config()
+        
+        if attrs['total_size'] > config['MAX_FILE_SIZE']:
+            raise serializers.ValidationError({
+                'total_size': f"File size cannot exceed {config['MAX_FILE_SIZE'] // BYTES_PER_MB}MB"
+            })
+        
+        chunk_size = attrs.setdefault('chunk_size', config['CHUNK_SIZE'])
+        if chunk_size > config['MAX_CHUNK_SIZE']:
+            raise serializers.ValidationError({
+                'chunk_size': f"Chunk size cannot exceed {config['MAX_CHUNK_SIZE']} bytes"
+            })
+        
+        document = attrs.get('document')
+        if document is None:
+            if not attrs.get('title'):
+                raise serializers.ValidationError({'title': "This field is required."})
+            if not attrs.get('category'):
+                raise serializers.ValidationError({'category': "This field is required."})
+        
+        # Fail early on files the document type won't accept (checked again at finalize)
+        document_type = document.document_type if document else attrs.get('document_type')
+        if document_type:
+            validate_file_for_type(document_type, attrs['filename'], attrs['total_size'], field='filename')
+        
+        return attrs
+    
+    def create(self, validated_data):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .uploads import get_config
+        
+        document = validated_data.pop('document', None)
+        metadata = {}
+        if document:
+            metadata['kind'] = 'version'
+            metadata['change_notes'] = validated_data.get('change_notes', '')
+        else:
+            metadata['kind'] = 'document'
+            for field in ('title', 'description', 'is_featured'):
+                if field in validated_data:
+                    metadata[field] = validated_data[field]
+            for field in ('category', 'folder', 'document_type'):
+                if validated_data.get(field):
+                    metadata[field] = validated_data[field].pk
+        
+        return UploadSession.objects.create(
+            user=self.context['request'].user,
+            document=document,
+            filename=validated_data['filename'],
+            content_type=validated_data.get('content_type', ''),
+            total_size=validated_data['total_size'],
+            chunk_size=validated_data['chunk_size'],
+            metadata=metadata,
+            expires_at=timezone.now() + timedelta(seconds=get_config()['SESSION_TTL'])
+        )
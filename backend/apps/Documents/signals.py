@@ -1,6 +1,14 @@
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import Document, DocumentApproval, DocumentVersion, ActivityLog
+from .models import (
+    Document, DocumentApproval, DocumentVersion, ActivityLog,
+    Folder, FolderPermission, FolderRolePermission, UploadSession,
+)
+from .permissions import bump_permission_version
+from .previews import preview_renderer
+from .search import search_indexer
+from .storage import release_file
+from .uploads import discard_temp_file
 
 @receiver(post_save, sender=Document)
 def log_document_save(sender, instance, created, **kwargs):
@@ -22,9 +30,8 @@ def log_document_delete(sender, instance, **kwargs):
         description=f"Document '{instance.title}' deleted"
     )
     
-    # Clean up file
-    if instance.file_path:
-        instance.file_path.delete(save=False)
+    # Drop the file reference (shared blobs go with their last reference)
+    release_file(instance.file_path)
 
 @receiver(post_save, sender=DocumentApproval)
 def log_approval_status_change(sender, instance, created, **kwargs):
@@ -62,5 +69,43 @@ def log_version_creation(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=DocumentVersion)
 def delete_version_file(sender, instance, **kwargs):
     """Clean up version file on deletion"""
-    if instance.file_path:
-        instance.file_path.delete(save=False)
\ No newline at end of file
+    release_file(instance.file_path)
+
+@receiver(post_save, sender=Folder)
+@receiver(post_delete, sender=Folder)
+@receiver(post_save, sender=FolderPermission)
+@receiver(post_delete, sender=FolderPermission)
+@receiver(post_save, sender=FolderRolePermission)
+@receiver(post_delete, sender=FolderRolePermission)
+def invalidate_effective_permissions(sender, **kwargs):
+    """Folder or folder permission changed - drop cached permission sets"""
+    bump_permission_version()
+
+@receiver(post_delete, sender=UploadSession)
+def delete_upload_session_file(sender, instance, **kwargs):
+    """Remove the partial file of an aborted or expired upload"""
+    discard_temp_file(instance)
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def reindex_document(sender, instance, **kwargs):
+    """Upload, edit, soft delete/restore or delete - refresh the search index"""
+    search_indexer.enqueue(instance.pk)
+
+@receiver(post_save, sender=DocumentVersion)
+def reindex_document_version(sender, instance, created, **kwargs):
+    """A new version replaces the text that is searched"""
+    if created:
+        search_indexer.enqueue(instance.document_id)
+
+@receiver(post_save, sender=Document)
+def render_document_preview(sender, instance, created, **kwargs):
+    """New upload - render its thumbnail / text preview in the background"""
+    if created:
+        preview_renderer.enqueue(instance.pk)
+
+@receiver(post_save, sender=DocumentVersion)
+def render_version_preview(sender, instance, created, **kwargs):
+    """A new version replaces the file that is previewed"""
+    if created:
+        preview_renderer.enqueue(instance.document_id)
@@ -0,0 +1,204 @@
+"""
+Incrementally maintained daily usage rollups for the analytics dashboard.
+
+Every document view, download and upload logged through ActivityLog.log()
+is also counted here, per day, for the document, its category, the acting
+user and the whole site (see DocumentDailyStat). Increments are summed in
+memory and applied every FLUSH_INTERVAL seconds, one UPDATE (or INSERT for
+a new day) per touched rollup row.
+
+Configured by settings.DOCUMENTS_STATS:
+    BUFFERED        False applies every event immediately (use in tests)
+    FLUSH_INTERVAL  seconds between background flushes
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': 10.0,
+}
+
+
+def rollup_keys(day, document_id=None, category_id=None, user_id=None):
+    """(date, scope, object_id) rows an event for this document/user counts towards"""
+    from .models import DocumentDailyStat
+
+    Scopes = DocumentDailyStat.Scopes
+    keys = [(day, Scopes.SITE, 0)]
+    if document_id:
+        keys.append((day, Scopes.DOCUMENT, document_id))
+    if category_id:
+        keys.append((day, Scopes.CATEGORY, category_id))
+    if user_id:
+        keys.append((day, Scopes.USER, user_id))
+    return keys
+
+
+class DocumentStatsBuffer(WriteBehindBuffer):
+    """Pending rollup increments keyed by ((date, scope, object_id), field)"""
+    thread_name = 'document-stats-flusher'
+
+    # ActivityLog action -> (event counter, bytes counter)
+    ACTION_FIELDS = {
+        'doc_view': ('views', None),
+        'doc_download': ('downloads', 'bytes_downloaded'),
+        'doc_upload': ('uploads', 'bytes_uploaded'),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._pending = Counter()
+
+    def get_config(self):
+        config = dict(DEFAULTS)
+        config.update(getattr(settings, 'DOCUMENTS_STATS', {}))
+        return config
+
+    def record_activity(self, action, document, user=None, num_bytes=None, when=None):
+        """Count one view/download/upload of document (other actions are ignored)"""
+        fields = self.ACTION_FIELDS.get(action)
+        if fields is None:
+            return
+
+        count_field, bytes_field = fields
+        increments = {count_field: 1}
+        if bytes_field:
+            increments[bytes_field] = (document.file_size or 0) if num_bytes is None else num_bytes
+
+        day = timezone.localdate(when or timezone.now())
+        keys = rollup_keys(day, document.pk, document.category_id, getattr(user, 'pk', None))
+
+        if not self.get_config()['BUFFERED']:
+            self._apply({key: increments for key in keys})
+            return
+
+        with self._lock:
+            for key in keys:
+                for field, amount in increments.items():
+                    self._pending[(key, field)] += amount
+        self.ensure_worker()
+
+    def record_bytes_downloaded(self, document, user, num_bytes):
+        """Count bytes served without counting another download (resumed ranges)"""
+        day = timezone.localdate()
+        keys = rollup_keys(day, document.pk, document.category_id, getattr(user, 'pk', None))
+        if not self.get_config()['BUFFERED']:
+            self._apply({key: {'bytes_downloaded': num_bytes} for key in keys})
+            return
+
+        with self._lock:
+            for key in keys:
+                self._pending[(key, 'bytes_downloaded')] += num_bytes
+        self.ensure_worker()
+
+    def flush(self):
+        """Apply pending increments. Returns the number of rollup rows touched."""
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = Counter()
+            if not pending:
+                return 0
+
+            by_row = {}
+            for (key, field), amount in pending.items():
+                by_row.setdefault(key, {})[field] = amount
+            try:
+                self._apply(by_row)
+            except Exception:
+                # Put the increments back so they're retried on the next flush
+                logger.exception("Applying document stats failed, will retry")
+                with self._lock:
+                    self._pending.update(pending)
+                return 0
+            return len(by_row)
+
+    def _apply(self, by_row):
+        from .models import DocumentDailyStat
+
+        with transaction.atomic():
+            for (day, scope, object_id), increments in by_row.items():
+                rows = DocumentDailyStat.objects.filter(date=day, scope=scope, object_id=object_id)
+                updates = {field: F(field) + amount for field, amount in increments.items()}
+                if rows.update(**updates):
+                    continue
+                try:
+                    with transaction.atomic():
+                        DocumentDailyStat.objects.create(
+                            date=day, scope=scope, object_id=object_id, **increments
+                        )
+                except IntegrityError:
+                    # Another process created the row first
+                    rows.update(**updates)
+
+
+stats_buffer = DocumentStatsBuffer()
+
+
+def rebuild_daily_stats(batch_size=1000):
+    """
+    Recompute every DocumentDailyStat row and Document.download_count from the
+    activity log history. Returns the number of rollup rows written.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+    from .models import ActivityLog, Document, DocumentDailyStat
+
+    documents = {
+        pk: (category_id, file_size or 0)
+        for pk, category_id, file_size in Document.objects.values_list('id', 'category_id', 'file_size')
+    }
+    history = (
+        ActivityLog.objects.filter(
+            content_type=ContentType.objects.get_for_model(Document),
+            action__in=list(DocumentStatsBuffer.ACTION_FIELDS),
+        )
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'object_id', 'user_id', 'action')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    totals = Counter()
+    downloads = Counter()
+    for row in history.iterator():
+        count_field, bytes_field = DocumentStatsBuffer.ACTION_FIELDS[row['action']]
+        category_id, file_size = documents.get(row['object_id'], (None, 0))
+        for key in rollup_keys(row['day'], row['object_id'], category_id, row['user_id']):
+            totals[(key, count_field)] += row['total']
+            if bytes_field:
+                totals[(key, bytes_field)] += row['total'] * file_size
+        if count_field == 'downloads':
+            downloads[row['object_id']] += row['total']
+
+    rows = {}
+    for ((day, scope, object_id), field), amount in totals.items():
+        rows.setdefault((day, scope, object_id), {})[field] = amount
+
+    with transaction.atomic():
+        DocumentDailyStat.objects.all().delete()
+        DocumentDailyStat.objects.bulk_create(
+            [
+                DocumentDailyStat(date=day, scope=scope, object_id=object_id, **fields)
+                for (day, scope, object_id), fields in rows.items()
+            ],
+            batch_size=batch_size,
+        )
+        Document.objects.exclude(pk__in=list(downloads)).exclude(download_count=0).update(download_count=0)
+        Document.objects.bulk_update(
+            [Document(pk=pk, download_count=total) for pk, total in downloads.items() if pk in documents],
+            ['download_count'],
+            batch_size=batch_size,
+        )
+    return len(rows)
@@ -0,0 +1,170 @@
+"""
+Content-addressed, deduplicating storage for document and version files.
+
+Every file saved through BlobStorage is stored once per distinct content, as
+blobs/<aa>/<bb>/<sha256><ext>, and tracked by a FileBlob row holding its
+reference count. Saving content that is already stored only bumps the count
+(nothing is written), so re-uploading the same syllabus into another folder
+or as another version is instant. release_file() drops a reference and
+removes the blob once the last document/version using it is deleted.
+
+The reference is taken in the caller's transaction: Document and
+DocumentVersion save inside transaction.atomic(), so a save that fails
+rolls the count back with the row. A blob file written for it is left
+without a FileBlob row, which reap_orphaned_files() removes.
+
+Files saved before this storage was introduced keep their old names and are
+deleted as before; `manage.py dedupe_document_files` moves them into blobs.
+
+Inside deferred_file_deletion() released files are only collected, so a
+caller deleting many rows can remove the files after its transaction
+commits (see cleanup.py).
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+BLOB_PREFIX = 'blobs'
+
+
+def blob_name(digest, filename=''):
+    """Storage name for content with the given SHA-256 hex digest"""
+    _, ext = os.path.splitext(filename)
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext[:10].lower()}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + '/')
+
+
+def hash_content(content):
+    """Return (sha256 hex digest, size) of a Django File"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class BlobStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content once (see module docstring)"""
+
+    def _save(self, name, content):
+        from .models import FileBlob
+
+        digest, size = hash_content(content)
+        with transaction.atomic():
+            # Lock the blob row so a concurrent release can't delete the file under us
+            blob, created = FileBlob.objects.select_for_update().get_or_create(
+                sha256=digest,
+                defaults={'name': blob_name(digest, name), 'size': size, 'ref_count': 0}
+            )
+            if not self.exists(blob.name):
+                # FileSystemStorage moves temporary uploads into place
+                saved = super()._save(blob.name, content)
+                if saved != blob.name:
+                    blob.name = saved
+                    blob.save(update_fields=['name'])
+            FileBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        return blob.name
+
+
+def get_blob_storage():
+    return blob_storage
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_file_deletion():
+    """
+    Collect the files released in this thread inside the block instead of
+    deleting them. Yields the list of (storage, name) pairs to delete.
+    """
+    previous = getattr(_deferred, 'files', None)
+    _deferred.files = files = []
+    try:
+        yield files
+    finally:
+        _deferred.files = previous
+
+
+def _delete_stored_file(storage, name):
+    files = getattr(_deferred, 'files', None)
+    if files is not None:
+        files.append((storage, name))
+    else:
+        storage.delete(name)
+
+
+def release_file(field_file):
+    """
+    Drop field_file's reference. Blobs are deleted with their last reference;
+    files saved under old-style names are deleted right away.
+    """
+    from .models import FileBlob
+
+    name = field_file.name if field_file else None
+    if not name:
+        return
+    if not is_blob(name):
+        _delete_stored_file(field_file.storage, name)
+        return
+
+    with transaction.atomic():
+        blob = FileBlob.objects.select_for_update().filter(name=name).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            FileBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            return
+        blob.delete()
+        _delete_stored_file(field_file.storage, name)
+
+
+blob_storage = BlobStorage()
+
+
+def rebuild_blob_refcounts():
+    """
+    Recount FileBlob references from documents and versions (creating rows
+    for referenced blobs that have none). Returns the number of blobs fixed.
+    """
+    from collections import Counter
+    from django.db.models import Count
+    from .models import Document, DocumentVersion, FileBlob
+
+    counts = Counter()
+    for model in (Document, DocumentVersion):
+        references = (
+            model.objects.filter(file_path__startswith=BLOB_PREFIX + '/')
+            .values_list('file_path')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for name, total in references:
+            counts[name] += total
+
+    created = 0
+    blobs = {blob.name: blob for blob in FileBlob.objects.all()}
+    for name, total in counts.items():
+        if name not in blobs:
+            digest = os.path.splitext(os.path.basename(name))[0]
+            size = blob_storage.size(name) if blob_storage.exists(name) else 0
+            FileBlob.objects.create(sha256=digest, name=name, size=size, ref_count=total)
+            created += 1
+
+    changed = []
+    for name, blob in blobs.items():
+        if blob.ref_count != counts.get(name, 0):
+            blob.ref_count = counts.get(name, 0)
+            changed.append(blob)
+    FileBlob.objects.bulk_update(changed, ['ref_count'])
+    return created + len(changed)
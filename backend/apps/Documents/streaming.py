@@ -0,0 +1,189 @@
+"""
+Streaming file responses with HTTP Range and conditional GET support.
+
+serve_file() answers a GET for a stored FileField file:
+    - 304 Not Modified when If-None-Match / If-Modified-Since match
+    - 206 Partial Content for a single "Range: bytes=..." request (resume)
+    - 416 Range Not Satisfiable for a range outside the file
+    - 200 with the whole file otherwise
+
+Bodies are streamed in chunks (FileResponse uses the server's file wrapper
+when available). When settings.DOCUMENTS_SENDFILE_HEADER is set (e.g.
+'X-Accel-Redirect' for nginx or 'X-Sendfile' for Apache), the response
+only carries that header and the web server sends the bytes itself; the
+URL/path is DOCUMENTS_SENDFILE_PREFIX + the file's storage name.
+"""
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import (
+    content_disposition_header, http_date, parse_http_date_safe, quote_etag,
+)
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Lets file endpoints accept any Accept header (e.g. application/octet-stream);
+    the file responses bypass rendering, error payloads are sent as JSON.
+    """
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class ServedFile:
+    """
+    Outcome of serve_file(): the response, how many body bytes Django streams
+    for it (0 when the web server sends the file) and the first byte offset.
+    """
+
+    def __init__(self, response, bytes_served=0, start=0):
+        self.response = response
+        self.bytes_served = bytes_served
+        self.start = start
+
+    @property
+    def is_continuation(self):
+        """True for a resumed range that doesn't start at byte 0"""
+        return self.start > 0
+
+
+def file_validators(field_file, fallback_modified=None):
+    """Return (etag, last_modified datetime) for a stored file"""
+    storage = field_file.storage
+    size = field_file.size
+    try:
+        modified = storage.get_modified_time(field_file.name)
+    except (NotImplementedError, OSError):
+        modified = fallback_modified
+    stamp = modified.timestamp() if modified else 0
+    digest = hashlib.md5(f"{field_file.name}:{size}:{stamp}".encode()).hexdigest()
+    return quote_etag(digest), modified
+
+
+def parse_range(header, size):
+    """
+    Parse a single byte range. Returns (start, end) inclusive, None when the
+    header should be ignored (absent or multi-range), or False when the range
+    can't be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _range_iterator(field_file, start, length):
+    with field_file.storage.open(field_file.name, 'rb') as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    if last_modified is None:
+        return False
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(last_modified.timestamp()) <= since
+
+
+def serve_file(request, field_file, filename, content_type=None, fallback_modified=None):
+    """Build the response for GET/HEAD of field_file (see module docstring)"""
+    etag, last_modified = file_validators(field_file, fallback_modified)
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified_ts
+    )
+    if not_modified is not None:
+        return ServedFile(not_modified)
+
+    size = field_file.size
+    byte_range = None
+    if _if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return ServedFile(response)
+
+    sendfile_header = getattr(settings, 'DOCUMENTS_SENDFILE_HEADER', None)
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if sendfile_header:
+        # Web server handles ranges and the body
+        response = HttpResponse(content_type=content_type or 'application/octet-stream')
+        prefix = getattr(settings, 'DOCUMENTS_SENDFILE_PREFIX', '')
+        response[sendfile_header] = f"{prefix}{field_file.name}"
+    elif byte_range:
+        response = StreamingHttpResponse(
+            _range_iterator(field_file, start, length),
+            status=206,
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(
+            field_file.storage.open(field_file.name, 'rb'),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type or None,
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Cache-Control'] = 'private, no-cache'
+
+    if request.method == 'HEAD':
+        return ServedFile(response)
+    if sendfile_header:
+        # The web server may serve fewer bytes (its own range handling, a
+        # dropped connection); don't count bytes we never sent
+        return ServedFile(response, start=start)
+    return ServedFile(response, bytes_served=length, start=start)
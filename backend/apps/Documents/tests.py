@@ -1,3 +1,1205 @@
-from django.test import TestCase
+import concurrent.futures
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .activity import activity_buffer, resolve_content_objects
+from .cleanup import purge_expired_trash, reap_orphaned_files
+from .counters import counter_buffer
+from .exports import COLUMNS
+from .stats import stats_buffer
+from .models import (
+    ActivityLog, ApprovalHistory, Category, Document, DocumentApproval, DocumentDailyStat, DocumentPermission,
+    DocumentVersion, FileBlob, Folder, FolderPermission, FolderRolePermission, PermissionVersion,
+    RecentDocumentAccess,
+)
+from .recent import trim_recent_accesses
+from .permissions import check_many, get_effective_permissions
+from . import previews
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='documents-tests-')
+
+# Write-behind buffers and background workers run synchronously in tests
+documents_test_settings = override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    DOCUMENTS_ACTIVITY_LOG={'BUFFERED': False},
+    DOCUMENTS_COUNTERS={'BUFFERED': False},
+    DOCUMENTS_STATS={'BUFFERED': False},
+    DOCUMENTS_RECENT={'BUFFERED': False},
+    DOCUMENTS_SEARCH={'BACKGROUND': False},
+    DOCUMENTS_PREVIEWS={'BACKGROUND': False},
+)
+
+
+# A background flush would never run during a test; tests flush explicitly
+BUFFERED = {'BUFFERED': True, 'FLUSH_INTERVAL': 3600}
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def make_user(username, role_type='student', **fields):
+    return User.objects.create(
+        username=username, institutional_id=username.upper(), role_type=role_type, **fields
+    )
+
+
+class DocumentsTestCase(TestCase):
+    """Shared fixtures: a category and an admin, faculty and student user"""
+
+    @classmethod
+    def setUpClass(cls):
+        documents_test_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        documents_test_settings.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Academic')
+        cls.admin = make_user('admin', 'admin', is_staff=True)
+        cls.faculty = make_user('faculty', 'faculty')
+        cls.student = make_user('student', 'student')
+
+    def setUp(self):
+        # Cached permission answers are keyed by a version that rolls back with each test
+        cache.clear()
+
+    def make_folder(self, name, parent=None, **fields):
+        return Folder.objects.create(name=name, parent=parent, category=self.category, **fields)
+
+    def make_document(self, title, folder=None, content=b'Hello world', filename='notes.txt', **fields):
+        fields.setdefault('uploaded_by', self.faculty)
+        fields.setdefault('category', self.category)
+        return Document.objects.create(
+            title=title, folder=folder,
+            file_path=ContentFile(content, name=filename), original_filename=filename, **fields
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class FolderPathTests(DocumentsTestCase):
+
+    def test_path_and_depth_on_create(self):
+        root = self.make_folder('Root')
+        child = self.make_folder('Child', root)
+        self.assertEqual(root.path, f'/{root.pk}/')
+        self.assertEqual(child.path, f'/{root.pk}/{child.pk}/')
+        self.assertEqual((root.depth, child.depth), (0, 1))
+        self.assertEqual(child.get_full_path(), '/Root/Child')
+
+    def test_move_rewrites_subtree(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        c = self.make_folder('C', b)
+        d = self.make_folder('D')
+
+        b.parent = d
+        b.save()
+
+        c.refresh_from_db()
+        self.assertEqual(c.path, f'/{d.pk}/{b.pk}/{c.pk}/')
+        self.assertEqual(c.depth, 2)
+        self.assertEqual(c.get_full_path(), '/D/B/C')
+        self.assertEqual(a.get_descendants(), [])
+        self.assertEqual([f.pk for f in d.get_descendants()], [b.pk, c.pk])
+
+    def test_move_to_root(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        c = self.make_folder('C', b)
+
+        b.parent = None
+        b.save()
+
+        c.refresh_from_db()
+        self.assertEqual(c.path, f'/{b.pk}/{c.pk}/')
+        self.assertEqual((b.depth, c.depth), (0, 1))
+
+    def test_rename_keeps_path(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        path = b.path
+
+        a.name = 'Renamed'
+        a.save()
+
+        b.refresh_from_db()
+        self.assertEqual(b.path, path)
+        self.assertEqual(b.get_full_path(), '/Renamed/B')
+
+    def test_descendants_hide_deleted_subtrees(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        self.make_folder('C', b)
+        kept = self.make_folder('D', a)
+
+        b.deleted_at = timezone.now()
+        b.save()
+
+        self.assertEqual([f.pk for f in a.get_descendants()], [kept.pk])
+
+    def test_descendants_without_path(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        c = self.make_folder('C', b)
+        self.make_folder('Other')
+        Folder.objects.update(path='', depth=0)
+        a.refresh_from_db()
+
+        self.assertEqual({f.pk for f in a.get_descendants()}, {b.pk, c.pk})
+
+    def test_rebuild_paths(self):
+        a = self.make_folder('A')
+        b = self.make_folder('B', a)
+        Folder.objects.update(path='', depth=0)
+
+        self.assertEqual(Folder.rebuild_paths(), 2)
+        b.refresh_from_db()
+        self.assertEqual((b.path, b.depth), (f'/{a.pk}/{b.pk}/', 1))
+
+
+class FolderPermissionTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.public = self.make_folder('Public')
+        self.private = self.make_folder('Private', is_public=False)
+        self.granted = self.make_folder('Granted', is_public=False)
+        self.denied = self.make_folder('Denied')
+        self.owned = self.make_folder('Owned', is_public=False, created_by=self.faculty)
+        FolderRolePermission.objects.create(folder=self.granted, role='student', can_view=True)
+        FolderPermission.objects.create(folder=self.denied, user=self.student, can_view=False)
+
+    def fresh(self, user):
+        """The user as loaded by a new request"""
+        return User.objects.get(pk=user.pk)
+
+    def visible(self, user, action='view'):
+        q = get_effective_permissions(self.fresh(user)).folder_q(action)
+        folders = Folder.objects.all() if q is None else Folder.objects.filter(q)
+        return set(folders.values_list('pk', flat=True))
+
+    def test_precedence(self):
+        self.assertEqual(self.visible(self.student), {self.public.pk, self.granted.pk})
+        self.assertEqual(self.visible(self.faculty), {self.public.pk, self.denied.pk, self.owned.pk})
+        self.assertEqual(self.visible(self.faculty, 'edit'), {self.owned.pk})
+        self.assertEqual(self.visible(self.student, 'upload'), set())
+        self.assertEqual(len(self.visible(self.admin)), Folder.objects.count())
+
+    def test_document_list_visibility(self):
+        visible = {
+            self.make_document('In public', self.public).pk,
+            self.make_document('In granted', self.granted).pk,
+            self.make_document('No folder').pk,
+            self.make_document('Own upload', self.private, uploaded_by=self.student).pk,
+        }
+        self.make_document('In private', self.private)
+        self.make_document('In denied', self.denied)
+
+        response = self.client_for(self.student).get('/api/documents/documents/', {'page_size': 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row['id'] for row in response.data['results']}, visible)
+
+    def test_check_many_matches_folder_q(self):
+        folders = list(Folder.objects.all())
+        for user in (self.student, self.faculty):
+            for action in ('view', 'edit'):
+                allowed = check_many(self.fresh(user), folders, action)
+                self.assertEqual({pk for pk, ok in allowed.items() if ok}, self.visible(user, action))
+
+    def test_check_many_queries(self):
+        folders = list(Folder.objects.all())
+        first, second = self.fresh(self.student), self.fresh(self.student)
+        # The version, then the folders' access in one query
+        with self.assertNumQueries(2):
+            check_many(first, folders, 'view')
+        # A later request reuses the cached answers
+        with self.assertNumQueries(1):
+            check_many(second, folders, 'view')
+
+    def test_permission_change_invalidates(self):
+        self.assertFalse(self.private.can_user_access(self.fresh(self.student)))
+        permission = FolderPermission.objects.create(folder=self.private, user=self.student, can_view=True)
+        self.assertTrue(self.private.can_user_access(self.fresh(self.student)))
+        permission.delete()
+        self.assertFalse(self.private.can_user_access(self.fresh(self.student)))
+
+    def test_folder_change_invalidates(self):
+        self.assertFalse(self.private.can_user_access(self.fresh(self.student)))
+        self.private.is_public = True
+        self.private.save()
+        self.assertTrue(self.private.can_user_access(self.fresh(self.student)))
+
+    def test_bump_from_another_process_invalidates(self):
+        self.assertFalse(self.private.can_user_access(self.fresh(self.student)))
+        # Granted without signals: the cached answer still applies...
+        FolderPermission.objects.bulk_create([FolderPermission(folder=self.private, user=self.student)])
+        self.assertFalse(self.private.can_user_access(self.fresh(self.student)))
+        # ...until any process bumps the version in the database
+        PermissionVersion.objects.filter(pk=1).update(version=F('version') + 1)
+        self.assertTrue(self.private.can_user_access(self.fresh(self.student)))
+
+
+class CountAnnotationTests(DocumentsTestCase):
+    """Folder and category lists take the same number of queries however many rows there are"""
+
+    def create(self, count):
+        for i in range(count):
+            category = Category.objects.create(name=f'Category {Category.objects.count()}')
+            folder = self.make_folder(f'Folder {i}')
+            self.make_folder(f'Subfolder {i}', folder)
+            self.make_document(f'Document {i}', folder, category=category)
+
+    def list_queries(self, url):
+        client = self.client_for(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, {'page_size': 200})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_folder_list_query_count_is_constant(self):
+        self.create(2)
+        small, _ = self.list_queries('/api/documents/folders/')
+        self.create(20)
+        large, data = self.list_queries('/api/documents/folders/')
+        self.assertEqual(small, large)
+
+        folder = next(row for row in data['results'] if row['name'] == 'Folder 0')
+        self.assertEqual((folder['subfolder_count'], folder['document_count']), (1, 1))
+
+    def test_category_list_query_count_is_constant(self):
+        self.create(2)
+        small, _ = self.list_queries('/api/documents/categories/')
+        self.create(20)
+        large, _ = self.list_queries('/api/documents/categories/')
+        self.assertEqual(small, large)
+
+        with self.assertNumQueries(1):
+            data = self.client_for(self.admin).get(f'/api/documents/categories/{self.category.pk}/').data
+        self.assertEqual((data['document_count'], data['folder_count']), (0, 44))
+
+
+class ActivityBufferTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.document = self.make_document('Syllabus')
+        ActivityLog.objects.all().delete()
+
+    def test_rows_are_written_on_flush(self):
+        with self.settings(DOCUMENTS_ACTIVITY_LOG=BUFFERED):
+            entries = [
+                ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.document, user=self.student)
+                for _ in range(3)
+            ]
+            self.assertFalse(ActivityLog.objects.exists())
+            self.assertEqual(len(activity_buffer), 3)
+
+            self.assertEqual(activity_buffer.flush(), 3)
+
+        self.assertEqual(len(activity_buffer), 0)
+        rows = ActivityLog.objects.order_by('created_at')
+        self.assertEqual(rows.count(), 3)
+        # Timestamps are the time of the event, not of the flush
+        self.assertEqual([row.created_at for row in rows], [entry.created_at for entry in entries])
+
+    def test_delete_activity_survives_the_flush(self):
+        pk = self.document.pk
+        with self.settings(DOCUMENTS_ACTIVITY_LOG=BUFFERED):
+            # Logged by the post_delete signal, after Django cleared the pk
+            self.document.delete()
+            activity_buffer.flush()
+
+        row = ActivityLog.objects.get(action=ActivityLog.ActionTypes.DOCUMENT_DELETE)
+        self.assertEqual(row.object_id, pk)
+
+    def test_unbuffered_writes_immediately(self):
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.document, user=self.student)
+        self.assertEqual(ActivityLog.objects.count(), 1)
+
+
+class CounterBufferTests(DocumentsTestCase):
+
+    def test_increments_are_coalesced(self):
+        document = self.make_document('Syllabus')
+        other = self.make_document('Handout')
+        with self.settings(DOCUMENTS_COUNTERS=BUFFERED):
+            for _ in range(3):
+                counter_buffer.increment(document.pk)
+            counter_buffer.increment(other.pk)
+            counter_buffer.increment(document.pk, 'download_count', 2)
+            self.assertEqual(counter_buffer.pending(document.pk), 3)
+            self.assertEqual(Document.objects.get(pk=document.pk).view_count, 0)
+
+            # One UPDATE per document
+            with self.assertNumQueries(4):  # plus the savepoint and its release
+                self.assertEqual(counter_buffer.flush(), 2)
+
+        self.assertEqual(counter_buffer.pending(document.pk), 0)
+        document.refresh_from_db()
+        self.assertEqual((document.view_count, document.download_count), (3, 2))
+        self.assertEqual(Document.objects.get(pk=other.pk).view_count, 1)
+
+    def test_unbuffered_increments_immediately(self):
+        document = self.make_document('Syllabus')
+        counter_buffer.increment(document.pk)
+        self.assertEqual(Document.objects.get(pk=document.pk).view_count, 1)
+
+
+class StatsBufferTests(DocumentsTestCase):
+
+    def test_rollups_on_flush(self):
+        document = self.make_document('Syllabus', content=b'x' * 100)
+        DocumentDailyStat.objects.all().delete()
+        with self.settings(DOCUMENTS_STATS=BUFFERED):
+            for _ in range(2):
+                ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD, document, user=self.student)
+            ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, document, user=self.student)
+            ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_UPDATE, document, user=self.student)
+            self.assertFalse(DocumentDailyStat.objects.exists())
+
+            # Site, document, category and user rows
+            self.assertEqual(stats_buffer.flush(), 4)
+
+        Scopes = DocumentDailyStat.Scopes
+        rows = {
+            (row.scope, row.object_id): (row.views, row.downloads, row.bytes_downloaded)
+            for row in DocumentDailyStat.objects.all()
+        }
+        self.assertEqual(rows, {
+            (Scopes.SITE, 0): (1, 2, 200),
+            (Scopes.DOCUMENT, document.pk): (1, 2, 200),
+            (Scopes.CATEGORY, self.category.pk): (1, 2, 200),
+            (Scopes.USER, self.student.pk): (1, 2, 200),
+        })
+
+    def test_analytics(self):
+        live = self.make_document('Syllabus', content=b'x' * 100)
+        deleted = self.make_document('Old syllabus')
+        Document.objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD, deleted, user=self.student)
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, live, user=self.student)
+
+        client = self.client_for(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/documents/documents/analytics/')
+        self.assertEqual(response.status_code, 200)
+        # Activity is read from the rollups, not the activity log
+        self.assertFalse([q for q in queries.captured_queries if 'activity_logs' in q['sql']])
+        data = response.data
+        # Library totals describe the current library
+        self.assertEqual(data['total_documents'], 1)
+        # Rollup totals include the deleted document
+        self.assertEqual(data['total_downloads'], 1)
+        self.assertEqual(data['recent_uploads'], 2)
+        # The faculty member's uploads and the student's download and view
+        self.assertEqual(data['active_users'], 2)
+        self.assertEqual(data['last_7_days'], {'views': 1, 'downloads': 1, 'uploads': 2})
+        self.assertEqual(data['categories'], [{
+            'name': 'Academic',
+            'count': 2,
+            'size_mb': (live.file_size + deleted.file_size) / (1024 * 1024),
+        }])
+
+
+class FileStreamingTests(DocumentsTestCase):
+
+    content = b'0123456789abcdefghij'
+
+    def setUp(self):
+        super().setUp()
+        self.document = self.make_document('Syllabus', content=self.content)
+        self.url = f'/api/documents/documents/{self.document.pk}/file/'
+        self.client = self.client_for(self.admin)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, body
+
+    def downloads(self):
+        return Document.objects.get(pk=self.document.pk).download_count
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+        self.assertEqual(self.downloads(), 1)
+
+    def test_range_and_resume(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, b'01234')
+        self.assertEqual(response['Content-Range'], f'bytes 0-4/{len(self.content)}')
+        self.assertEqual(self.downloads(), 1)
+
+        # Resuming doesn't count another download
+        response, body = self.get(HTTP_RANGE='bytes=5-', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[5:])
+        self.assertEqual(self.downloads(), 1)
+
+    def test_suffix_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, b'hij')
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+        self.assertEqual(self.downloads(), 0)
+
+    def test_not_modified(self):
+        response, _ = self.get()
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response, body = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, b'')
+        self.assertEqual(self.downloads(), 1)
+
+        response, _ = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_if_range_sends_whole_file(self):
+        response, body = self.get(HTTP_RANGE='bytes=5-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_head_does_not_count(self):
+        response = self.client.head(self.url)
+        response.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.downloads(), 0)
+
+    def test_sendfile_records_no_bytes(self):
+        site = DocumentDailyStat.objects.filter(scope=DocumentDailyStat.Scopes.SITE)
+        with self.settings(DOCUMENTS_SENDFILE_HEADER='X-Accel-Redirect',
+                           DOCUMENTS_SENDFILE_PREFIX='/protected/'):
+            response, body = self.get()
+            self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.document.file_path.name}')
+            self.assertEqual(body, b'')
+            self.assertEqual(self.downloads(), 1)
+
+            # The web server resumes the range; that isn't another download
+            self.get(HTTP_RANGE='bytes=5-')
+            self.assertEqual(self.downloads(), 1)
+
+        # Django didn't send the body, so no bytes are counted
+        self.assertEqual(site.get().bytes_downloaded, 0)
+        self.assertEqual(site.get().downloads, 1)
+
+
+class UploadSessionTests(DocumentsTestCase):
+
+    chunk_size = 64 * 1024
+    content = bytes(range(256)) * 640  # two full chunks and a 32KB tail
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.faculty)
+        response = self.client.post('/api/documents/uploads/', {
+            'filename': 'lecture.pdf', 'total_size': len(self.content), 'chunk_size': self.chunk_size,
+            'title': 'Lecture', 'category': self.category.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.url = f"/api/documents/uploads/{response.data['id']}/"
+
+    def chunk(self, index):
+        return self.content[index * self.chunk_size:(index + 1) * self.chunk_size]
+
+    def put(self, index, data=None, checksum=None):
+        data = self.chunk(index) if data is None else data
+        return self.client.put(
+            f'{self.url}chunks/{index}/', data, content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest()
+        )
+
+    def test_resume_after_missing_chunk(self):
+        self.assertEqual(self.put(0).status_code, 200)
+        self.assertEqual(self.put(2).status_code, 200)
+
+        # The client reconnects and asks what the server already has
+        data = self.client.get(self.url).data
+        self.assertEqual(data['missing_chunks'], [1])
+        self.assertEqual(data['received_ranges'], [
+            [0, self.chunk_size - 1], [2 * self.chunk_size, len(self.content) - 1]
+        ])
+
+        response = self.client.post(f'{self.url}finalize/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing_chunks'], [1])
+
+        self.assertEqual(self.put(1).status_code, 200)
+        response = self.client.post(f'{self.url}finalize/')
+        self.assertEqual(response.status_code, 201)
+
+        document = Document.objects.get(pk=response.data['id'])
+        with document.file_path.open('rb') as fh:
+            self.assertEqual(fh.read(), self.content)
+        self.assertEqual(self.client.post(f'{self.url}finalize/').status_code, 409)
+
+    def test_bad_checksum_is_rejected(self):
+        response = self.put(0, checksum='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url).data['missing_chunks'], [0, 1, 2])
+
+    def test_short_chunk_is_rejected(self):
+        response = self.put(0, data=self.chunk(0)[:-1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.url).data['received_chunks'], [])
+
+
+class BlobStorageTests(DocumentsTestCase):
+
+    def blob(self):
+        return FileBlob.objects.get()
+
+    def test_same_content_is_stored_once(self):
+        first = self.make_document('First', filename='a.txt')
+        second = self.make_document('Second', filename='b.txt')
+        DocumentVersion.objects.create(
+            document=first, version_number=2, file_path=ContentFile(b'Hello world', name='c.txt')
+        )
+        blob = self.blob()
+        self.assertEqual(blob.ref_count, 3)
+        self.assertEqual(first.file_path.name, blob.name)
+        self.assertEqual(second.file_path.name, blob.name)
+        self.assertEqual(second.original_filename, 'b.txt')
+
+    def test_blob_is_deleted_with_its_last_reference(self):
+        first = self.make_document('First')
+        second = self.make_document('Second')
+        name = self.blob().name
+
+        first.delete()
+        self.assertEqual(self.blob().ref_count, 1)
+        self.assertTrue(first.file_path.storage.exists(name))
+
+        second.delete()
+        self.assertFalse(FileBlob.objects.exists())
+        self.assertFalse(second.file_path.storage.exists(name))
+
+    def test_failed_save_does_not_keep_the_reference(self):
+        self.make_document('First')
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('save failed')
+
+        post_save.connect(fail, sender=Document)
+        try:
+            with self.assertRaises(RuntimeError):
+                self.make_document('Second')
+        finally:
+            post_save.disconnect(fail, sender=Document)
+
+        self.assertEqual(Document.objects.count(), 1)
+        self.assertEqual(self.blob().ref_count, 1)
+
+
+class SearchTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.public = self.make_folder('Public', is_public=True)
+        self.private = self.make_folder('Private', is_public=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.syllabus = self.make_document(
+                'Calculus syllabus', self.public, content=b'Limits, derivatives and integrals'
+            )
+            self.notes = self.make_document(
+                'Physics notes', self.public, content=b'Kinematics worked with calculus'
+            )
+            self.exam = self.make_document(
+                'Calculus exam', self.private, content=b'Answer key for the integrals'
+            )
+
+    def search(self, user, q, **params):
+        response = self.client_for(user).get('/api/documents/documents/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_title_matches_rank_first(self):
+        data = self.search(self.admin, 'calculus')
+        self.assertEqual(data['count'], 3)
+        ids = [row['id'] for row in data['results']]
+        self.assertEqual(ids[-1], self.notes.pk)
+
+    def test_prefix_match_in_file_contents(self):
+        data = self.search(self.admin, 'deriv')
+        self.assertEqual([row['id'] for row in data['results']], [self.syllabus.pk])
+        self.assertIn('<mark>derivatives</mark>', data['results'][0]['snippet'])
+
+    def test_results_are_limited_to_visible_documents(self):
+        data = self.search(self.student, 'integrals')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual([row['id'] for row in data['results']], [self.syllabus.pk])
+
+    def test_paging(self):
+        data = self.search(self.admin, 'calculus', limit=2, offset=2)
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['results']), 1)
+
+    def test_deleted_documents_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.syllabus.deleted_at = timezone.now()
+            self.syllabus.save()
+        self.assertEqual(self.search(self.admin, 'deriv')['count'], 0)
+
+    def test_query_is_required(self):
+        response = self.client_for(self.admin).get('/api/documents/documents/search/')
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+        self.documents = [self.make_document(f'Doc {i % 3}') for i in range(7)]
+        # Ties on the ordering column are broken by id
+        Document.objects.update(uploaded_at=timezone.now())
+
+    def walk(self, **params):
+        ids, pages = [], 0
+        response = self.client.get('/api/documents/documents/', {'page_size': 3, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            pages += 1
+            if not response.data['next']:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+
+    def test_default_ordering(self):
+        ids, pages = self.walk()
+        self.assertEqual(ids, sorted((d.pk for d in self.documents), reverse=True))
+        self.assertEqual(pages, 3)
+
+    def test_ordering_param(self):
+        ids, _ = self.walk(ordering='title')
+        expected = sorted(self.documents, key=lambda d: (d.title, d.pk))
+        self.assertEqual(ids, [d.pk for d in expected])
+
+    def test_new_rows_do_not_shift_pages(self):
+        response = self.client.get('/api/documents/documents/', {'page_size': 3})
+        first = [row['id'] for row in response.data['results']]
+        self.make_document('Latest')
+        response = self.client.get(response.data['next'])
+        second = [row['id'] for row in response.data['results']]
+        self.assertFalse(set(first) & set(second))
+        self.assertLess(max(second), min(first))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/documents/documents/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class RecentAccessTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+
+    def recent(self, user):
+        return list(
+            RecentDocumentAccess.objects.filter(user=user)
+            .order_by('-last_accessed_at', '-id')
+            .values_list('document_id', 'access_kind')
+        )
+
+    def test_view_download_and_upload(self):
+        document = self.make_document('Syllabus')
+        self.assertEqual(self.recent(self.faculty), [(document.pk, 'upload')])
+
+        self.client.get(f'/api/documents/documents/{document.pk}/')
+        self.assertEqual(self.recent(self.admin), [(document.pk, 'view')])
+
+        response = self.client.get(f'/api/documents/documents/{document.pk}/file/')
+        response.close()
+        # The same row is updated with the latest access
+        self.assertEqual(self.recent(self.admin), [(document.pk, 'download')])
+
+    def test_list_is_capped_per_user(self):
+        with self.settings(DOCUMENTS_RECENT={'BUFFERED': False, 'MAX_PER_USER': 3}):
+            documents = [self.make_document(f'Doc {i}') for i in range(5)]
+            self.client.get(f'/api/documents/documents/{documents[0].pk}/')
+
+        self.assertEqual(
+            [pk for pk, _ in self.recent(self.faculty)],
+            [d.pk for d in reversed(documents[2:])]
+        )
+        self.assertEqual(self.recent(self.admin), [(documents[0].pk, 'view')])
+
+    def test_trim_is_one_statement(self):
+        documents = [self.make_document(f'Doc {i}') for i in range(4)]
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, documents[0], user=self.admin)
+
+        with self.assertNumQueries(1):
+            trim_recent_accesses([self.faculty.pk, self.admin.pk], keep=2)
+
+        self.assertEqual([pk for pk, _ in self.recent(self.faculty)], [documents[3].pk, documents[2].pk])
+        self.assertEqual(len(self.recent(self.admin)), 1)
+
+    def test_my_recent_query_count(self):
+        def my_recent():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/documents/documents/my-recent/')
+            self.assertEqual(response.status_code, 200)
+            return [row['id'] for row in response.data], len(queries)
+
+        documents = [self.make_document(f'Doc {i}') for i in range(2)]
+        for document in documents:
+            ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, document, user=self.admin)
+        ids, few = my_recent()
+        self.assertEqual(ids, [d.pk for d in reversed(documents)])
+
+        for i in range(10):
+            ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.make_document(f'More {i}'), user=self.admin)
+        ids, many = my_recent()
+        self.assertEqual(len(ids), 12)
+        self.assertEqual(few, many)
+
+    def test_backfill(self):
+        documents = [self.make_document(f'Doc {i}') for i in range(3)]
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD, documents[0], user=self.admin)
+        deleted = self.make_document('Deleted')
+        ActivityLog.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, deleted, user=self.admin)
+        deleted.delete()
+        RecentDocumentAccess.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_recent_documents', '--max-per-user', '2', stdout=out)
+
+        self.assertIn('Wrote 3', out.getvalue())
+        self.assertEqual(
+            self.recent(self.faculty),
+            [(documents[2].pk, 'upload'), (documents[1].pk, 'upload')]
+        )
+        # Documents that no longer exist are skipped
+        self.assertEqual(self.recent(self.admin), [(documents[0].pk, 'download')])
+
+
+class ActivityExportTests(DocumentsTestCase):
+
+    url = '/api/documents/activities/export/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+        self.documents = [self.make_document(f'Doc {i}') for i in range(3)]
+        self.folder = self.make_folder('Handouts')
+        ActivityLog.objects.all().delete()
+
+    def log(self, action, obj, user=None, **metadata):
+        return ActivityLog.log(action, obj, user=user or self.student, **metadata)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_resolve_one_query_per_content_type(self):
+        for document in self.documents[1:]:
+            self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, document)
+        self.log(ActivityLog.ActionTypes.DOCUMENT_UPDATE, self.folder)
+        # A document that has since been deleted
+        gone = self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[0])
+        ActivityLog.objects.filter(pk=gone.pk).update(object_id=0)
+        activities = list(ActivityLog.objects.all())
+
+        with self.assertNumQueries(2):
+            resolved = resolve_content_objects(activities)
+
+        self.assertEqual(len(resolved), 3)
+        self.assertEqual(
+            {obj.pk for obj in resolved.values() if isinstance(obj, Document)},
+            {d.pk for d in self.documents[1:]}
+        )
+        self.assertIn(self.folder, resolved.values())
+
+    def test_ndjson(self):
+        self.log(ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD, self.documents[0], ip='10.0.0.1')
+        gone = self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[1])
+        # Point the view at a document that has since been deleted
+        ActivityLog.objects.filter(pk=gone.pk).update(object_id=0)
+
+        rows = [json.loads(line) for line in self.export().splitlines()]
+
+        self.assertEqual([row['action'] for row in rows], ['doc_download', 'doc_view'])
+        self.assertEqual(set(rows[0]), set(COLUMNS))
+        self.assertEqual(rows[0]['object'], 'Doc 0')
+        self.assertEqual(rows[0]['username'], 'student')
+        self.assertEqual(rows[0]['ip'], '10.0.0.1')
+        # The deleted document has no label
+        self.assertEqual(rows[1]['object'], '')
+
+    def test_csv(self):
+        self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[0], ip='10.0.0.1')
+        self.log(ActivityLog.ActionTypes.DOCUMENT_UPDATE, self.folder)
+
+        rows = list(csv.reader(StringIO(self.export(output='csv'))))
+
+        self.assertEqual(rows[0], COLUMNS)
+        records = [dict(zip(COLUMNS, row)) for row in rows[1:]]
+        self.assertEqual([r['object'] for r in records], ['Doc 0', 'Handouts'])
+        self.assertEqual(records[0]['content_type'], 'Documents.document')
+        self.assertEqual(json.loads(records[0]['metadata']), {'ip': '10.0.0.1'})
+        self.assertEqual(records[1]['metadata'], '')
+
+    def test_filters(self):
+        now = timezone.now()
+        old = self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[0])
+        recent = self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[1])
+        download = self.log(ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD, self.documents[2])
+        ActivityLog.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=10))
+        ActivityLog.objects.filter(pk=recent.pk).update(created_at=now - timedelta(days=2))
+
+        def ids(**params):
+            return [json.loads(line)['id'] for line in self.export(**params).splitlines()]
+
+        self.assertEqual(ids(action='doc_view'), [old.pk, recent.pk])
+        self.assertEqual(ids(since=(now - timedelta(days=3)).date().isoformat()), [recent.pk, download.pk])
+        self.assertEqual(ids(until=(now - timedelta(days=5)).date().isoformat()), [old.pk])
+        self.assertEqual(ids(action='doc_view', since=(now - timedelta(days=3)).isoformat()), [recent.pk])
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+    def test_export_is_admin_only(self):
+        response = self.client_for(self.student).get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_user_activity_query_count(self):
+        def user_activity():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/documents/documents/user_activity/')
+            self.assertEqual(response.status_code, 200)
+            return response.data, len(queries)
+
+        self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[0])
+        self.log(ActivityLog.ActionTypes.DOCUMENT_UPDATE, self.folder)
+        data, few = user_activity()
+        self.assertEqual([row['document_title'] for row in data], ['-', 'Doc 0'])
+
+        for i in range(10):
+            self.log(ActivityLog.ActionTypes.DOCUMENT_VIEW, self.documents[i % 3])
+            self.log(ActivityLog.ActionTypes.DOCUMENT_UPDATE, self.make_folder(f'Folder {i}'))
+        data, many = user_activity()
+        self.assertEqual(len(data), 22)
+        self.assertEqual(few, many)
+
+
+class BulkOperationTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.faculty)
+        self.public = self.make_folder('Public', is_public=True)
+        self.private = self.make_folder('Private', is_public=False)
+        self.target = self.make_folder('Target', is_public=False, created_by=self.faculty)
+        self.own = self.make_document('Own', self.public)
+        self.others = self.make_document('Others', self.public, uploaded_by=self.student)
+        DocumentPermission.objects.create(document=self.others, role='faculty', can_view=True)
+        self.hidden = self.make_document('Hidden', self.private, uploaded_by=self.student)
+
+    def post(self, action, data):
+        response = self.client.post(f'/api/documents/documents/{action}/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def statuses(self, data):
+        return {row['id']: row['status'] for row in data['results']}
+
+    def test_move_reports_each_document(self):
+        ids = [self.own.pk, self.others.pk, self.hidden.pk, 999999]
+        data = self.post('bulk_move', {'document_ids': ids, 'folder_id': self.target.pk})
+        self.assertEqual(self.statuses(data), {
+            self.own.pk: 'ok', self.others.pk: 'forbidden', self.hidden.pk: 'not_found', 999999: 'not_found'
+        })
+        self.assertEqual((data['succeeded'], data['failed']), (1, 3))
+        self.assertEqual(
+            dict(Document.objects.values_list('pk', 'folder')),
+            {self.own.pk: self.target.pk, self.others.pk: self.public.pk, self.hidden.pk: self.private.pk}
+        )
+        log = ActivityLog.objects.get(object_id=self.own.pk, description__startswith='Moved')
+        self.assertEqual(log.description, "Moved document from '/Public' to '/Target'")
+
+    def test_move_query_count_is_constant(self):
+        def move(count):
+            ids = [self.make_document(f'Doc {i}', self.public).pk for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                data = self.post('bulk_move', {'document_ids': ids, 'folder_id': self.target.pk})
+            self.assertEqual(data['succeeded'], count)
+            return len(queries)
+
+        move(1)  # the user's permissions are cached from here on
+        self.assertEqual(move(2), move(20))
+
+    def test_restore(self):
+        Document.objects.filter(pk__in=[self.own.pk, self.others.pk]).update(deleted_at=timezone.now())
+        ids = [self.own.pk, self.others.pk, self.hidden.pk]
+        data = self.post('bulk_restore', {'document_ids': ids, 'restore_to_folder_id': self.target.pk})
+        self.assertEqual(self.statuses(data), {
+            self.own.pk: 'ok', self.others.pk: 'forbidden', self.hidden.pk: 'skipped'
+        })
+        own = Document.objects.get(pk=self.own.pk)
+        self.assertIsNone(own.deleted_at)
+        self.assertEqual(own.folder_id, self.target.pk)
+        self.assertIsNotNone(Document.objects.get(pk=self.others.pk).deleted_at)
+
+    def test_categorize(self):
+        category = Category.objects.create(name='Research')
+        data = self.post('bulk_categorize', {'document_ids': [self.own.pk, self.own.pk], 'category': category.pk})
+        self.assertEqual(self.statuses(data), {self.own.pk: 'ok'})
+        self.assertEqual(Document.objects.get(pk=self.own.pk).category, category)
+
+    def test_approve(self):
+        pending = DocumentApproval.objects.create(document=self.own)
+        approved = DocumentApproval.objects.create(document=self.others, status='approved')
+        response = self.client_for(self.admin).post('/api/documents/approvals/bulk_approve/', {
+            'document_ids': [self.own.pk, self.others.pk], 'action': 'approve', 'notes': 'Fine'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response.data), {self.own.pk: 'ok', self.others.pk: 'skipped'})
+        pending.refresh_from_db()
+        self.assertEqual((pending.status, pending.previous_status), ('approved', 'pending'))
+        self.assertEqual(pending.reviewed_by, self.admin)
+        self.assertTrue(ApprovalHistory.objects.filter(approval=pending, status_to='approved').exists())
+        self.assertFalse(ApprovalHistory.objects.filter(approval=approved, status_to='approved').exists())
+
+
+class StuckPool:
+    """Stands in for the preview process pool: submitted files never finish"""
+    _processes = {}
+
+    def __init__(self):
+        self.shutdown_calls = []
+
+    def submit(self, *args):
+        return concurrent.futures.Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+
+
+class PreviewTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.mkdtemp(prefix='documents-previews-')
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        self.config = {'BACKGROUND': False, 'CACHE_DIR': cache_dir, 'THUMBNAIL_SIZE': 64}
+        config = self.settings(DOCUMENTS_PREVIEWS=self.config)
+        config.enable()
+        self.addCleanup(config.disable)
+        self.client = self.client_for(self.admin)
+
+    def png(self, color='red'):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 150), color).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def upload(self, title, content, filename):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = self.make_document(title, content=content, filename=filename)
+        document.refresh_from_db()
+        return document
+
+    def test_render_on_upload(self):
+        image = self.upload('Photo', self.png(), 'photo.png')
+        text = self.upload('Notes', b'Lecture notes, week one', 'notes.txt')
+        binary = self.upload('Archive', b'PK\x03\x04', 'archive.zip')
+
+        self.assertEqual((image.preview_kind, text.preview_kind, binary.preview_kind), ('image', 'text', ''))
+        self.assertEqual(image.preview_key, hashlib.sha256(self.png()).hexdigest())
+        from PIL import Image
+        with Image.open(previews.preview_path(image.preview_key, 'image')) as thumbnail:
+            self.assertEqual(thumbnail.size, (64, 32))
+        with open(previews.preview_path(text.preview_key, 'text'), encoding='utf-8') as fh:
+            self.assertEqual(fh.read(), 'Lecture notes, week one')
+
+    def test_identical_files_render_once(self):
+        first = self.make_document('First', content=self.png(), filename='a.png')
+        second = self.make_document('Second', content=self.png(), filename='b.png')
+
+        with mock.patch.object(previews, 'render_preview', wraps=previews.render_preview) as render:
+            self.assertEqual(previews.render_documents([first.pk, second.pk]), 2)
+            self.assertEqual(previews.render_documents([first.pk, second.pk]), 2)
+        # Once for the shared content, then served from the cache
+        self.assertEqual(render.call_count, 1)
+
+    def test_pdf_render_timeout(self):
+        document = self.make_document('Handout', content=b'%PDF-1.4', filename='handout.pdf')
+        with self.settings(DOCUMENTS_PREVIEWS={**self.config, 'RENDER_TIMEOUT': 5}), \
+                mock.patch.object(previews, '_render_pdf', return_value=None) as render_pdf:
+            previews.render_documents([document.pk])
+        self.assertEqual(render_pdf.call_args.args[1:], (64, 5))
+
+    def test_timeout_replaces_the_pool(self):
+        stuck = self.make_document('Stuck', content=b'takes forever')
+        renderer = previews.PreviewRenderer()
+        pool = StuckPool()
+        renderer._executor, renderer._executor_pid = pool, os.getpid()
+
+        with self.settings(DOCUMENTS_PREVIEWS={**self.config, 'RENDER_TIMEOUT': 0.01}), \
+                self.assertLogs(previews.logger, 'ERROR'):
+            self.assertEqual(renderer.render([stuck.pk]), 0)
+
+        # The stuck worker is killed rather than waited for, and a new pool started next time
+        self.assertEqual(pool.shutdown_calls, [(False, True)])
+        self.assertIsNone(renderer._executor)
+        self.assertEqual(Document.objects.get(pk=stuck.pk).preview_kind, '')
+
+    def test_serve_preview(self):
+        document = self.upload('Photo', self.png(), 'photo.png')
+        url = f'/api/documents/documents/{document.pk}/thumbnail/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'\x89PNG'))
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A URL for the current content can be cached for good, a stale one can't
+        response = self.client.get(url, {'v': document.preview_key[:16]})
+        response.close()
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+        response = self.client.get(url, {'v': 'stale'})
+        response.close()
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_missing_preview(self):
+        document = self.make_document('Notes')
+        url = f'/api/documents/documents/{document.pk}/thumbnail/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        document = self.upload('Photo', self.png(), 'photo.png')
+        os.remove(previews.preview_path(document.preview_key, 'image'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(f'/api/documents/documents/{document.pk}/thumbnail/')
+        self.assertEqual(response.status_code, 404)
+        # Rendered again for the next request
+        self.assertTrue(os.path.exists(previews.preview_path(document.preview_key, 'image')))
+
+    def test_thumbnail_url_in_list(self):
+        document = self.upload('Photo', self.png(), 'photo.png')
+        self.make_document('Notes')
+
+        response = self.client.get('/api/documents/documents/')
+        urls = {row['id']: row['thumbnail_url'] for row in response.data['results']}
+
+        self.assertEqual(len(urls), 2)
+        self.assertTrue(urls[document.pk].endswith(
+            f'/api/documents/documents/{document.pk}/thumbnail/?v={document.preview_key[:16]}'
+        ))
+        self.assertEqual([url for pk, url in urls.items() if pk != document.pk], [None])
+
+
+class TrashPurgeTests(DocumentsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # The reaper walks MEDIA_ROOT, so keep other tests' files out of it
+        media_root = tempfile.mkdtemp(prefix='documents-purge-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        expired = timezone.now() - timedelta(days=30)
+        self.unique = self.make_document('Unique', content=b'only here')
+        self.shared = self.make_document('Shared', content=b'shared content')
+        self.live = self.make_document('Live', content=b'shared content')
+        self.recent = self.make_document('Recent', content=b'recently deleted')
+        Document.objects.filter(pk__in=[self.unique.pk, self.shared.pk]).update(deleted_at=expired)
+        Document.objects.filter(pk=self.recent.pk).update(deleted_at=timezone.now() - timedelta(days=1))
+
+        # A deleted folder takes its subfolders and their documents with it
+        self.folder = self.make_folder('Old')
+        self.subfolder = self.make_folder('Older', self.folder)
+        self.inside = self.make_document('Inside', self.subfolder, content=b'in a deleted folder')
+        Folder.objects.filter(pk=self.folder.pk).update(deleted_at=expired)
+
+    def remaining(self):
+        return set(Document.objects.values_list('title', flat=True))
+
+    def test_dry_run_reports_without_deleting(self):
+        report = purge_expired_trash(retention_days=15, dry_run=True)
+        self.assertEqual(report.as_dict(), {
+            'documents': 3, 'folders': 2, 'files': 2,
+            'bytes_reclaimed': len(b'only here') + len(b'in a deleted folder'),
+        })
+        self.assertEqual(self.remaining(), {'Unique', 'Shared', 'Live', 'Recent', 'Inside'})
+        self.assertEqual(FileBlob.objects.count(), 4)
+        self.assertTrue(self.unique.file_path.storage.exists(self.unique.file_path.name))
+
+    def test_purge_matches_dry_run(self):
+        expected = purge_expired_trash(retention_days=15, dry_run=True).as_dict()
+        report = purge_expired_trash(retention_days=15, batch_size=1, workers=2)
+        self.assertEqual(report.as_dict(), expected)
+
+        self.assertEqual(self.remaining(), {'Live', 'Recent'})
+        self.assertEqual(set(Folder.objects.values_list('name', flat=True)), set())
+        self.assertFalse(self.unique.file_path.storage.exists(self.unique.file_path.name))
+        self.assertEqual(FileBlob.objects.get(name=self.live.file_path.name).ref_count, 1)
+        self.assertTrue(self.live.file_path.storage.exists(self.live.file_path.name))
+
+    def test_reap_orphaned_files(self):
+        # Written behind BlobStorage's back, so no FileBlob row refers to it
+        storage = FileSystemStorage()
+        stray = storage.save('blobs/ff/ff/stray.txt', ContentFile(b'nobody'))
+
+        report = reap_orphaned_files(grace_period=0, dry_run=True)
+        self.assertEqual((report.files, report.bytes), (1, len(b'nobody')))
+        self.assertTrue(storage.exists(stray))
+
+        report = reap_orphaned_files(grace_period=0)
+        self.assertEqual(report.files, 1)
+        self.assertFalse(storage.exists(stray))
+        self.assertTrue(storage.exists(self.live.file_path.name))
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('purge_trash', '--dry-run', '--skip-orphans', stdout=out)
+        self.assertIn('Would remove 3 document(s) and 2 folder(s) from the trash, 2 file(s)', out.getvalue())
+        self.assertEqual(len(self.remaining()), 5)
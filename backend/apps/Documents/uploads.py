@@ -0,0 +1,133 @@
+"""
+Resumable chunked uploads.
+
+A client initiates an UploadSession, PUTs numbered chunks (each with its
+SHA-256 in the X-Chunk-SHA256 header) in any order, can ask which byte ranges
+the server already has after a dropped connection, and finalizes once every
+chunk is in. Chunks are written straight into a temp file at their offset,
+so neither the server nor the client ever holds the whole file in memory.
+
+At finalize the temp file is wrapped in a SessionFile, which exposes
+temporary_file_path() like Django's TemporaryUploadedFile: the regular
+serializers validate it, and FileSystemStorage moves it into place instead
+of copying it.
+
+Configured by settings.DOCUMENTS_UPLOADS:
+    TEMP_DIR        where partial files live (keep it on the MEDIA_ROOT
+                    filesystem so finalize is a rename)
+    CHUNK_SIZE      default chunk size in bytes
+    MAX_CHUNK_SIZE  largest chunk size a client may ask for
+    MAX_FILE_SIZE   largest file that can be uploaded
+    SESSION_TTL     seconds an unfinished session is kept
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+DEFAULTS = {
+    'TEMP_DIR': None,
+    'CHUNK_SIZE': 5 * 1024 * 1024,
+    'MAX_CHUNK_SIZE': 32 * 1024 * 1024,
+    'MAX_FILE_SIZE': 100 * 1024 * 1024,
+    'SESSION_TTL': 24 * 60 * 60,
+}
+
+READ_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk was rejected; the client should send it again"""
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DOCUMENTS_UPLOADS', {}))
+    if not config['TEMP_DIR']:
+        config['TEMP_DIR'] = os.path.join(settings.MEDIA_ROOT, 'upload_sessions')
+    return config
+
+
+def temp_path(session):
+    """Path of the partial file for session"""
+    return os.path.join(get_config()['TEMP_DIR'], f'{session.pk}.part')
+
+
+def create_temp_file(session):
+    path = temp_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.truncate(session.total_size)
+    return path
+
+
+def discard_temp_file(session):
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def write_chunk(session, index, stream, checksum):
+    """
+    Copy chunk index from stream into the session's temp file.
+    Returns the UploadChunk; raises ChunkError on a short read or bad checksum.
+    """
+    from .models import UploadChunk
+
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError(f"Chunk index must be between 0 and {session.total_chunks - 1}")
+    if not checksum:
+        raise ChunkError("X-Chunk-SHA256 header is required")
+
+    offset, length = session.chunk_bounds(index)
+    digest = hashlib.sha256()
+    received = 0
+    with open(temp_path(session), 'r+b') as fh:
+        fh.seek(offset)
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            digest.update(data)
+            fh.write(data)
+            received += len(data)
+        extra = stream.read(1)
+
+    if received != length or extra:
+        raise ChunkError(f"Chunk {index} must be exactly {length} bytes")
+    if digest.hexdigest() != checksum.strip().lower():
+        raise ChunkError(f"Checksum mismatch for chunk {index}")
+
+    chunk, _ = UploadChunk.objects.update_or_create(
+        session=session, index=index,
+        defaults={'size': length, 'checksum': digest.hexdigest()}
+    )
+    return chunk
+
+
+def received_ranges(session, indexes):
+    """Merge received chunk indexes into [start, end] byte ranges (inclusive)"""
+    ranges = []
+    for index in sorted(indexes):
+        offset, length = session.chunk_bounds(index)
+        if ranges and ranges[-1][1] + 1 == offset:
+            ranges[-1][1] = offset + length - 1
+        else:
+            ranges.append([offset, offset + length - 1])
+    return ranges
+
+
+class SessionFile(UploadedFile):
+    """A finished session's temp file, handled like a TemporaryUploadedFile"""
+
+    def __init__(self, session):
+        self._path = temp_path(session)
+        super().__init__(
+            open(self._path, 'rb'), session.filename,
+            session.content_type or None, session.total_size
+        )
+
+    def temporary_file_path(self):
+        return self._path
@@ -11,6 +11,7 @@ router.register(r'folders', FolderViewSet, basename='folder')
 router.register(r'documents', DocumentViewSet, basename='document')
 router.register(r'approvals', DocumentApprovalViewSet, basename='approval')
 router.register(r'activities', ActivityLogViewSet, basename='activity')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,7 +1,8 @@
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, mixins, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import JSONRenderer
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Prefetch
 from django.utils import timezone
@@ -9,12 +10,22 @@ from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import *
+from .pagination import KeysetPagination
 from .serializers import *
+from .activity import resolve_content_objects
+from .bulk import move_documents, recategorize_documents, restore_documents, review_approvals
+from .exports import EXPORT_FORMATS, stream_activity_export
+from .permissions import check_many, get_effective_permissions
+from .previews import preview_renderer, serve_preview
+from .search import search_documents
+from .stats import stats_buffer
+from .streaming import PassthroughRenderer, serve_file
+from .uploads import ChunkError, SessionFile, create_temp_file, discard_temp_file, write_chunk
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
     """ViewSet for managing document categories"""
-    queryset = Category.objects.all()
+    queryset = Category.objects.with_counts()
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
@@ -115,14 +126,20 @@ class FolderViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter folders based on user permissions"""
         queryset = Folder.objects.filter(deleted_at__isnull=True)
         
-        # Optimize queries
-        queryset = queryset.select_related('category', 'created_by', 'parent')
-        queryset = queryset.prefetch_related('subfolders', 'documents')
+        # Optimize queries - counts are annotated, nested subfolders prefetched with theirs
+        queryset = queryset.select_related('category', 'created_by', 'parent').with_counts()
+        if self.action != 'list':
+            queryset = queryset.prefetch_related(
+                Prefetch('subfolders', queryset=Folder.objects.select_related('category').with_counts()),
+                'folder_permissions__user',
+                'folder_role_permissions',
+            )
         
         # Handle parent folder filtering explicitly
         parent_param = self.request.query_params.get('parent', None)
@@ -141,12 +158,9 @@ class FolderViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if not user.is_staff:
             # Non-staff can only see public folders or folders they have access to
-            queryset = queryset.filter(
-                Q(is_public=True) |
-                Q(created_by=user) |
-                Q(folder_permissions__user=user) |
-                Q(folder_role_permissions__role=user.role_type)
-            ).distinct()
+            visible = get_effective_permissions(user).folder_q('view')
+            if visible is not None:
+                queryset = queryset.filter(Q(created_by=user) | visible)
         
         return queryset
     
@@ -183,7 +197,9 @@ class FolderViewSet(viewsets.ModelViewSet):
     def tree(self, request, pk=None):
         """Get folder tree (descendants)"""
         folder = self.get_object()
-        descendants = folder.get_descendants()
+        descendant_ids = [d.pk for d in folder.get_descendants()]
+        counted = Folder.objects.select_related('category').with_counts().in_bulk(descendant_ids)
+        descendants = [counted[pk] for pk in descendant_ids if pk in counted]
         serializer = FolderListSerializer(
             descendants, many=True, context={'request': request}
         )
@@ -208,6 +224,40 @@ class FolderViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def create_document_version(request, document, file_path, change_notes=''):
+    """Save file_path as the new current version of document"""
+    # Get next version number
+    last_version = document.versions.order_by('-version_number').first()
+    next_version = (last_version.version_number + 1) if last_version else 1
+    
+    # Create new version
+    version_data = {
+        'document': document.id,
+        'version_number': next_version,
+        'file_path': file_path,
+        'change_notes': change_notes,
+        'is_current': True
+    }
+    
+    serializer = DocumentVersionSerializer(data=version_data, context={'request': request})
+    if serializer.is_valid():
+        # Mark all other versions as not current
+        document.versions.update(is_current=False)
+        
+        # Save new version
+        version = serializer.save(uploaded_by=request.user)
+        
+        # Log version creation
+        version.log_activity(
+            action=ActivityLog.ActionTypes.VERSION_CREATE,
+            user=request.user,
+            description=f"Created version {next_version} for '{document.title}'"
+        )
+        
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 class DocumentViewSet(viewsets.ModelViewSet):
     """ViewSet for managing documents"""
     permission_classes = [IsAuthenticated]
@@ -216,6 +266,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'file_extension']
     ordering_fields = ['title', 'uploaded_at', 'view_count', 'file_size']
     ordering = ['-uploaded_at']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter documents based on user permissions"""
@@ -229,7 +280,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
         queryset = queryset.select_related(
             'category', 'folder', 'document_type', 'uploaded_by', 'approval'
         )
-        queryset = queryset.prefetch_related('permissions', 'versions')
+        if self.action != 'thumbnail':
+            queryset = queryset.prefetch_related('permissions', 'versions')
         
         user = self.request.user
         
@@ -251,16 +303,21 @@ class DocumentViewSet(viewsets.ModelViewSet):
         
         # Filter based on permissions
         if not user.is_staff:
-            queryset = queryset.filter(
-                Q(uploaded_by=user) |
-                Q(folder__is_public=True) |
-                Q(folder__isnull=True) |
-                Q(folder__folder_permissions__user=user) |
-                Q(folder__folder_role_permissions__role=user.role_type)
-            ).distinct()
+            queryset = self.filter_visible(queryset, user)
         
         return queryset
     
+    def filter_visible(self, queryset, user):
+        """Restrict documents to the user's own uploads and folders they can view"""
+        visible = get_effective_permissions(user).folder_q('view', prefix='folder__')
+        if visible is None:
+            return queryset
+        return queryset.filter(
+            Q(uploaded_by=user) |
+            Q(folder__isnull=True) |
+            visible
+        )
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return DocumentCreateSerializer
@@ -275,7 +332,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         # Check if user can view
-        if not instance.can_user_access(request.user, 'view'):
+        if not check_many(request.user, [instance], 'view')[instance.pk]:
             return Response(
                 {'error': 'You do not have permission to view this document'},
                 status=status.HTTP_403_FORBIDDEN
@@ -328,13 +385,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 description=f"Deleted document '{instance.title}'"
             )
     
-    @action(detail=True, methods=['get'])
-    def download(self, request, pk=None):
-        """Download document file"""
-        document = self.get_object()
-        
+    def check_download(self, request, document):
+        """Return an error Response if document can't be downloaded, else None"""
         # Check permissions
-        if not document.can_user_access(request.user, 'download'):
+        if not check_many(request.user, [document], 'download')[document.pk]:
             return Response(
                 {'error': 'You do not have permission to download this document'},
                 status=status.HTTP_403_FORBIDDEN
@@ -353,27 +407,121 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 {'error': 'Document file not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        return None
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Get download info; the file itself is streamed from the `file` endpoint"""
+        document = self.get_object()
         
-        # Log download
-        document.log_activity(
-            action=ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD,
-            user=request.user,
-            description=f"Downloaded document '{document.title}'",
-            ip=request.META.get('REMOTE_ADDR')
-        )
+        error = self.check_download(request, document)
+        if error:
+            return error
         
-        # Return file URL
-        file_url = request.build_absolute_uri(document.file_path.url)
-        # Extract just the filename from the path
-        import os
-        filename = os.path.basename(document.file_path.name)
+        # Return streaming URL (downloads are counted when the file is served)
+        from django.urls import reverse
+        file_url = request.build_absolute_uri(
+            reverse('documents:document-file', kwargs={'pk': document.pk})
+        )
         return Response({
             'url': file_url,
-            'filename': filename,
+            'filename': document.get_download_filename(),
             'size': document.file_size,
             'mime_type': document.mime_type
         })
     
+    @action(
+        detail=True, methods=['get', 'head'], url_path='file',
+        renderer_classes=[JSONRenderer, PassthroughRenderer]
+    )
+    def file(self, request, pk=None):
+        """
+        Stream the document file (or ?version=<n>) with Range and
+        ETag/Last-Modified support. Full downloads and the first range of a
+        resumed download count as a download; later ranges only add bytes.
+        """
+        document = self.get_object()
+        
+        error = self.check_download(request, document)
+        if error:
+            return error
+        
+        field_file = document.file_path
+        filename = document.get_download_filename()
+        modified = document.updated_at
+        content_type = document.mime_type
+        version_number = request.query_params.get('version')
+        if version_number:
+            try:
+                version = document.versions.get(version_number=int(version_number))
+            except (ValueError, DocumentVersion.DoesNotExist):
+                return Response(
+                    {'error': 'Version not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            field_file = version.file_path
+            filename = version.get_download_filename()
+            modified = version.uploaded_at
+            content_type = version.mime_type or content_type
+        
+        if not field_file or not field_file.storage.exists(field_file.name):
+            return Response(
+                {'error': 'Document file not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        served = serve_file(
+            request, field_file,
+            filename=filename,
+            content_type=content_type,
+            fallback_modified=modified
+        )
+        
+        if served.is_continuation:
+            if served.bytes_served:
+                stats_buffer.record_bytes_downloaded(document, request.user, served.bytes_served)
+        elif served.bytes_served or (served.response.status_code == 200 and request.method == 'GET'):
+            document.increment_download_count()
+            document.log_activity(
+                action=ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD,
+                user=request.user,
+                description=f"Downloaded document '{document.title}'",
+                ip=request.META.get('REMOTE_ADDR'),
+                bytes_served=served.bytes_served,
+                range=request.META.get('HTTP_RANGE'),
+                version=version_number
+            )
+        
+        return served.response
+    
+    @action(
+        detail=True, methods=['get', 'head'],
+        renderer_classes=[JSONRenderer, PassthroughRenderer]
+    )
+    def thumbnail(self, request, pk=None):
+        """
+        Preview of the current file: a PNG thumbnail (images, PDFs) or a
+        plain-text snippet, with ETag. Rendered in the background after
+        upload; 404 until then or for files that can't be previewed.
+        """
+        document = self.get_object()
+        
+        if not document.preview_kind:
+            return Response(
+                {'error': 'No preview available'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        response = serve_preview(request, document)
+        if response is None:
+            # Preview cache was cleared - render it again
+            preview_renderer.enqueue(document.pk)
+            return Response(
+                {'error': 'Preview is being generated'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return response
+    
     @action(detail=True, methods=['post'])
     def create_version(self, request, pk=None):
         """Create a new version of the document"""
@@ -386,36 +534,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Get next version number
-        last_version = document.versions.order_by('-version_number').first()
-        next_version = (last_version.version_number + 1) if last_version else 1
-        
-        # Create new version
-        version_data = {
-            'document': document.id,
-            'version_number': next_version,
-            'file_path': request.data.get('file_path'),
-            'change_notes': request.data.get('change_notes', ''),
-            'is_current': True
-        }
-        
-        serializer = DocumentVersionSerializer(data=version_data, context={'request': request})
-        if serializer.is_valid():
-            # Mark all other versions as not current
-            document.versions.update(is_current=False)
-            
-            # Save new version
-            version = serializer.save(uploaded_by=request.user)
-            
-            # Log version creation
-            version.log_activity(
-                action=ActivityLog.ActionTypes.VERSION_CREATE,
-                user=request.user,
-                description=f"Created version {next_version} for '{document.title}'"
-            )
-            
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return create_document_version(
+            request, document,
+            request.data.get('file_path'),
+            request.data.get('change_notes', '')
+        )
     
     @action(detail=True, methods=['get'])
     def versions(self, request, pk=None):
@@ -478,6 +601,89 @@ class DocumentViewSet(viewsets.ModelViewSet):
             'count': count
         })
     
+    @action(detail=False, methods=['post'])
+    def bulk_move(self, request):
+        """Move many documents to one folder (folder_id null for the root)"""
+        serializer = BulkMoveSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        folder_id = serializer.validated_data.get('folder_id')
+        folder = Folder.objects.get(pk=folder_id) if folder_id is not None else None
+        result = move_documents(request.user, serializer.validated_data['document_ids'], folder)
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['post'])
+    def bulk_restore(self, request):
+        """Restore many documents from trash (optionally into restore_to_folder_id)"""
+        serializer = BulkRestoreSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        folder_id = serializer.validated_data.get('restore_to_folder_id')
+        folder = Folder.objects.get(pk=folder_id) if folder_id is not None else None
+        result = restore_documents(request.user, serializer.validated_data['document_ids'], folder)
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['post'])
+    def bulk_categorize(self, request):
+        """Assign one category to many documents"""
+        serializer = BulkCategorizeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = recategorize_documents(
+            request.user,
+            serializer.validated_data['document_ids'],
+            serializer.validated_data['category']
+        )
+        return Response(result.as_dict())
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked full-text search over titles, descriptions and file contents.
+        Query params: q, limit (default 20, max 100), offset, plus the usual
+        list filters (category, document_type, folder, ...).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response(
+                {'error': 'limit and offset must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Ranking runs inside the permission-filtered queryset
+        visible = self.filter_queryset(self.get_queryset())
+        total, hits = search_documents(query, visible, limit, offset)
+        
+        documents = visible.in_bulk([hit.document_id for hit in hits])
+        results = []
+        for hit in hits:
+            document = documents.get(hit.document_id)
+            if document is None:
+                continue
+            data = DocumentListSerializer(document, context={'request': request}).data
+            data['rank'] = hit.rank
+            data['snippet'] = hit.snippet
+            results.append(data)
+        
+        return Response({
+            'query': query,
+            'count': total,
+            'limit': limit,
+            'offset': offset,
+            'results': results
+        })
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured documents"""
@@ -498,29 +704,18 @@ class DocumentViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], url_path='my-recent')
     def my_recent(self, request):
-        """Get current user's recently viewed/accessed documents based on activity log"""
-        from django.db.models import Max
-        
-        # Get document IDs from user's recent activities
-        recent_activities = ActivityLog.objects.filter(
-            user=request.user,
-            action__in=[
-                ActivityLog.ActionTypes.DOCUMENT_VIEW,
-                ActivityLog.ActionTypes.DOCUMENT_DOWNLOAD,
-                ActivityLog.ActionTypes.DOCUMENT_UPLOAD
-            ],
-            content_type__model='document'
-        ).values('object_id').annotate(
-            last_accessed=Max('created_at')
-        ).order_by('-last_accessed')[:50]
-        
-        # Get document IDs
-        doc_ids = [activity['object_id'] for activity in recent_activities]
+        """Get current user's recently viewed/downloaded/uploaded documents"""
+        # Capped per user (see recent.py), newest first from the user's index
+        doc_ids = list(
+            RecentDocumentAccess.objects.filter(user=request.user)
+            .order_by('-last_accessed_at')
+            .values_list('document_id', flat=True)
+        )
         
         # Fetch documents maintaining the order
         documents = self.get_queryset().filter(id__in=doc_ids)
         
-        # Preserve activity order
+        # Preserve access order
         documents_dict = {doc.id: doc for doc in documents}
         ordered_documents = [documents_dict[doc_id] for doc_id in doc_ids if doc_id in documents_dict]
         
@@ -538,10 +733,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
         # Apply sorting
         queryset = queryset.order_by('-uploaded_at')
         
+        page = self.paginate_queryset(queryset)
         serializer = DocumentListSerializer(
-            queryset, many=True, context={'request': request}
+            page, many=True, context={'request': request}
         )
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def trash(self, request):
@@ -552,13 +748,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         # Apply permission filtering
         user = request.user
         if not user.is_staff:
-            queryset = queryset.filter(
-                Q(uploaded_by=user) |
-                Q(folder__is_public=True) |
-                Q(folder__isnull=True) |
-                Q(folder__folder_permissions__user=user) |
-                Q(folder__folder_role_permissions__role=user.role_type)
-            ).distinct()
+            queryset = self.filter_visible(queryset, user)
         
         # Filter for deleted documents only
         queryset = queryset.filter(deleted_at__isnull=False)
@@ -568,10 +758,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
             'category', 'folder', 'document_type', 'uploaded_by', 'deleted_by'
         ).order_by('-deleted_at')
         
+        page = self.paginate_queryset(queryset)
         serializer = DocumentListSerializer(
-            queryset, many=True, context={'request': request}
+            page, many=True, context={'request': request}
         )
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def restore(self, request, pk=None):
@@ -695,67 +886,58 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        from django.db.models import Count, Sum, Q
-        from django.utils import timezone
+        from django.db.models import Count, Sum
         from datetime import timedelta
         
-        # Calculate date ranges
-        now = timezone.now()
-        week_ago = now - timedelta(days=7)
-        
-        # Total documents
-        total_documents = Document.objects.filter(is_active=True, deleted_at__isnull=True).count()
+        week_start = timezone.localdate() - timedelta(days=6)  # last 7 days including today
+        Scopes = DocumentDailyStat.Scopes
         
-        # Total storage usage
-        total_size = Document.objects.filter(
+        # Size of the current library (documents that aren't deleted)
+        library = Document.objects.filter(
             is_active=True, deleted_at__isnull=True
-        ).aggregate(
-            total=Sum('file_size')
-        )['total'] or 0
-        total_size_mb = total_size / (1024 * 1024)
+        ).aggregate(count=Count('id'), size=Sum('file_size'))
+        total_documents = library['count']
+        total_size_mb = (library['size'] or 0) / (1024 * 1024)
         
         # Total users
         User = get_user_model()
         total_users = User.objects.filter(is_active=True).count()
         
-        # Total downloads
-        total_downloads = Document.objects.filter(
-            is_active=True, deleted_at__isnull=True
-        ).aggregate(
-            total=Sum('download_count')
-        )['total'] or 0
+        # Everything else comes from the daily rollups, which are a few rows
+        # per day rather than a scan of the documents or the activity log.
+        # Rollup totals include documents that have since been deleted.
+        site = DocumentDailyStat.objects.filter(scope=Scopes.SITE)
+        total_downloads = site.aggregate(total=Sum('downloads'))['total'] or 0
+        weekly = site.filter(date__gte=week_start).aggregate(
+            views=Sum('views'),
+            downloads=Sum('downloads'),
+            uploads=Sum('uploads')
+        )
         
-        # Recent uploads (last 7 days)
-        recent_uploads = Document.objects.filter(
-            is_active=True,
-            deleted_at__isnull=True,
-            uploaded_at__gte=week_ago
-        ).count()
-        
-        # Active users (last 7 days)
-        active_users = ActivityLog.objects.filter(
-            created_at__gte=week_ago
-        ).values('user').distinct().count()
-        
-        # Category distribution
-        categories = Category.objects.annotate(
-            doc_count=Count(
-                'documents',
-                filter=Q(documents__is_active=True, documents__deleted_at__isnull=True)
-            ),
-            total_size=Sum(
-                'documents__file_size',
-                filter=Q(documents__is_active=True, documents__deleted_at__isnull=True)
-            )
-        ).filter(doc_count__gt=0).order_by('-doc_count')
+        # Active users: anyone who viewed, downloaded or uploaded a document
+        active_users = DocumentDailyStat.objects.filter(
+            scope=Scopes.USER, date__gte=week_start
+        ).values('object_id').distinct().count()
+        
+        # Category distribution: documents and bytes uploaded to each category
+        category_totals = DocumentDailyStat.objects.filter(
+            scope=Scopes.CATEGORY, uploads__gt=0
+        ).values('object_id').annotate(
+            count=Sum('uploads'),
+            size=Sum('bytes_uploaded')
+        ).order_by('-count')
+        category_names = dict(Category.objects.filter(
+            pk__in=[row['object_id'] for row in category_totals]
+        ).values_list('id', 'name'))
         
         category_data = [
             {
-                'name': cat.name,
-                'count': cat.doc_count,
-                'size_mb': (cat.total_size or 0) / (1024 * 1024)
+                'name': category_names[row['object_id']],
+                'count': row['count'],
+                'size_mb': row['size'] / (1024 * 1024)
             }
-            for cat in categories
+            for row in category_totals
+            if row['object_id'] in category_names
         ]
         
         # Top documents by views
@@ -779,8 +961,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
             'total_size_mb': round(total_size_mb, 2),
             'total_users': total_users,
             'total_downloads': total_downloads,
-            'recent_uploads': recent_uploads,
+            'recent_uploads': weekly['uploads'] or 0,
             'active_users': active_users,
+            'last_7_days': {key: value or 0 for key, value in weekly.items()},
             'categories': category_data,
             'top_documents': top_docs_data
         })
@@ -808,15 +991,19 @@ class DocumentViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(action__icontains=action_filter)
         
         # Limit results
-        activities = queryset[:limit]
+        activities = list(queryset[:limit])
+        
+        # Load the logged objects with one query per content type
+        content_objects = resolve_content_objects(activities)
         
         # Format response
         activity_data = []
         for act in activities:
             # Get document title if content_object is a Document
             document_title = '-'
-            if act.content_object and isinstance(act.content_object, Document):
-                document_title = act.content_object.title
+            content_object = content_objects.get((act.content_type_id, act.object_id))
+            if isinstance(content_object, Document):
+                document_title = content_object.title
             
             # Get IP address from metadata
             ip_address = act.metadata.get('ip', '-') if act.metadata else '-'
@@ -841,6 +1028,7 @@ class DocumentApprovalViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'reviewed_by']
     ordering_fields = ['submitted_at', 'reviewed_at']
     ordering = ['-submitted_at']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter approvals based on user role"""
@@ -953,36 +1141,28 @@ class DocumentApprovalViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        document_ids = serializer.validated_data['document_ids']
+        document_ids = list(dict.fromkeys(serializer.validated_data['document_ids']))
         action_type = serializer.validated_data['action']
         notes = serializer.validated_data.get('notes', '')
-        
-        approvals = DocumentApproval.objects.filter(
-            document_id__in=document_ids,
-            status='pending'
-        )
-        
-        count = approvals.count()
         new_status = 'approved' if action_type == 'approve' else 'rejected'
         
-        approvals.update(
-            status=new_status,
-            reviewed_by=request.user,
-            review_notes=notes,
-            reviewed_at=timezone.now()
-        )
+        # One UPDATE, with history and activity rows written in bulk
+        result = review_approvals(request.user, document_ids, new_status, notes)
+        count = result.succeeded
         
         return Response({
             'message': f'Successfully {action_type}d {count} documents',
-            'count': count
+            'count': count,
+            **result.as_dict()
         })
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending approvals"""
-        approvals = self.get_queryset().filter(status='pending')
-        serializer = self.get_serializer(approvals, many=True)
-        return Response(serializer.data)
+        approvals = self.get_queryset().filter(status='pending').order_by('submitted_at')
+        page = self.paginate_queryset(approvals)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -993,6 +1173,7 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ['action', 'user', 'content_type']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter activities based on user permissions"""
@@ -1007,3 +1188,207 @@ class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Non-admins see only their own activities
         return queryset.filter(user=user)
+    
+    def filter_queryset(self, queryset):
+        """Apply the filter backends plus ?since= / ?until= (dates or ISO datetimes, inclusive)"""
+        queryset = super().filter_queryset(queryset)
+        since = self._parse_time_bound('since')
+        until = self._parse_time_bound('until', end_of_day=True)
+        if since is not None:
+            queryset = queryset.filter(created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(created_at__lt=until)
+        return queryset
+    
+    def _parse_time_bound(self, param, end_of_day=False):
+        from datetime import datetime, time, timedelta
+        from django.utils.dateparse import parse_date, parse_datetime
+        from rest_framework.exceptions import ValidationError
+        
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                if day is None:
+                    raise ValueError
+                if end_of_day:
+                    day += timedelta(days=1)
+                moment = datetime.combine(day, time.min)
+            elif end_of_day:
+                moment += timedelta(microseconds=1)
+        except ValueError:
+            raise ValidationError({param: 'Expected a date (YYYY-MM-DD) or an ISO 8601 datetime'})
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+    
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, PassthroughRenderer])
+    def export(self, request):
+        """
+        Stream the activity log as NDJSON (?output=ndjson, default) or CSV
+        (?output=csv), oldest first (Admin only). Takes the same filters as
+        the list: action, user, content_type, since and until.
+        """
+        if not request.user.is_staff and request.user.role_type != 'admin':
+            return Response(
+                {'error': 'Only administrators can export the activity log'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        export_format = request.query_params.get('output', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_activity_export(queryset, export_format)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Resumable chunked uploads (see uploads.py):
+        POST   /uploads/                    start a session
+        PUT    /uploads/{id}/chunks/{n}/    send chunk n (X-Chunk-SHA256 header)
+        GET    /uploads/{id}/               received chunks / byte ranges
+        POST   /uploads/{id}/finalize/      create the document or version
+        DELETE /uploads/{id}/               abort
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Users only see their own sessions"""
+        return UploadSession.objects.filter(
+            user=self.request.user
+        ).prefetch_related('chunks')
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return UploadSessionCreateSerializer
+        return UploadSessionSerializer
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # New versions need edit permission on the document
+        document = serializer.validated_data.get('document')
+        if document and not check_many(request.user, [document], 'edit')[document.pk]:
+            return Response(
+                {'error': 'You do not have permission to edit this document'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        session = serializer.save()
+        create_temp_file(session)
+        return Response(
+            UploadSessionSerializer(session, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+    
+    def get_active_session(self):
+        """Return (session, error Response)"""
+        session = self.get_object()
+        if session.status != UploadSession.StatusChoices.ACTIVE:
+            return None, Response(
+                {'error': 'Upload session is already completed'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if session.expires_at <= timezone.now():
+            return None, Response(
+                {'error': 'Upload session has expired'},
+                status=status.HTTP_410_GONE
+            )
+        return session, None
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """Receive one chunk (raw request body)"""
+        session, error = self.get_active_session()
+        if error:
+            return error
+        
+        try:
+            chunk = write_chunk(
+                session, int(index), request,
+                request.META.get('HTTP_X_CHUNK_SHA256', '')
+            )
+        except ChunkError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Keep sessions that are still receiving data alive
+        from datetime import timedelta
+        from .uploads import get_config
+        UploadSession.objects.filter(pk=session.pk).update(
+            updated_at=timezone.now(),
+            expires_at=timezone.now() + timedelta(seconds=get_config()['SESSION_TTL'])
+        )
+        return Response({'index': chunk.index, 'size': chunk.size, 'checksum': chunk.checksum})
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Validate the assembled file and turn it into a Document or DocumentVersion"""
+        from django.db import transaction
+        
+        session, error = self.get_active_session()
+        if error:
+            return error
+        
+        received = {chunk.index for chunk in session.chunks.all()}
+        missing = [i for i in range(session.total_chunks) if i not in received]
+        if missing:
+            return Response(
+                {'error': 'Upload is incomplete', 'missing_chunks': missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            # Lock the session so a repeated finalize can't create two documents
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != UploadSession.StatusChoices.ACTIVE:
+                return Response(
+                    {'error': 'Upload session is already completed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            upload = SessionFile(session)
+            try:
+                if session.is_version:
+                    document = session.document
+                    if document.document_type:
+                        validate_file_for_type(document.document_type, upload.name, upload.size)
+                    response = create_document_version(
+                        request, document, upload, session.metadata.get('change_notes', '')
+                    )
+                    if response.status_code != status.HTTP_201_CREATED:
+                        return response
+                else:
+                    data = {k: v for k, v in session.metadata.items() if k != 'kind'}
+                    data['file_path'] = upload
+                    serializer = DocumentCreateSerializer(data=data, context={'request': request})
+                    if not serializer.is_valid():
+                        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+                    document = serializer.save()
+                    response = Response(
+                        DocumentDetailSerializer(document, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED
+                    )
+            finally:
+                upload.close()
+            
+            session.status = UploadSession.StatusChoices.COMPLETED
+            session.document = document
+            session.save(update_fields=['status', 'document', 'updated_at'])
+            session.chunks.all().delete()
+        
+        # Storage moved the temp file into place (or copied it on other backends)
+        discard_temp_file(session)
+        return response
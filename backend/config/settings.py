@@ -179,6 +179,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'apps.Users.apps.UsersConfig',
     'apps.Documents.apps.DocumentsConfig',
+    'apps.Academics.apps.AcademicsConfig',
 
     "apps.Announcements",
     "apps.Calendar",
@@ -292,6 +293,69 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Documents activity log: rows are buffered in-process and written with bulk_create.
+# Set BUFFERED to False to write each row synchronously (e.g. in tests).
+DOCUMENTS_ACTIVITY_LOG = {
+    'BUFFERED': True,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+# Documents view/download counters: increments are summed in memory and applied
+# as one UPDATE per document every FLUSH_INTERVAL seconds.
+DOCUMENTS_COUNTERS = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': 5.0,
+}
+
+# Documents analytics: daily per-document/category/user rollups, flushed in batches.
+DOCUMENTS_STATS = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': 10.0,
+}
+
+# Documents "recently accessed" lists: latest access per user/document, capped per user.
+DOCUMENTS_RECENT = {
+    'BUFFERED': True,
+    'FLUSH_INTERVAL': 5.0,
+    'MAX_PER_USER': 50,
+}
+
+DOCUMENTS_UPLOADS = {
+    'CHUNK_SIZE': 5 * 1024 * 1024,
+    'MAX_CHUNK_SIZE': 32 * 1024 * 1024,
+    'MAX_FILE_SIZE': 100 * 1024 * 1024,
+    'SESSION_TTL': 24 * 60 * 60,
+}
+
+# Documents full-text search: text extraction and indexing run in a background thread.
+# Set BACKGROUND to False to index synchronously (e.g. in tests).
+DOCUMENTS_SEARCH = {
+    'BACKGROUND': True,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_CONTENT_CHARS': 500000,
+}
+
+# Documents thumbnails/text previews: rendered by a process pool fed from a background
+# thread, cached under MEDIA_ROOT/previews. Set BACKGROUND to False to render synchronously.
+DOCUMENTS_PREVIEWS = {
+    'BACKGROUND': True,
+    'FLUSH_INTERVAL': 2.0,
+    'WORKERS': 2,
+    'THUMBNAIL_SIZE': 256,
+}
+
+# Documents trash retention and orphaned file cleanup (manage.py purge_trash, run daily).
+DOCUMENTS_TRASH = {
+    'RETENTION_DAYS': 15,
+    'BATCH_SIZE': 200,
+    'WORKERS': 4,
+}
+
+# Let the web server send document files (see apps/Documents/streaming.py)
+# DOCUMENTS_SENDFILE_HEADER = 'X-Accel-Redirect'
+# DOCUMENTS_SENDFILE_PREFIX = '/protected-media/'
+
 from datetime import timedelta
 
 # JWT Settings
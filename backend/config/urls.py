@@ -29,4 +29,7 @@ urlpatterns = [
     # Documents
     path('api/documents/', include('apps.Documents.urls')),
 
+    # Academics
+    path('api/academics/', include('apps.Academics.urls')),
+
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
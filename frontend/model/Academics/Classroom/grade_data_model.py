@@ -22,6 +22,7 @@ try:
     from frontend.services.Academics.Classroom.grading_rubric_service import GradingRubricService
     from frontend.services.Academics.Classroom.assessment_service import AssessmentService
     from frontend.services.Academics.Classroom.score_service import ScoreService
+    from frontend.services.Academics.Classroom.score_api_service import ScoreAPIService
 except ImportError:
     try:
         # Try relative import
@@ -32,12 +33,14 @@ except ImportError:
         from Academics.Classroom.grading_rubric_service import GradingRubricService
         from Academics.Classroom.assessment_service import AssessmentService
         from Academics.Classroom.score_service import ScoreService
+        from Academics.Classroom.score_api_service import ScoreAPIService
     except ImportError:
         print("Warning: Could not import backend services")
         EnrollmentService = None
         GradingRubricService = None
         AssessmentService = None
         ScoreService = None
+        ScoreAPIService = None
 
 class GradeDataModel(QObject):
     """
@@ -65,6 +68,8 @@ class GradeDataModel(QObject):
         self.rubric_service = GradingRubricService() if GradingRubricService else None
         self.assessment_service = AssessmentService() if AssessmentService else None
         self.score_service = ScoreService() if ScoreService else None
+        # Reads the grades table through the ETag-cached gradebook endpoint
+        self.score_api_service = ScoreAPIService(class_id) if ScoreAPIService else None
         
         # Component types with sub-items (now loaded from assessments)
         self.components = {
@@ -226,21 +231,27 @@ class GradeDataModel(QObject):
             return False
 
     def _load_scores_from_backend(self):
-        """Load scores from score service"""
-        if not self.score_service:
+        """Load scores from the class gradebook"""
+        if not self.score_api_service:
             return
         
         try:
-            grade_matrix = self.score_service.get_class_grade_matrix(self.class_id)
+            grade_matrix = self.score_api_service.get_class_grade_matrix(self.class_id)
             
-            for student_id, scores in grade_matrix.items():
-                student_id_str = str(student_id)
+            # Students are keyed by institutional ID here, by primary key in the matrix
+            institutional_ids = {
+                student['id']: str(student['institutional_id'])
+                for student in grade_matrix['students']
+            }
+            
+            for student_id, scores in grade_matrix['scores'].items():
+                student_id_str = institutional_ids.get(student_id, str(student_id))
                 if student_id_str not in self.grades:
                     self.grades[student_id_str] = {}
                 
                 for component_key, score_data in scores.items():
                     grade_item = GradeItem()
-                    grade_item.value = str(score_data.get('score', ''))
+                    grade_item.value = str(score_data.get('points', ''))
                     grade_item.is_draft = not score_data.get('is_published', False)
                     self.grades[student_id_str][component_key] = grade_item
             
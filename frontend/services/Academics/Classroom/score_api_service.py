@@ -29,11 +29,17 @@ class ScoreAPIService:
         self.api_client: Optional[APIClient] = None
         self.offline_mode = False
         
-        # JSON fallback path
+        # class_id -> (ETag, grade matrix) of the last gradebook fetched
+        self._gradebook_cache: Dict[int, tuple] = {}
+        
+        # JSON fallback paths
         self.json_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             "data", "grades.json"
         )
+        self.assessments_json_path = os.path.join(
+            os.path.dirname(self.json_path), "assessments.json"
+        )
         
         # Initialize API client
         if API_AVAILABLE:
@@ -197,7 +203,29 @@ class ScoreAPIService:
             if not self._update_score_in_json(score['id'], {'points': score['points']}):
                 success = False
         return success
-    
+
+    def import_scores(self, file_path: str, class_id: Optional[int] = None,
+                      is_published: bool = False, dry_run: bool = False) -> Dict:
+        """
+        Import scores from a CSV or XLSX file (an id_number column plus one
+        column per assessment title). Needs the server; there is no offline
+        import.
+
+        Returns the import report: rows, created, updated, error_count and
+        errors (list of {row, column, error}), or {'error': ...}.
+        """
+        cid = class_id or self.class_id
+        if not cid:
+            return {'error': 'No class selected'}
+        if not self.api_client or self.offline_mode:
+            return {'error': 'Importing scores requires a connection to the server'}
+
+        return self.api_client.post_file(
+            f"academics/classes/{cid}/scores/import/",
+            file_path,
+            data={'is_published': is_published, 'dry_run': dry_run}
+        )
+
     # ==================== PUBLISH OPERATIONS ====================
     
     def publish_score(self, score_id: int) -> bool:
@@ -287,49 +315,133 @@ class ScoreAPIService:
         Get complete grade matrix for a class.
         Returns data structured for the grades table view.
         
+        Online, this is one request to the class gradebook endpoint. The
+        result is cached per class and revalidated with its ETag, so a
+        refresh when nothing changed is a single 304. Offline, the same
+        structure is built from the JSON score and assessment files.
+        
         Returns:
         {
-            'students': [...],
+            'students': [{'id': 1, 'institutional_id': '2024-0001', 'name': '...'}],
             'assessments': {
-                'midterm': {'Quiz': [...], 'Performance Task': [...]},
+                'midterm': {'Quiz': [{'id': 1, 'title': ..., 'max_points': ..., 'is_published': ...}]},
                 'finals': {...}
             },
             'scores': {
-                'student_id': {
-                    'assessment_id': score_value
+                student_id: {
+                    assessment_id: {'points': 85, 'max_points': 100, 'is_published': True}
                 }
             }
         }
         """
         cid = class_id or self.class_id
-        scores = self.get_all_scores(cid)
         
-        # Build matrix
-        matrix = {
-            'students': set(),
-            'assessments': {},
-            'scores': {}
+        if self.api_client and not self.offline_mode:
+            etag, cached = self._gradebook_cache.get(cid, (None, None))
+            result = self.api_client.get_if_changed(f"academics/classes/{cid}/gradebook/", etag)
+            if result.get('not_modified') and cached is not None:
+                return cached
+            if not result.get('error') and not result.get('not_modified'):
+                matrix = self._matrix_from_gradebook(result)
+                self._gradebook_cache[cid] = (result.get('_etag'), matrix)
+                return matrix
+            if result.get('offline'):
+                self.offline_mode = True
+        
+        return self._matrix_from_json(cid)
+    
+    def _matrix_from_gradebook(self, gradebook: Dict) -> Dict:
+        """Turn the columnar gradebook payload into the grade matrix structure"""
+        students = gradebook['students']
+        columns = gradebook['assessments']
+        
+        assessments = {}
+        for term in gradebook['terms']:
+            period = assessments.setdefault(term['academic_period'], {})
+            for component in term['components']:
+                start, stop = component['columns']
+                period[component['name']] = [
+                    {
+                        'id': columns['id'][j],
+                        'title': columns['title'][j],
+                        'max_points': columns['max_points'][j],
+                        'is_published': columns['is_published'][j]
+                    }
+                    for j in range(start, stop)
+                ]
+        
+        scores = {}
+        for i, student_id in enumerate(students['id']):
+            row = gradebook['scores'][i]
+            published = gradebook['published'][i]
+            scores[student_id] = {
+                columns['id'][j]: {
+                    'points': points,
+                    'max_points': columns['max_points'][j],
+                    'is_published': bool(published[j])
+                }
+                for j, points in enumerate(row) if points is not None
+            }
+        
+        return {
+            'students': [
+                {'id': student_id, 'institutional_id': institutional_id, 'name': name}
+                for student_id, institutional_id, name in zip(
+                    students['id'], students['institutional_id'], students['name']
+                )
+            ],
+            'assessments': assessments,
+            'scores': scores
         }
+    
+    # ==================== JSON FALLBACK METHODS ====================
+    
+    def _matrix_from_json(self, class_id: int) -> Dict:
+        """Build the grade matrix (same structure as online) from the JSON files"""
+        assessments = {}
+        for assessment in self._get_assessments_from_json(class_id):
+            # The offline files say 'final' where the backend says 'finals'
+            period_name = assessment.get('academic_period', 'midterm')
+            period = assessments.setdefault('finals' if period_name == 'final' else period_name, {})
+            period.setdefault(assessment.get('rubric_component_name', 'Unknown'), []).append({
+                'id': assessment.get('id'),
+                'title': assessment.get('title', ''),
+                'max_points': assessment.get('max_points', 100),
+                'is_published': assessment.get('is_published', False)
+            })
         
-        for score in scores:
+        students = {}
+        scores = {}
+        for score in self._get_scores_from_json(class_id):
             student_id = score.get('student_id')
-            assessment_id = score.get('assessment_id')
-            
-            matrix['students'].add(student_id)
-            
-            if student_id not in matrix['scores']:
-                matrix['scores'][student_id] = {}
-            
-            matrix['scores'][student_id][assessment_id] = {
+            # Offline scores are keyed by the student's institutional ID
+            students.setdefault(student_id, {
+                'id': student_id,
+                'institutional_id': str(score.get('institutional_id', student_id)),
+                'name': score.get('student_name', '')
+            })
+            scores.setdefault(student_id, {})[score.get('assessment_id')] = {
                 'points': score.get('points', 0),
                 'max_points': score.get('max_points', 100),
                 'is_published': score.get('is_published', False)
             }
         
-        matrix['students'] = list(matrix['students'])
-        return matrix
+        return {
+            'students': list(students.values()),
+            'assessments': assessments,
+            'scores': scores
+        }
     
-    # ==================== JSON FALLBACK METHODS ====================
+    def _get_assessments_from_json(self, class_id: int) -> List[Dict]:
+        """Get a class's assessments from the offline assessments file"""
+        try:
+            if os.path.exists(self.assessments_json_path):
+                with open(self.assessments_json_path, 'r') as f:
+                    data = json.load(f)
+                return [a for a in data.get('assessments', []) if a.get('class_id') == class_id]
+        except Exception as e:
+            print(f"[SCORE SERVICE] Error loading assessments JSON: {e}")
+        return []
     
     def _load_json(self) -> Dict:
         """Load data from JSON file"""
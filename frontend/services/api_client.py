@@ -9,6 +9,7 @@ import requests
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 import json
+import os
 
 
 @dataclass
@@ -98,6 +99,37 @@ class APIClient:
             print(f"[API] Request error: {e}")
             return {'error': str(e)}
     
+    def get_if_changed(self, endpoint: str, etag: Optional[str] = None,
+                       params: Optional[Dict] = None) -> Dict:
+        """
+        Conditional GET: sends etag as If-None-Match. Returns
+        {'not_modified': True} on 304, otherwise the response data with the
+        new ETag under '_etag' (when the response is a dict).
+        """
+        url = f"{self.config.base_url}/{endpoint.lstrip('/')}"
+        headers = self._get_headers()
+        if etag:
+            headers['If-None-Match'] = etag
+        try:
+            response = self.session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=self.config.timeout
+            )
+            if response.status_code == 304:
+                return {'not_modified': True}
+            data = self._handle_response(response)
+            if isinstance(data, dict) and not data.get('error'):
+                data['_etag'] = response.headers.get('ETag')
+            return data
+        except requests.ConnectionError:
+            print(f"[API] Connection error - is Django server running?")
+            return {'error': 'Connection failed. Is the server running?', 'offline': True}
+        except Exception as e:
+            print(f"[API] Request error: {e}")
+            return {'error': str(e)}
+    
     def post(self, endpoint: str, data: Dict) -> Dict:
         """Make POST request to API"""
         url = f"{self.config.base_url}/{endpoint.lstrip('/')}"
@@ -114,6 +146,30 @@ class APIClient:
         except Exception as e:
             return {'error': str(e)}
     
+    def post_file(self, endpoint: str, file_path: str, data: Optional[Dict] = None,
+                  field: str = 'file') -> Dict:
+        """Make multipart POST request to API, uploading file_path as field"""
+        url = f"{self.config.base_url}/{endpoint.lstrip('/')}"
+        headers = self._get_headers()
+        # Let requests set the multipart Content-Type (None also drops the session's JSON one)
+        headers['Content-Type'] = None
+        try:
+            with open(file_path, 'rb') as f:
+                response = self.session.post(
+                    url,
+                    data=data or {},
+                    files={field: (os.path.basename(file_path), f)},
+                    headers=headers,
+                    timeout=self.config.timeout
+                )
+            return self._handle_response(response)
+        except requests.ConnectionError:
+            return {'error': 'Connection failed. Is the server running?', 'offline': True}
+        except (FileNotFoundError, IsADirectoryError, PermissionError) as e:
+            return {'error': f'Could not read {file_path}: {e}'}
+        except Exception as e:
+            return {'error': str(e)}
+
     def put(self, endpoint: str, data: Dict) -> Dict:
         """Make PUT request to API"""
         url = f"{self.config.base_url}/{endpoint.lstrip('/')}"
@@ -20,6 +20,7 @@ from PyQt6.QtWidgets import (
     QSplitter, QLabel, QStackedWidget, QProgressBar
 )
 from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QPixmap
 from datetime import datetime, timedelta
 
 from .widgets import Sidebar, Toolbar, FileListView, BreadcrumbBar
@@ -70,6 +71,8 @@ class DocumentsV2View(QWidget):
         self.categories = []
         self.folders = []
         self.documents = []
+        self.next_page_url = None  # Cursor URL of the next page of documents (None when all loaded)
+        self._page_cache = None  # (cache_key, cache_type) the loaded pages belong to
         
         # Cache system with TTL (Time To Live)
         self.cache = {
@@ -85,6 +88,7 @@ class DocumentsV2View(QWidget):
         # Loading state
         self.is_loading = False
         self._loading_lock = False  # Prevent simultaneous loads
+        self._loading_more = False  # A next-page request is in flight
         
         # Worker threads for async operations
         self.current_worker = None
@@ -190,6 +194,7 @@ class DocumentsV2View(QWidget):
         self.file_list.item_double_clicked.connect(self._handle_item_double_click)
         self.file_list.context_menu_action.connect(self._handle_context_menu_action)
         self.file_list.selection_changed.connect(self._handle_selection_changed)
+        self.file_list.verticalScrollBar().valueChanged.connect(self._on_file_list_scrolled)
         self.content_stack.addWidget(self.file_list)  # Index 0
         
         # Loading view
@@ -411,7 +416,19 @@ class DocumentsV2View(QWidget):
             return entry['data'], True
         return None, False
     
-    def _save_to_cache(self, cache_key: str, data: list, cache_type: str = 'documents'):
+    def _get_cached_next_page(self, cache_key: str, cache_type: str = 'documents'):
+        """
+        Get the next-page URL stored with a cached document list.
+        
+        Returns:
+            str or None: URL of the page after the cached ones
+        """
+        if cache_type in ['categories', 'recent', 'trash', 'starred']:
+            return self.cache[cache_type].get('next')
+        return self.cache[cache_type].get(cache_key, {}).get('next')
+    
+    def _save_to_cache(self, cache_key: str, data: list, cache_type: str = 'documents',
+                       next_url: str = None):
         """
         Save data to cache with timestamp.
         
@@ -419,9 +436,11 @@ class DocumentsV2View(QWidget):
             cache_key (str): Cache key
             data (list): Data to cache
             cache_type (str): Type of cache
+            next_url (str): URL of the next page when data is paginated
         """
         entry = {
             'data': data,
+            'next': next_url,
             'timestamp': datetime.now()
         }
         
@@ -548,6 +567,7 @@ class DocumentsV2View(QWidget):
         
         # Clear documents to prevent showing stale data
         self.documents = []
+        self.next_page_url = None
         
         # Build filters based on current state
         filters = {}
@@ -593,8 +613,10 @@ class DocumentsV2View(QWidget):
             cached_data, is_valid = self._get_from_cache(cache_key, cache_type)
             if is_valid:
                 print("[DocumentsV2] Using cached data")
-                # Prepare data from cache
+                # Prepare data from cache (every page loaded so far)
                 self.documents = cached_data
+                self.next_page_url = self._get_cached_next_page(cache_key, cache_type)
+                self._page_cache = (cache_key, cache_type)
                 # Turn off loading before displaying (display will set correct index)
                 self.is_loading = False
                 self.toolbar.setEnabled(True)
@@ -602,6 +624,7 @@ class DocumentsV2View(QWidget):
                 self.set_status(f"Loaded {len(self.documents)} document(s)")
                 # Release lock after cache hit
                 self._loading_lock = False
+                self._load_more_if_needed()
                 return
         
         # Fetch from API asynchronously
@@ -651,9 +674,11 @@ class DocumentsV2View(QWidget):
         """
         if result['success']:
             self.documents = result['data']
+            self.next_page_url = result.get('next')
+            self._page_cache = (cache_key, cache_type)
             
             # Save to cache
-            self._save_to_cache(cache_key, self.documents, cache_type)
+            self._save_to_cache(cache_key, self.documents, cache_type, self.next_page_url)
             
             # Turn off loading before displaying (display will set correct index)
             self.is_loading = False
@@ -663,9 +688,79 @@ class DocumentsV2View(QWidget):
             self._display_documents_immediately()
             
             self.set_status(f"Loaded {len(self.documents)} document(s)")
+            
+            # The first page may not fill the view, leaving nothing to scroll
+            QTimer.singleShot(0, self._load_more_if_needed)
         else:
             self._on_documents_load_error(result.get('error', 'Unknown error'))
     
+    def _on_file_list_scrolled(self, value: int):
+        """Fetch the next page when the list is scrolled near the bottom."""
+        scrollbar = self.file_list.verticalScrollBar()
+        if value >= scrollbar.maximum() - scrollbar.pageStep() // 2:
+            self._load_more_documents()
+    
+    def _load_more_if_needed(self):
+        """Fetch the next page if everything loaded so far fits without scrolling."""
+        if self.file_list.verticalScrollBar().maximum() == 0:
+            self._load_more_documents()
+    
+    def _load_more_documents(self):
+        """Fetch the next page of the current document list in the background."""
+        if not self.next_page_url or self._loading_more or self._loading_lock:
+            return
+        
+        self._loading_more = True
+        requested_url = self.next_page_url
+        self.set_status(f"Loaded {len(self.documents)} document(s), loading more...")
+        
+        worker = APIWorker(self.document_service.get_next_page, requested_url)
+        worker.finished.connect(lambda result: self._on_more_documents_loaded(result, requested_url))
+        worker.finished.connect(lambda: self._cleanup_worker(worker))
+        worker.error.connect(self._on_more_documents_error)
+        worker.error.connect(lambda: self._cleanup_worker(worker))
+        self.active_workers.append(worker)
+        worker.start()
+    
+    def _on_more_documents_loaded(self, result: dict, requested_url: str):
+        """
+        Append a fetched page to the list.
+        
+        Args:
+            result (dict): API result
+            requested_url (str): Page URL the result belongs to
+        """
+        self._loading_more = False
+        
+        # Navigated elsewhere while the page was loading
+        if requested_url != self.next_page_url:
+            return
+        
+        if not result['success']:
+            self._on_more_documents_error(result.get('error', 'Unknown error'))
+            return
+        
+        page = result['data'] or []
+        self.documents.extend(page)
+        self.next_page_url = result.get('next')
+        if self._page_cache:
+            cache_key, cache_type = self._page_cache
+            self._save_to_cache(cache_key, self.documents, cache_type, self.next_page_url)
+        
+        self.file_list.append_documents(page)
+        self.set_status(f"Loaded {len(self.documents)} document(s)")
+        self._load_more_if_needed()
+    
+    def _on_more_documents_error(self, error_msg: str):
+        """
+        Handle a failed next-page load; scrolling again retries it.
+        
+        Args:
+            error_msg (str): Error message
+        """
+        self._loading_more = False
+        self.set_status(f"Could not load more documents: {error_msg}")
+    
     def _on_documents_load_error(self, error_msg: str):
         """
         Handle async document load error.
@@ -1191,7 +1286,7 @@ class DocumentsV2View(QWidget):
     
     def _show_details(self, doc_id: int):
         """
-        Show document details (placeholder).
+        Show document details with the file's preview, when there is one.
         
         Args:
             doc_id (int): Document ID
@@ -1208,7 +1303,20 @@ class DocumentsV2View(QWidget):
             Category: {doc.get('category_name', 'N/A')}
             """
             
-            QMessageBox.information(self, "Document Details", details)
+            box = QMessageBox(QMessageBox.Icon.Information, "Document Details", details, parent=self)
+            if doc.get('thumbnail_url'):
+                preview = self.document_service.get_thumbnail(doc['thumbnail_url'])
+                if preview['success'] and preview['data']['kind'] == 'image':
+                    pixmap = QPixmap()
+                    if pixmap.loadFromData(preview['data']['content']):
+                        box.setIconPixmap(pixmap.scaled(
+                            160, 160,
+                            Qt.AspectRatioMode.KeepAspectRatio,
+                            Qt.TransformationMode.SmoothTransformation
+                        ))
+                elif preview['success']:
+                    box.setInformativeText(preview['data']['content'][:300])
+            box.exec()
         else:
             self.show_error("Failed to load details", result['error'])
     
@@ -16,6 +16,10 @@ Endpoints Used:
 - /folders/ - Folder operations
 - /categories/ - Category operations
 - /approvals/ - Approval workflow operations
+
+List endpoints are cursor-paginated: they return {'next': url, 'results': [...]}.
+_make_request unwraps that into 'data' (the page) and 'next' (the URL of the
+following page, or None); get_next_page() fetches it.
 """
 
 import requests
@@ -57,6 +61,8 @@ class DocumentService(QObject):
             'Authorization': f'Bearer {token}' if token else '',
             'Content-Type': 'application/json'
         }
+        # Thumbnail URLs carry the content hash, so cached bytes never go stale
+        self._thumbnail_cache = {}
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None, 
                      files: Dict = None, params: Dict = None) -> Dict[str, Any]:
@@ -65,15 +71,16 @@ class DocumentService(QObject):
         
         Args:
             method (str): HTTP method (GET, POST, PATCH, DELETE)
-            endpoint (str): API endpoint (e.g., '/documents/')
+            endpoint (str): API endpoint (e.g., '/documents/') or absolute URL
             data (dict): JSON data for request body
             files (dict): Files for multipart upload
             params (dict): Query parameters
             
         Returns:
             dict: {'success': bool, 'data': any, 'error': str}
+                  plus 'next' (str or None) for paginated list endpoints
         """
-        url = f"{self.api_url}{endpoint}"
+        url = endpoint if endpoint.startswith('http') else f"{self.api_url}{endpoint}"
         headers = self.headers.copy()
         
         # Remove Content-Type for file uploads (requests will set it)
@@ -108,6 +115,15 @@ class DocumentService(QObject):
                         print(f"[DocumentService] JSON parse error: {json_error}")
                         print(f"[DocumentService] Response text: {response.text[:200]}")
                         raise
+                
+                # Paginated list: hand back the page and where the next one is
+                if isinstance(data, dict) and 'results' in data and 'next' in data:
+                    return {
+                        'success': True,
+                        'data': data['results'],
+                        'next': data['next'],
+                        'error': None
+                    }
                     
                 return {
                     'success': True,
@@ -151,6 +167,37 @@ class DocumentService(QObject):
                 'error': str(e)
             }
     
+    def get_next_page(self, next_url: str) -> Dict[str, Any]:
+        """
+        Fetch the page after one returned by a paginated list endpoint.
+        
+        Args:
+            next_url (str): The 'next' URL from the previous result
+            
+        Returns:
+            dict: {'success': bool, 'data': list, 'next': str or None, 'error': str}
+        """
+        return self._make_request('GET', next_url)
+    
+    def _get_all_pages(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
+        """
+        Follow 'next' links and return every page of a list endpoint at once.
+        
+        For callers that need the whole list (folder pickers, approval queues).
+        
+        Returns:
+            dict: {'success': bool, 'data': list, 'error': str}
+        """
+        result = self._make_request('GET', endpoint, params=params)
+        items = list(result['data'] or []) if result['success'] else []
+        while result['success'] and result.get('next'):
+            result = self.get_next_page(result['next'])
+            if result['success']:
+                items.extend(result['data'] or [])
+        if not result['success']:
+            return result
+        return {'success': True, 'data': items, 'error': None}
+    
     # ==================== Document Operations ====================
     
     def get_documents(self, filters: Dict = None) -> Dict[str, Any]:
@@ -164,9 +211,11 @@ class DocumentService(QObject):
                 - search (str): Search in title/description
                 - is_featured (bool): Get featured documents only
                 - ordering (str): Sort field (e.g., '-uploaded_at', 'title')
+                - page_size (int): Documents per page (default 50)
                 
         Returns:
-            dict: {'success': bool, 'data': list of documents, 'error': str}
+            dict: {'success': bool, 'data': first page of documents,
+                   'next': URL of the next page or None, 'error': str}
         """
         return self._make_request('GET', '/documents/', params=filters)
     
@@ -188,7 +237,7 @@ class DocumentService(QObject):
         Returns:
             dict: {'success': bool, 'data': list of documents, 'error': str}
         """
-        return self._make_request('GET', '/documents/my-uploads/')
+        return self._get_all_pages('/documents/my-uploads/')
     
     def get_starred_documents(self) -> Dict[str, Any]:
         """
@@ -206,7 +255,8 @@ class DocumentService(QObject):
         Users see only their own deleted docs unless admin.
         
         Returns:
-            dict: {'success': bool, 'data': list of deleted documents, 'error': str}
+            dict: {'success': bool, 'data': first page of deleted documents,
+                   'next': URL of the next page or None, 'error': str}
         """
         return self._make_request('GET', '/documents/trash/')
     
@@ -316,6 +366,35 @@ class DocumentService(QObject):
         """
         return self._make_request('GET', f'/documents/{doc_id}/download/')
     
+    def get_thumbnail(self, thumbnail_url: str) -> Dict[str, Any]:
+        """
+        Fetch a document preview (the 'thumbnail_url' of a document).
+        
+        Args:
+            thumbnail_url (str): Absolute thumbnail URL from the API
+            
+        Returns:
+            dict: {'success': bool, 'data': {'kind': 'image' or 'text', 'content': bytes or str}, 'error': str}
+        """
+        if thumbnail_url in self._thumbnail_cache:
+            return {'success': True, 'data': self._thumbnail_cache[thumbnail_url], 'error': None}
+        
+        headers = {'Authorization': self.headers['Authorization']}
+        try:
+            response = requests.get(thumbnail_url, headers=headers, timeout=30)
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'data': None, 'error': str(e)}
+        
+        if response.status_code != 200:
+            return {'success': False, 'data': None, 'error': f"No preview available ({response.status_code})"}
+        
+        if response.headers.get('Content-Type', '').startswith('image/'):
+            preview = {'kind': 'image', 'content': response.content}
+        else:
+            preview = {'kind': 'text', 'content': response.content.decode('utf-8', errors='replace')}
+        self._thumbnail_cache[thumbnail_url] = preview
+        return {'success': True, 'data': preview, 'error': None}
+    
     def rename_document(self, doc_id: int, new_title: str) -> Dict[str, Any]:
         """
         Rename a document.
@@ -366,7 +445,7 @@ class DocumentService(QObject):
             params['parent'] = ''
         if category_id:
             params['category'] = category_id
-        return self._make_request('GET', '/folders/', params=params)
+        return self._get_all_pages('/folders/', params=params)
     
     def create_folder(self, name: str, category_id: int, parent_id: int = None,
                      description: str = "") -> Dict[str, Any]:
@@ -471,7 +550,7 @@ class DocumentService(QObject):
         Returns:
             dict: {'success': bool, 'data': list of pending approvals, 'error': str}
         """
-        return self._make_request('GET', '/approvals/pending/')
+        return self._get_all_pages('/approvals/pending/')
     
     def approve_document(self, approval_id: int, notes: str = "") -> Dict[str, Any]:
         """
@@ -513,7 +592,8 @@ class DocumentService(QObject):
             filters (dict): Optional filters (search, category, ordering, etc.)
             
         Returns:
-            dict: {'success': bool, 'data': list of documents, 'error': str}
+            dict: {'success': bool, 'data': first page of documents,
+                   'next': URL of the next page or None, 'error': str}
         """
         params = filters if filters else {}
         params['admin_view'] = True  # Signal backend to return all documents
@@ -676,30 +756,50 @@ class DocumentService(QObject):
             'error': f"{len(results['failed'])} document(s) failed to delete" if results['failed'] else None
         }
     
-    def bulk_restore(self, doc_ids: List[int]) -> Dict[str, Any]:
+    def _bulk_request(self, endpoint: str, payload: Dict, done_key: str, verb: str) -> Dict[str, Any]:
+        """
+        Call a set-based bulk endpoint and reshape its per-document results.
+        
+        The server applies the change to every allowed document in one
+        transaction and reports the outcome of each requested ID.
+        
+        Returns:
+            dict: {'success': bool, 'data': {done_key: int, 'failed': list}, 'error': str}
+        """
+        result = self._make_request('POST', endpoint, data=payload)
+        if not result['success']:
+            return {
+                'success': False,
+                'data': {done_key: 0, 'failed': [{'id': doc_id, 'error': result['error']} for doc_id in payload['document_ids']]},
+                'error': result['error']
+            }
+        
+        data = result['data'] or {}
+        failed = [
+            {'id': item['id'], 'error': item.get('error') or item.get('status')}
+            for item in data.get('results', []) if item.get('status') != 'ok'
+        ]
+        return {
+            'success': len(failed) == 0,
+            'data': {done_key: data.get('succeeded', 0), 'failed': failed},
+            'error': f"{len(failed)} document(s) failed to {verb}" if failed else None
+        }
+    
+    def bulk_restore(self, doc_ids: List[int], folder_id: int = None) -> Dict[str, Any]:
         """
         Bulk restore documents from trash.
         
         Args:
             doc_ids (list): List of document IDs
+            folder_id (int): Folder to restore into (None keeps each document's folder)
             
         Returns:
             dict: {'success': bool, 'data': {'restored': int, 'failed': list}, 'error': str}
         """
-        results = {'restored': 0, 'failed': []}
-        
-        for doc_id in doc_ids:
-            result = self.restore_document(doc_id)
-            if result['success']:
-                results['restored'] += 1
-            else:
-                results['failed'].append({'id': doc_id, 'error': result['error']})
-        
-        return {
-            'success': len(results['failed']) == 0,
-            'data': results,
-            'error': f"{len(results['failed'])} document(s) failed to restore" if results['failed'] else None
-        }
+        payload = {'document_ids': doc_ids}
+        if folder_id is not None:
+            payload['restore_to_folder_id'] = folder_id
+        return self._bulk_request('/documents/bulk_restore/', payload, 'restored', 'restore')
     
     def bulk_move(self, doc_ids: List[int], folder_id: int = None) -> Dict[str, Any]:
         """
@@ -712,20 +812,22 @@ class DocumentService(QObject):
         Returns:
             dict: {'success': bool, 'data': {'moved': int, 'failed': list}, 'error': str}
         """
-        results = {'moved': 0, 'failed': []}
-        
-        for doc_id in doc_ids:
-            result = self.move_document(doc_id, folder_id)
-            if result['success']:
-                results['moved'] += 1
-            else:
-                results['failed'].append({'id': doc_id, 'error': result['error']})
+        payload = {'document_ids': doc_ids, 'folder_id': folder_id}
+        return self._bulk_request('/documents/bulk_move/', payload, 'moved', 'move')
+    
+    def bulk_change_category(self, doc_ids: List[int], category_id: int) -> Dict[str, Any]:
+        """
+        Bulk change the category of documents.
         
-        return {
-            'success': len(results['failed']) == 0,
-            'data': results,
-            'error': f"{len(results['failed'])} document(s) failed to move" if results['failed'] else None
-        }
+        Args:
+            doc_ids (list): List of document IDs
+            category_id (int): New category ID
+            
+        Returns:
+            dict: {'success': bool, 'data': {'updated': int, 'failed': list}, 'error': str}
+        """
+        payload = {'document_ids': doc_ids, 'category': category_id}
+        return self._bulk_request('/documents/bulk_categorize/', payload, 'updated', 'update')
     
     def bulk_permanent_delete(self, doc_ids: List[int]) -> Dict[str, Any]:
         """
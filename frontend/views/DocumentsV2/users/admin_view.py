@@ -11,7 +11,7 @@ Provides full CRUD operations plus:
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, 
-    QLabel, QMessageBox, QPushButton, QStackedWidget
+    QLabel, QMessageBox, QPushButton, QStackedWidget, QInputDialog
 )
 from PyQt6.QtCore import Qt
 
@@ -247,13 +247,19 @@ class AdminDocumentView(DocumentsV2View):
             QMessageBox.warning(self, "No Selection", "No documents selected")
             return
         
-        self._execute_bulk_operation(operation_type, selected_ids, params)
+        if operation_type == 'bulk_move':
+            self._bulk_move_documents(selected_ids)
+        elif operation_type == 'bulk_category':
+            self._bulk_change_category(selected_ids)
+        else:
+            self._execute_bulk_operation(operation_type, selected_ids, params)
     
     def _show_approvals_view(self):
         """Show pending approvals for admin review."""
         self.current_view = 'approvals'
         self.current_folder_id = None
         self.current_category_id = None
+        self.next_page_url = None  # The approval queue is loaded whole
         
         self.breadcrumb.reset()
         self.breadcrumb.set_path([{'id': None, 'name': 'Pending Approvals'}])
@@ -323,6 +329,7 @@ class AdminDocumentView(DocumentsV2View):
         self.current_view = 'all_documents'
         self.current_folder_id = None
         self.current_category_id = None
+        self.next_page_url = None
         
         self.breadcrumb.reset()
         self.breadcrumb.set_path([{'id': None, 'name': 'All Documents'}])
@@ -331,8 +338,11 @@ class AdminDocumentView(DocumentsV2View):
         cached_data, is_valid = self._get_from_cache('all_documents', 'all_documents')
         if is_valid:
             self.documents = cached_data
+            self.next_page_url = self._get_cached_next_page('all_documents', 'all_documents')
+            self._page_cache = ('all_documents', 'all_documents')
             self._display_documents_immediately()
             self.set_status(f"Loaded {len(self.documents)} document(s) from cache")
+            self._load_more_if_needed()
             return
         
         # Force refresh from API
@@ -354,9 +364,12 @@ class AdminDocumentView(DocumentsV2View):
         """Handle all documents load completion."""
         if result['success']:
             self.documents = result['data']
+            # Further pages are appended as the list is scrolled
+            self.next_page_url = result.get('next')
+            self._page_cache = ('all_documents', 'all_documents')
             
             # Save to cache
-            self._save_to_cache('all_documents', self.documents, 'all_documents')
+            self._save_to_cache('all_documents', self.documents, 'all_documents', self.next_page_url)
             
             if not self.documents:
                 self._show_empty_state('mydrive')
@@ -365,6 +378,7 @@ class AdminDocumentView(DocumentsV2View):
                 self.content_stack.setCurrentIndex(0)
             self._show_loading(False)
             self.set_status(f"Loaded {len(self.documents)} document(s)")
+            self._load_more_if_needed()
         else:
             self._on_load_error("all documents", result.get('error', 'Unknown error'))
     
@@ -571,7 +585,7 @@ class AdminDocumentView(DocumentsV2View):
         Execute bulk operation on multiple documents.
         
         Args:
-            operation_type (str): Operation type ('delete', 'restore', 'move', 'permanent_delete')
+            operation_type (str): Operation type ('delete', 'restore', 'move', 'category', 'permanent_delete')
             doc_ids (list): List of document IDs
             params (dict): Additional parameters for the operation
         """
@@ -617,6 +631,10 @@ class AdminDocumentView(DocumentsV2View):
             self.set_status(f"Moving {count} document(s)...")
             result = self.document_service.bulk_move(doc_ids, folder_id)
             
+        elif operation_type == 'category':
+            self.set_status(f"Changing category of {count} document(s)...")
+            result = self.document_service.bulk_change_category(doc_ids, params.get('category_id'))
+            
         elif operation_type == 'permanent_delete':
             reply = QMessageBox.warning(
                 self,
@@ -654,6 +672,11 @@ class AdminDocumentView(DocumentsV2View):
                     self, "Success",
                     f"Successfully moved {data['moved']} document(s)"
                 )
+            elif operation_type == 'category':
+                QMessageBox.information(
+                    self, "Success",
+                    f"Moved {data['updated']} document(s) to '{params.get('category_name')}'"
+                )
             elif operation_type == 'permanent_delete':
                 QMessageBox.information(
                     self, "Success",
@@ -706,3 +729,23 @@ class AdminDocumentView(DocumentsV2View):
                 'folder_id': folder_id,
                 'folder_name': folder_name or 'Root'
             })
+    
+    def _bulk_change_category(self, doc_ids: list):
+        """Ask for a category and assign it to multiple documents."""
+        if not self.categories:
+            QMessageBox.warning(self, "No Categories", "No categories available")
+            return
+        
+        names = [category.get('name', '') for category in self.categories]
+        name, ok = QInputDialog.getItem(
+            self, "Change Category", f"New category for {len(doc_ids)} document(s):",
+            names, 0, False
+        )
+        if not ok:
+            return
+        
+        category = self.categories[names.index(name)]
+        self._execute_bulk_operation('category', doc_ids, {
+            'category_id': category.get('id'),
+            'category_name': name
+        })
@@ -137,59 +137,88 @@ class FileListView(QTableWidget):
         self.setRowCount(len(documents))
         
         for row, doc in enumerate(documents):
-            # Column 0: Checkbox
-            checkbox_widget = self._create_checkbox(doc['id'])
-            self.setCellWidget(row, 0, checkbox_widget)
-            
-            # Column 1: Name with icon
-            file_type = doc.get('file_extension', '').lower()
-            is_folder = doc.get('folder') is True  # Check if it's actually a folder item
-            icon = self.FILE_TYPE_ICONS.get(
-                'folder' if is_folder else file_type,
-                '📄'  # Default icon
-            )
-            
-            name = doc.get('title') or doc.get('name', 'Untitled')
-            name_item = QTableWidgetItem(f"{icon} {name}")
-            name_item.setData(Qt.ItemDataRole.UserRole, doc['id'])
-            name_item.setData(Qt.ItemDataRole.UserRole + 1, doc)  # Store full document data
-            self.setItem(row, 1, name_item)
-            
-            # Column 2: Owner
-            owner = doc.get('uploaded_by_name') or doc.get('created_by', 'Unknown')
-            owner_item = QTableWidgetItem(owner)
-            self.setItem(row, 2, owner_item)
-            
-            # Column 3: Modified date
-            date_str = doc.get('uploaded_at') or doc.get('updated_at', '')
-            if date_str:
-                try:
-                    # Parse ISO format date
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    formatted_date = date_obj.strftime('%b %d, %Y')
-                except:
-                    formatted_date = date_str[:10]  # Fallback to first 10 chars
+            self._fill_row(row, doc)
+    
+    def append_documents(self, documents: list):
+        """
+        Append another page of documents below the current rows.
+        
+        Args:
+            documents (list): List of document dictionaries from API
+        """
+        # Rows are filled by index, so keep Qt from re-sorting mid-insert
+        sorting = self.isSortingEnabled()
+        self.setSortingEnabled(False)
+        
+        start = self.rowCount()
+        self.documents = self.documents + documents
+        self.setRowCount(start + len(documents))
+        for offset, doc in enumerate(documents):
+            self._fill_row(start + offset, doc)
+        
+        self.setSortingEnabled(sorting)
+    
+    def _fill_row(self, row: int, doc: dict):
+        """
+        Fill one table row from a document (or folder) dictionary.
+        
+        Args:
+            row (int): Row index
+            doc (dict): Document dictionary from API
+        """
+        # Column 0: Checkbox
+        checkbox_widget = self._create_checkbox(doc['id'])
+        self.setCellWidget(row, 0, checkbox_widget)
+        
+        # Column 1: Name with icon
+        file_type = doc.get('file_extension', '').lower()
+        is_folder = doc.get('folder') is True  # Check if it's actually a folder item
+        icon = self.FILE_TYPE_ICONS.get(
+            'folder' if is_folder else file_type,
+            '📄'  # Default icon
+        )
+        
+        name = doc.get('title') or doc.get('name', 'Untitled')
+        name_item = QTableWidgetItem(f"{icon} {name}")
+        name_item.setData(Qt.ItemDataRole.UserRole, doc['id'])
+        name_item.setData(Qt.ItemDataRole.UserRole + 1, doc)  # Store full document data
+        self.setItem(row, 1, name_item)
+        
+        # Column 2: Owner
+        owner = doc.get('uploaded_by_name') or doc.get('created_by', 'Unknown')
+        owner_item = QTableWidgetItem(owner)
+        self.setItem(row, 2, owner_item)
+        
+        # Column 3: Modified date
+        date_str = doc.get('uploaded_at') or doc.get('updated_at', '')
+        if date_str:
+            try:
+                # Parse ISO format date
+                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                formatted_date = date_obj.strftime('%b %d, %Y')
+            except:
+                formatted_date = date_str[:10]  # Fallback to first 10 chars
+        else:
+            formatted_date = '-'
+        
+        date_item = QTableWidgetItem(formatted_date)
+        self.setItem(row, 3, date_item)
+        
+        # Column 4: Size
+        if is_folder:
+            size_text = '-'
+        else:
+            size_mb = doc.get('file_size_mb', 0)
+            if size_mb >= 1:
+                size_text = f"{size_mb:.1f} MB"
+            elif size_mb > 0:
+                size_kb = size_mb * 1024
+                size_text = f"{size_kb:.0f} KB"
             else:
-                formatted_date = '-'
-            
-            date_item = QTableWidgetItem(formatted_date)
-            self.setItem(row, 3, date_item)
-            
-            # Column 4: Size
-            if is_folder:
                 size_text = '-'
-            else:
-                size_mb = doc.get('file_size_mb', 0)
-                if size_mb >= 1:
-                    size_text = f"{size_mb:.1f} MB"
-                elif size_mb > 0:
-                    size_kb = size_mb * 1024
-                    size_text = f"{size_kb:.0f} KB"
-                else:
-                    size_text = '-'
-            
-            size_item = QTableWidgetItem(size_text)
-            self.setItem(row, 4, size_item)
+        
+        size_item = QTableWidgetItem(size_text)
+        self.setItem(row, 4, size_item)
     
     def _create_checkbox(self, doc_id: int) -> QWidget:
         """